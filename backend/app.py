@@ -19,6 +19,7 @@ sys.path.append(current_dir)  # Pour importer botV0.py qui est dans le même dos
 
 # Import the bot class
 from botV0 import BotScalpingAvance
+from ordonnanceur import PRIORITE_FOND, DelaiOrdonnanceurDepasse
 
 # Configure logging
 log_dir = os.path.join(current_dir, 'logs')
@@ -151,9 +152,10 @@ def get_bot_data():
         }
     
     try:
-        # Get the latest data from the bot
+        # Get the latest data from the bot: one immutable snapshot, published atomically by the bot
+        snapshot = bot_instance.instantane
         positions_data = []
-        for symbol, position in bot_instance.positions.items():
+        for symbol, position in snapshot.positions.items():
             # Get current price for each position
             current_price = None
             try:
@@ -161,9 +163,17 @@ def get_bot_data():
                 if not bot_instance or not bot_running or not hasattr(bot_instance, 'exchange'):
                     continue
                     
-                # Try to get the latest price from the exchange
-                ticker = bot_instance.exchange.fetch_ticker(symbol)
-                current_price = ticker['last'] if 'last' in ticker else None
+                # Read the shared price snapshot (refreshed with one fetch_tickers for all pairs)
+                current_price = bot_instance.service_prix.prix(symbol)
+                
+                # Otherwise try to get the latest price from the exchange, with the lowest
+                # scheduler priority so that dashboard reads never delay stop-loss handling
+                if current_price is None:
+                    with bot_instance.ordonnanceur.priorite(PRIORITE_FOND, delai_max=2):
+                        ticker = bot_instance.exchange.fetch_ticker(symbol)
+                    current_price = ticker['last'] if 'last' in ticker else None
+            except DelaiOrdonnanceurDepasse:
+                logger.warning(f"Price for {symbol} skipped: request scheduler is saturated")
             except Exception as e:
                 logger.error(f"Error fetching current price for {symbol}: {e}")
                 
@@ -198,13 +208,14 @@ def get_bot_data():
                     }
                     market_trends.append(trend_data)
         
-        # Get performance data
-        history = bot_instance.historique_performance if hasattr(bot_instance, 'historique_performance') else {}
+        # Get performance data: one running-metrics object, updated by the bot on every close
+        metrics = bot_instance.metriques if hasattr(bot_instance, 'metriques') else None
+        history = metrics.resume(snapshot.balance) if metrics else {}
         
         # Get recent trades (last 10)
         recent_trades = []
-        if history and "trades" in history:
-            for trade in history["trades"][-10:]:
+        if metrics:
+            for trade in list(metrics.derniers_trades)[-10:]:
                 trade_data = {
                     "symbol": trade.get("symbole", ""),
                     "action": trade.get("action", ""),
@@ -221,7 +232,7 @@ def get_bot_data():
         # Compile all data
         data = {
             "status": "running" if bot_running else "stopped",
-            "balance": getattr(bot_instance, 'balance', 0),
+            "balance": snapshot.balance,
             "initial_balance": getattr(bot_instance, 'balance_initiale', 0),
             "positions": positions_data,
             "market_trends": market_trends,
@@ -308,12 +319,13 @@ def close_position():
         if not symbol:
             return jsonify({"status": "error", "message": "Symbol is required"})
         
-        # Vérifier si l'attribut positions existe
-        if not hasattr(bot_instance, 'positions'):
+        # Vérifier si l'instantané des positions existe
+        if not hasattr(bot_instance, 'instantane'):
             return jsonify({"status": "error", "message": "Bot positions not available"})
             
         # Check if the position exists
-        if symbol not in bot_instance.positions:
+        position = bot_instance.instantane.positions.get(symbol)
+        if position is None:
             return jsonify({"status": "error", "message": f"No active position for {symbol}"})
         
         # Vérifier si l'attribut executer_trade existe
@@ -321,7 +333,6 @@ def close_position():
             return jsonify({"status": "error", "message": "Bot trading function not available"})
         
         # Close the position
-        position = bot_instance.positions[symbol]
         result = bot_instance.executer_trade(
             symbol,
             "CLOSE_LONG" if position["direction"] == "LONG" else "CLOSE_SHORT",
@@ -339,6 +350,52 @@ def close_position():
         logger.error(f"Error closing position: {e}")
         return jsonify({"status": "error", "message": f"Error closing position: {e}"})
 
+@app.route('/api/trades', methods=['GET'])
+def get_trades():
+    """Filtered trade history from the bot's SQLite store, newest first.
+
+    Query parameters: type (fermeture, ouverture, profit_partiel, ajustement or all),
+    symbol, reason, since, until ('YYYY-MM-DD[ HH:MM:SS]'), limit, before (event id, next page).
+    """
+    store = getattr(bot_instance, 'stockage_trades', None)
+    if store is None:
+        return jsonify({"status": "error", "message": "Trade store not available"})
+    
+    try:
+        args = request.args
+        event_type = args.get('type', 'fermeture')
+        events = store.historique(
+            type=None if event_type == 'all' else event_type,
+            symbole=args.get('symbol'),
+            raison=args.get('reason'),
+            debut=args.get('since'),
+            fin=args.get('until'),
+            limite=min(args.get('limit', 100, type=int), 1000),
+            avant=args.get('before', type=int)
+        )
+        return jsonify({"status": "success", "trades": events})
+    except Exception as e:
+        logger.error(f"Error querying trade history: {e}")
+        return jsonify({"status": "error", "message": f"Error querying trade history: {e}"})
+
+@app.route('/api/trades/summary', methods=['GET'])
+def get_trades_summary():
+    """Closed-trade PnL per symbol and per day from the bot's SQLite store (optional since/until/symbol)"""
+    store = getattr(bot_instance, 'stockage_trades', None)
+    if store is None:
+        return jsonify({"status": "error", "message": "Trade store not available"})
+    
+    try:
+        since, until = request.args.get('since'), request.args.get('until')
+        return jsonify({
+            "status": "success",
+            "per_symbol": store.pnl_par_symbole(since, until),
+            "per_day": store.cumuls_quotidiens(since, until, request.args.get('symbol'))
+        })
+    except Exception as e:
+        logger.error(f"Error querying trade summary: {e}")
+        return jsonify({"status": "error", "message": f"Error querying trade summary: {e}"})
+
 # Socket.IO events
 @socketio.on('connect')
 def handle_connect():
@@ -413,11 +470,14 @@ def get_system_status():
         
         # Compter les positions en vérifiant d'abord si l'attribut existe
         positions_count = 0
-        if hasattr(bot_instance, 'positions'):
-            positions_count = len(bot_instance.positions)
+        if hasattr(bot_instance, 'instantane'):
+            positions_count = len(bot_instance.instantane.positions)
         
         status_data.update({
             "bot_status": "running",
+            "request_scheduler": bot_instance.ordonnanceur.statistiques(),
+            "ohlcv_cache": bot_instance.cache_donnees.statistiques(),
+            "indicator_cache": bot_instance.cache_indicateurs.statistiques(),
             "uptime": uptime,
             "cpu_usage": process.cpu_percent(),
             "memory_usage": process.memory_info().rss / 1024 / 1024,  # En MB
@@ -429,7 +489,7 @@ def get_system_status():
         # psutil n'est pas installé
         status_data.update({
             "bot_status": "running",
-            "positions_count": len(bot_instance.positions) if hasattr(bot_instance, 'positions') else 0
+            "positions_count": len(bot_instance.instantane.positions) if hasattr(bot_instance, 'instantane') else 0
         })
         return jsonify(status_data)
     except Exception as e:
@@ -0,0 +1,482 @@
+"""
+Backtest événementiel hors ligne
+--------------------------------
+Rejoue un historique de bougies 1m dans la vraie logique du bot :
+``calculer_indicateurs`` → ``ajuster_levier_et_niveaux`` / ``verifier_signaux``
+→ ``appliquer_decision`` / ``executer_trade``, avec ``verifier_stop_loss_take_profit``
+et ``gerer_positions_ouvertes`` pour la gestion des positions. Le bot est
+construit sur une horloge simulée et un exchange simulé qui ne sert que les
+bougies déjà clôturées à l'instant simulé : aucun accès réseau, aucune
+lecture du futur.
+
+Pour tenir un an de bougies 1m sur une vingtaine de paires en quelques
+minutes, un pré-filtre vectorisé calcule les indicateurs une seule fois par
+paire sur toute la série et retient les bougies où un trade est possible
+(score de ``verifier_signaux`` et alignement des tendances dans le même
+sens). Pendant le rejeu, ``analyser_symbole`` n'est appelé que sur ces
+bougies, et seulement si ``appliquer_decision`` peut agir (pas de position
+dans le même sens, place disponible). La décision elle-même est celle du
+direct, calculée sur la fenêtre de 100 bougies servie par l'exchange simulé.
+
+Approximations connues :
+- le pré-filtre utilise des EMA calculées sur toute la série : une bougie
+  dont le score ne franchit le seuil qu'avec les EMA de la fenêtre de 100
+  bougies peut être manquée. Les candidates que le bot rejette sont
+  comptées (``faux_positifs``) ; les signaux manqués sont estimés en faisant
+  analyser par le bot une bougie sur ``controle`` parmi les autres
+  (``faux_negatifs`` sur ``controles``, sans agir sur leur décision) ;
+- ``scores_volatilite`` reste vide (pas d'``analyser_paires``) : la
+  volatilité vient de la fenêtre analysée, comme pour une paire inconnue ;
+- l'alignement multi-timeframe est recalculé toutes les ``pas_analyse``
+  bougies à partir des EMA 8/21 de la bougie en formation ;
+- le chemin du prix dans chaque bougie 1m suit le modèle ``modele_intrabar``
+  (voir intrabar.py) ; ``None`` revient à ne vérifier que la clôture.
+
+Le mode ``complet`` (``--complet``) se passe du pré-filtre pour les
+décisions : le bot analyse chaque bougie de chaque paire et applique sa
+décision, comme en direct. Beaucoup plus lent, il sert de référence pour
+mesurer l'écart du mode rapide ; le pré-filtre y est toujours calculé et
+ses faux positifs et faux négatifs sont comptés sur toutes les bougies.
+
+Format des fichiers : CSV ``timestamp,open,high,low,close,volume`` avec un
+horodatage en millisecondes, un fichier par paire.
+"""
+
+import io
+import os
+import time
+import logging
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+from horloge import HorlogeSimulee
+from intrabar import bas_d_abord, parcourir_bougie
+from reechantillonnage import agreger
+from tampon_ohlcv import COLONNES_OHLCV, duree_timeframe
+
+logger = logging.getLogger(__name__)
+
+# Bougies 1m fournies à l'analyse en direct (recuperer_ohlcv(symbole, '1m', 100))
+FENETRE_ANALYSE = 100
+
+# Lignes restant après le dropna de calculer_indicateurs sur la fenêtre d'analyse
+LIGNES_ANALYSE = 81
+
+# Bougies de la fin de la fenêtre où le direct ne marque jamais de divergence
+BOUGIES_SANS_DIVERGENCE = 4
+
+# Timeframes de l'alignement des tendances (analyser_conditions_marche)
+TIMEFRAMES_ALIGNEMENT = ('1m', '5m', '15m', '1h')
+
+# Seuil d'alignement de appliquer_decision (le seuil des signaux est PARAMETRES_DEFAUT['seuil_signal'] du bot)
+SEUIL_ALIGNEMENT = 2
+
+# Une bougie non candidate sur CONTROLE_PREFILTRE est analysée par le bot pour compter les signaux manqués
+CONTROLE_PREFILTRE = 200
+
+
+def charger_historique(chemin):
+    """Lit un CSV de bougies 1m et retourne un DataFrame trié sans doublons"""
+    df = pd.read_csv(chemin)
+    df.columns = [colonne.strip().lower() for colonne in df.columns]
+    df = df[COLONNES_OHLCV].astype({'timestamp': np.int64})
+    return df.drop_duplicates('timestamp', keep='last').sort_values('timestamp').reset_index(drop=True)
+
+
+def generer_historique(bougies, debut_ms=1_700_000_040_000, graine=0, prix=100.0):
+    """Série 1m synthétique (marche aléatoire à volatilité changeante), pour les essais et mesures"""
+    generateur = np.random.default_rng(graine)
+    volatilite = 0.0015 * np.exp(np.cumsum(generateur.normal(0, 0.02, bougies)).clip(-1.5, 1.5))
+    rendements = generateur.normal(0, 1, bougies) * volatilite + 0.0002 * np.sin(np.arange(bougies) / 700)
+    close = prix * np.exp(np.cumsum(rendements))
+    ouverture = np.concatenate(([prix], close[:-1]))
+    amplitude = np.abs(generateur.normal(0, 1, bougies)) * volatilite * close
+    return pd.DataFrame({
+        'timestamp': debut_ms + 60_000 * np.arange(bougies, dtype=np.int64),
+        'open': ouverture,
+        'high': np.maximum(ouverture, close) + amplitude,
+        'low': np.minimum(ouverture, close) - amplitude,
+        'close': close,
+        'volume': generateur.lognormal(3, 0.5, bougies),
+    })
+
+
+# Poids des composantes du score de verifier_signaux (sur 10)
+POIDS_SIGNAUX = {
+    'tendance': 4, 'momentum': 2, 'breakout': 2, 'macd': 1, 'bollinger': 1, 'pattern': 1, 'volume': 0.5
+}
+
+
+def indicateurs_historique(bot, bougies):
+    """calculer_indicateurs sur tout l'historique, avec les divergences telles que le direct les voit.
+
+    En direct, seules les bougies -5 à -29 de la fenêtre portent une
+    divergence : à la bougie t, verifier_signaux voit celle de t-4. L'index
+    du résultat est la position de chaque ligne dans ``bougies``.
+    """
+    cadre = pd.DataFrame(bougies, columns=COLONNES_OHLCV)
+    cadre['timestamp'] = pd.to_datetime(cadre['timestamp'].astype(np.int64), unit='ms')
+    ind = bot.calculer_indicateurs(cadre, serie_complete=True)
+    for colonne in ('divergence_haussiere', 'divergence_baissiere'):
+        vue = np.zeros(len(ind), dtype=bool)
+        vue[BOUGIES_SANS_DIVERGENCE:] = ind[colonne].to_numpy()[:-BOUGIES_SANS_DIVERGENCE]
+        ind[colonne] = vue
+    return ind
+
+
+def composantes_signaux(ind):
+    """Composantes (long, short) de verifier_signaux pour chaque ligne d'un DataFrame d'indicateurs"""
+    colonne = lambda nom: ind[nom].to_numpy(dtype=np.float64)
+    booleen = lambda nom: ind[nom].to_numpy(dtype=bool)
+    close, ema_8, ema_21 = colonne('close'), colonne('ema_8'), colonne('ema_21')
+    rsi, bb_width = colonne('rsi'), colonne('bb_width')
+    precedent = lambda valeurs: np.concatenate(([np.nan], valeurs[:-1]))
+    moyenne_bb = ind['bb_width'].rolling(window=20).mean().to_numpy()
+
+    with np.errstate(invalid='ignore'):
+        volume_eleve = colonne('volume_ratio') > 1.2
+        bb_expansion = bb_width > moyenne_bb * 1.2
+        rsi_precedent = precedent(rsi)
+        ecart_macd = colonne('macd') - colonne('macd_signal')
+        ecart_macd_precedent = precedent(ecart_macd)
+        return {
+            'tendance': ((ema_8 > ema_21) & (close > ema_8), (ema_8 < ema_21) & (close < ema_8)),
+            'momentum': ((rsi > 50) & (rsi > rsi_precedent), (rsi < 50) & (rsi < rsi_precedent)),
+            'breakout': ((close > colonne('high_max')) & volume_eleve, (close < colonne('low_min')) & volume_eleve),
+            'macd': ((ecart_macd > 0) & (ecart_macd_precedent <= 0), (ecart_macd < 0) & (ecart_macd_precedent >= 0)),
+            'bollinger': ((close > colonne('bb_upper')) & bb_expansion, (close < colonne('bb_lower')) & bb_expansion),
+            'pattern': (booleen('marteau') | booleen('absorption_haussiere') | booleen('divergence_haussiere'),
+                        booleen('etoile_filante') | booleen('absorption_baissiere') | booleen('divergence_baissiere')),
+            'volume': (volume_eleve, volume_eleve),
+        }
+
+
+def scores_signaux(composantes, poids=POIDS_SIGNAUX):
+    """Scores long/short pondérés à partir des composantes de composantes_signaux"""
+    score_long = sum(poids[nom] * longue for nom, (longue, _) in composantes.items())
+    score_short = sum(poids[nom] * courte for nom, (_, courte) in composantes.items())
+    return score_long, score_short
+
+
+def alignements_tendance(bougies):
+    """Alignement des tendances (-4 à 4) vu à la clôture de chaque bougie 1m.
+
+    Pour chaque timeframe, l'EMA 8/21 de la bougie en formation prolonge l'EMA
+    des bougies clôturées avec la dernière clôture 1m, comme le moteur
+    incrémental utilisé par analyser_conditions_marche.
+    """
+    horodatages, close = bougies[:, 0], bougies[:, 4]
+    alignement = np.zeros(len(bougies), dtype=np.int64)
+    for timeframe in TIMEFRAMES_ALIGNEMENT:
+        duree = duree_timeframe(timeframe)
+        periodes = horodatages // duree
+        ruptures = np.flatnonzero(np.diff(periodes)) + 1
+        dernieres = np.concatenate((ruptures, [len(bougies)])) - 1
+        rang = np.cumsum(np.concatenate(([0], np.diff(periodes) != 0)))
+        clotures = pd.Series(close[dernieres])
+        formation = {}
+        for periode in (8, 21):
+            alpha = 2 / (periode + 1)
+            ema = clotures.ewm(span=periode, adjust=False).mean().to_numpy()
+            precedente = np.where(rang > 0, ema[np.maximum(rang - 1, 0)], close)
+            formation[periode] = precedente * (1 - alpha) + alpha * close
+        alignement += np.where(formation[8] > formation[21], 1, -1)
+    return alignement
+
+
+class ExchangeSimule:
+    """Exchange hors ligne : sert les bougies clôturées à l'instant de l'horloge simulée.
+
+    Les timeframes supérieurs sont agrégés à partir des bougies 1m ; leur
+    dernière bougie est en formation, comme sur l'exchange réel.
+    """
+
+    def __init__(self, historiques, horloge):
+        self.horloge = horloge
+        # Les tableaux (bougies x 6 colonnes OHLCV) sont utilisés tels quels, sans copie
+        self.bougies = {symbole: donnees if isinstance(donnees, np.ndarray)
+                        else donnees[COLONNES_OHLCV].to_numpy(dtype=np.float64)
+                        for symbole, donnees in historiques.items()}
+        self.statistiques = {'requetes': 0, 'bougies_servies': 0}
+
+    def milliseconds(self):
+        return int(round(self.horloge.time() * 1000))
+
+    def _fin(self, symbole):
+        """Nombre de bougies 1m clôturées à l'instant simulé"""
+        bougies = self.bougies[symbole]
+        return int(np.searchsorted(bougies[:, 0], self.milliseconds() - 60_000, side='right'))
+
+    def load_markets(self, reload=False):
+        return {symbole: {'symbol': symbole, 'active': True} for symbole in self.bougies}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        bougies = self.bougies[symbol]
+        fin = self._fin(symbol)
+        if fin == 0:
+            return []
+        duree = duree_timeframe(timeframe)
+        limite = limit or 500
+        if since is not None:
+            debut = (since // duree) * duree
+        else:
+            debut = (bougies[fin - 1, 0] // duree - (limite - 1)) * duree
+        tranche = bougies[np.searchsorted(bougies[:, 0], debut, side='left'):fin]
+        if duree != 60_000:
+            tranche = agreger(tranche, duree)
+        tranche = tranche[:limite] if since is not None else tranche[-limite:]
+        self.statistiques['requetes'] += 1
+        self.statistiques['bougies_servies'] += len(tranche)
+        return tranche.tolist()
+
+    def fetch_ticker(self, symbol, params=None):
+        fin = self._fin(symbol)
+        if fin == 0:
+            raise KeyError(f"Aucune donnée pour {symbol} à cet instant")
+        bougie = self.bougies[symbol][fin - 1]
+        return {'symbol': symbol, 'timestamp': int(bougie[0]) + 60_000, 'last': bougie[4], 'close': bougie[4]}
+
+    def fetch_tickers(self, symbols=None, params=None):
+        tickers = {}
+        for symbole in symbols or self.bougies:
+            if self._fin(symbole):
+                tickers[symbole] = self.fetch_ticker(symbole)
+        return tickers
+
+
+class MoteurBacktest:
+    """Pilote un BotScalpingAvance sur des historiques 1m.
+
+    ``pas_analyse`` : bougies entre deux analyses des conditions de marché
+    (5 = toutes les 5 minutes comme en direct) ; ``pas_gestion`` : bougies
+    entre deux appels à gerer_positions_ouvertes ; ``modele_intrabar`` :
+    chemin du prix dans la bougie pour les stops et objectifs ('ohlc',
+    'pessimiste', 'optimiste', ou None pour la seule clôture) ; ``complet`` :
+    analyse par le bot de chaque bougie au lieu des seules candidates du
+    pré-filtre ; ``controle`` : une bougie non candidate sur ``controle``
+    est analysée pour compter les signaux manqués (0 : aucun contrôle).
+    """
+
+    def __init__(self, historiques, repertoire, pas_analyse=5, pas_gestion=1, fermer_a_la_fin=True,
+                 parametres=None, modele_intrabar='ohlc', complet=False, controle=CONTROLE_PREFILTRE):
+        from botV0 import BotScalpingAvance
+
+        os.makedirs(repertoire, exist_ok=True)
+        self.pas_analyse = pas_analyse
+        self.pas_gestion = pas_gestion
+        self.fermer_a_la_fin = fermer_a_la_fin
+        self.modele_intrabar = modele_intrabar
+        self.complet = complet
+        self.controle = controle
+        self.horloge = HorlogeSimulee()
+        self.exchange = ExchangeSimule(historiques, self.horloge)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.bot = BotScalpingAvance(exchange=self.exchange, horloge=self.horloge, paires=list(historiques),
+                                         demarrer_taches=False, repertoire=repertoire, parametres=parametres)
+        # Un seul enregistrement des performances, en fin de backtest
+        self.bot.intervalle_sauvegarde = float('inf')
+        self.statistiques = {'bougies': 0, 'candidates': 0, 'decisions': 0, 'faux_positifs': 0,
+                             'controles': 0, 'faux_negatifs': 0}
+
+    def _preparer(self, symbole, chronologie):
+        """Pré-filtre vectorisé d'une paire : pas à analyser par le bot et alignements tenus à chaque pas.
+
+        Chaque pas retenu porte le verdict du pré-filtre (achat, vente) et
+        indique s'il ne sert qu'au contrôle des signaux manqués.
+        """
+        bougies = self.exchange.bougies[symbole]
+        horodatages = bougies[:, 0]
+
+        # Dernière bougie clôturée de la paire à chaque pas, alignement de la dernière analyse
+        locale = np.searchsorted(horodatages, chronologie, side='right') - 1
+        presente = (locale >= 0) & (horodatages[np.maximum(locale, 0)] == chronologie)
+        analyses = (np.arange(len(chronologie)) // self.pas_analyse) * self.pas_analyse
+        tenu = np.where(locale[analyses] >= 0, alignements_tendance(bougies)[np.maximum(locale[analyses], 0)], 0)
+
+        ind = indicateurs_historique(self.bot, bougies)
+        lignes = ind.index.to_numpy()  # Position de chaque ligne d'indicateurs dans l'historique
+        score_long, score_short = scores_signaux(composantes_signaux(ind))
+        del ind
+
+        # Pas où la paire a sa propre bougie, avec au moins une fenêtre d'analyse d'historique
+        pas = np.flatnonzero(presente & (locale >= FENETRE_ANALYSE - 1))
+        ligne = np.minimum(np.searchsorted(lignes, locale[pas]), len(lignes) - 1)
+        pas, ligne = pas[lignes[ligne] == locale[pas]], ligne[lignes[ligne] == locale[pas]]
+        seuil = self.bot.parametres['seuil_signal']
+        achat = (score_long[ligne] >= seuil) & (tenu[pas] >= SEUIL_ALIGNEMENT)
+        vente = (score_short[ligne] >= seuil) & (tenu[pas] <= -SEUIL_ALIGNEMENT)
+        garde = achat | vente
+
+        # Ordre des extrêmes dans chaque bougie, pour chaque sens de position
+        bas_en_premier = {}
+        if self.modele_intrabar:
+            for sens in ('long', 'short'):
+                bas_en_premier[sens] = bas_d_abord(bougies[:, 1], bougies[:, 4], self.modele_intrabar, sens)
+
+        self.statistiques['bougies'] += len(bougies)
+        self.statistiques['candidates'] += int(garde.sum())
+        if self.complet:
+            retenus = np.ones(len(pas), dtype=bool)
+        else:
+            # Candidates, plus une bougie sur ``controle`` parmi les autres
+            retenus = garde.copy()
+            if self.controle:
+                retenus[np.flatnonzero(~garde)[::self.controle]] = True
+        return {'locale': locale, 'presente': presente, 'alignement': tenu, 'bas_en_premier': bas_en_premier,
+                'candidates': (pas[retenus], achat[retenus], vente[retenus], ~garde[retenus])}
+
+    @staticmethod
+    def _signaux_decision(decision):
+        """Signaux (achat, vente) sur lesquels appliquer_decision peut agir : score et alignement"""
+        return (decision['signal_achat'] and decision['alignement'] >= SEUIL_ALIGNEMENT,
+                decision['signal_vente'] and decision['alignement'] <= -SEUIL_ALIGNEMENT)
+
+    def _decision_utile(self, symbole, achat, vente):
+        """Vrai si appliquer_decision peut agir sur ce signal dans l'état actuel du portefeuille"""
+        position = self.bot.positions.get(symbole)
+        if position is not None:
+            return vente if position['direction'] == 'long' else achat
+        return len(self.bot.positions) < self.bot.parametres['positions_max'] and self.bot.balance > 10
+
+    def executer(self):
+        """Rejoue tout l'historique et retourne le résumé des performances"""
+        bot = self.bot
+        debut = time.perf_counter()
+        chronologie = np.unique(np.concatenate([b[:, 0] for b in self.exchange.bougies.values()])).astype(np.int64)
+
+        # Candidates de toutes les paires, dans l'ordre de la chronologie
+        symboles = list(self.exchange.bougies)
+        index_symboles = {symbole: i for i, symbole in enumerate(symboles)}
+        preparations = [self._preparer(symbole, chronologie) for symbole in symboles]
+        pas_candidats = np.concatenate([p['candidates'][0] for p in preparations])
+        rangs = np.concatenate([np.full(len(p['candidates'][0]), i) for i, p in enumerate(preparations)])
+        achats = np.concatenate([p['candidates'][1] for p in preparations])
+        ventes = np.concatenate([p['candidates'][2] for p in preparations])
+        hors_filtre = np.concatenate([p['candidates'][3] for p in preparations])
+        ordre = np.argsort(pas_candidats, kind='stable')
+        candidates = list(zip(pas_candidats[ordre].tolist(), rangs[ordre].tolist(),
+                              achats[ordre].tolist(), ventes[ordre].tolist(), hors_filtre[ordre].tolist()))
+        candidates.append((len(chronologie), -1, False, False, False))
+        duree_preparation = time.perf_counter() - debut
+
+        niveau = logging.getLogger('botV0').level
+        logging.getLogger('botV0').setLevel(logging.WARNING)
+        suivante = 0
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for p, horodatage in enumerate(chronologie.tolist()):
+                    self.horloge.regler(horodatage / 1000 + 60)
+
+                    # Stops et objectifs le long du chemin du prix dans la bougie (ou sur sa clôture)
+                    clotures = {}
+                    for symbole in list(bot.positions):
+                        preparation = preparations[index_symboles[symbole]]
+                        if preparation['presente'][p]:
+                            locale = preparation['locale'][p]
+                            bougie = self.exchange.bougies[symbole][locale]
+                            clotures[symbole] = bougie[4]
+                            if self.modele_intrabar:
+                                sens = bot.positions[symbole]['direction']
+                                parcourir_bougie(bot, symbole, bougie,
+                                                 bas_en_premier=preparation['bas_en_premier'][sens][locale])
+                            else:
+                                bot.verifier_stop_loss_take_profit(symbole, bougie[4])
+                    # Clôtures publiées dans l'instantané des prix, comme le fait ServicePrix en direct
+                    bot.service_prix.publier(clotures)
+
+                    # Conditions de marché (alignement des tendances) toutes les pas_analyse bougies
+                    if p % self.pas_analyse == 0:
+                        for symbole, preparation in zip(symboles, preparations):
+                            bot.tendances_marche.setdefault(symbole, {})['alignement_tendance'] = \
+                                int(preparation['alignement'][p])
+
+                    # Analyse complète du bot, seulement là où un trade peut en résulter (partout en mode complet)
+                    while candidates[suivante][0] == p:
+                        _, rang, achat, vente, hors_filtre = candidates[suivante]
+                        suivante += 1
+                        symbole = symboles[rang]
+                        if self.complet:
+                            pass
+                        elif hors_filtre:
+                            # Contrôle seul : sans position, analyser_symbole ne modifie pas le portefeuille
+                            if symbole in bot.positions:
+                                continue
+                        elif not self._decision_utile(symbole, achat, vente):
+                            continue
+                        decision = bot.analyser_symbole(symbole)
+                        if decision is None:
+                            continue
+                        signaux = self._signaux_decision(decision)
+                        if hors_filtre:
+                            self.statistiques['controles'] += 1
+                            self.statistiques['faux_negatifs'] += int(any(signaux))
+                        elif signaux != (achat, vente):
+                            self.statistiques['faux_positifs'] += 1
+                        if self.complet or not hors_filtre:
+                            self.statistiques['decisions'] += 1
+                            bot.appliquer_decision(symbole, decision)
+
+                    if bot.positions and p % self.pas_gestion == 0:
+                        bot.gerer_positions_ouvertes()
+
+                if self.fermer_a_la_fin:
+                    for symbole in list(bot.positions):
+                        prix = self.exchange.bougies[symbole][-1, 4]
+                        bot.executer_trade(symbole, 'fermer', prix, bot.positions[symbole]['levier'])
+                bot._sauvegarder_historique_performance()
+        finally:
+            logging.getLogger('botV0').setLevel(niveau)
+
+        duree = time.perf_counter() - debut
+        performance = bot.metriques.resume(bot.balance)
+        return {
+            'solde_final': bot.balance,
+            'profit_total': performance['profit_total'],
+            'frais_total': performance['frais_total'],
+            'taux_reussite': performance['taux_reussite'],
+            'nombre_trades': performance.get('nombre_trades', {'total': 0, 'gagnants': 0, 'perdants': 0}),
+            'positions_ouvertes': len(bot.positions),
+            'statistiques': dict(self.statistiques, requetes_exchange=self.exchange.statistiques['requetes']),
+            'duree_preparation_s': duree_preparation,
+            'duree_s': duree,
+            'bougies_par_seconde': self.statistiques['bougies'] / duree if duree else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    import tempfile
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description="Backtest hors ligne du bot de scalping")
+    parser.add_argument("fichiers", nargs="*", help="CSV 1m (timestamp ms,open,high,low,close,volume), un par paire")
+    parser.add_argument("--paires", type=int, default=4, help="Paires synthétiques si aucun fichier n'est fourni")
+    parser.add_argument("--bougies", type=int, default=20_000, help="Bougies 1m par paire synthétique")
+    parser.add_argument("--repertoire", default=None, help="Répertoire des fichiers de suivi du backtest")
+    parser.add_argument("--pas-analyse", type=int, default=5)
+    parser.add_argument("--pas-gestion", type=int, default=1)
+    parser.add_argument("--intrabar", default='ohlc', help="Modèle de chemin intrabar (ohlc, pessimiste, optimiste, cloture)")
+    parser.add_argument("--complet", action="store_true", help="Analyse par le bot de chaque bougie, sans pré-filtre (référence)")
+    parser.add_argument("--controle", type=int, default=CONTROLE_PREFILTRE,
+                        help="Une bougie non candidate sur N analysée pour compter les signaux manqués (0 : aucune)")
+    args = parser.parse_args()
+
+    if args.fichiers:
+        historiques = {os.path.splitext(os.path.basename(chemin))[0].replace('_', '/', 1) + ':USDT':
+                       charger_historique(chemin) for chemin in args.fichiers}
+    else:
+        historiques = {f"SYN{i}/USDT:USDT": generer_historique(args.bougies, graine=i, prix=10.0 * (i + 1))
+                       for i in range(args.paires)}
+
+    repertoire = args.repertoire or tempfile.mkdtemp(prefix="backtest_")
+    moteur = MoteurBacktest(historiques, repertoire, pas_analyse=args.pas_analyse, pas_gestion=args.pas_gestion,
+                            modele_intrabar=None if args.intrabar == 'cloture' else args.intrabar,
+                            complet=args.complet, controle=args.controle)
+    resultats = moteur.executer()
+    print(json.dumps(resultats, indent=2, ensure_ascii=False))
+    print(f"Fichiers de suivi dans {repertoire}")
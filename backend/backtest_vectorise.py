@@ -0,0 +1,317 @@
+"""
+Backtest vectorisé des signaux
+------------------------------
+Moteur de recherche rapide, complément du rejeu fidèle de ``backtest.py`` :
+les indicateurs, les composantes du score de ``verifier_signaux``,
+l'alignement des tendances et les niveaux de ``ajuster_levier_et_niveaux``
+sont calculés une fois par paire, en colonnes sur tout l'historique. Chaque
+variante de paramètres n'ajoute ensuite que quelques opérations sur ces
+colonnes (seuil, filtre d'alignement, facteurs SL/TP) : la sortie de
+toutes les entrées candidates est cherchée en même temps, par sauts dans une
+table des extrêmes partagée par les variantes, puis une boucle au niveau des
+trades (et non des bougies) enchaîne les positions.
+
+Simplifications par rapport au bot (le rejeu fidèle reste la référence) :
+- une position à la fois par paire, sans limite de portefeuille ni solde ;
+- entrée à la clôture du signal, sortie au premier contact du SL ou du TP
+  sur les plus hauts/plus bas (si les deux sont touchés dans la même
+  bougie, l'ordre suit le modèle ``intrabar`` de la variante, pessimiste
+  par défaut : le SL d'abord), sinon à la clôture après ``duree_max``
+  bougies ;
+- pas de trailing stop, break-even, profit partiel ni inversion ;
+- le rendement est exprimé sur la marge : variation du prix x levier,
+  moins les frais taker à l'entrée et à la sortie.
+"""
+
+import itertools
+import logging
+
+import numpy as np
+
+from intrabar import bas_d_abord
+from backtest import (LIGNES_ANALYSE, FENETRE_ANALYSE, POIDS_SIGNAUX, SEUIL_ALIGNEMENT,
+                      alignements_tendance, composantes_signaux, indicateurs_historique, scores_signaux)
+
+logger = logging.getLogger(__name__)
+
+# Variante de référence : les réglages du bot ('seuil' : PARAMETRES_DEFAUT['seuil_signal'], voir variante_complete)
+VARIANTE_DEFAUT = {
+    'alignement_min': SEUIL_ALIGNEMENT,
+    'facteur_sl': 1.0,
+    'facteur_tp': 1.0,
+    'duree_max': 240,   # Bougies avant sortie forcée (le bot coupe les pertes après 4 h)
+    'poids': POIDS_SIGNAUX,
+    'intrabar': 'pessimiste',  # Ordre du SL et du TP touchés dans une même bougie (voir intrabar.py)
+}
+
+# Causes de sortie enregistrées pour chaque trade
+SORTIE_SL, SORTIE_TP, SORTIE_DUREE = 0, 1, 2
+
+
+def niveaux_risque(ind, levier_max=30):
+    """Levier et SL/TP (fractions) de ajuster_levier_et_niveaux pour chaque ligne d'indicateurs.
+
+    La volatilité est l'écart-type des rendements de la fenêtre d'analyse du
+    direct (``scores_volatilite`` vide, comme dans le rejeu).
+    """
+    close = ind['close']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatilite = (close.pct_change().rolling(window=LIGNES_ANALYSE - 1).std() * 100).to_numpy()
+        atr_pct = (ind['atr'] / close * 100).to_numpy()
+        bb_width = ind['bb_width'].to_numpy()
+        est_range = bb_width < ind['bb_width'].rolling(window=20).mean().to_numpy()
+        ema_8, ema_21 = ind['ema_8'].to_numpy(), ind['ema_21'].to_numpy()
+        est_tendance = (ema_8 > ema_21) | (ema_8 < ema_21)
+
+        levier_base = np.maximum(10, np.minimum(levier_max, np.trunc(25 - volatilite * 1.5)))
+        levier = np.where(est_tendance & (ind['volume_ratio'].to_numpy() > 1.2),
+                          np.minimum(levier_max, np.trunc(levier_base * 1.3)),
+                          np.where(est_range | (volatilite > 5), np.maximum(5, np.trunc(levier_base * 0.8)),
+                                   levier_base))
+
+        facteur_atr = np.minimum(atr_pct, 3.0)
+        sl_pct = np.where(est_tendance, facteur_atr * 1.0, np.where(est_range, facteur_atr * 1.5, facteur_atr * 1.2))
+        tp_pct = np.where(est_tendance, facteur_atr * 3.0, np.where(est_range, facteur_atr * 2.0, facteur_atr * 2.5))
+    return levier, np.clip(sl_pct, 0.5, 4.0) / 100, np.clip(tp_pct, 1.0, 12.0) / 100
+
+
+class PreparationPaire:
+    """Colonnes d'une paire partagées par toutes les variantes"""
+
+    __slots__ = ('symbole', 'ouverture', 'haut', 'bas', 'close', 'composantes', 'alignement', 'levier', 'sl_pct', 'tp_pct',
+                 'valide', '_scores')
+
+    def __init__(self, bot, symbole, bougies, pas_analyse=5):
+        ind = indicateurs_historique(bot, bougies)
+        lignes = ind.index.to_numpy()
+        self.symbole = symbole
+        self.ouverture = bougies[lignes, 1]
+        self.haut = bougies[lignes, 2]
+        self.bas = bougies[lignes, 3]
+        self.close = bougies[lignes, 4]
+        self.composantes = composantes_signaux(ind)
+        # Alignement de la dernière analyse des conditions de marché (toutes les pas_analyse bougies)
+        self.alignement = alignements_tendance(bougies)[(lignes // pas_analyse) * pas_analyse]
+        self.levier, self.sl_pct, self.tp_pct = niveaux_risque(ind, bot.parametres['levier_max'])
+        self.valide = (lignes >= FENETRE_ANALYSE - 1) & np.isfinite(self.levier) & np.isfinite(self.sl_pct)
+        self._scores = {}
+
+    def __len__(self):
+        return len(self.close)
+
+    def scores(self, poids):
+        """Scores (long, short) pour un jeu de poids, conservés pour les variantes suivantes"""
+        cle = tuple(sorted(poids.items()))
+        if cle not in self._scores:
+            self._scores[cle] = scores_signaux(self.composantes, poids)
+        return self._scores[cle]
+
+
+def table_extremes(haut, bas, duree_max):
+    """Minima des plus bas et maxima des plus hauts sur des blocs de 1, 2, 4... bougies (table creuse).
+
+    ``minima[k][i]`` est le plus bas des bougies i à i + 2**k - 1 ; les
+    niveaux couvrent des sauts jusqu'à ``duree_max`` bougies.
+    """
+    minima, maxima = [bas], [haut]
+    while (1 << len(minima)) <= duree_max:
+        pas = 1 << (len(minima) - 1)
+        minima.append(np.minimum(minima[-1][:-pas], minima[-1][pas:]))
+        maxima.append(np.maximum(maxima[-1][:-pas], maxima[-1][pas:]))
+    return minima, maxima
+
+
+def premier_contact(table, depart, limite, niveau, par_le_bas):
+    """Première bougie après ``depart`` (au plus ``limite``) qui touche ``niveau`` ; ``limite + 1`` sinon.
+
+    ``par_le_bas`` : le niveau est touché par un plus bas inférieur ou égal
+    (sinon par un plus haut supérieur ou égal). Recherche par sauts de
+    puissances de deux décroissantes, pour toutes les entrées à la fois.
+    """
+    minima, maxima = table
+    position = depart.copy()  # Dernière bougie sans contact
+    for k in range(len(minima) - 1, -1, -1):
+        saut = 1 << k
+        i = np.minimum(position + 1, len(minima[k]) - 1)
+        libre = np.where(par_le_bas, minima[k][i] > niveau, maxima[k][i] < niveau)
+        position = np.where((position + saut <= limite) & libre, position + saut, position)
+    return position + 1
+
+
+def sorties(entrees, sens, stop, objectif, table, close, duree_max, bas_en_premier=None):
+    """Sortie de chaque entrée candidate : (indice, prix, cause).
+
+    ``bas_en_premier`` : couple de masques (positions longues, courtes) des
+    bougies dont le plus bas précède le plus haut, pour départager un SL et
+    un TP touchés dans la même bougie ; sans masques, le SL l'emporte. Sans
+    contact, la sortie a lieu à la clôture ``duree_max`` bougies plus tard
+    (ou à la dernière bougie).
+    """
+    limite = np.minimum(entrees + duree_max, len(close) - 1)
+    haussier = sens > 0
+    contact_sl = premier_contact(table, entrees, limite, stop, haussier)
+    contact_tp = premier_contact(table, entrees, limite, objectif, ~haussier)
+    meme_bougie = contact_sl == contact_tp
+    if bas_en_premier is None:
+        sl_d_abord = meme_bougie
+    else:
+        # Le SL d'une position longue est sous l'entrée, celui d'une courte au-dessus
+        bougie = np.minimum(contact_sl, len(close) - 1)
+        sl_d_abord = meme_bougie & np.where(haussier, bas_en_premier[0][bougie], ~bas_en_premier[1][bougie])
+    par_sl = (contact_sl <= limite) & ((contact_sl < contact_tp) | sl_d_abord)
+    par_tp = ~par_sl & (contact_tp <= limite)
+    indice = np.where(par_sl, contact_sl, np.where(par_tp, contact_tp, limite))
+    prix = np.where(par_sl, stop, np.where(par_tp, objectif, close[limite]))
+    cause = np.where(par_sl, SORTIE_SL, np.where(par_tp, SORTIE_TP, SORTIE_DUREE))
+    return indice, prix, cause
+
+
+def variante_complete(variante=None):
+    """VARIANTE_DEFAUT et seuil de signal du bot, remplacés par les valeurs de ``variante``"""
+    from botV0 import PARAMETRES_DEFAUT
+
+    complete = dict(VARIANTE_DEFAUT, seuil=PARAMETRES_DEFAUT['seuil_signal'])
+    complete.update(variante or {})
+    return complete
+
+
+def simuler(preparation, variante=None, frais=None, table=None):
+    """Trades d'une variante sur une paire : tableaux (entree, sortie, direction, rendement, cause).
+
+    ``table`` (table_extremes de la paire) peut être partagée entre variantes.
+    """
+    from botV0 import TAKER_FEE
+
+    variante = variante_complete(variante)
+    frais = TAKER_FEE if frais is None else frais
+    score_long, score_short = preparation.scores(variante['poids'])
+    seuil, alignement_min = variante['seuil'], variante['alignement_min']
+    achat = preparation.valide & (score_long >= seuil) & (preparation.alignement >= alignement_min)
+    # appliquer_decision essaie l'achat avant la vente
+    vente = preparation.valide & ~achat & (score_short >= seuil) & (preparation.alignement <= -alignement_min)
+    achat[-1] = vente[-1] = False  # Aucune bougie pour sortir après la dernière
+    entrees = np.flatnonzero(achat | vente)
+
+    # Niveaux et sortie de toutes les entrées candidates, comme si chacune était prise
+    sens = np.where(achat[entrees], 1, -1)
+    prix_entree = preparation.close[entrees]
+    stop = prix_entree * (1 - sens * preparation.sl_pct[entrees] * variante['facteur_sl'])
+    objectif = prix_entree * (1 + sens * preparation.tp_pct[entrees] * variante['facteur_tp'])
+    if table is None:
+        table = table_extremes(preparation.haut, preparation.bas, variante['duree_max'])
+    bas_en_premier = None
+    if variante['intrabar'] != 'pessimiste':
+        bas_en_premier = tuple(bas_d_abord(preparation.ouverture, preparation.close, variante['intrabar'], cote)
+                               for cote in ('long', 'short'))
+    sortie, prix_sortie, cause = sorties(entrees, sens, stop, objectif, table, preparation.close,
+                                         variante['duree_max'], bas_en_premier)
+
+    # Une position à la fois : après une sortie, la prochaine entrée possible est à la clôture de la bougie de sortie
+    suivante = np.searchsorted(entrees, sortie).tolist()
+    prises = []
+    i = 0
+    while i < len(entrees):
+        prises.append(i)
+        i = suivante[i]
+    prises = np.asarray(prises, dtype=np.int64)
+
+    ratio = prix_sortie[prises] / prix_entree[prises]
+    rendement = (sens[prises] * (ratio - 1) - frais * (1 + ratio)) * preparation.levier[entrees[prises]]
+    return {
+        'entree': entrees[prises],
+        'sortie': sortie[prises],
+        'direction': sens[prises],
+        'rendement': rendement,
+        'cause': cause[prises],
+    }
+
+
+def metriques(rendements):
+    """Résumé d'une suite de rendements de trades (fractions de la marge)"""
+    rendements = np.asarray(rendements, dtype=np.float64)
+    if len(rendements) == 0:
+        return {'trades': 0, 'taux_reussite': 0.0, 'rendement_total': 0.0, 'rendement_moyen': 0.0,
+                'facteur_profit': 0.0, 'drawdown_max': 0.0, 'sharpe_trades': 0.0}
+    gains, pertes = rendements[rendements > 0].sum(), -rendements[rendements <= 0].sum()
+    cumul = np.cumsum(rendements)
+    ecart_type = rendements.std(ddof=1) if len(rendements) > 1 else 0.0
+    return {
+        'trades': int(len(rendements)),
+        'taux_reussite': float((rendements > 0).mean() * 100),
+        'rendement_total': float(cumul[-1]),
+        'rendement_moyen': float(rendements.mean()),
+        'facteur_profit': float(gains / pertes) if pertes > 0 else float('inf'),
+        'drawdown_max': float((np.maximum.accumulate(np.maximum(cumul, 0)) - cumul).max()),
+        'sharpe_trades': float(rendements.mean() / ecart_type * np.sqrt(len(rendements))) if ecart_type > 0 else 0.0,
+    }
+
+
+def grille(**valeurs):
+    """Produit cartésien de listes de valeurs : grille(seuil=[6.5, 7], facteur_tp=[1, 1.5])"""
+    noms = list(valeurs)
+    return [dict(zip(noms, combinaison)) for combinaison in itertools.product(*(valeurs[nom] for nom in noms))]
+
+
+def explorer(preparations, variantes, frais=None):
+    """Évalue chaque variante sur toutes les paires ; résultats triés par rendement total décroissant"""
+    duree_max = max(variante_complete(variante)['duree_max'] for variante in variantes)
+    rendements = [[] for _ in variantes]
+    # Paire par paire : une seule table des extrêmes en mémoire, partagée par toutes les variantes
+    for preparation in preparations:
+        table = table_extremes(preparation.haut, preparation.bas, duree_max)
+        for i, variante in enumerate(variantes):
+            rendements[i].append(simuler(preparation, variante, frais, table)['rendement'])
+    resultats = []
+    for variante, series in zip(variantes, rendements):
+        resultat = metriques(np.concatenate(series) if series else [])
+        resultat['variante'] = variante
+        resultats.append(resultat)
+    return sorted(resultats, key=lambda r: r['rendement_total'], reverse=True)
+
+
+if __name__ == "__main__":
+    # Débit sur une grille de variantes
+    import os
+    import sys
+    import time
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from botV0 import BotScalpingAvance, PARAMETRES_DEFAUT
+    from backtest import charger_historique, generer_historique
+    from tampon_ohlcv import COLONNES_OHLCV
+
+    parser = argparse.ArgumentParser(description="Backtest vectorisé des signaux")
+    parser.add_argument("fichiers", nargs="*", help="CSV 1m (timestamp ms,open,high,low,close,volume), un par paire")
+    parser.add_argument("--paires", type=int, default=4)
+    parser.add_argument("--bougies", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bot = BotScalpingAvance.__new__(BotScalpingAvance)
+    bot.parametres = dict(PARAMETRES_DEFAUT)
+    bot.scores_volatilite = {}
+    bot.tendances_marche = {}
+    bot.ajustements_levier = {}
+
+    if args.fichiers:
+        historiques = {os.path.basename(chemin): charger_historique(chemin) for chemin in args.fichiers}
+    else:
+        historiques = {f"SYN{i}": generer_historique(args.bougies, graine=i, prix=10.0 * (i + 1))
+                       for i in range(args.paires)}
+
+    debut = time.perf_counter()
+    preparations = [PreparationPaire(bot, symbole, df[COLONNES_OHLCV].to_numpy(dtype=np.float64))
+                    for symbole, df in historiques.items()]
+    bougies = sum(len(p) for p in preparations)
+    print(f"Préparation : {bougies} bougies en {time.perf_counter() - debut:.1f} s")
+
+    variantes = grille(seuil=[6, 6.5, 7, 7.5], alignement_min=[1, 2, 3],
+                       facteur_sl=[0.75, 1.0, 1.5], facteur_tp=[0.5, 1.0, 1.5])
+    debut = time.perf_counter()
+    resultats = explorer(preparations, variantes)
+    duree = time.perf_counter() - debut
+    print(f"{len(variantes)} variantes en {duree:.2f} s : "
+          f"{bougies * len(variantes) / duree / 1e6:.1f} millions de bougies par seconde")
+    for resultat in resultats[:5]:
+        print(f"{resultat['variante']} -> {resultat['trades']} trades, réussite {resultat['taux_reussite']:.1f}%, "
+              f"total {resultat['rendement_total']:+.2f}, drawdown {resultat['drawdown_max']:.2f}")
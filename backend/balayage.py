@@ -0,0 +1,225 @@
+"""
+Balayage de paramètres en parallèle
+-----------------------------------
+Lance un backtest événementiel (``backtest.MoteurBacktest``) par jeu de
+paramètres de la stratégie (clés de ``PARAMETRES_DEFAUT`` dans botV0), sur
+un pool de processus, et classe les résultats.
+
+Les bougies de toutes les paires sont copiées une seule fois dans un segment
+de mémoire partagée ; chaque processus ne fait que s'y attacher et travaille
+sur des vues NumPy en lecture seule, sans copie par processus. Les essais
+sont indépendants et distribués un par un : le débit croît avec le nombre
+de cœurs tant que la mémoire suffit (un backtest à la fois par processus).
+
+Espaces de recherche :
+- ``grille(risque_par_trade=[0.1, 0.3], seuil_signal=[6.5, 7])`` : produit
+  cartésien ;
+- ``tirages_aleatoires({'risque_par_trade': (0.05, 0.4), 'seuil_signal': [6, 7, 8]}, 50)`` :
+  une liste est un choix, un couple (bas, haut) un intervalle (entier si les
+  deux bornes sont entières).
+"""
+
+import os
+import time
+import random
+import shutil
+import logging
+import tempfile
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from backtest import MoteurBacktest
+from backtest_vectorise import grille
+from tampon_ohlcv import COLONNES_OHLCV
+
+logger = logging.getLogger(__name__)
+
+# Métrique de classement par défaut (plus grand = meilleur)
+CLE_CLASSEMENT = 'profit_total'
+
+# Colonnes de résultat affichées dans le tableau classé
+COLONNES_RESULTAT = ('profit_total', 'solde_final', 'taux_reussite', 'trades', 'frais_total', 'duree_s')
+
+
+class DonneesPartagees:
+    """Bougies de toutes les paires dans un segment de mémoire partagée (créé par le processus parent)"""
+
+    def __init__(self, historiques):
+        tableaux = {symbole: donnees if isinstance(donnees, np.ndarray)
+                    else donnees[COLONNES_OHLCV].to_numpy(dtype=np.float64)
+                    for symbole, donnees in historiques.items()}
+        taille = sum(tableau.nbytes for tableau in tableaux.values())
+        self.segment = shared_memory.SharedMemory(create=True, size=max(taille, 1))
+        self.plan = []  # (symbole, décalage en octets, nombre de bougies)
+        decalage = 0
+        for symbole, tableau in tableaux.items():
+            vue = np.ndarray(tableau.shape, dtype=np.float64, buffer=self.segment.buf, offset=decalage)
+            vue[:] = tableau
+            self.plan.append((symbole, decalage, len(tableau)))
+            decalage += tableau.nbytes
+
+    @property
+    def descripteur(self):
+        """Ce qu'un processus doit recevoir pour s'attacher au segment"""
+        return self.segment.name, self.plan
+
+    def fermer(self):
+        self.segment.close()
+        self.segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def attacher(descripteur):
+    """S'attache au segment partagé ; retourne (segment, {symbole: vue en lecture seule})"""
+    nom, plan = descripteur
+    # Le segment appartient au parent, seul responsable de sa suppression
+    try:
+        segment = shared_memory.SharedMemory(name=nom, track=False)
+    except TypeError:
+        # Avant Python 3.13, les processus du pool partagent le suivi des ressources du parent
+        segment = shared_memory.SharedMemory(name=nom)
+    historiques = {}
+    for symbole, decalage, lignes in plan:
+        vue = np.ndarray((lignes, len(COLONNES_OHLCV)), dtype=np.float64, buffer=segment.buf, offset=decalage)
+        vue.flags.writeable = False
+        historiques[symbole] = vue
+    return segment, historiques
+
+
+# État de chaque processus du pool (initialisé une fois par processus)
+_segment = None
+_historiques = None
+
+
+def _initialiser_processus(descripteur):
+    global _segment, _historiques
+    _segment, _historiques = attacher(descripteur)
+
+
+def _executer_essai(essai):
+    """Un backtest complet dans un processus du pool ; retourne (numéro, paramètres, résultat ou erreur)"""
+    numero, parametres, options = essai
+    repertoire = tempfile.mkdtemp(prefix=f"balayage_{numero}_")
+    try:
+        resultat = MoteurBacktest(_historiques, repertoire, parametres=parametres, **options).executer()
+        return numero, parametres, resultat, None
+    except Exception as e:
+        return numero, parametres, None, f"{type(e).__name__}: {e}"
+    finally:
+        shutil.rmtree(repertoire, ignore_errors=True)
+
+
+def tirages_aleatoires(espace, nombre, graine=None):
+    """``nombre`` jeux de paramètres tirés dans ``espace`` (liste = choix, couple (bas, haut) = intervalle)"""
+    generateur = random.Random(graine)
+
+    def tirer(domaine):
+        if isinstance(domaine, tuple):
+            bas, haut = domaine
+            if isinstance(bas, int) and isinstance(haut, int):
+                return generateur.randint(bas, haut)
+            return generateur.uniform(bas, haut)
+        return generateur.choice(list(domaine))
+
+    return [{nom: tirer(domaine) for nom, domaine in espace.items()} for _ in range(nombre)]
+
+
+def balayer(historiques, essais, processus=None, cle=CLE_CLASSEMENT, **options):
+    """Exécute un backtest par jeu de paramètres et retourne les lignes classées par ``cle`` décroissante.
+
+    ``options`` est transmis à MoteurBacktest (pas_analyse, pas_gestion...).
+    Un essai en erreur apparaît en fin de classement avec son message.
+    """
+    processus = processus or os.cpu_count() or 1
+    lignes = []
+    debut = time.perf_counter()
+    with DonneesPartagees(historiques) as donnees:
+        with Pool(processus, initializer=_initialiser_processus, initargs=(donnees.descripteur,)) as pool:
+            travaux = [(numero, parametres, options) for numero, parametres in enumerate(essais)]
+            for numero, parametres, resultat, erreur in pool.imap_unordered(_executer_essai, travaux):
+                ligne = {'essai': numero, 'parametres': parametres, 'erreur': erreur}
+                if resultat is not None:
+                    ligne.update({nom: resultat[nom] for nom in ('profit_total', 'solde_final', 'taux_reussite',
+                                                                  'frais_total', 'duree_s')})
+                    ligne['trades'] = resultat['nombre_trades']['total']
+                else:
+                    logger.error(f"Essai {numero} {parametres} en échec: {erreur}")
+                lignes.append(ligne)
+    logger.info(f"Balayage de {len(essais)} essais sur {processus} processus en {time.perf_counter() - debut:.1f} s")
+
+    lignes.sort(key=lambda ligne: (ligne['erreur'] is None, ligne.get(cle, float('-inf'))), reverse=True)
+    for rang, ligne in enumerate(lignes, 1):
+        ligne['rang'] = rang
+    return lignes
+
+
+def tableau(lignes, colonnes=COLONNES_RESULTAT):
+    """Tableau texte du classement : rang, résultats puis paramètres de chaque essai"""
+    noms_parametres = sorted({nom for ligne in lignes for nom in ligne['parametres']})
+    entetes = ['rang'] + list(colonnes) + noms_parametres
+    rangees = []
+    for ligne in lignes:
+        valeurs = [ligne['rang']] + [ligne.get(nom, '') for nom in colonnes]
+        valeurs += [ligne['parametres'].get(nom, '') for nom in noms_parametres]
+        rangees.append([f"{v:.4g}" if isinstance(v, float) else str(v) for v in valeurs])
+    largeurs = [max(len(cellule) for cellule in colonne) for colonne in zip(entetes, *rangees)]
+    formater = lambda cellules: '  '.join(cellule.rjust(largeur) for cellule, largeur in zip(cellules, largeurs))
+    texte = [formater(entetes)]
+    for ligne, cellules in zip(lignes, rangees):
+        texte.append(formater(cellules) + (f"  {ligne['erreur']}" if ligne['erreur'] else ''))
+    return '\n'.join(texte)
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from backtest import charger_historique, generer_historique
+
+    parser = argparse.ArgumentParser(description="Balayage parallèle des paramètres de la stratégie")
+    parser.add_argument("fichiers", nargs="*", help="CSV 1m (timestamp ms,open,high,low,close,volume), un par paire")
+    parser.add_argument("--espace", default='{"risque_par_trade": [0.1, 0.2, 0.3], "seuil_signal": [6.5, 7, 7.5]}',
+                        help="JSON nom -> liste de valeurs, ou {\"min\": bas, \"max\": haut} avec --aleatoire")
+    parser.add_argument("--aleatoire", type=int, default=0, help="Nombre de tirages aléatoires (0 = grille)")
+    parser.add_argument("--graine", type=int, default=None)
+    parser.add_argument("--processus", type=int, default=None)
+    parser.add_argument("--paires", type=int, default=4)
+    parser.add_argument("--bougies", type=int, default=20_000)
+    parser.add_argument("--pas-gestion", type=int, default=1)
+    parser.add_argument("--sortie", default=None, help="Fichier CSV du classement")
+    args = parser.parse_args()
+
+    if args.fichiers:
+        historiques = {os.path.splitext(os.path.basename(chemin))[0].replace('_', '/', 1) + ':USDT':
+                       charger_historique(chemin) for chemin in args.fichiers}
+    else:
+        historiques = {f"SYN{i}/USDT:USDT": generer_historique(args.bougies, graine=i, prix=10.0 * (i + 1))
+                       for i in range(args.paires)}
+
+    espace = {nom: (domaine['min'], domaine['max']) if isinstance(domaine, dict) else domaine
+              for nom, domaine in json.loads(args.espace).items()}
+    essais = tirages_aleatoires(espace, args.aleatoire, args.graine) if args.aleatoire else grille(**espace)
+
+    debut = time.perf_counter()
+    lignes = balayer(historiques, essais, processus=args.processus, pas_gestion=args.pas_gestion)
+    duree = time.perf_counter() - debut
+    print(tableau(lignes))
+    print(f"{len(essais)} essais en {duree:.1f} s sur {args.processus or os.cpu_count()} processus")
+
+    if args.sortie:
+        import csv
+        noms = sorted({nom for ligne in lignes for nom in ligne['parametres']})
+        with open(args.sortie, 'w', newline='', encoding='utf-8') as f:
+            ecrivain = csv.writer(f)
+            ecrivain.writerow(['rang', *COLONNES_RESULTAT, *noms, 'erreur'])
+            for ligne in lignes:
+                ecrivain.writerow([ligne['rang'], *(ligne.get(nom, '') for nom in COLONNES_RESULTAT),
+                                   *(ligne['parametres'].get(nom, '') for nom in noms), ligne['erreur'] or ''])
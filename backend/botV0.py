@@ -10,9 +10,33 @@ import json
 import os
 from datetime import datetime, timedelta
 from threading import Lock, Thread
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from retry import retry
 from collections import deque
+from queue import Queue, Empty
 from dotenv import load_dotenv
+from tampon_ohlcv import StockageOHLCV
+from flux_marche import FluxWebsocketKucoin, FluxRejeu
+from reechantillonnage import Reechantillonneur, TIMEFRAMES_REECHANTILLONNES
+from instantane_prix import ServicePrix
+from cache_bougies import CacheBougies, CacheIndicateurs
+from indicateurs_flux import IndicateursFlux
+from divergences import detecter_divergences
+from indicateurs_lot import empiler, calculer_indicateurs_lot, evaluer_lot, BOUGIES_MIN_LOT
+from graphe_indicateurs import GrapheIndicateurs, construire_noeuds, fusionner
+from horloge import HorlogeSysteme
+import exchange_factice
+from carnet_declencheurs import CarnetDeclencheurs
+from livre_positions import LivrePositions
+from persistance import EcrivainPersistance, ecrire_atomique
+from journal_trades import JournalTrades
+from metriques import MetriquesPerformance
+from stockage_trades import StockageTrades
+import point_reprise
+from types import MappingProxyType
+from verrous import VerrouMesure, VerrousSymboles, InstantanePortefeuille
+from ordonnanceur import OrdonnanceurRequetes, ExchangePlanifie, PRIORITE_PROTECTION, PRIORITE_SIGNAUX, PRIORITE_FOND
 
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
@@ -42,17 +66,25 @@ api_key = os.getenv("KUCOIN_API_KEY")
 api_secret = os.getenv("KUCOIN_API_SECRET")
 api_passphrase = os.getenv("KUCOIN_API_PASSPHRASE")
 
-# Vérifier que les variables d'environnement sont chargées
-if not api_key or not api_secret or not api_passphrase:
-    logger.error("Erreur: Les clés API KuCoin n'ont pas été trouvées dans le fichier .env")
-    sys.exit(1)
-
 # Paramètres du bot
 INITIAL_BALANCE = 400
 BASE_LEVERAGE = 15  # Augmenté pour plus d'agressivité
 MAX_LEVERAGE = 30   # Augmenté pour plus d'agressivité
 RISK_PER_TRADE = 0.30  # Augmenté pour des positions plus importantes
 MAX_POSITIONS = 10  # Augmenté pour plus d'opportunités
+
+# Réglages de la stratégie, modifiables par instance (backtests, balayages de paramètres)
+PARAMETRES_DEFAUT = {
+    'risque_par_trade': RISK_PER_TRADE,
+    'levier_base': BASE_LEVERAGE,
+    'levier_max': MAX_LEVERAGE,
+    'positions_max': MAX_POSITIONS,
+    'seuil_signal': 7,                 # Score minimal sur 10 pour un signal
+    'trailing_activation_pct': 2.0,    # Profit (avec levier) qui active le trailing stop
+    'trailing_ecart': 0.005,           # Distance du trailing stop au prix
+    'breakeven_pct': 1.0,              # Profit (avec levier) qui remonte le stop au prix d'entrée
+    'profit_partiel_pct': 3.0,         # Profit (avec levier) qui déclenche la prise de profit partielle
+}
 PAIRS = [
     'BTC/USDT:USDT', 'ETH/USDT:USDT', 'BNB/USDT:USDT', 'SOL/USDT:USDT',
     'XRP/USDT:USDT', 'TAO/USDT:USDT', 'LINK/USDT:USDT', 'DOGE/USDT:USDT',
@@ -60,59 +92,206 @@ PAIRS = [
     'NEAR/USDT:USDT', 'ARB/USDT:USDT', 'OP/USDT:USDT', 'ATOM/USDT:USDT'
 ]
 
+# Exchange utilisé : 'kucoin' (réel) ou 'factice' (local, sans réseau ni clés API, voir exchange_factice.py)
+EXCHANGE_MODE = os.getenv("EXCHANGE_MODE", "kucoin")
+
 # Frais de trading
 TAKER_FEE = 0.0006  # 0.06% par défaut
 MAKER_FEE = 0.0002  # 0.02% par défaut
 
+# Nombre de paires récupérées et analysées en parallèle dans la boucle principale (1 = séquentiel)
+FETCH_CONCURRENCY = int(os.getenv("FETCH_CONCURRENCY", "8"))
+
+# Faire passer toutes les requêtes REST par l'ordonnanceur à priorités (remplace la limitation de ccxt)
+REQUEST_SCHEDULER = os.getenv("REQUEST_SCHEDULER", "1") == "1"
+
+# Intervalle (s) de rafraîchissement de l'instantané des prix de tout l'univers (un seul fetch_tickers)
+PRICE_SNAPSHOT_INTERVAL = float(os.getenv("PRICE_SNAPSHOT_INTERVAL", "2"))
+
+# Reconstruire les bougies 5m/15m/1h à partir du flux 1m plutôt que de les télécharger
+RESAMPLE_FROM_1M = os.getenv("RESAMPLE_FROM_1M", "1") == "1"
+
+# Flux de données de marché : 'rest' (interrogation périodique), 'websocket' ou 'rejeu'
+MARKET_DATA_FEED = os.getenv("MARKET_DATA_FEED", "rest")
+REPLAY_FILE = os.getenv("REPLAY_FILE", "")          # Fichier JSON Lines pour le mode 'rejeu'
+REPLAY_ADDRESS = os.getenv("REPLAY_ADDRESS", "")    # Ou adresse hote:port d'un serveur de rejeu
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1"))
+
+# Divergences RSI : largeur des pivots (0 = chaque bougie) et écart maximal entre pivots comparés
+DIVERGENCE_PIVOT_WIDTH = int(os.getenv("DIVERGENCE_PIVOT_WIDTH", "0"))
+DIVERGENCE_LOOKBACK = int(os.getenv("DIVERGENCE_LOOKBACK", "1"))
+
+# Calculer les indicateurs de toutes les paires en une passe vectorisée (symboles x temps)
+BATCH_INDICATORS = os.getenv("BATCH_INDICATORS", "1") == "1"
+
+# Ne calculer que les indicateurs lus par verifier_signaux et ajuster_levier_et_niveaux, sur leur fenêtre utile
+LAZY_INDICATORS = os.getenv("LAZY_INDICATORS", "1") == "1"
+
 # Fichiers de suivi des performances
 PERFORMANCE_FILE = "historique_performance.json"
 DAILY_REPORT_FILE = "rapport_quotidien.json"
 TRADES_LOG_FILE = "journal_trades.csv"
+TRADE_JOURNAL_FILE = "journal_trades.jsonl"    # Trades fermés, une ligne JSON par trade (ajout seul)
+
+# Synchronisation disque du journal des trades : 'jamais', 'lot' (un fsync par lot de l'écrivain) ou 'toujours'
+TRADE_JOURNAL_FSYNC = os.getenv("TRADE_JOURNAL_FSYNC", "lot")
+
+# Base SQLite (WAL) des ouvertures, fermetures, profits partiels et ajustements de SL/TP, pour les rapports et l'interface
+TRADE_STORE = os.getenv("TRADE_STORE", "1") == "1"
+TRADE_STORE_FILE = "trades.sqlite"
+
+# Point de reprise de l'état complet (positions, solde, paires, tampons de bougies) écrit toutes les
+# STATE_CHECKPOINT_INTERVAL secondes ; WARM_RESTART=1 repart de ce point sans analyse des paires au démarrage
+STATE_FILE = "etat_bot.npz"
+STATE_CHECKPOINT_INTERVAL = float(os.getenv("STATE_CHECKPOINT_INTERVAL", "30"))
+WARM_RESTART = os.getenv("WARM_RESTART", "1") == "1"
+# Âge (secondes) au-delà duquel le classement des paires repris est recalculé en arrière-plan
+PAIR_RANKING_MAX_AGE = float(os.getenv("PAIR_RANKING_MAX_AGE", "3600"))
+
+class KucoinFuturesConcurrent(ccxt.kucoinfutures):
+    """Client KuCoin Futures dont la limitation de débit de ccxt est sûre entre threads"""
+    
+    def __init__(self, config=None):
+        super().__init__(config or {})
+        self._verrou_debit = Lock()
+    
+    def throttle(self, cost=None):
+        # Les requêtes concurrentes réservent leur créneau l'une après l'autre
+        with self._verrou_debit:
+            super().throttle(cost)
+            self.lastRestRequestTimestamp = self.milliseconds()
+
 
 class BotScalpingAvance:
-    def __init__(self):
-        self.exchange = self._initialiser_exchange()
+    def __init__(self, exchange=None, horloge=None, paires=None, demarrer_taches=True, repertoire=None,
+                 parametres=None, reprise=None, flux=None):
+        """Bot connecté à KuCoin par défaut.
+
+        Un backtest fournit son propre ``exchange`` et son ``horloge``, la liste
+        des ``paires`` (ni test de connexion ni analyse des paires), désactive
+        les flux et threads d'arrière-plan avec ``demarrer_taches=False`` et
+        écrit ses fichiers de suivi dans ``repertoire``. ``parametres``
+        remplace tout ou partie de PARAMETRES_DEFAUT.
+
+        ``reprise`` (par défaut WARM_RESTART, seulement avec les tâches
+        d'arrière-plan) repart du point de reprise de ``repertoire`` s'il
+        existe : positions, solde, paires et bougies sont restaurés, et
+        l'exchange n'est consulté qu'ensuite, en arrière-plan.
+
+        ``flux`` impose le flux de marché poussé (par exemple un ``FluxRejeu``
+        pour tourner sans réseau) à la place de celui de MARKET_DATA_FEED.
+        """
+        inconnus = set(parametres or {}) - set(PARAMETRES_DEFAUT)
+        if inconnus:
+            raise ValueError(f"Paramètres inconnus: {', '.join(sorted(inconnus))}")
+        self.parametres = dict(PARAMETRES_DEFAUT, **(parametres or {}))
+        self.horloge = horloge if horloge is not None else HorlogeSysteme()
+        repertoire = repertoire or ''
+        self.fichier_performance = os.path.join(repertoire, PERFORMANCE_FILE)
+        self.fichier_rapport = os.path.join(repertoire, DAILY_REPORT_FILE)
+        self.fichier_journal = os.path.join(repertoire, TRADES_LOG_FILE)
+        self.fichier_reprise = os.path.join(repertoire, STATE_FILE)
+        self.intervalle_sauvegarde = 300  # Secondes entre deux sauvegardes des performances
+        self.ordonnanceur = OrdonnanceurRequetes()
+        self.exchange = exchange if exchange is not None else self._initialiser_exchange()
         self.balance = INITIAL_BALANCE
         self.balance_initiale = INITIAL_BALANCE
-        self.positions = {}
+        self.positions = LivrePositions()
+        self.carnet_declencheurs = CarnetDeclencheurs(self.parametres, livre=self.positions)
         self.running = True
-        self.lock = Lock()
+        # Verrou par symbole pour modifier une position, garde du portefeuille pour le solde et le
+        # nombre de positions (toujours prise après le verrou du symbole), instantané pour les lecteurs
+        self.verrous_symboles = VerrousSymboles()
+        self.verrou_portefeuille = VerrouMesure('portefeuille', reentrant=True)
+        self.instantane = InstantanePortefeuille(MappingProxyType({}), self.balance, self.horloge.time())
+        self.persistance = EcrivainPersistance()
+        self.journal_trades = JournalTrades(os.path.join(repertoire, TRADE_JOURNAL_FILE), TRADE_JOURNAL_FSYNC, self.persistance)
+        self.stockage_trades = StockageTrades(os.path.join(repertoire, TRADE_STORE_FILE)) if TRADE_STORE else None
         self.scores_volatilite = {}
-        self.cache_donnees = {}
-        self.historique_performance = self._charger_historique_performance()
-        self.historique_trades = []
+        self.cache_donnees = CacheBougies(horloge=self.horloge.time)
+        self.cache_indicateurs = CacheIndicateurs()
+        self.graphe_indicateurs = GrapheIndicateurs(construire_noeuds(DIVERGENCE_PIVOT_WIDTH, DIVERGENCE_LOOKBACK))
+        self.demandes_analyse = fusionner(self.CARACTERISTIQUES_SIGNAUX, self.CARACTERISTIQUES_LEVIER)
+        self.stockage_ohlcv = StockageOHLCV(self.exchange, horloge=self.horloge.time)
+        self.reechantillonneur = Reechantillonneur(self.stockage_ohlcv)
+        self.indicateurs_flux = IndicateursFlux()
+        self.metriques = self._charger_metriques()
         self.tendances_marche = {}
         self.file_positions = deque()
         self.derniere_analyse = {}
         self.frais_cumules = 0
-        self.derniere_sauvegarde = time.time()
-        self.trades_gagnants_consecutifs = 0
-        self.trades_perdants_consecutifs = 0
+        self.derniere_sauvegarde = self.horloge.time()
+        self.dernier_point_de_reprise = self.horloge.time()
+        # Point de reprise demandé, pas encore copié par l'écrivain de persistance
+        self.point_de_reprise_en_attente = False
+        self.reconciliation = None
+        self.service_prix = ServicePrix(self.exchange, lambda: set(self.paires) | set(self.positions),
+                                        PRICE_SNAPSHOT_INTERVAL, horloge=self.horloge.time)
+        self.evenements_marche = Queue()
+        self.latences_decision = deque(maxlen=1000)
+        self.durees_cycle = deque(maxlen=100)
+        self.statistiques_lot = {'symboles_lot': 0, 'repli_pandas': 0}
+        self.executeur = None
+        self.flux = flux if flux is not None else (self._initialiser_flux() if demarrer_taches else None)
         
         # Initialiser le journal des trades CSV s'il n'existe pas
-        if not os.path.exists(TRADES_LOG_FILE):
-            with open(TRADES_LOG_FILE, 'w', encoding='utf-8') as f:
+        if not os.path.exists(self.fichier_journal):
+            with open(self.fichier_journal, 'w', encoding='utf-8') as f:
                 f.write("Date,Symbole,Direction,Prix Entrée,Prix Sortie,Quantité,Levier,Profit Net,Profit %,Frais,Durée (min)\n")
         
         # Log simple pour l'initialisation
         print(f"Bot initialisé | Solde: {self.balance} USDT | Mode: Scalping Haute Fréquence")
         
-        # Vérification de la connexion et analyse des paires
-        self.verifier_connexion()
-        self.paires = self.analyser_paires()
-        self.ajustements_levier = {paire: BASE_LEVERAGE for paire in self.paires}
+        # Reprise à chaud depuis le point de reprise, si demandée et disponible
+        if reprise is None:
+            reprise = WARM_RESTART and demarrer_taches
+        etat_repris = self._restaurer_point_de_reprise() if reprise else None
+        
+        # Vérification de la connexion et analyse des paires (sauf si les paires sont imposées ou reprises)
+        if paires is not None:
+            self.paires = list(paires)
+        elif etat_repris is not None and etat_repris['paires']:
+            self.paires = list(etat_repris['paires'])
+        else:
+            self.verifier_connexion()
+            self.paires = self.analyser_paires()
+        self.ajustements_levier = {paire: self.parametres['levier_base'] for paire in self.paires}
+        if etat_repris is not None:
+            self.ajustements_levier.update(etat_repris['ajustements_levier'])
+            self.reconciliation = Thread(target=self._reconcilier_apres_reprise,
+                                         args=(self.horloge.time() - etat_repris['horodatage'],),
+                                         name='reconciliation', daemon=True)
+            self.reconciliation.start()
         print(f"Paires sélectionnées: {', '.join(self.paires[:5])}... ({len(self.paires)} au total)")
         
+        # Abonnement au flux de marché poussé
+        if self.flux is not None:
+            self.flux.suivre(self.paires, ('1m',))
+            self.flux.abonner_bougies(self._sur_bougie)
+            self.flux.abonner_tickers(self._sur_ticker)
+            self.stockage_ohlcv.flux_connecte = lambda: self.flux.connecte
+            self.flux.demarrer()
+        
         # Démarrage des tâches en arrière-plan
-        self.demarrer_taches_arriere_plan()
+        if demarrer_taches:
+            self.demarrer_taches_arriere_plan()
 
     def _initialiser_exchange(self):
         """Initialise la connexion à l'exchange avec les paramètres optimaux"""
-        exchange = ccxt.kucoinfutures({
+        if EXCHANGE_MODE == 'factice':
+            exchange = exchange_factice.depuis_configuration(PAIRS)
+            return ExchangePlanifie(exchange, self.ordonnanceur) if REQUEST_SCHEDULER else exchange
+        
+        # Vérifier que les variables d'environnement sont chargées
+        if not api_key or not api_secret or not api_passphrase:
+            logger.error("Erreur: Les clés API KuCoin n'ont pas été trouvées dans le fichier .env")
+            raise RuntimeError("Les clés API KuCoin n'ont pas été trouvées dans le fichier .env")
+        
+        exchange = KucoinFuturesConcurrent({
             'apiKey': api_key,
             'secret': api_secret,
             'password': api_passphrase,
-            'enableRateLimit': True,
+            'enableRateLimit': not REQUEST_SCHEDULER,
             'timeout': 10000,
             'options': {
                 'defaultType': 'future',
@@ -120,103 +299,296 @@ class BotScalpingAvance:
                 'recvWindow': 60000
             }
         })
+        
+        # Le débit est alors régulé par l'ordonnanceur partagé entre tous les threads
+        if REQUEST_SCHEDULER:
+            return ExchangePlanifie(exchange, self.ordonnanceur)
         return exchange
 
-    def _charger_historique_performance(self):
-        """Charge l'historique des performances depuis le fichier JSON"""
+    def _initialiser_flux(self):
+        """Crée le flux de données de marché poussé selon la configuration (None en mode REST)"""
+        if MARKET_DATA_FEED == 'websocket':
+            return FluxWebsocketKucoin(self.exchange)
+        if MARKET_DATA_FEED == 'rejeu':
+            if REPLAY_ADDRESS:
+                hote, port = REPLAY_ADDRESS.rsplit(':', 1)
+                return FluxRejeu(adresse=(hote, int(port)), vitesse=REPLAY_SPEED)
+            return FluxRejeu(chemin=REPLAY_FILE, vitesse=REPLAY_SPEED)
+        return None
+
+    def _sur_bougie(self, symbole, timeframe, bougie, recu):
+        """Intègre une bougie poussée par le flux et signale le symbole à la boucle principale"""
+        self.stockage_ohlcv.alimenter(symbole, timeframe, bougie)
+        
+        # Invalider le DataFrame en cache pour ce symbole et ce timeframe
+        self.cache_donnees.invalider(symbole, timeframe)
+        
+        self.service_prix.publier({symbole: bougie[4]})
+        if timeframe == '1m':
+            self.evenements_marche.put((symbole, recu))
+
+    def _sur_ticker(self, symbole, prix, horodatage, recu):
+        """Vérifie les niveaux de sortie de la position dès qu'un nouveau prix arrive"""
+        self.service_prix.publier({symbole: prix})
+        if self.carnet_declencheurs.surveiller(symbole, prix, self.verifier_stop_loss_take_profit):
+            self.latences_decision.append((time.perf_counter() - recu) * 1000)
+
+    def _sur_instantane_prix(self, instantane):
+        """Vérifie les niveaux de sortie de toutes les positions avec le nouvel instantané des prix"""
+        # Une seule comparaison vectorisée pour toutes les positions, puis vérification des seules déclenchées
+        for symbole in self.positions.declenches(instantane.prix):
+            self.verifier_stop_loss_take_profit(symbole, instantane.prix[symbole])
+
+    def _attendre_evenements_marche(self, delai=1.0):
+        """Attend les mises à jour du flux et retourne {symbole: instant de réception le plus ancien}"""
+        evenements = {}
         try:
-            if os.path.exists(PERFORMANCE_FILE):
-                with open(PERFORMANCE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {
-                "trades": [], 
-                "pnl_quotidien": {}, 
-                "taux_reussite": 0, 
-                "profit_total": 0,
-                "frais_total": 0,
-                "meilleur_trade": {"symbole": "", "profit": 0},
-                "pire_trade": {"symbole": "", "profit": 0},
-                "nombre_trades": {"total": 0, "gagnants": 0, "perdants": 0},
-                "series_gagnantes": {"max": 0, "actuelle": 0},
-                "series_perdantes": {"max": 0, "actuelle": 0},
-                "roi": 0,
-                "sharpe_ratio": 0,
-                "drawdown_max": 0
-            }
+            symbole, recu = self.evenements_marche.get(timeout=delai)
+            evenements[symbole] = recu
+            while True:
+                symbole, recu = self.evenements_marche.get_nowait()
+                evenements.setdefault(symbole, recu)
+        except Empty:
+            pass
+        return evenements
+
+    def statistiques_latence(self):
+        """Latence tick -> décision (ms) mesurée sur les derniers événements du flux"""
+        latences = sorted(self.latences_decision)
+        if not latences:
+            return {'evenements': 0, 'moyenne_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+        return {
+            'evenements': len(latences),
+            'moyenne_ms': sum(latences) / len(latences),
+            'p99_ms': latences[min(len(latences) - 1, int(len(latences) * 0.99))],
+            'max_ms': latences[-1]
+        }
+
+    def _charger_metriques(self):
+        """Reconstruit les métriques de performance : point de reprise JSON puis fin du journal des trades.
+
+        Le point de reprise contient l'état de l'accumulateur et la position
+        du journal à laquelle il correspond ; seuls les trades écrits ensuite
+        sont relus. Sans point de reprise exploitable (fichier absent, ancien
+        format, journal plus court que prévu), tout le journal est relu. Un
+        ancien fichier contenant la liste complète des trades est converti en
+        journal au premier chargement.
+        """
+        metriques = MetriquesPerformance(self.balance_initiale)
+        try:
+            reprise = {'trades': 0, 'octets': 0}
+            if os.path.exists(self.fichier_performance):
+                with open(self.fichier_performance, 'r', encoding='utf-8') as f:
+                    etat = json.load(f)
+                anciens_trades = etat.pop('trades', [])
+                if anciens_trades and not os.path.exists(self.journal_trades.chemin):
+                    for trade in anciens_trades:
+                        self.journal_trades.ajouter(trade)
+                if 'journal' in etat and 'solde_max' in etat:
+                    metriques = MetriquesPerformance.depuis_etat(etat, self.balance_initiale)
+                    reprise = etat['journal']
+            
+            taille = os.path.getsize(self.journal_trades.chemin) if os.path.exists(self.journal_trades.chemin) else 0
+            if taille < reprise['octets']:
+                logger.error(f"Journal des trades plus court que le point de reprise "
+                             f"({taille} < {reprise['octets']} octets), métriques reconstruites")
+                metriques = MetriquesPerformance(self.balance_initiale)
+                reprise = {'trades': 0, 'octets': 0}
+            for trade in self.journal_trades.lire(**reprise):
+                metriques.ajouter(trade)
+            return metriques
         except Exception as e:
             logger.error(f"Erreur lors du chargement de l'historique de performance: {e}")
-            return {
-                "trades": [], 
-                "pnl_quotidien": {}, 
-                "taux_reussite": 0, 
-                "profit_total": 0,
-                "frais_total": 0,
-                "meilleur_trade": {"symbole": "", "profit": 0},
-                "pire_trade": {"symbole": "", "profit": 0},
-                "nombre_trades": {"total": 0, "gagnants": 0, "perdants": 0},
-                "series_gagnantes": {"max": 0, "actuelle": 0},
-                "series_perdantes": {"max": 0, "actuelle": 0},
-                "roi": 0,
-                "sharpe_ratio": 0,
-                "drawdown_max": 0
-            }
+            return MetriquesPerformance(self.balance_initiale)
 
     def _sauvegarder_historique_performance(self):
-        """Sauvegarde l'historique des performances dans un fichier JSON"""
-        try:
-            # Calculer des métriques supplémentaires
-            self.historique_performance["roi"] = ((self.balance / self.balance_initiale) - 1) * 100
-            
-            # Calculer le Sharpe Ratio si nous avons assez de données
-            if len(self.historique_performance["trades"]) > 10:
-                profits = [t.get("profit_net", 0) for t in self.historique_performance["trades"][-30:]]
-                if profits:
-                    rendement_moyen = np.mean(profits)
-                    volatilite = np.std(profits) if np.std(profits) > 0 else 0.0001
-                    self.historique_performance["sharpe_ratio"] = (rendement_moyen / volatilite) if volatilite else 0
-            
-            # Calculer le drawdown maximum
-            if len(self.historique_performance["trades"]) > 0:
-                solde_cumule = self.balance_initiale
-                solde_max = solde_cumule
-                drawdown_max = 0
-                
-                for trade in self.historique_performance["trades"]:
-                    solde_cumule += trade.get("profit_net", 0)
-                    solde_max = max(solde_max, solde_cumule)
-                    drawdown_actuel = (solde_max - solde_cumule) / solde_max * 100 if solde_max > 0 else 0
-                    drawdown_max = max(drawdown_max, drawdown_actuel)
-                
-                self.historique_performance["drawdown_max"] = drawdown_max
+        """Planifie la sauvegarde du point de reprise des performances et du rapport quotidien.
+
+        L'état de l'accumulateur et le rapport sont copiés ici, en temps
+        constant, sous la garde du portefeuille ; les fichiers JSON sont
+        écrits par l'écrivain de persistance.
+        """
+        with self.verrou_portefeuille:
+            aujourd_hui = self.horloge.maintenant().strftime('%Y-%m-%d')
+            etat = self.metriques.etat(self.balance)
+            etat['journal'] = self.journal_trades.point_de_reprise()
             
-            with open(PERFORMANCE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.historique_performance, f, indent=4, ensure_ascii=False)
-                
             # Générer un rapport quotidien
-            aujourd_hui = datetime.now().strftime('%Y-%m-%d')
             rapport = {
                 "date": aujourd_hui,
                 "solde": self.balance,
-                "profit_jour": self.historique_performance["pnl_quotidien"].get(aujourd_hui, 0),
-                "nombre_trades_jour": sum(1 for t in self.historique_performance["trades"] 
-                                         if t.get("date_sortie", "").startswith(aujourd_hui)),
-                "taux_reussite": self.historique_performance["taux_reussite"],
-                "profit_total": self.historique_performance["profit_total"],
-                "frais_total": self.historique_performance["frais_total"],
-                "roi": self.historique_performance["roi"],
-                "sharpe_ratio": self.historique_performance["sharpe_ratio"],
-                "drawdown_max": self.historique_performance["drawdown_max"],
-                "series_gagnantes": self.historique_performance["series_gagnantes"],
-                "series_perdantes": self.historique_performance["series_perdantes"],
+                "profit_jour": self.metriques.profit_jour(aujourd_hui),
+                "nombre_trades_jour": self.metriques.nombre_trades_jour(aujourd_hui),
+                "taux_reussite": etat["taux_reussite"],
+                "profit_total": etat["profit_total"],
+                "frais_total": etat["frais_total"],
+                "roi": etat["roi"],
+                "sharpe_ratio": etat["sharpe_ratio"],
+                "drawdown_max": etat["drawdown_max"],
+                "series_gagnantes": etat["series_gagnantes"],
+                "series_perdantes": etat["series_perdantes"],
                 "positions_actives": len(self.positions)
             }
-            
-            with open(DAILY_REPORT_FILE, 'w', encoding='utf-8') as f:
-                json.dump(rapport, f, indent=4, ensure_ascii=False)
+        self.persistance.planifier('performance', lambda: self._ecrire_historique_performance(etat, rapport))
+
+    def _ecrire_historique_performance(self, etat, rapport):
+        """Écrit le point de reprise des performances et le rapport quotidien"""
+        try:
+            # Point de reprise : état des métriques et position du journal des trades, sans les trades eux-mêmes
+            ecrire_atomique(self.fichier_performance, lambda f: json.dump(etat, f, indent=4, ensure_ascii=False))
+            ecrire_atomique(self.fichier_rapport, lambda f: json.dump(rapport, f, indent=4, ensure_ascii=False))
                 
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde de l'historique de performance: {e}")
 
+    def _etat_point_de_reprise(self):
+        """Copie de l'état à écrire dans le point de reprise.
+
+        Les positions sont modifiées sous le verrou de leur symbole (profit
+        partiel, trailing, break-even) : les verrous de tous les symboles en
+        position sont pris, dans l'ordre, puis la garde du portefeuille, pour
+        ne jamais copier une modification à moitié appliquée. Si une position
+        s'est ouverte entre-temps, la copie recommence avec son verrou.
+        À n'appeler sans tenir aucun verrou du bot (écrivain de persistance,
+        boucle principale) : un verrou de symbole déjà tenu inverserait l'ordre.
+        """
+        while True:
+            symboles = sorted(self.positions)
+            with ExitStack() as verrous:
+                for symbole in symboles:
+                    verrous.enter_context(self.verrous_symboles.verrou(symbole))
+                with self.verrou_portefeuille:
+                    if not set(self.positions) <= set(symboles):
+                        continue
+                    return {
+                        'horodatage': self.horloge.time(),
+                        'balance': self.balance,
+                        'frais_cumules': self.frais_cumules,
+                        'positions': {symbole: dict(position) for symbole, position in self.positions.items()},
+                        'paires': list(self.paires),
+                        'scores_volatilite': dict(self.scores_volatilite),
+                        'ajustements_levier': dict(self.ajustements_levier),
+                        'journal': self.journal_trades.point_de_reprise()
+                    }
+
+    def _ecrire_point_de_reprise(self, etat):
+        """Écrit l'état copié et les tampons de bougies dans le point de reprise"""
+        try:
+            point_reprise.sauvegarder(self.fichier_reprise, etat, self.stockage_ohlcv.exporter())
+        except Exception as e:
+            logger.error(f"Erreur lors de l'écriture du point de reprise: {e}")
+
+    def _planifier_point_de_reprise(self):
+        """Demande l'écriture du point de reprise (tâches d'arrière-plan démarrées uniquement).
+
+        Appelée sous le verrou d'un symbole, et parfois sous la garde du
+        portefeuille : l'état n'est pas copié ici mais par l'écrivain de
+        persistance, qui ne tient aucun verrou du bot, après les lignes du
+        journal des trades déjà déposées. Les demandes rapprochées donnent
+        une seule copie.
+        """
+        if not self.persistance.actif:
+            return
+        self.dernier_point_de_reprise = self.horloge.time()
+        if self.point_de_reprise_en_attente:
+            return
+        self.point_de_reprise_en_attente = True
+        self.persistance.planifier('point_de_reprise', self._copier_et_ecrire_point_de_reprise)
+
+    def _copier_et_ecrire_point_de_reprise(self):
+        """Tâche de l'écrivain de persistance : copie l'état puis écrit le point de reprise"""
+        # Remis à zéro avant la copie : une modification qui suit la copie redemande un point de reprise
+        self.point_de_reprise_en_attente = False
+        self._ecrire_point_de_reprise(self._etat_point_de_reprise())
+
+    def _restaurer_point_de_reprise(self):
+        """Restaure l'état sauvegardé par _planifier_point_de_reprise ; None sans point de reprise lisible.
+
+        Les fermetures écrites dans le journal des trades après le point de
+        reprise sont rejouées : la position correspondante est retirée et le
+        solde crédité. Une position ouverte après le dernier point de reprise
+        est perdue (elle n'existait que dans le bot, qui trade sur papier).
+        """
+        if not os.path.exists(self.fichier_reprise):
+            return None
+        try:
+            etat, tampons = point_reprise.charger(self.fichier_reprise)
+        except Exception as e:
+            logger.error(f"Point de reprise {self.fichier_reprise} illisible, démarrage à froid: {e}")
+            return None
+
+        self.stockage_ohlcv.importer(tampons)
+        with self.verrou_portefeuille:
+            self.scores_volatilite.update(etat['scores_volatilite'])
+            self.balance = etat['balance']
+            self.frais_cumules = etat['frais_cumules']
+            for symbole, valeurs in etat['positions'].items():
+                self.positions[symbole] = valeurs
+
+            # Fermetures postérieures au point de reprise
+            reprise = etat['journal']
+            taille = os.path.getsize(self.journal_trades.chemin) if os.path.exists(self.journal_trades.chemin) else 0
+            if taille < reprise['octets']:
+                logger.error(f"Journal des trades plus court que le point de reprise ({taille} < {reprise['octets']} octets)")
+            else:
+                for trade in self.journal_trades.lire(**reprise):
+                    position = self.positions.get(trade['symbole'])
+                    if position is not None and position['heure_entree'] == trade['date_entree']:
+                        self.balance += position['marge_initiale'] + trade['profit_net']
+                        self.frais_cumules += trade['frais'] - position.get('frais_entree', 0)
+                        del self.positions[trade['symbole']]
+                    else:
+                        self.balance += trade['profit_net']
+                        logger.info(f"Reprise: fermeture de {trade['symbole']} ({trade['date_entree']}) sans position sauvegardée")
+
+        for symbole, position in list(self.positions.items()):
+            self.carnet_declencheurs.placer(symbole, position)
+            self._publier_position(symbole)
+
+        age = self.horloge.time() - etat['horodatage']
+        print(f"♻️ Reprise à chaud | Solde: {self.balance:.2f} USDT | Positions: {len(self.positions)} | Point de reprise de {age:.0f} s")
+        logger.info(f"Reprise depuis {self.fichier_reprise}: {len(self.positions)} positions, {len(etat['paires'])} paires, "
+                    f"{len(tampons)} tampons de bougies, point de reprise de {age:.0f} s")
+        return etat
+
+    def _reconcilier_apres_reprise(self, age):
+        """Après une reprise à chaud, rattrape en arrière-plan ce que le démarrage à froid vérifiait.
+
+        Les niveaux des positions reprises sont confrontés aux prix actuels,
+        les paires dont le marché n'est plus actif sont écartées et, si le
+        classement repris date de plus de PAIR_RANKING_MAX_AGE secondes, les
+        paires sont réanalysées (le flux poussé garde les symboles suivis au
+        démarrage).
+        """
+        try:
+            with self.ordonnanceur.priorite(PRIORITE_PROTECTION):
+                for symbole in list(self.positions):
+                    ticker = self.exchange.fetch_ticker(symbole)
+                    self.verifier_stop_loss_take_profit(symbole, ticker['last'])
+                marches = self.exchange.load_markets()
+
+            inactives = [paire for paire in self.paires if paire not in marches or not marches[paire]['active']]
+            if inactives:
+                logger.info(f"Reprise: paires écartées (marché inactif): {inactives}")
+                self.paires = [paire for paire in self.paires if paire not in inactives]
+
+            if age > PAIR_RANKING_MAX_AGE:
+                with self.ordonnanceur.priorite(PRIORITE_FOND):
+                    paires = self.analyser_paires()
+                for paire in paires:
+                    self.ajustements_levier.setdefault(paire, self.parametres['levier_base'])
+                self.paires = paires
+            logger.info(f"Réconciliation après reprise terminée: {len(self.positions)} positions, {len(self.paires)} paires")
+        except Exception as e:
+            logger.error(f"Erreur lors de la réconciliation après reprise: {e}")
+
+    def _enregistrer_evenement(self, type_evenement, symbole, **champs):
+        """Dépose un événement de trading dans le stockage SQLite (écrit par lots, hors du verrou)"""
+        if self.stockage_trades is None:
+            return
+        champs.setdefault('horodatage', self.horloge.maintenant().strftime('%Y-%m-%d %H:%M:%S'))
+        self.stockage_trades.enregistrer(dict(champs, type=type_evenement, symbole=symbole))
+
     def verifier_connexion(self):
         """Vérifie la connexion à l'API de l'exchange"""
         try:
@@ -230,24 +602,23 @@ class BotScalpingAvance:
     def recuperer_ohlcv(self, symbole, timeframe='1m', limite=100):
         """Récupère les données OHLCV avec mise en cache pour optimiser les appels API"""
         try:
-            cle_cache = f"{symbole}_{timeframe}_{limite}"
-            temps_actuel = time.time()
-            
-            # Utiliser les données en cache si disponibles et récentes
-            if (cle_cache in self.cache_donnees and 
-                temps_actuel - self.cache_donnees[cle_cache]['temps'] < 3):
-                return self.cache_donnees[cle_cache]['donnees']
+            # Utiliser les données en cache si disponibles et récentes (une fenêtre plus
+            # large déjà en cache sert aussi les demandes portant sur moins de bougies)
+            df = self.cache_donnees.obtenir(symbole, timeframe, limite)
+            if df is not None:
+                return df
             
-            ohlcv = self.exchange.fetch_ohlcv(symbole, timeframe, limit=limite)
-            if not ohlcv or len(ohlcv) < limite * 0.9:
+            # Seules les bougies manquantes sont téléchargées, le DataFrame est une copie du tampon
+            if RESAMPLE_FROM_1M and timeframe in TIMEFRAMES_REECHANTILLONNES:
+                df = self.reechantillonneur.recuperer(symbole, timeframe, limite)
+            else:
+                df = self.stockage_ohlcv.recuperer(symbole, timeframe, limite)
+            if df is None or len(df) < limite * 0.9:
                 return None
-                
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             
-            # Mettre en cache les données
-            self.cache_donnees[cle_cache] = {'donnees': df, 'temps': temps_actuel}
-            return df
+            # Mettre en cache les données, l'appelant reçoit son propre DataFrame
+            self.cache_donnees.stocker(symbole, timeframe, df)
+            return df.copy(deep=False)
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des données OHLCV pour {symbole}: {e}")
             return None
@@ -309,9 +680,9 @@ class BotScalpingAvance:
             metrics = metriques_paires[paire]
             logger.info(f"{paire}: Score {metrics['score']:.2f}, Vol 1m {metrics['volatilite_1m']:.2f}%, Vol 5m {metrics['volatilite_5m']:.2f}%, Var 24h {metrics['variation_24h']:.2f}%")
         
-        return paires_triees[:MAX_POSITIONS*2] if paires_triees else ['BTC/USDT:USDT', 'ETH/USDT:USDT']
+        return paires_triees[:self.parametres['positions_max']*2] if paires_triees else ['BTC/USDT:USDT', 'ETH/USDT:USDT']
 
-    def calculer_indicateurs(self, df):
+    def calculer_indicateurs(self, df, serie_complete=False):
         """Calcule les indicateurs techniques pour l'analyse"""
         # EMAs
         df['ema_5'] = df['close'].ewm(span=5, adjust=False).mean()
@@ -354,22 +725,53 @@ class BotScalpingAvance:
         # Momentum
         df['momentum'] = df['close'] / df['close'].shift(10) - 1
         
-        # Divergences RSI
-        df['divergence_haussiere'] = False
-        df['divergence_baissiere'] = False
-        
-        if len(df) > 30:
-            for i in range(5, 30):
-                if df['low'].iloc[-i] < df['low'].iloc[-i-1] and df['rsi'].iloc[-i] > df['rsi'].iloc[-i-1]:
-                    df.loc[df.index[-i], 'divergence_haussiere'] = True
-                if df['high'].iloc[-i] > df['high'].iloc[-i-1] and df['rsi'].iloc[-i] < df['rsi'].iloc[-i-1]:
-                    df.loc[df.index[-i], 'divergence_baissiere'] = True
+        # Divergences RSI (dernières bougies en direct, toute la série pour les backtests)
+        df['divergence_haussiere'], df['divergence_baissiere'] = detecter_divergences(
+            df['low'].to_numpy(), df['high'].to_numpy(), df['rsi'].to_numpy(),
+            largeur_pivot=DIVERGENCE_PIVOT_WIDTH, ecart_max=DIVERGENCE_LOOKBACK, serie_complete=serie_complete)
         
         # Identification des patterns de chandeliers
         self.identifier_patterns_chandeliers(df)
         
         return df.dropna()
 
+    def calculer_indicateurs_memoises(self, symbole, df, timeframe='1m'):
+        """calculer_indicateurs partagé entre threads : recalculé seulement si les bougies ont changé"""
+        # Une entrée par symbole et timeframe, valable jusqu'à la prochaine bougie clôturée
+        cle = (symbole, timeframe)
+        resultat = self.cache_indicateurs.obtenir(cle, df)
+        if resultat is None:
+            resultat = self.calculer_indicateurs(df)
+            self.cache_indicateurs.stocker(cle, df, resultat)
+        return self._fenetre_demandee(resultat, df)
+
+    def calculer_indicateurs_analyse(self, symbole, df):
+        """Indicateurs lus par verifier_signaux et ajuster_levier_et_niveaux, évalués paresseusement si activé"""
+        if not LAZY_INDICATORS:
+            return self.calculer_indicateurs_memoises(symbole, df)
+        cle = (symbole, '1m', 'analyse')
+        resultat = self.cache_indicateurs.obtenir(cle, df)
+        if resultat is None:
+            resultat, _ = self.graphe_indicateurs.evaluer(df, self.demandes_analyse)
+            # Données incomplètes : le calcul complet (dropna) fait foi
+            if resultat is None:
+                return self.calculer_indicateurs_memoises(symbole, df)
+            self.cache_indicateurs.stocker(cle, df, resultat)
+        return self._fenetre_demandee(resultat, df)
+
+    @staticmethod
+    def _fenetre_demandee(resultat, df):
+        """Lignes d'un résultat mémorisé couvertes par ``df`` ; chaque appelant reçoit son propre DataFrame"""
+        debut = df['timestamp'].iloc[0]
+        if resultat['timestamp'].iloc[0] < debut:
+            # Calculé sur une fenêtre plus large : seules les bougies demandées sont rendues
+            return resultat[resultat['timestamp'] >= debut]
+        return resultat.copy(deep=False)
+
+    def indicateurs_incrementaux(self, symbole, timeframe='1m'):
+        """Dernières valeurs des indicateurs, mises à jour en O(1) depuis le tampon OHLCV"""
+        return self.indicateurs_flux.synchroniser(symbole, timeframe, self.stockage_ohlcv.tampon(symbole, timeframe))
+
     def calculer_atr(self, df, periode=14):
         """Calcule l'Average True Range (ATR)"""
         high = df['high']
@@ -411,6 +813,11 @@ class BotScalpingAvance:
         
         return df
 
+    # Colonnes lues par ajuster_levier_et_niveaux -> nombre de dernières lignes utilisées (None = toutes)
+    CARACTERISTIQUES_LEVIER = {
+        'close': None, 'atr': 1, 'bb_width': 20, 'ema_8': 1, 'ema_21': 1, 'volume_ratio': 1
+    }
+
     def ajuster_levier_et_niveaux(self, symbole, df):
         """Ajuste dynamiquement le levier et les niveaux de stop-loss/take-profit"""
         # Obtenir les métriques de volatilité
@@ -424,11 +831,12 @@ class BotScalpingAvance:
         est_tendance = tendance_haussiere or tendance_baissiere
         
         # Ajuster le levier en fonction des conditions du marché et de la volatilité
-        levier_base = max(10, min(MAX_LEVERAGE, int(25 - (volatilite * 1.5))))
+        levier_max = self.parametres['levier_max']
+        levier_base = max(10, min(levier_max, int(25 - (volatilite * 1.5))))
         
         # Augmenter le levier pour les marchés en tendance forte
         if est_tendance and df['volume_ratio'].iloc[-1] > 1.2:
-            levier = min(MAX_LEVERAGE, int(levier_base * 1.3))
+            levier = min(levier_max, int(levier_base * 1.3))
         # Réduire le levier pour les marchés en range ou très volatils
         elif est_range or volatilite > 5:
             levier = max(5, int(levier_base * 0.8))
@@ -459,6 +867,14 @@ class BotScalpingAvance:
         
         return levier, sl_pct/100, tp_pct/100
 
+    # Colonnes lues par verifier_signaux -> nombre de dernières lignes utilisées
+    CARACTERISTIQUES_SIGNAUX = {
+        'close': 2, 'ema_8': 2, 'ema_21': 2, 'rsi': 2, 'volume_ratio': 2, 'high_max': 2, 'low_min': 2,
+        'macd': 2, 'macd_signal': 2, 'bb_width': 20, 'bb_upper': 2, 'bb_lower': 2,
+        'marteau': 2, 'absorption_haussiere': 2, 'etoile_filante': 2, 'absorption_baissiere': 2,
+        'divergence_haussiere': 5, 'divergence_baissiere': 5
+    }
+
     def verifier_signaux(self, df, symbole):
         """Système avancé de détection de signaux de trading"""
         if len(df) < 30:
@@ -545,9 +961,9 @@ class BotScalpingAvance:
             score_long += 0.5
             score_short += 0.5
             
-        # Seuil de décision (7/10 = 70% de confiance)
-        signal_achat = score_long >= 7
-        signal_vente = score_short >= 7
+        # Seuil de décision (7/10 = 70% de confiance par défaut)
+        signal_achat = score_long >= self.parametres['seuil_signal']
+        signal_vente = score_short >= self.parametres['seuil_signal']
         
         # Enregistrer la force du signal pour l'analyse
         force_signal = max(score_long, score_short) / 10
@@ -563,109 +979,120 @@ class BotScalpingAvance:
         # Utiliser le taux taker par défaut (plus conservateur)
         return valeur_position * TAKER_FEE
 
+    def _publier_position(self, symbole):
+        """Publie un nouvel instantané du portefeuille où seule la position ``symbole`` a changé.
+
+        Appelé par le détenteur du verrou du symbole, une fois la position
+        cohérente ; l'instantané est remplacé d'un bloc sous la garde du
+        portefeuille, avec le solde du même instant.
+        """
+        with self.verrou_portefeuille:
+            positions = dict(self.instantane.positions)
+            position = self.positions.get(symbole)
+            if position is None:
+                positions.pop(symbole, None)
+            else:
+                positions[symbole] = MappingProxyType(dict(position))
+            self.instantane = InstantanePortefeuille(MappingProxyType(positions), self.balance, self.horloge.time())
+
     def executer_trade(self, symbole, action, prix, levier, sl_pct=None, tp_pct=None):
         """Exécute un trade avec gestion des risques améliorée"""
+        # Messages formatés sous le verrou, affichés et journalisés après
+        console, details = [], []
         try:
-            with self.lock:
-                horodatage = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            with self.verrous_symboles.verrou(symbole):
+                horodatage = self.horloge.maintenant().strftime('%Y-%m-%d %H:%M:%S')
                 
-                # Ajuster le risque en fonction des performances récentes
-                risque_base = RISK_PER_TRADE
+                if action in ('acheter', 'vendre_short'):
+                    # Solde, nombre de positions et taille : sous la garde du portefeuille, le temps de l'ouverture
+                    with self.verrou_portefeuille:
+                        # Ajuster le risque en fonction des performances récentes
+                        risque_base = self.parametres['risque_par_trade']
                 
-                # Augmenter le risque après une série de trades gagnants
-                if self.trades_gagnants_consecutifs >= 3:
-                    risque_utilise = min(0.4, risque_base * (1 + 0.1 * min(self.trades_gagnants_consecutifs, 5)))
-                # Réduire le risque après une série de trades perdants
-                elif self.trades_perdants_consecutifs >= 2:
-                    risque_utilise = max(0.15, risque_base * (1 - 0.1 * min(self.trades_perdants_consecutifs, 5)))
-                else:
-                    risque_utilise = risque_base
+                        # Augmenter le risque après une série de trades gagnants
+                        if self.metriques.gagnants_consecutifs >= 3:
+                            risque_utilise = min(0.4, risque_base * (1 + 0.1 * min(self.metriques.gagnants_consecutifs, 5)))
+                        # Réduire le risque après une série de trades perdants
+                        elif self.metriques.perdants_consecutifs >= 2:
+                            risque_utilise = max(0.15, risque_base * (1 - 0.1 * min(self.metriques.perdants_consecutifs, 5)))
+                        else:
+                            risque_utilise = risque_base
                 
-                # Calculer la taille de la position
-                montant_risque = self.balance * risque_utilise
-                marge = montant_risque / levier
-                quantite = (montant_risque * levier) / prix
+                        # Calculer la taille de la position
+                        montant_risque = self.balance * risque_utilise
+                        marge = montant_risque / levier
+                        quantite = (montant_risque * levier) / prix
                 
-                # Calculer les frais
-                frais = self.calculer_frais(quantite, prix, levier)
+                        # Calculer les frais
+                        frais = self.calculer_frais(quantite, prix, levier)
                 
-                if action == 'acheter' and self.balance > 10 and len(self.positions) < MAX_POSITIONS:
-                    if symbole not in self.positions:
-                        # Définir les niveaux de stop loss et take profit
-                        prix_sl = prix * (1 - sl_pct) if sl_pct else None
-                        prix_tp = prix * (1 + tp_pct) if tp_pct else None
+                        if action == 'acheter' and self.balance > 10 and len(self.positions) < self.parametres['positions_max']:
+                            if symbole not in self.positions:
+                                # Définir les niveaux de stop loss et take profit
+                                prix_sl = prix * (1 - sl_pct) if sl_pct else None
+                                prix_tp = prix * (1 + tp_pct) if tp_pct else None
                         
-                        self.positions[symbole] = {
-                            'quantite': quantite,
-                            'prix_entree': prix,
-                            'levier': levier,
-                            'marge_initiale': marge,
-                            'direction': 'long',
-                            'heure_entree': horodatage,
-                            'stop_loss': prix_sl,
-                            'take_profit': prix_tp,
-                            'risque_utilise': risque_utilise,
-                            'frais_entree': frais
-                        }
-                        self.balance -= (marge + frais)
-                        self.frais_cumules += frais
+                                self.positions[symbole] = {
+                                    'quantite': quantite,
+                                    'prix_entree': prix,
+                                    'levier': levier,
+                                    'marge_initiale': marge,
+                                    'direction': 'long',
+                                    'heure_entree': horodatage,
+                                    'stop_loss': prix_sl,
+                                    'take_profit': prix_tp,
+                                    'risque_utilise': risque_utilise,
+                                    'frais_entree': frais
+                                }
+                                self.balance -= (marge + frais)
+                                self.frais_cumules += frais
+                                self.carnet_declencheurs.placer(symbole, self.positions[symbole])
+                                self._publier_position(symbole)
+                                self._planifier_point_de_reprise()
                         
-                        # Log simplifié dans la console
-                        print(f"✅ LONG {symbole} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f}")
+                                # Log simplifié dans la console
+                                console.append(f"✅ LONG {symbole} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f}")
                         
-                        # Log détaillé dans le fichier
-                        logger.info(f"OUVERTURE LONG {symbole} | Qté: {quantite:.6f} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f} | Frais: {frais:.4f} USDT | Risque: {risque_utilise*100:.1f}%")
+                                # Log détaillé dans le fichier
+                                details.append(f"OUVERTURE LONG {symbole} | Qté: {quantite:.6f} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f} | Frais: {frais:.4f} USDT | Risque: {risque_utilise*100:.1f}%")
                         
-                        # Ajouter à l'historique des trades
-                        self.historique_trades.append({
-                            'symbole': symbole,
-                            'action': 'ouverture_long',
-                            'prix': prix,
-                            'quantite': quantite,
-                            'levier': levier,
-                            'horodatage': horodatage,
-                            'marge': marge,
-                            'frais': frais
-                        })
-
-                elif action == 'vendre_short' and self.balance > 10 and len(self.positions) < MAX_POSITIONS:
-                    if symbole not in self.positions:
-                        # Définir les niveaux de stop loss et take profit
-                        prix_sl = prix * (1 + sl_pct) if sl_pct else None
-                        prix_tp = prix * (1 - tp_pct) if tp_pct else None
+                                self._enregistrer_evenement('ouverture', symbole, horodatage=horodatage, direction='long', prix=prix,
+                                                            quantite=quantite, levier=levier, stop_loss=prix_sl, take_profit=prix_tp,
+                                                            frais=frais, marge=marge, risque_utilise=risque_utilise)
+
+                        elif action == 'vendre_short' and self.balance > 10 and len(self.positions) < self.parametres['positions_max']:
+                            if symbole not in self.positions:
+                                # Définir les niveaux de stop loss et take profit
+                                prix_sl = prix * (1 + sl_pct) if sl_pct else None
+                                prix_tp = prix * (1 - tp_pct) if tp_pct else None
                         
-                        self.positions[symbole] = {
-                            'quantite': quantite,
-                            'prix_entree': prix,
-                            'levier': levier,
-                            'marge_initiale': marge,
-                            'direction': 'short',
-                            'heure_entree': horodatage,
-                            'stop_loss': prix_sl,
-                            'take_profit': prix_tp,
-                            'risque_utilise': risque_utilise,
-                            'frais_entree': frais
-                        }
-                        self.balance -= (marge + frais)
-                        self.frais_cumules += frais
+                                self.positions[symbole] = {
+                                    'quantite': quantite,
+                                    'prix_entree': prix,
+                                    'levier': levier,
+                                    'marge_initiale': marge,
+                                    'direction': 'short',
+                                    'heure_entree': horodatage,
+                                    'stop_loss': prix_sl,
+                                    'take_profit': prix_tp,
+                                    'risque_utilise': risque_utilise,
+                                    'frais_entree': frais
+                                }
+                                self.balance -= (marge + frais)
+                                self.frais_cumules += frais
+                                self.carnet_declencheurs.placer(symbole, self.positions[symbole])
+                                self._publier_position(symbole)
+                                self._planifier_point_de_reprise()
                         
-                        # Log simplifié dans la console
-                        print(f"✅ SHORT {symbole} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f}")
+                                # Log simplifié dans la console
+                                console.append(f"✅ SHORT {symbole} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f}")
                         
-                        # Log détaillé dans le fichier
-                        logger.info(f"OUVERTURE SHORT {symbole} | Qté: {quantite:.6f} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f} | Frais: {frais:.4f} USDT | Risque: {risque_utilise*100:.1f}%")
+                                # Log détaillé dans le fichier
+                                details.append(f"OUVERTURE SHORT {symbole} | Qté: {quantite:.6f} | Prix: {prix:.4f} | Levier: {levier}x | SL: {prix_sl:.4f} | TP: {prix_tp:.4f} | Frais: {frais:.4f} USDT | Risque: {risque_utilise*100:.1f}%")
                         
-                        # Ajouter à l'historique des trades
-                        self.historique_trades.append({
-                            'symbole': symbole,
-                            'action': 'ouverture_short',
-                            'prix': prix,
-                            'quantite': quantite,
-                            'levier': levier,
-                            'horodatage': horodatage,
-                            'marge': marge,
-                            'frais': frais
-                        })
+                                self._enregistrer_evenement('ouverture', symbole, horodatage=horodatage, direction='short', prix=prix,
+                                                            quantite=quantite, levier=levier, stop_loss=prix_sl, take_profit=prix_tp,
+                                                            frais=frais, marge=marge, risque_utilise=risque_utilise)
 
                 elif action == 'fermer' and symbole in self.positions:
                     position = self.positions[symbole]
@@ -688,10 +1115,6 @@ class BotScalpingAvance:
                     # Profit net après frais
                     profit_net = profit_brut - frais_total
                     
-                    # Mettre à jour le solde
-                    self.balance += (position['marge_initiale'] + profit_net)
-                    self.frais_cumules += frais_sortie
-                    
                     # Calculer la durée du trade
                     duree_trade = datetime.strptime(horodatage, '%Y-%m-%d %H:%M:%S') - datetime.strptime(position['heure_entree'], '%Y-%m-%d %H:%M:%S')
                     duree_minutes = duree_trade.total_seconds() / 60
@@ -708,209 +1131,211 @@ class BotScalpingAvance:
                                                            (position['direction'] == 'short' and prix >= position['trailing_stop'])):
                         raison_fermeture = "TS"
                     
-                    # Log simplifié dans la console
-                    emoji = "🟢" if profit_net > 0 else "🔴"
-                    print(f"{emoji} FERMETURE {position['direction'].upper()} {symbole} | Prix: {prix:.4f} | P/L: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Raison: {raison_fermeture}")
-                    
-                    # Log détaillé dans le fichier
-                    logger.info(f"FERMETURE {position['direction'].upper()} {symbole} | Prix: {prix:.4f} | Profit brut: {profit_brut:.2f} USDT | Frais: {frais_total:.2f} USDT | Profit net: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Durée: {duree_minutes:.1f} min | Solde: {self.balance:.2f} USDT | Raison: {raison_fermeture}")
-                    
-                    # Mettre à jour les séries de trades gagnants/perdants
-                    if profit_net > 0:
-                        self.trades_gagnants_consecutifs += 1
-                        self.trades_perdants_consecutifs = 0
-                        if self.trades_gagnants_consecutifs > self.historique_performance["series_gagnantes"]["max"]:
-                            self.historique_performance["series_gagnantes"]["max"] = self.trades_gagnants_consecutifs
-                        self.historique_performance["series_gagnantes"]["actuelle"] = self.trades_gagnants_consecutifs
-                    else:
-                        self.trades_perdants_consecutifs += 1
-                        self.trades_gagnants_consecutifs = 0
-                        if self.trades_perdants_consecutifs > self.historique_performance["series_perdantes"]["max"]:
-                            self.historique_performance["series_perdantes"]["max"] = self.trades_perdants_consecutifs
-                        self.historique_performance["series_perdantes"]["actuelle"] = self.trades_perdants_consecutifs
+                    # Solde, séries et historique : sous la garde du portefeuille
+                    with self.verrou_portefeuille:
+                        # Mettre à jour le solde
+                        self.balance += (position['marge_initiale'] + profit_net)
+                        self.frais_cumules += frais_sortie
                     
-                    # Ajouter à l'historique des trades et au suivi des performances
-                    enregistrement_trade = {
-                        'symbole': symbole,
-                        'action': f"fermeture_{position['direction']}",
-                        'prix_entree': prix_entree,
-                        'prix_sortie': prix,
-                        'profit_brut': profit_brut,
-                        'frais': frais_total,
-                        'profit_net': profit_net,
-                        'profit_pct': profit_pct,
-                        'levier': levier_pos,
-                        'date_entree': position['heure_entree'],
-                        'date_sortie': horodatage,
-                        'duree_minutes': duree_minutes,
-                        'raison_fermeture': raison_fermeture
-                    }
+                        # Log simplifié dans la console
+                        emoji = "🟢" if profit_net > 0 else "🔴"
+                        console.append(f"{emoji} FERMETURE {position['direction'].upper()} {symbole} | Prix: {prix:.4f} | P/L: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Raison: {raison_fermeture}")
                     
-                    self.historique_trades.append(enregistrement_trade)
-                    self.historique_performance['trades'].append(enregistrement_trade)
+                        # Log détaillé dans le fichier
+                        details.append(f"FERMETURE {position['direction'].upper()} {symbole} | Prix: {prix:.4f} | Profit brut: {profit_brut:.2f} USDT | Frais: {frais_total:.2f} USDT | Profit net: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Durée: {duree_minutes:.1f} min | Solde: {self.balance:.2f} USDT | Raison: {raison_fermeture}")
                     
-                    # Mettre à jour le taux de réussite
-                    total_trades = len(self.historique_performance['trades'])
-                    trades_gagnants = sum(1 for t in self.historique_performance['trades'] if t.get('profit_net', 0) > 0)
-                    self.historique_performance['taux_reussite'] = (trades_gagnants / total_trades) * 100 if total_trades > 0 else 0
-                    self.historique_performance['profit_total'] += profit_net
-                    self.historique_performance['frais_total'] += frais_total
+                        # Suivi des performances
+                        enregistrement_trade = {
+                            'symbole': symbole,
+                            'action': f"fermeture_{position['direction']}",
+                            'prix_entree': prix_entree,
+                            'prix_sortie': prix,
+                            'profit_brut': profit_brut,
+                            'frais': frais_total,
+                            'profit_net': profit_net,
+                            'profit_pct': profit_pct,
+                            'levier': levier_pos,
+                            'date_entree': position['heure_entree'],
+                            'date_sortie': horodatage,
+                            'duree_minutes': duree_minutes,
+                            'raison_fermeture': raison_fermeture
+                        }
                     
-                    # Mettre à jour le meilleur/pire trade
-                    if not self.historique_performance['meilleur_trade']['symbole'] or profit_net > self.historique_performance['meilleur_trade']['profit']:
-                        self.historique_performance['meilleur_trade'] = {'symbole': symbole, 'profit': profit_net}
-                    if not self.historique_performance['pire_trade']['symbole'] or profit_net < self.historique_performance['pire_trade']['profit']:
-                        self.historique_performance['pire_trade'] = {'symbole': symbole, 'profit': profit_net}
+                        # Séries, taux de réussite, drawdown, Sharpe et compteurs du jour en temps constant
+                        self.metriques.ajouter(enregistrement_trade)
                     
-                                        # Mettre à jour le PnL quotidien
-                    aujourd_hui = datetime.now().strftime('%Y-%m-%d')
-                    if aujourd_hui not in self.historique_performance['pnl_quotidien']:
-                        self.historique_performance['pnl_quotidien'][aujourd_hui] = 0
-                    self.historique_performance['pnl_quotidien'][aujourd_hui] += profit_net
+                        # Une ligne ajoutée au journal des trades (écrite après les verrous), l'état agrégé est sauvegardé à part
+                        self.journal_trades.ajouter(enregistrement_trade, differer=True)
+                        self._enregistrer_evenement('fermeture', symbole, horodatage=horodatage, direction=position['direction'],
+                                                    prix=prix, quantite=quantite_pos, levier=levier_pos, prix_entree=prix_entree,
+                                                    profit_net=profit_net, profit_pct=profit_pct, frais=frais_total,
+                                                    duree_minutes=duree_minutes, raison=raison_fermeture, profit_brut=profit_brut,
+                                                    date_entree=position['heure_entree'])
                     
-                    # Mettre à jour le nombre de trades
-                    if 'nombre_trades' not in self.historique_performance:
-                        self.historique_performance['nombre_trades'] = {'total': 0, 'gagnants': 0, 'perdants': 0}
-                    self.historique_performance['nombre_trades']['total'] += 1
-                    if profit_net > 0:
-                        self.historique_performance['nombre_trades']['gagnants'] += 1
-                    else:
-                        self.historique_performance['nombre_trades']['perdants'] += 1
+                        # Enregistrer le trade dans le CSV (écrit par l'écrivain de persistance, dans l'ordre des fermetures)
+                        self.persistance.ajouter_ligne(self.fichier_journal, f"{horodatage},{symbole},{position['direction']},{prix_entree:.4f},{prix:.4f},{quantite_pos:.6f},{levier_pos},{profit_net:.2f},{profit_pct:.2f},{frais_total:.2f},{duree_minutes:.1f}\n")
                     
-                    # Enregistrer le trade dans le CSV
-                    with open(TRADES_LOG_FILE, 'a', encoding='utf-8') as f:
-                        f.write(f"{horodatage},{symbole},{position['direction']},{prix_entree:.4f},{prix:.4f},{quantite_pos:.6f},{levier_pos},{profit_net:.2f},{profit_pct:.2f},{frais_total:.2f},{duree_minutes:.1f}\n")
+                        # Supprimer la position
+                        del self.positions[symbole]
+                        self._publier_position(symbole)
+                        self._planifier_point_de_reprise()
                     
-                    # Supprimer la position
-                    del self.positions[symbole]
+                        # Sauvegarder l'historique des performances périodiquement (copie ici, écriture hors du verrou)
+                        if self.horloge.time() - self.derniere_sauvegarde > self.intervalle_sauvegarde:  # Toutes les 5 minutes
+                            self._sauvegarder_historique_performance()
+                            self.derniere_sauvegarde = self.horloge.time()
                     
-                    # Sauvegarder l'historique des performances périodiquement
-                    if time.time() - self.derniere_sauvegarde > 300:  # Toutes les 5 minutes
-                        self._sauvegarder_historique_performance()
-                        self.derniere_sauvegarde = time.time()
+                    self.carnet_declencheurs.retirer(symbole)
                 
         except Exception as e:
             logger.error(f"Erreur lors de l'exécution du trade pour {symbole}: {e}")
+        
+        # Écriture (et fsync selon TRADE_JOURNAL_FSYNC) du journal des trades, hors de la garde du portefeuille
+        self.journal_trades.ecrire()
+        for message in console:
+            print(message)
+        for message in details:
+            logger.info(message)
 
     def verifier_stop_loss_take_profit(self, symbole, prix_actuel):
         """Vérifie et gère les stop-loss et take-profit pour une position"""
-        if symbole not in self.positions:
-            return
-            
-        position = self.positions[symbole]
-        direction = position['direction']
-        prix_entree = position['prix_entree']
-        
-        # Vérifier le stop loss
-        if position.get('stop_loss'):
-            if (direction == 'long' and prix_actuel <= position['stop_loss']) or \
-               (direction == 'short' and prix_actuel >= position['stop_loss']):
-                self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
-                return
-        
-        # Vérifier le take profit
-        if position.get('take_profit'):
-            if (direction == 'long' and prix_actuel >= position['take_profit']) or \
-               (direction == 'short' and prix_actuel <= position['take_profit']):
-                self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+        # Les positions d'autres symboles restent gérées en parallèle
+        with self.verrous_symboles.verrou(symbole):
+            if symbole not in self.positions:
                 return
+            
+            position = self.positions[symbole]
+            direction = position['direction']
+            prix_entree = position['prix_entree']
+        
+            # Vérifier le stop loss
+            if position.get('stop_loss'):
+                if (direction == 'long' and prix_actuel <= position['stop_loss']) or \
+                   (direction == 'short' and prix_actuel >= position['stop_loss']):
+                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    return
         
-        # Vérifier le trailing stop
-        if position.get('trailing_stop'):
-            if (direction == 'long' and prix_actuel <= position['trailing_stop']) or \
-               (direction == 'short' and prix_actuel >= position['trailing_stop']):
-                self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
-                return
+            # Vérifier le take profit
+            if position.get('take_profit'):
+                if (direction == 'long' and prix_actuel >= position['take_profit']) or \
+                   (direction == 'short' and prix_actuel <= position['take_profit']):
+                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    return
         
-        # Calculer le profit actuel
-        if direction == 'long':
-            profit_pct = (prix_actuel / prix_entree - 1) * 100 * position['levier']
-        else:
-            profit_pct = (prix_entree / prix_actuel - 1) * 100 * position['levier']
+            # Vérifier le trailing stop
+            if position.get('trailing_stop'):
+                if (direction == 'long' and prix_actuel <= position['trailing_stop']) or \
+                   (direction == 'short' and prix_actuel >= position['trailing_stop']):
+                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    return
         
-        # Gérer le trailing stop dynamique
-        if not position.get('trailing_actif', False):
-            # Activer le trailing stop quand le profit atteint un certain seuil
-            if profit_pct >= 2.0:  # Activer à 2% de profit
-                if direction == 'long':
-                    trailing_stop = prix_actuel * 0.995  # 0.5% sous le prix actuel
-                else:
-                    trailing_stop = prix_actuel * 1.005  # 0.5% au-dessus du prix actuel
-                
-                position['trailing_stop'] = trailing_stop
-                position['trailing_actif'] = True
-                position['niveau_activation_trailing'] = prix_actuel
+            # Calculer le profit actuel
+            if direction == 'long':
+                profit_pct = (prix_actuel / prix_entree - 1) * 100 * position['levier']
+            else:
+                profit_pct = (prix_entree / prix_actuel - 1) * 100 * position['levier']
+        
+            # Gérer le trailing stop dynamique
+            ecart_trailing = self.parametres['trailing_ecart']
+            if not position.get('trailing_actif', False):
+                # Activer le trailing stop quand le profit atteint un certain seuil (2% par défaut)
+                if profit_pct >= self.parametres['trailing_activation_pct']:
+                    if direction == 'long':
+                        trailing_stop = prix_actuel * (1 - ecart_trailing)  # 0.5% sous le prix actuel par défaut
+                    else:
+                        trailing_stop = prix_actuel * (1 + ecart_trailing)  # 0.5% au-dessus du prix actuel par défaut
                 
-                # Log dans le fichier uniquement
-                logger.info(f"Trailing stop activé pour {symbole} {direction.upper()} à {trailing_stop:.4f} (Profit: {profit_pct:.2f}%)")
-        
-        # Mettre à jour le trailing stop si le prix continue de bouger favorablement
-        elif position.get('trailing_actif', False):
-            if direction == 'long' and prix_actuel > position.get('niveau_activation_trailing', 0):
-                # Déplacer le trailing stop vers le haut
-                nouveau_trailing = prix_actuel * 0.995
-                if nouveau_trailing > position['trailing_stop']:
-                    position['trailing_stop'] = nouveau_trailing
+                    position['trailing_stop'] = trailing_stop
+                    position['trailing_actif'] = True
                     position['niveau_activation_trailing'] = prix_actuel
+                
                     # Log dans le fichier uniquement
-                    logger.info(f"Trailing stop ajusté pour {symbole} LONG à {nouveau_trailing:.4f}")
+                    logger.info(f"Trailing stop activé pour {symbole} {direction.upper()} à {trailing_stop:.4f} (Profit: {profit_pct:.2f}%)")
+                    self._enregistrer_evenement('ajustement', symbole, direction=direction, prix=prix_actuel, raison='activation_trailing',
+                                                profit_pct=profit_pct, trailing_stop=trailing_stop)
+        
+            # Mettre à jour le trailing stop si le prix continue de bouger favorablement
+            elif position.get('trailing_actif', False):
+                if direction == 'long' and prix_actuel > position.get('niveau_activation_trailing', 0):
+                    # Déplacer le trailing stop vers le haut
+                    nouveau_trailing = prix_actuel * (1 - ecart_trailing)
+                    if nouveau_trailing > position['trailing_stop']:
+                        position['trailing_stop'] = nouveau_trailing
+                        position['niveau_activation_trailing'] = prix_actuel
+                        # Log dans le fichier uniquement
+                        logger.info(f"Trailing stop ajusté pour {symbole} LONG à {nouveau_trailing:.4f}")
+                        self._enregistrer_evenement('ajustement', symbole, direction=direction, prix=prix_actuel, raison='trailing',
+                                                    profit_pct=profit_pct, trailing_stop=nouveau_trailing)
             
-            elif direction == 'short' and prix_actuel < position.get('niveau_activation_trailing', float('inf')):
-                # Déplacer le trailing stop vers le bas
-                nouveau_trailing = prix_actuel * 1.005
-                if nouveau_trailing < position['trailing_stop']:
-                    position['trailing_stop'] = nouveau_trailing
-                    position['niveau_activation_trailing'] = prix_actuel
-                    # Log dans le fichier uniquement
-                    logger.info(f"Trailing stop ajusté pour {symbole} SHORT à {nouveau_trailing:.4f}")
-        
-        # Déplacer le stop loss au break-even après un certain profit
-        if not position.get('breakeven_actif', False) and profit_pct >= 1.0:
-            if direction == 'long':
-                nouveau_sl = prix_entree * 1.001  # Légèrement au-dessus du prix d'entrée
-            else:
-                nouveau_sl = prix_entree * 0.999  # Légèrement en-dessous du prix d'entrée
+                elif direction == 'short' and prix_actuel < position.get('niveau_activation_trailing', float('inf')):
+                    # Déplacer le trailing stop vers le bas
+                    nouveau_trailing = prix_actuel * (1 + ecart_trailing)
+                    if nouveau_trailing < position['trailing_stop']:
+                        position['trailing_stop'] = nouveau_trailing
+                        position['niveau_activation_trailing'] = prix_actuel
+                        # Log dans le fichier uniquement
+                        logger.info(f"Trailing stop ajusté pour {symbole} SHORT à {nouveau_trailing:.4f}")
+                        self._enregistrer_evenement('ajustement', symbole, direction=direction, prix=prix_actuel, raison='trailing',
+                                                    profit_pct=profit_pct, trailing_stop=nouveau_trailing)
+        
+            # Déplacer le stop loss au break-even après un certain profit
+            if not position.get('breakeven_actif', False) and profit_pct >= self.parametres['breakeven_pct']:
+                if direction == 'long':
+                    nouveau_sl = prix_entree * 1.001  # Légèrement au-dessus du prix d'entrée
+                else:
+                    nouveau_sl = prix_entree * 0.999  # Légèrement en-dessous du prix d'entrée
             
-            position['stop_loss'] = nouveau_sl
-            position['breakeven_actif'] = True
+                position['stop_loss'] = nouveau_sl
+                position['breakeven_actif'] = True
             
-            # Log dans le fichier uniquement
-            logger.info(f"Stop loss déplacé au break-even pour {symbole} {direction.upper()} à {nouveau_sl:.4f}")
-        
-        # Prendre des profits partiels
-        if not position.get('profit_partiel_pris', False) and profit_pct >= 3.0:
-            # Fermer la moitié de la position
-            position_originale = position.copy()
+                # Log dans le fichier uniquement
+                logger.info(f"Stop loss déplacé au break-even pour {symbole} {direction.upper()} à {nouveau_sl:.4f}")
+                self._enregistrer_evenement('ajustement', symbole, direction=direction, prix=prix_actuel, raison='breakeven',
+                                            profit_pct=profit_pct, stop_loss=nouveau_sl)
+        
+            # Prendre des profits partiels
+            if not position.get('profit_partiel_pris', False) and profit_pct >= self.parametres['profit_partiel_pct']:
+                # Fermer la moitié de la position
+                position_originale = position.copy()
             
-            # Réduire la quantité de moitié
-            position['quantite'] /= 2
-            position['marge_initiale'] /= 2
-            position['profit_partiel_pris'] = True
+                # Réduire la quantité de moitié
+                position['quantite'] /= 2
+                position['marge_initiale'] /= 2
+                position['profit_partiel_pris'] = True
             
-            # Calculer le profit pour la partie fermée
-            if direction == 'long':
-                profit_brut = (prix_actuel - prix_entree) / prix_entree * (position_originale['quantite'] / 2) * prix_actuel * position['levier']
-            else:
-                profit_brut = (prix_entree - prix_actuel) / prix_entree * (position_originale['quantite'] / 2) * prix_actuel * position['levier']
+                # Calculer le profit pour la partie fermée
+                if direction == 'long':
+                    profit_brut = (prix_actuel - prix_entree) / prix_entree * (position_originale['quantite'] / 2) * prix_actuel * position['levier']
+                else:
+                    profit_brut = (prix_entree - prix_actuel) / prix_entree * (position_originale['quantite'] / 2) * prix_actuel * position['levier']
             
-            # Calculer les frais
-            frais = self.calculer_frais(position_originale['quantite'] / 2, prix_actuel, position['levier'])
-            profit_net = profit_brut - frais
+                # Calculer les frais
+                frais = self.calculer_frais(position_originale['quantite'] / 2, prix_actuel, position['levier'])
+                profit_net = profit_brut - frais
             
-            # Mettre à jour le solde
-            self.balance += (position_originale['marge_initiale'] / 2 + profit_net)
-            self.frais_cumules += frais
+                # Mettre à jour le solde
+                with self.verrou_portefeuille:
+                    self.balance += (position_originale['marge_initiale'] / 2 + profit_net)
+                    self.frais_cumules += frais
             
-            # Log simplifié dans la console
-            print(f"🔄 PROFIT PARTIEL {symbole} {direction.upper()} | Prix: {prix_actuel:.4f} | P/L: {profit_net:.2f} USDT ({profit_pct:.2f}%)")
+                # Log simplifié dans la console
+                print(f"🔄 PROFIT PARTIEL {symbole} {direction.upper()} | Prix: {prix_actuel:.4f} | P/L: {profit_net:.2f} USDT ({profit_pct:.2f}%)")
             
-            # Log détaillé dans le fichier
-            logger.info(f"PROFIT PARTIEL {symbole} {direction.upper()} | Prix: {prix_actuel:.4f} | Profit: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Frais: {frais:.2f} USDT")
+                # Log détaillé dans le fichier
+                logger.info(f"PROFIT PARTIEL {symbole} {direction.upper()} | Prix: {prix_actuel:.4f} | Profit: {profit_net:.2f} USDT ({profit_pct:.2f}%) | Frais: {frais:.2f} USDT")
+                self._enregistrer_evenement('profit_partiel', symbole, direction=direction, prix=prix_actuel,
+                                            quantite=position_originale['quantite'] / 2, levier=position['levier'],
+                                            prix_entree=prix_entree, profit_net=profit_net, profit_pct=profit_pct, frais=frais)
+                self._planifier_point_de_reprise()
+        
+            # Niveaux de la position (éventuellement déplacés) pour les prochains prix
+            self.carnet_declencheurs.placer(symbole, position)
+            self._publier_position(symbole)
 
     def analyser_conditions_marche(self, symbole):
         """Analyse les conditions du marché pour un symbole donné"""
         try:
-            temps_actuel = time.time()
+            temps_actuel = self.horloge.time()
             
             # Vérifier si une analyse récente existe déjà
             if symbole in self.derniere_analyse and temps_actuel - self.derniere_analyse[symbole] < 300:  # 5 minutes
@@ -925,17 +1350,17 @@ class BotScalpingAvance:
             if df_1m is None or df_5m is None or df_15m is None or df_1h is None:
                 return
                 
-            # Calculer les indicateurs
-            df_1m = self.calculer_indicateurs(df_1m)
-            df_5m = self.calculer_indicateurs(df_5m)
-            df_15m = self.calculer_indicateurs(df_15m)
-            df_1h = self.calculer_indicateurs(df_1h)
+            # Indicateurs incrémentaux sur chaque timeframe (les tampons viennent d'être rafraîchis)
+            ind_1m = self.indicateurs_incrementaux(symbole, '1m')
+            ind_5m = self.indicateurs_incrementaux(symbole, '5m')
+            ind_15m = self.indicateurs_incrementaux(symbole, '15m')
+            ind_1h = self.indicateurs_incrementaux(symbole, '1h')
             
             # Déterminer la tendance sur chaque timeframe
-            tendance_1m = 'haussière' if df_1m['ema_8'].iloc[-1] > df_1m['ema_21'].iloc[-1] else 'baissière'
-            tendance_5m = 'haussière' if df_5m['ema_8'].iloc[-1] > df_5m['ema_21'].iloc[-1] else 'baissière'
-            tendance_15m = 'haussière' if df_15m['ema_8'].iloc[-1] > df_15m['ema_21'].iloc[-1] else 'baissière'
-            tendance_1h = 'haussière' if df_1h['ema_8'].iloc[-1] > df_1h['ema_21'].iloc[-1] else 'baissière'
+            tendance_1m = 'haussière' if ind_1m['ema_8'] > ind_1m['ema_21'] else 'baissière'
+            tendance_5m = 'haussière' if ind_5m['ema_8'] > ind_5m['ema_21'] else 'baissière'
+            tendance_15m = 'haussière' if ind_15m['ema_8'] > ind_15m['ema_21'] else 'baissière'
+            tendance_1h = 'haussière' if ind_1h['ema_8'] > ind_1h['ema_21'] else 'baissière'
             
             # Déterminer l'alignement global des tendances
             alignement_tendance = sum([
@@ -974,50 +1399,71 @@ class BotScalpingAvance:
 
     def gerer_positions_ouvertes(self):
         """Gère les positions existantes - ajuste les stops, prend des profits partiels, etc."""
-        for symbole in list(self.positions.keys()):
+        # Valorisation et durées de toutes les positions en une passe sur le livre, aux prix de l'instantané partagé
+        prix_instantane = {symbole: self.service_prix.prix(symbole, age_max=PRICE_SNAPSHOT_INTERVAL * 5)
+                           for symbole in list(self.positions)}
+        self.positions.marquer(prix_instantane)
+        profits, _ = self.positions.valorisation()
+        durees = self.positions.durees_minutes(self.horloge.maintenant())
+        # Positions des relevés ci-dessus : une position ouverte ou fermée depuis est traitée au prochain passage
+        for symbole, duree_minutes in durees.items():
             try:
-                position = self.positions[symbole]
-                df = self.recuperer_ohlcv(symbole, '1m', 30)
-                
-                if df is None or len(df) < 20:
+                position = self.positions.get(symbole)
+                if position is None:
                     continue
-                    
-                prix_actuel = df['close'].iloc[-1]
-                prix_entree = position['prix_entree']
-                direction = position['direction']
-                duree = datetime.now() - datetime.strptime(position['heure_entree'], '%Y-%m-%d %H:%M:%S')
-                duree_minutes = duree.total_seconds() / 60
                 
-                # Calculer le profit/perte actuel
-                if direction == 'long':
-                    profit_pct = (prix_actuel / prix_entree - 1) * 100 * position['levier']
-                else:
-                    profit_pct = (prix_entree / prix_actuel - 1) * 100 * position['levier']
+                direction = position['direction']
+                levier = position['levier']
+                prix_actuel = prix_instantane.get(symbole)
+                profit_pct = profits.get(symbole) if prix_actuel is not None else None
+                if profit_pct is None:
+                    # À défaut de prix dans l'instantané, la dernière clôture du tampon (sans requête)
+                    tampon = self.stockage_ohlcv.tampon(symbole, '1m')
+                    with tampon.verrou:
+                        prix_actuel = float(tampon.vue(1)[-1, 4]) if len(tampon) else None
+                    if prix_actuel is None:
+                        logger.warning(f"Aucun prix connu pour gérer la position {symbole}")
+                        continue
+                    prix_entree = position['prix_entree']
+                    if direction == 'long':
+                        profit_pct = (prix_actuel / prix_entree - 1) * 100 * levier
+                    else:
+                        profit_pct = (prix_entree / prix_actuel - 1) * 100 * levier
                 
                 # Vérifier le stop loss / take profit
                 self.verifier_stop_loss_take_profit(symbole, prix_actuel)
+                if self.positions.get(symbole) is not position:
+                    continue
                 
                 # Fermer les positions ouvertes depuis trop longtemps avec un profit/perte minimal
                 if duree_minutes > 120 and abs(profit_pct) < 1:  # 2 heures avec <1% de profit/perte
                     # Log uniquement dans le fichier
                     logger.info(f"Fermeture de position stagnante pour {symbole} après {duree_minutes:.1f} minutes")
-                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    self.executer_trade(symbole, 'fermer', prix_actuel, levier)
+                    continue
                 
-                                # Fermer les positions perdantes ouvertes depuis trop longtemps
+                # Fermer les positions perdantes ouvertes depuis trop longtemps
                 if duree_minutes > 240 and profit_pct < -1:  # 4 heures avec perte
                     # Log uniquement dans le fichier
                     logger.info(f"Fermeture de position perdante pour {symbole} après {duree_minutes:.1f} minutes (P/L: {profit_pct:.2f}%)")
-                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    self.executer_trade(symbole, 'fermer', prix_actuel, levier)
+                    continue
                 
-                # Vérifier si la tendance s'est inversée
-                df = self.calculer_indicateurs(df)
-                tendance_actuelle = 'haussière' if df['ema_8'].iloc[-1] > df['ema_21'].iloc[-1] else 'baissière'
+                # Vérifier si la tendance s'est inversée (seulement pour une position gagnante,
+                # la seule concernée : les bougies ne sont demandées que dans ce cas)
+                if profit_pct <= 0:
+                    continue
+                df = self.recuperer_ohlcv(symbole, '1m', 30)
+                if df is None or len(df) < 20:
+                    continue
+                indicateurs = self.indicateurs_incrementaux(symbole, '1m')
+                tendance_actuelle = 'haussière' if indicateurs['ema_8'] > indicateurs['ema_21'] else 'baissière'
                 
-                if (direction == 'long' and tendance_actuelle == 'baissière' and profit_pct > 0) or \
-                   (direction == 'short' and tendance_actuelle == 'haussière' and profit_pct > 0):
+                if (direction == 'long' and tendance_actuelle == 'baissière') or \
+                   (direction == 'short' and tendance_actuelle == 'haussière'):
                     # Log uniquement dans le fichier
                     logger.info(f"Fermeture de position pour {symbole} suite à inversion de tendance (P/L: {profit_pct:.2f}%)")
-                    self.executer_trade(symbole, 'fermer', prix_actuel, position['levier'])
+                    self.executer_trade(symbole, 'fermer', prix_actuel, levier)
                 
             except Exception as e:
                 logger.error(f"Erreur lors de la gestion de la position pour {symbole}: {e}")
@@ -1025,31 +1471,232 @@ class BotScalpingAvance:
     def demarrer_taches_arriere_plan(self):
         """Démarre les tâches d'analyse en arrière-plan"""
         def analyser_marche_periodiquement():
-            while self.running:
-                try:
-                    for symbole in self.paires:
-                        self.analyser_conditions_marche(symbole)
-                        time.sleep(1)  # Pause entre chaque analyse pour éviter de surcharger l'API
-                    time.sleep(300)  # Analyser toutes les 5 minutes
-                except Exception as e:
-                    logger.error(f"Erreur dans l'analyse périodique du marché: {e}")
-                    time.sleep(60)
+            # Priorité la plus basse : cède ses créneaux aux signaux et à la protection
+            with self.ordonnanceur.priorite(PRIORITE_FOND):
+                while self.running:
+                    try:
+                        for symbole in self.paires:
+                            self.analyser_conditions_marche(symbole)
+                            if not REQUEST_SCHEDULER:
+                                time.sleep(1)  # Pause entre chaque analyse pour éviter de surcharger l'API
+                        time.sleep(300)  # Analyser toutes les 5 minutes
+                    except Exception as e:
+                        logger.error(f"Erreur dans l'analyse périodique du marché: {e}")
+                        time.sleep(60)
         
         def gerer_positions_periodiquement():
-            while self.running:
-                try:
-                    self.gerer_positions_ouvertes()
-                    time.sleep(30)  # Vérifier toutes les 30 secondes
-                except Exception as e:
-                    logger.error(f"Erreur dans la gestion périodique des positions: {e}")
-                    time.sleep(60)
+            # Les vérifications SL/TP passent avant toute autre requête
+            with self.ordonnanceur.priorite(PRIORITE_PROTECTION):
+                while self.running:
+                    try:
+                        self.gerer_positions_ouvertes()
+                        time.sleep(30)  # Vérifier toutes les 30 secondes
+                    except Exception as e:
+                        logger.error(f"Erreur dans la gestion périodique des positions: {e}")
+                        time.sleep(60)
         
         # Démarrer les threads
+        self.persistance.demarrer()
+        if self.stockage_trades is not None:
+            self.stockage_trades.demarrer()
+        self.service_prix.abonner(self._sur_instantane_prix)
+        self.service_prix.demarrer(self.ordonnanceur.priorite(PRIORITE_PROTECTION))
         Thread(target=analyser_marche_periodiquement, daemon=True).start()
         Thread(target=gerer_positions_periodiquement, daemon=True).start()
         
         logger.info("Tâches d'analyse en arrière-plan démarrées")
 
+    def analyser_symbole(self, symbole):
+        """Analyse un symbole et retourne la décision de trading (sans ouvrir de position)"""
+        try:
+            # Récupérer et analyser les données
+            df_1m = self.recuperer_ohlcv(symbole, '1m', 100)
+            if df_1m is None or len(df_1m) < 30:
+                return None
+            
+            df_1m = self.calculer_indicateurs_analyse(symbole, df_1m)
+            prix_actuel = df_1m['close'].iloc[-1]
+            
+            # Vérifier les stop loss / take profit pour les positions existantes
+            if symbole in self.positions:
+                self.verifier_stop_loss_take_profit(symbole, prix_actuel)
+            
+            # Ajuster le levier et les niveaux de SL/TP
+            levier, sl_pct, tp_pct = self.ajuster_levier_et_niveaux(symbole, df_1m)
+            
+            # Vérifier les signaux d'entrée
+            signal_achat, signal_vente = self.verifier_signaux(df_1m, symbole)
+            
+            # Vérifier l'alignement des tendances sur plusieurs timeframes
+            alignement = self.tendances_marche.get(symbole, {}).get('alignement_tendance', 0)
+            
+            return {
+                'prix': prix_actuel,
+                'levier': levier,
+                'sl_pct': sl_pct,
+                'tp_pct': tp_pct,
+                'signal_achat': signal_achat,
+                'signal_vente': signal_vente,
+                'alignement': alignement
+            }
+        
+        except Exception as e:
+            logger.error(f"Erreur pour {symbole}: {e}")
+            return None
+
+    def appliquer_decision(self, symbole, decision):
+        """Exécute les trades correspondant à la décision issue de analyser_symbole"""
+        try:
+            prix_actuel = decision['prix']
+            levier = decision['levier']
+            sl_pct = decision['sl_pct']
+            tp_pct = decision['tp_pct']
+            signal_achat = decision['signal_achat']
+            signal_vente = decision['signal_vente']
+            alignement = decision['alignement']
+            
+            # Exécuter les trades en fonction des signaux et de l'alignement des tendances
+            if symbole in self.positions:
+                direction_actuelle = self.positions[symbole]['direction']
+                
+                # Fermer la position si le signal est contraire à la position actuelle
+                if (direction_actuelle == 'long' and signal_vente and alignement <= -2) or \
+                   (direction_actuelle == 'short' and signal_achat and alignement >= 2):
+                    self.executer_trade(symbole, 'fermer', prix_actuel, levier)
+                    
+                    # Ouvrir une position dans la direction opposée (inversion)
+                    if direction_actuelle == 'long' and signal_vente:
+                        self.executer_trade(symbole, 'vendre_short', prix_actuel, levier, sl_pct, tp_pct)
+                    elif direction_actuelle == 'short' and signal_achat:
+                        self.executer_trade(symbole, 'acheter', prix_actuel, levier, sl_pct, tp_pct)
+            else:
+                # Ouvrir une nouvelle position si le signal est fort et aligné avec les tendances
+                if signal_achat and alignement >= 2 and len(self.positions) < self.parametres['positions_max']:
+                    self.executer_trade(symbole, 'acheter', prix_actuel, levier, sl_pct, tp_pct)
+                elif signal_vente and alignement <= -2 and len(self.positions) < self.parametres['positions_max']:
+                    self.executer_trade(symbole, 'vendre_short', prix_actuel, levier, sl_pct, tp_pct)
+        
+        except Exception as e:
+            logger.error(f"Erreur pour {symbole}: {e}")
+
+    def analyser_symboles_lot(self, symboles):
+        """Analyse tous les symboles en une passe vectorisée (mêmes décisions que analyser_symbole)"""
+        def recuperer(symbole):
+            # Threads du pool : la priorité est propre à chaque thread
+            with self.ordonnanceur.priorite(PRIORITE_SIGNAUX):
+                return self.recuperer_ohlcv(symbole, '1m', 100)
+        
+        if self.executeur is not None:
+            cadres = list(self.executeur.map(recuperer, symboles))
+        else:
+            cadres = [recuperer(symbole) for symbole in symboles]
+        
+        # Résultats mémorisés pour les symboles dont les bougies n'ont pas changé ;
+        # les autres forment un lot par longueur de série (indicateurs identiques au calcul par symbole)
+        resultats = [None] * len(symboles)
+        groupes = {}
+        for i, df in enumerate(cadres):
+            if df is None or len(df) < 30:
+                continue
+            # Le score de volatilité connu entre dans le calcul du levier
+            volatilite = self.scores_volatilite.get(symboles[i])
+            memoise = self.cache_indicateurs.obtenir((symboles[i], '1m', 'lot'), df)
+            if memoise is not None and memoise[0] == volatilite:
+                resultats[i] = memoise[1]
+            else:
+                groupes.setdefault(len(df), []).append(i)
+        
+        a_refaire = []
+        for longueur, indices in groupes.items():
+            if longueur < BOUGIES_MIN_LOT:
+                a_refaire.extend(indices)
+                continue
+            try:
+                tableaux = empiler([cadres[i] for i in indices])
+                indicateurs = calculer_indicateurs_lot(
+                    tableaux['open'], tableaux['high'], tableaux['low'], tableaux['close'], tableaux['volume'],
+                    largeur_pivot=DIVERGENCE_PIVOT_WIDTH, ecart_max=DIVERGENCE_LOOKBACK)
+                volatilites = np.array([self.scores_volatilite.get(symboles[i], np.nan) for i in indices], dtype=np.float64)
+                lot = evaluer_lot(indicateurs, volatilites, levier_max=self.parametres['levier_max'],
+                                  seuil=self.parametres['seuil_signal'])
+            except Exception as e:
+                logger.error(f"Erreur lors du calcul des indicateurs par lot: {e}")
+                a_refaire.extend(indices)
+                continue
+            for j, i in enumerate(indices):
+                resultats[i] = {nom: valeurs[j] for nom, valeurs in lot.items()}
+                self.cache_indicateurs.stocker((symboles[i], '1m', 'lot'), cadres[i],
+                                               (self.scores_volatilite.get(symboles[i]), resultats[i]))
+        
+        decisions = [None] * len(symboles)
+        for i, resultat in enumerate(resultats):
+            if resultat is None:
+                continue
+            # Séries incomplètes : le chemin pandas (dropna) fait foi
+            if not resultat['valide']:
+                a_refaire.append(i)
+                continue
+            symbole = symboles[i]
+            try:
+                prix_actuel = float(resultat['prix'])
+                if symbole in self.positions:
+                    self.verifier_stop_loss_take_profit(symbole, prix_actuel)
+                
+                levier = int(resultat['levier'])
+                self.ajustements_levier[symbole] = levier
+                self.tendances_marche.setdefault(symbole, {})['force_signal'] = float(resultat['force_signal'])
+                
+                decisions[i] = {
+                    'prix': prix_actuel,
+                    'levier': levier,
+                    'sl_pct': float(resultat['sl_pct']),
+                    'tp_pct': float(resultat['tp_pct']),
+                    'signal_achat': bool(resultat['signal_achat']),
+                    'signal_vente': bool(resultat['signal_vente']),
+                    'alignement': self.tendances_marche.get(symbole, {}).get('alignement_tendance', 0)
+                }
+            except Exception as e:
+                logger.error(f"Erreur pour {symbole}: {e}")
+        
+        # Les données sont en cache : le repli ne refait pas de requête
+        for i in a_refaire:
+            decisions[i] = self.analyser_symbole(symboles[i])
+        self.statistiques_lot['symboles_lot'] += sum(resultat is not None for resultat in resultats) - len(a_refaire)
+        self.statistiques_lot['repli_pandas'] += len(a_refaire)
+        return decisions
+
+    def evaluer_symboles(self, symboles):
+        """Analyse les symboles en parallèle puis applique les décisions dans l'ordre de priorité"""
+        def analyser(symbole):
+            with self.ordonnanceur.priorite(PRIORITE_SIGNAUX):
+                return self.analyser_symbole(symbole)
+        
+        # Requêtes des signaux : après la protection des positions, avant les analyses de fond
+        with self.ordonnanceur.priorite(PRIORITE_SIGNAUX):
+            if BATCH_INDICATORS and len(symboles) > 1:
+                decisions = self.analyser_symboles_lot(symboles)
+            elif self.executeur is not None and len(symboles) > 1:
+                decisions = list(self.executeur.map(analyser, symboles))
+            else:
+                decisions = [self.analyser_symbole(symbole) for symbole in symboles]
+        
+        # Les ouvertures ne se sérialisent que sur la garde du portefeuille dans executer_trade
+        for symbole, decision in zip(symboles, decisions):
+            if decision is not None:
+                self.appliquer_decision(symbole, decision)
+
+    def statistiques_cycle(self):
+        """Durée (ms) des derniers cycles complets de la boucle principale"""
+        durees = sorted(self.durees_cycle)
+        if not durees:
+            return {'cycles': 0, 'derniere_ms': 0, 'moyenne_ms': 0, 'p95_ms': 0}
+        return {
+            'cycles': len(durees),
+            'derniere_ms': self.durees_cycle[-1],
+            'moyenne_ms': sum(durees) / len(durees),
+            'p95_ms': durees[min(len(durees) - 1, int(len(durees) * 0.95))]
+        }
+
     def run(self, in_thread=False):
         """Fonction principale du bot"""
         print("Bot de scalping crypto démarré...")
@@ -1064,84 +1711,96 @@ class BotScalpingAvance:
         
         compteur_cycle = 0
         
+        # Pool borné de workers pour récupérer et analyser les paires en parallèle
+        if FETCH_CONCURRENCY > 1:
+            self.executeur = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix='analyse')
+        
         while self.running:
             try:
                 # Trier les paires par score de volatilité pour prioriser les plus volatiles
                 paires_triees = sorted(self.paires, key=lambda x: self.scores_volatilite.get(x, 0), reverse=True)
                 
-                for symbole in paires_triees:
-                    try:
-                        # Récupérer et analyser les données
-                        df_1m = self.recuperer_ohlcv(symbole, '1m', 100)
-                        if df_1m is None or len(df_1m) < 30:
-                            continue
-                            
-                        df_1m = self.calculer_indicateurs(df_1m)
-                        prix_actuel = df_1m['close'].iloc[-1]
-                        
-                        # Vérifier les stop loss / take profit pour les positions existantes
-                        if symbole in self.positions:
-                            self.verifier_stop_loss_take_profit(symbole, prix_actuel)
-                        
-                        # Ajuster le levier et les niveaux de SL/TP
-                        levier, sl_pct, tp_pct = self.ajuster_levier_et_niveaux(symbole, df_1m)
-                        
-                        # Vérifier les signaux d'entrée
-                        signal_achat, signal_vente = self.verifier_signaux(df_1m, symbole)
-                        
-                        # Vérifier l'alignement des tendances sur plusieurs timeframes
-                        alignement = self.tendances_marche.get(symbole, {}).get('alignement_tendance', 0)
-                        
-                        # Exécuter les trades en fonction des signaux et de l'alignement des tendances
-                        if symbole in self.positions:
-                            direction_actuelle = self.positions[symbole]['direction']
-                            
-                            # Fermer la position si le signal est contraire à la position actuelle
-                            if (direction_actuelle == 'long' and signal_vente and alignement <= -2) or \
-                               (direction_actuelle == 'short' and signal_achat and alignement >= 2):
-                                self.executer_trade(symbole, 'fermer', prix_actuel, levier)
-                                
-                                # Ouvrir une position dans la direction opposée (inversion)
-                                if direction_actuelle == 'long' and signal_vente:
-                                    self.executer_trade(symbole, 'vendre_short', prix_actuel, levier, sl_pct, tp_pct)
-                                elif direction_actuelle == 'short' and signal_achat:
-                                    self.executer_trade(symbole, 'acheter', prix_actuel, levier, sl_pct, tp_pct)
-                        else:
-                            # Ouvrir une nouvelle position si le signal est fort et aligné avec les tendances
-                            if signal_achat and alignement >= 2 and len(self.positions) < MAX_POSITIONS:
-                                self.executer_trade(symbole, 'acheter', prix_actuel, levier, sl_pct, tp_pct)
-                            elif signal_vente and alignement <= -2 and len(self.positions) < MAX_POSITIONS:
-                                self.executer_trade(symbole, 'vendre_short', prix_actuel, levier, sl_pct, tp_pct)
-                    
-                    except Exception as e:
-                        logger.error(f"Erreur pour {symbole}: {e}")
+                if self.flux is not None:
+                    # Mode poussé : traiter les symboles dès que le flux signale une nouvelle bougie
+                    evenements = self._attendre_evenements_marche()
+                    debut_cycle = time.perf_counter()
+                    symboles = sorted(evenements, key=lambda x: self.scores_volatilite.get(x, 0), reverse=True)
+                    self.evaluer_symboles(symboles)
+                    fin_decisions = time.perf_counter()
+                    for symbole in symboles:
+                        self.latences_decision.append((fin_decisions - evenements[symbole]) * 1000)
+                else:
+                    debut_cycle = time.perf_counter()
+                    self.evaluer_symboles(paires_triees)
+                
+                # Durée du balayage complet de l'univers
+                self.durees_cycle.append((time.perf_counter() - debut_cycle) * 1000)
+                
+                # Relevé des volumes téléchargés pendant le cycle
+                releve = self.stockage_ohlcv.releve_cycle()
                 
                 # Journaliser le statut périodiquement (toutes les 100 itérations)
                 compteur_cycle += 1
                 if compteur_cycle % 100 == 0:
-                    taux_reussite = self.historique_performance.get('taux_reussite', 0)
-                    profit_total = self.historique_performance.get('profit_total', 0)
-                    frais_total = self.historique_performance.get('frais_total', 0)
+                    taux_reussite = self.metriques.taux_reussite
+                    profit_total = self.metriques.profit_total
+                    frais_total = self.metriques.frais_total
                     
                     # Log simplifié dans la console
                     print(f"📊 STATUT | Solde: {self.balance:.2f} USDT | Positions: {len(self.positions)} | Profit: {profit_total:.2f} USDT | Taux réussite: {taux_reussite:.1f}%")
                     
+                    # Log détaillé dans le fichier
+                    logger.info(f"Données OHLCV du dernier cycle: {releve['octets_recus']} octets reçus ({releve['bougies_recues']} bougies, {releve['requetes']} requêtes) contre {releve['octets_rechargement_complet']} octets en rechargement complet ({releve['economie_pct']:.1f}% économisés)")
+                    if RESAMPLE_FROM_1M:
+                        stats_reech = self.reechantillonneur.statistiques
+                        logger.info(f"Rééchantillonnage local: {stats_reech['mises_a_jour_locales']} mises à jour depuis le 1m, {stats_reech['rattrapages']} rattrapages sur l'exchange")
+                    logger.info(f"Cache OHLCV: {self.cache_donnees.statistiques()}")
+                    logger.info(f"Cache des indicateurs: {self.cache_indicateurs.statistiques()}")
+                    if LAZY_INDICATORS:
+                        logger.info(f"Graphe d'indicateurs paresseux: {self.graphe_indicateurs.statistiques()}")
+                    if BATCH_INDICATORS:
+                        logger.info(f"Indicateurs par lot: {self.statistiques_lot['symboles_lot']} symboles vectorisés, {self.statistiques_lot['repli_pandas']} replis sur pandas")
+                    if REQUEST_SCHEDULER:
+                        logger.info(f"Ordonnanceur de requêtes: {self.ordonnanceur.statistiques()}")
+                    logger.info(f"Garde du portefeuille: {self.verrou_portefeuille.statistiques()} | Verrous des symboles: {self.verrous_symboles.statistiques()} | Écrivain de persistance: {self.persistance.statistiques}"
+                                f" | Stockage des trades: {self.stockage_trades.statistiques if self.stockage_trades else 'désactivé'}")
+                    cycle = self.statistiques_cycle()
+                    logger.info(f"Durée du cycle: dernier {cycle['derniere_ms']:.0f} ms, moyenne {cycle['moyenne_ms']:.0f} ms, p95 {cycle['p95_ms']:.0f} ms ({FETCH_CONCURRENCY} workers)")
+                    if self.flux is not None:
+                        latence = self.statistiques_latence()
+                        logger.info(f"Latence tick -> décision: moyenne {latence['moyenne_ms']:.1f} ms, p99 {latence['p99_ms']:.1f} ms, max {latence['max_ms']:.1f} ms sur {latence['evenements']} événements")
+                    
                     # Sauvegarder l'historique des performances
                     self._sauvegarder_historique_performance()
                 
-                # Pause pour économiser les ressources
-                time.sleep(0.5)
+                # Point de reprise de l'état complet, pour un redémarrage à chaud
+                if self.horloge.time() - self.dernier_point_de_reprise >= STATE_CHECKPOINT_INTERVAL:
+                    self._planifier_point_de_reprise()
+                
+                # Pause pour économiser les ressources (inutile en mode poussé, l'attente se fait sur le flux)
+                if self.flux is None:
+                    time.sleep(0.5)
                 
             except Exception as e:
                 logger.error(f"Erreur dans la boucle principale: {e}")
                 time.sleep(5)
         
+        if self.flux is not None:
+            self.flux.arreter()
+        self.service_prix.arreter()
+        if self.executeur is not None:
+            self.executeur.shutdown(wait=False)
+        
         # Sauvegarde finale avant de quitter
         self._sauvegarder_historique_performance()
+        self._planifier_point_de_reprise()
+        self.persistance.arreter()
+        if self.stockage_trades is not None:
+            self.stockage_trades.fermer()
         
         # Rapport final simplifié dans la console
-        profit_total = self.historique_performance.get('profit_total', 0)
-        taux_reussite = self.historique_performance.get('taux_reussite', 0)
+        profit_total = self.metriques.profit_total
+        taux_reussite = self.metriques.taux_reussite
         
         print(f"""
         ===== RAPPORT FINAL =====
@@ -0,0 +1,174 @@
+"""
+Cache des DataFrames OHLCV
+--------------------------
+Cache borné (LRU) et protégé par un verrou, partagé par la boucle principale
+et les threads d'arrière-plan. Une entrée par couple (symbole, timeframe) :
+une demande portant sur moins de bougies est servie en découpant la fenêtre
+la plus large déjà en cache. La durée de vie d'une entrée dépend du
+timeframe et n'excède jamais la clôture de la bougie en cours.
+
+Le cache des indicateurs mémorise les résultats calculés sur ces fenêtres,
+un par symbole et timeframe, valables pour la dernière bougie clôturée :
+tant qu'aucune nouvelle bougie n'arrive et que la bougie en cours n'a pas
+bougé, tous les consommateurs réutilisent le même résultat, quelle que
+soit la taille de la fenêtre qu'ils demandent tant que la fenêtre du
+calcul mémorisé la couvre.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from tampon_ohlcv import duree_timeframe
+
+# Nombre maximal d'entrées conservées
+TAILLE_MAX_CACHE = 256
+
+# Résultats d'indicateurs conservés (plusieurs entrées par symbole)
+TAILLE_MAX_CACHE_INDICATEURS = 1024
+
+# Fraîcheur d'une entrée : une fraction de la durée de la bougie, au minimum quelques secondes
+FRACTION_TIMEFRAME = 1 / 20
+FRAICHEUR_MIN = 3
+
+
+def expiration(timeframe, maintenant=None):
+    """Instant (secondes depuis l'époque) d'expiration d'une entrée rafraîchie à ``maintenant``"""
+    maintenant = time.time() if maintenant is None else maintenant
+    duree = duree_timeframe(timeframe) / 1000
+    prochaine_cloture = (maintenant // duree + 1) * duree
+    return min(prochaine_cloture, maintenant + max(FRAICHEUR_MIN, duree * FRACTION_TIMEFRAME))
+
+
+class CacheBougies:
+    """Cache TTL/LRU des DataFrames OHLCV indexé par (symbole, timeframe)"""
+
+    def __init__(self, taille_max=TAILLE_MAX_CACHE, horloge=time.time):
+        self.taille_max = taille_max
+        self.horloge = horloge
+        self._entrees = OrderedDict()
+        self._verrou = Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def obtenir(self, symbole, timeframe, limite):
+        """Retourne les ``limite`` dernières bougies en cache, ou None si absentes ou expirées"""
+        cle = (symbole, timeframe)
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None or len(entree['donnees']) < limite:
+                self.echecs += 1
+                return None
+            if self.horloge() >= entree['expiration']:
+                del self._entrees[cle]
+                self.expirations += 1
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            df = entree['donnees']
+
+        # Chaque appelant reçoit son propre DataFrame (copie paresseuse) qu'il peut enrichir
+        return df.iloc[-limite:].reset_index(drop=True)
+
+    def stocker(self, symbole, timeframe, df):
+        """Met en cache la fenêtre récupérée, si elle n'est pas plus petite qu'une entrée encore valide"""
+        cle = (symbole, timeframe)
+        maintenant = self.horloge()
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and maintenant < entree['expiration'] and len(entree['donnees']) > len(df):
+                return
+            self._entrees[cle] = {'donnees': df, 'expiration': expiration(timeframe, maintenant)}
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def invalider(self, symbole, timeframe):
+        """Supprime l'entrée d'un couple symbole/timeframe (nouvelle bougie reçue)"""
+        with self._verrou:
+            self._entrees.pop((symbole, timeframe), None)
+
+    def __len__(self):
+        with self._verrou:
+            return len(self._entrees)
+
+    def statistiques(self):
+        """Compteurs de succès, d'échecs et d'évictions du cache"""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'entrees': len(self._entrees),
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'taux_succes': self.succes / total * 100 if total else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+def signature_bougies(df):
+    """(horodatage de la dernière bougie clôturée, valeurs de la bougie en cours) d'un DataFrame OHLCV"""
+    horodatages = df['timestamp'].to_numpy()
+    cloture = horodatages[-2] if len(horodatages) > 1 else None
+    en_cours = tuple(float(df[colonne].to_numpy()[-1]) for colonne in ('open', 'high', 'low', 'close', 'volume'))
+    return cloture, (horodatages[-1],) + en_cours
+
+
+class CacheIndicateurs:
+    """Cache LRU de résultats d'indicateurs, valides jusqu'à l'arrivée d'une nouvelle bougie"""
+
+    def __init__(self, taille_max=TAILLE_MAX_CACHE_INDICATEURS):
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle, df):
+        """Résultat mémorisé pour ``cle`` si ``df`` a la même dernière bougie clôturée et la même bougie en cours.
+
+        Un résultat calculé sur une fenêtre plus large (commençant plus tôt)
+        sert aussi ``df`` ; une fenêtre plus courte que ``df`` est recalculée.
+        """
+        cloture, en_cours = signature_bougies(df)
+        debut = df['timestamp'].iloc[0]
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None or entree['cloture'] != cloture or entree['en_cours'] != en_cours \
+                    or entree['debut'] > debut:
+                self.echecs += 1
+                return None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return entree['valeur']
+
+    def stocker(self, cle, df, valeur):
+        cloture, en_cours = signature_bougies(df)
+        with self._verrou:
+            self._entrees[cle] = {'cloture': cloture, 'en_cours': en_cours, 'debut': df['timestamp'].iloc[0],
+                                  'valeur': valeur}
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        with self._verrou:
+            return len(self._entrees)
+
+    def statistiques(self):
+        """Compteurs de succès, d'échecs et d'évictions du cache"""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'entrees': len(self._entrees),
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'taux_succes': self.succes / total * 100 if total else 0,
+                'evictions': self.evictions
+            }
@@ -0,0 +1,140 @@
+"""
+Carnet des déclencheurs de sortie
+---------------------------------
+Les niveaux auxquels ``verifier_stop_loss_take_profit`` agit sur une position
+(stop-loss, take-profit, trailing stop, seuils d'activation du trailing, du
+break-even et du profit partiel, suivi du trailing actif) sont rangés par
+symbole dans deux listes triées :
+
+- ``bas`` : niveaux déclenchés quand le prix descend à leur hauteur ou en
+  dessous (stop d'une position longue, objectif d'une position courte...) ;
+- ``haut`` : niveaux déclenchés quand le prix monte à leur hauteur ou au-dessus.
+
+Chaque prix reçu se compare au plus haut des ``bas`` et au plus bas des
+``haut`` : un prix qui ne franchit rien est écarté en temps constant, sans
+parcourir les conditions de la position. Seul un franchissement appelle
+``verifier_stop_loss_take_profit``, après quoi les niveaux de la position
+sont recalculés ; ``franchis`` retrouve par bisection les niveaux atteints.
+"""
+
+import time
+import bisect
+from threading import Lock
+
+
+def seuil_profit(position, profit_pct):
+    """Prix auquel le profit avec levier de la position atteint ``profit_pct`` %"""
+    # Un rien au-delà, pour que le calcul du profit par le bot franchisse bien le seuil malgré les arrondis
+    ecart = profit_pct / 100 / position['levier'] * (1 + 1e-9)
+    if position['direction'] == 'long':
+        return position['prix_entree'] * (1 + ecart)
+    return position['prix_entree'] / (1 + ecart)
+
+
+def niveaux_position(position, parametres):
+    """Niveaux de la position : (bas, haut), listes de (prix, nature) triées"""
+    defavorables = [('stop_loss', position.get('stop_loss')), ('trailing_stop', position.get('trailing_stop'))]
+    favorables = [('take_profit', position.get('take_profit'))]
+    if not position.get('trailing_actif', False):
+        favorables.append(('activation_trailing', seuil_profit(position, parametres['trailing_activation_pct'])))
+    else:
+        # Le trailing suit le prix dès qu'il dépasse le dernier niveau de suivi
+        favorables.append(('suivi_trailing', position.get('niveau_activation_trailing')))
+    if not position.get('breakeven_actif', False):
+        favorables.append(('breakeven', seuil_profit(position, parametres['breakeven_pct'])))
+    if not position.get('profit_partiel_pris', False):
+        favorables.append(('profit_partiel', seuil_profit(position, parametres['profit_partiel_pct'])))
+
+    if position['direction'] == 'long':
+        bas, haut = defavorables, favorables
+    else:
+        bas, haut = favorables, defavorables
+    return (sorted((prix, nature) for nature, prix in bas if prix),
+            sorted((prix, nature) for nature, prix in haut if prix))
+
+
+class CarnetDeclencheurs:
+    """Niveaux de sortie des positions ouvertes, indexés par symbole et par prix"""
+
+    def __init__(self, parametres, livre=None):
+        self.parametres = parametres
+        # Livre des positions (LivrePositions) à qui reporter les niveaux les plus proches
+        self.livre = livre
+        self._bas = {}
+        self._haut = {}
+        self._verrou = Lock()
+        self.statistiques = {'prix': 0, 'declenchements': 0, 'duree_max_ms': 0.0}
+
+    def __contains__(self, symbole):
+        return symbole in self._bas
+
+    def __len__(self):
+        return len(self._bas)
+
+    def placer(self, symbole, position):
+        """(Re)calcule les niveaux de la position ``symbole``"""
+        bas, haut = niveaux_position(position, self.parametres)
+        with self._verrou:
+            self._bas[symbole] = bas
+            self._haut[symbole] = haut
+        if self.livre is not None:
+            self.livre.fixer_seuils(symbole, bas[-1][0] if bas else -float('inf'), haut[0][0] if haut else float('inf'))
+
+    def retirer(self, symbole):
+        with self._verrou:
+            self._bas.pop(symbole, None)
+            self._haut.pop(symbole, None)
+
+    def declenche(self, symbole, prix):
+        """Vrai si ``prix`` atteint au moins un niveau de ``symbole`` (temps constant)"""
+        self.statistiques['prix'] += 1
+        bas = self._bas.get(symbole)
+        if bas is None:
+            return False
+        haut = self._haut[symbole]
+        return bool((bas and prix <= bas[-1][0]) or (haut and prix >= haut[0][0]))
+
+    def franchis(self, symbole, prix):
+        """Niveaux atteints par ``prix`` : [(prix du niveau, nature)], les plus proches du prix en dernier"""
+        with self._verrou:
+            bas = self._bas.get(symbole, [])
+            haut = self._haut.get(symbole, [])
+            debut_bas = bisect.bisect_left(bas, prix, key=lambda niveau: niveau[0])
+            fin_haut = bisect.bisect_right(haut, prix, key=lambda niveau: niveau[0])
+            return bas[debut_bas:] + haut[:fin_haut][::-1]
+
+    def surveiller(self, symbole, prix, verifier):
+        """Appelle ``verifier(symbole, prix)`` si ``prix`` franchit un niveau ; retourne vrai dans ce cas"""
+        if not self.declenche(symbole, prix):
+            return False
+        debut = time.perf_counter()
+        verifier(symbole, prix)
+        duree = (time.perf_counter() - debut) * 1000
+        self.statistiques['declenchements'] += 1
+        self.statistiques['duree_max_ms'] = max(self.statistiques['duree_max_ms'], duree)
+        return True
+
+
+if __name__ == "__main__":
+    import random
+
+    parametres = {'trailing_activation_pct': 2.0, 'breakeven_pct': 1.0, 'profit_partiel_pct': 3.0}
+    carnet = CarnetDeclencheurs(parametres)
+    generateur = random.Random(0)
+    symboles = [f"SYN{i}/USDT:USDT" for i in range(16)]
+    for i, symbole in enumerate(symboles):
+        direction = 'long' if i % 2 == 0 else 'short'
+        signe = 1 if direction == 'long' else -1
+        carnet.placer(symbole, {'direction': direction, 'prix_entree': 100.0, 'levier': 20,
+                                'stop_loss': 100 * (1 - signe * 0.003), 'take_profit': 100 * (1 + signe * 0.006)})
+
+    declenchements = []
+    ticks = [(generateur.choice(symboles), 100 * (1 + generateur.gauss(0, 0.0005))) for _ in range(1_000_000)]
+    debut = time.perf_counter()
+    for symbole, prix in ticks:
+        carnet.surveiller(symbole, prix, lambda s, p: declenchements.append((s, p)))
+    duree = time.perf_counter() - debut
+    print(f"{len(ticks)} prix en {duree:.2f} s ({duree / len(ticks) * 1e9:.0f} ns par prix), "
+          f"{len(declenchements)} déclenchements")
+    symbole, prix = declenchements[0]
+    print(f"Premier déclenchement {symbole} à {prix:.4f}: {carnet.franchis(symbole, prix)}")
@@ -0,0 +1,148 @@
+"""
+Détection vectorisée des divergences RSI
+----------------------------------------
+Une divergence haussière est un plus bas de prix inférieur au pivot bas
+précédent alors que le RSI fait un plus bas supérieur ; la divergence
+baissière est le symétrique sur les plus hauts. Tout le calcul se fait sur
+des tableaux NumPy, sans boucle Python, et peut porter sur les dernières
+bougies (usage en direct) ou sur toute la série (backtests).
+
+Avec les réglages par défaut, chaque bougie est un pivot et elle est comparée
+à la précédente, sur les bougies -5 à -29 : c'est exactement le comportement
+historique de ``calculer_indicateurs``.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bougies examinées en direct : de la 5e à la 29e en partant de la fin
+FENETRE_DIVERGENCES = (5, 30)
+
+# Nombre de bougies de part et d'autre d'un pivot (0 = chaque bougie est un pivot)
+LARGEUR_PIVOT = 0
+
+# Écart maximal (en bougies) entre deux pivots comparés
+ECART_MAX_PIVOTS = 1
+
+
+def pivots(valeurs, largeur, sens):
+    """Masque des pivots : extremum local sur ``largeur`` bougies de chaque côté.
+
+    ``sens`` vaut 'bas' ou 'haut'. Le temps est le dernier axe ; les
+    ``largeur`` dernières bougies ne peuvent pas encore être confirmées.
+    """
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    masque = np.zeros(valeurs.shape, dtype=bool)
+    if largeur <= 0:
+        masque[...] = True
+        return masque
+    taille = 2 * largeur + 1
+    n = valeurs.shape[-1]
+    if n < taille:
+        return masque
+    fenetres = sliding_window_view(valeurs, taille, axis=-1)
+    extremum = fenetres.min(axis=-1) if sens == 'bas' else fenetres.max(axis=-1)
+    masque[..., largeur:n - largeur] = valeurs[..., largeur:n - largeur] == extremum
+    return masque
+
+
+def pivot_precedent(masque):
+    """Indice du pivot strictement antérieur à chaque bougie (-1 s'il n'y en a pas)"""
+    indices = np.where(masque, np.arange(masque.shape[-1]), -1)
+    precedent = np.full(masque.shape, -1, dtype=np.int64)
+    if masque.shape[-1] > 1:
+        precedent[..., 1:] = np.maximum.accumulate(indices, axis=-1)[..., :-1]
+    return precedent
+
+
+def _divergence(prix, rsi, masque, ecart_max, comparer_prix, comparer_rsi):
+    precedent = pivot_precedent(masque)
+    valide = masque & (precedent >= 0) & (np.arange(masque.shape[-1]) - precedent <= ecart_max)
+    reference = np.where(precedent >= 0, precedent, 0)
+    with np.errstate(invalid='ignore'):
+        return (valide
+                & comparer_prix(prix, np.take_along_axis(prix, reference, axis=-1))
+                & comparer_rsi(rsi, np.take_along_axis(rsi, reference, axis=-1)))
+
+
+def detecter_divergences(bas, haut, rsi, largeur_pivot=LARGEUR_PIVOT, ecart_max=ECART_MAX_PIVOTS,
+                         fenetre=FENETRE_DIVERGENCES, serie_complete=False):
+    """Retourne les masques (divergence_haussiere, divergence_baissiere).
+
+    Les tableaux peuvent être à une dimension (une série) ou à deux
+    dimensions (symboles x temps). ``fenetre`` = (debut, fin) limite la
+    détection aux bougies -debut à -(fin - 1), et seulement si la série
+    compte plus de ``fin`` bougies. ``serie_complete`` désactive cette
+    limite pour marquer toute la série.
+    """
+    bas = np.asarray(bas, dtype=np.float64)
+    haut = np.asarray(haut, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    n = rsi.shape[-1]
+
+    if serie_complete:
+        haussiere = _divergence(bas, rsi, pivots(bas, largeur_pivot, 'bas'), ecart_max, np.less, np.greater)
+        baissiere = _divergence(haut, rsi, pivots(haut, largeur_pivot, 'haut'), ecart_max, np.greater, np.less)
+        return haussiere, baissiere
+
+    haussiere = np.zeros(rsi.shape, dtype=bool)
+    baissiere = np.zeros(rsi.shape, dtype=bool)
+    debut, fin = fenetre
+    if n <= fin:
+        return haussiere, baissiere
+
+    # Seule la fin de la série est utile : la fenêtre, plus le contexte des pivots comparés
+    premier = n - fin + 1
+    origine = max(0, premier - ecart_max - largeur_pivot)
+    queue = (Ellipsis, slice(origine, None))
+    zone = (Ellipsis, slice(premier - origine, n - debut + 1 - origine))
+    cible = (Ellipsis, slice(premier, n - debut + 1))
+    haussiere[cible] = _divergence(
+        bas[queue], rsi[queue], pivots(bas[queue], largeur_pivot, 'bas'), ecart_max, np.less, np.greater)[zone]
+    baissiere[cible] = _divergence(
+        haut[queue], rsi[queue], pivots(haut[queue], largeur_pivot, 'haut'), ecart_max, np.greater, np.less)[zone]
+    return haussiere, baissiere
+
+
+if __name__ == "__main__":
+    # Mesure du gain face à la boucle d'origine
+    import time
+    import pandas as pd
+
+    def boucle_origine(df):
+        df['divergence_haussiere'] = False
+        df['divergence_baissiere'] = False
+        if len(df) > 30:
+            for i in range(5, 30):
+                if df['low'].iloc[-i] < df['low'].iloc[-i-1] and df['rsi'].iloc[-i] > df['rsi'].iloc[-i-1]:
+                    df.loc[df.index[-i], 'divergence_haussiere'] = True
+                if df['high'].iloc[-i] > df['high'].iloc[-i-1] and df['rsi'].iloc[-i] < df['rsi'].iloc[-i-1]:
+                    df.loc[df.index[-i], 'divergence_baissiere'] = True
+        return df
+
+    generateur = np.random.default_rng(7)
+    taille = 1000
+    close = 100 + np.cumsum(generateur.normal(0, 0.5, taille))
+    df = pd.DataFrame({
+        'low': close - generateur.random(taille),
+        'high': close + generateur.random(taille),
+        'rsi': 50 + 20 * np.sin(np.arange(taille) / 3) + generateur.normal(0, 5, taille),
+    })
+
+    bas, haut, rsi = df['low'].to_numpy(), df['high'].to_numpy(), df['rsi'].to_numpy()
+    repetitions = 200
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        boucle_origine(df.copy())
+    duree_boucle = (time.perf_counter() - debut) / repetitions
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        detecter_divergences(bas, haut, rsi)
+    duree_vecteur = (time.perf_counter() - debut) / repetitions
+    print(f"Boucle: {duree_boucle * 1e3:.2f} ms, vectorisé: {duree_vecteur * 1e6:.1f} µs (x{duree_boucle / duree_vecteur:.0f})")
+
+    debut = time.perf_counter()
+    haussiere, baissiere = detecter_divergences(bas, haut, rsi, largeur_pivot=3, ecart_max=20,
+                                                serie_complete=True)
+    print(f"Série complète (pivots 3, écart 20): {haussiere.sum()} haussières, {baissiere.sum()} baissières "
+          f"en {(time.perf_counter() - debut) * 1e6:.0f} µs")
@@ -0,0 +1,309 @@
+"""
+Exchange factice KuCoin Futures
+-------------------------------
+Remplaçant local de ``ccxt.kucoinfutures`` pour les essais de charge et les
+mesures du bot complet, sans réseau ni clés API. Il expose les appels dont
+le bot se sert (``load_markets``, ``fetch_ticker``, ``fetch_tickers``,
+``fetch_ohlcv``) ainsi que les ordres (``create_order``, ``fetch_order``,
+``cancel_order``, ``fetch_open_orders``, ``fetch_balance``,
+``fetch_positions``), exécutés en mémoire.
+
+Les données sont des bougies 1m enregistrées (un CSV par paire, comme pour
+backtest.py) ou synthétiques. Leurs horodatages sont recalés pour que les
+``prechauffage`` premières bougies soient déjà clôturées au lancement, puis
+le marché avance en temps réel : une nouvelle bougie à chaque minute.
+
+Chaque requête subit une latence tirée d'une loi configurable, puis peut
+échouer comme le vrai service :
+- ``ccxt.RateLimitExceeded`` (HTTP 429) quand le poids des requêtes dépasse
+  le quota de la fenêtre glissante, ou au hasard avec ``taux_429`` ;
+- ``ccxt.RequestTimeout`` au hasard avec ``taux_timeout``, après avoir
+  attendu ``delai_timeout`` secondes.
+
+Lois de latence (chaîne ``nom:paramètres`` en secondes) : ``constante:0.05``,
+``uniforme:0.02:0.2``, ``normale:0.08:0.02``, ``lognormale:0.08:0.5``
+(médiane, sigma), ``exponentielle:0.05`` (moyenne), ``aucune``.
+"""
+
+import os
+import time
+import random
+import logging
+import itertools
+from collections import deque
+from threading import Lock
+
+import ccxt
+import numpy as np
+
+from backtest import ExchangeSimule, charger_historique, generer_historique
+from ordonnanceur import POIDS_REQUETES, POIDS_FENETRE, DUREE_FENETRE
+
+logger = logging.getLogger(__name__)
+
+# Bougies 1m déjà clôturées au lancement (le bot lit jusqu'à 24 bougies 1h)
+PRECHAUFFAGE = 2 * 24 * 60
+
+# Durée des séries synthétiques après le lancement
+DUREE_SYNTHETIQUE = 7 * 24 * 60
+
+# Prix de départ des séries synthétiques (les autres paires partent de 1 à 50 USDT)
+PRIX_SYNTHETIQUES = {'BTC/USDT:USDT': 60000.0, 'ETH/USDT:USDT': 3000.0, 'BNB/USDT:USDT': 550.0,
+                     'SOL/USDT:USDT': 150.0, 'TAO/USDT:USDT': 400.0}
+
+
+def loi_latence(specification, generateur=None):
+    """Fonction sans argument qui tire une latence (secondes) selon ``specification``"""
+    generateur = generateur or random.Random()
+    nom, *valeurs = str(specification or 'aucune').split(':')
+    valeurs = [float(valeur) for valeur in valeurs]
+    if nom == 'aucune':
+        return lambda: 0.0
+    if nom == 'constante':
+        return lambda: valeurs[0]
+    if nom == 'uniforme':
+        return lambda: generateur.uniform(valeurs[0], valeurs[1])
+    if nom == 'normale':
+        return lambda: max(0.0, generateur.gauss(valeurs[0], valeurs[1]))
+    if nom == 'lognormale':
+        return lambda: valeurs[0] * generateur.lognormvariate(0, valeurs[1])
+    if nom == 'exponentielle':
+        return lambda: generateur.expovariate(1 / valeurs[0])
+    raise ValueError(f"Loi de latence inconnue: {specification}")
+
+
+def historiques_enregistres(repertoire):
+    """Bougies 1m des CSV de ``repertoire`` (BTC_USDT.csv -> 'BTC/USDT:USDT')"""
+    return {os.path.splitext(nom)[0].replace('_', '/', 1) + ':USDT': charger_historique(os.path.join(repertoire, nom))
+            for nom in sorted(os.listdir(repertoire)) if nom.endswith('.csv')}
+
+
+def historiques_synthetiques(paires, bougies=PRECHAUFFAGE + DUREE_SYNTHETIQUE, graine=0):
+    """Une marche aléatoire 1m par paire, reproductible pour une même graine"""
+    return {paire: generer_historique(bougies, graine=graine + i, prix=PRIX_SYNTHETIQUES.get(paire, 1.0 + 49 * (i % 7) / 6))
+            for i, paire in enumerate(paires)}
+
+
+class ExchangeFactice(ExchangeSimule):
+    """Exchange KuCoin Futures en mémoire, à l'heure réelle, avec latence et pannes injectées"""
+
+    def __init__(self, historiques, latence='aucune', taux_429=0.0, taux_timeout=0.0, delai_timeout=10.0,
+                 quota=POIDS_FENETRE, duree_fenetre=DUREE_FENETRE, prechauffage=PRECHAUFFAGE, solde=400.0,
+                 graine=None, horloge=None):
+        from horloge import HorlogeSysteme
+
+        super().__init__(historiques, horloge or HorlogeSysteme())
+        # Recalage : la bougie ``prechauffage`` se clôture à l'instant du lancement
+        lancement = (self.milliseconds() // 60_000) * 60_000
+        for symbole, bougies in self.bougies.items():
+            bougies = bougies.copy()
+            reference = bougies[min(prechauffage, len(bougies)) - 1, 0]
+            bougies[:, 0] += lancement - 60_000 - reference
+            self.bougies[symbole] = bougies
+
+        self._generateur = random.Random(graine)
+        self._latence = loi_latence(latence, self._generateur)
+        self.taux_429 = taux_429
+        self.taux_timeout = taux_timeout
+        self.delai_timeout = delai_timeout
+        self.quota = quota
+        self.duree_fenetre = duree_fenetre
+        self._verrou = Lock()
+        self._requetes_recentes = deque()  # (instant, poids) sur la fenêtre glissante
+        self._numeros = itertools.count(1)
+        self.ordres = {}
+        self.solde = solde
+        self.positions_ouvertes = {}
+        self.statistiques.update({'appels': 0, 'erreurs_429': 0, 'timeouts': 0, 'latence_totale': 0.0, 'latence_max': 0.0})
+
+    def _requete(self, nom):
+        """Latence, quota de la fenêtre et pannes tirées au hasard pour une requête ``nom``"""
+        poids = POIDS_REQUETES.get(nom, 1)
+        with self._verrou:
+            latence = self._latence()
+            tirage = self._generateur.random()
+            maintenant = time.monotonic()
+            while self._requetes_recentes and maintenant - self._requetes_recentes[0][0] >= self.duree_fenetre:
+                self._requetes_recentes.popleft()
+            consomme = sum(p for _, p in self._requetes_recentes)
+            depasse = consomme + poids > self.quota or tirage < self.taux_429
+            expire = not depasse and tirage < self.taux_429 + self.taux_timeout
+            if not depasse:
+                self._requetes_recentes.append((maintenant, poids))
+            self.statistiques['appels'] += 1
+            self.statistiques['erreurs_429'] += depasse
+            self.statistiques['timeouts'] += expire
+            self.statistiques['latence_totale'] += latence
+            self.statistiques['latence_max'] = max(self.statistiques['latence_max'], latence)
+        time.sleep(latence)
+        if depasse:
+            raise ccxt.RateLimitExceeded(f"kucoinfutures 429 Too Many Requests ({nom})")
+        if expire:
+            time.sleep(self.delai_timeout)
+            raise ccxt.RequestTimeout(f"kucoinfutures GET {nom} request timed out ({self.delai_timeout:.0f} s)")
+
+    def _prix(self, symbole):
+        fin = self._fin(symbole)
+        if fin == 0:
+            raise ccxt.BadSymbol(f"kucoinfutures aucune donnée pour {symbole}")
+        return float(self.bougies[symbole][fin - 1, 4])
+
+    # Données de marché
+
+    def load_markets(self, reload=False, params=None):
+        self._requete('load_markets')
+        return {symbole: self.market(symbole) for symbole in self.bougies}
+
+    def market(self, symbole):
+        base = symbole.split('/')[0]
+        return {'symbol': symbole, 'id': f"{'XBT' if base == 'BTC' else base}USDTM", 'base': base,
+                'quote': 'USDT', 'settle': 'USDT', 'type': 'swap', 'contract': True, 'linear': True,
+                'contractSize': 1, 'active': True}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._requete('fetch_ohlcv')
+        return super().fetch_ohlcv(symbol, timeframe, since, limit, params)
+
+    def fetch_ticker(self, symbol, params=None):
+        self._requete('fetch_ticker')
+        if symbol not in self.bougies:
+            raise ccxt.BadSymbol(f"kucoinfutures symbole inconnu {symbol}")
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self._requete('fetch_tickers')
+        return {symbole: self._ticker(symbole) for symbole in symbols or self.bougies
+                if symbole in self.bougies and self._fin(symbole)}
+
+    def _ticker(self, symbole):
+        fin = self._fin(symbole)
+        if fin == 0:
+            raise ccxt.BadSymbol(f"kucoinfutures aucune donnée pour {symbole}")
+        bougies = self.bougies[symbole][max(0, fin - 1440):fin]
+        dernier = bougies[-1]
+        return {'symbol': symbole, 'timestamp': int(dernier[0]) + 60_000, 'last': dernier[4], 'close': dernier[4],
+                'bid': dernier[4], 'ask': dernier[4], 'open': bougies[0, 1], 'high': bougies[:, 2].max(),
+                'low': bougies[:, 3].min(), 'baseVolume': bougies[:, 5].sum()}
+
+    # Ordres (exécutés immédiatement au dernier prix pour un ordre au marché)
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._requete('create_order')
+        prix = self._prix(symbol)
+        execute = type == 'market' or (side == 'buy' and price >= prix) or (side == 'sell' and price <= prix)
+        ordre = {'id': str(next(self._numeros)), 'symbol': symbol, 'type': type, 'side': side,
+                 'amount': amount, 'price': price if price is not None else prix,
+                 'average': prix if execute else None, 'filled': amount if execute else 0.0,
+                 'remaining': 0.0 if execute else amount, 'status': 'closed' if execute else 'open',
+                 'timestamp': self.milliseconds(), 'params': dict(params or {})}
+        with self._verrou:
+            self.ordres[ordre['id']] = ordre
+            if execute:
+                self._executer(symbol, side, amount)
+        return dict(ordre)
+
+    def _executer(self, symbole, cote, quantite):
+        """Met à jour la position nette de ``symbole`` (quantité signée)"""
+        nette = self.positions_ouvertes.get(symbole, 0.0) + (quantite if cote == 'buy' else -quantite)
+        if abs(nette) < 1e-12:
+            self.positions_ouvertes.pop(symbole, None)
+        else:
+            self.positions_ouvertes[symbole] = nette
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._requete('fetch_order')
+        if id not in self.ordres:
+            raise ccxt.OrderNotFound(f"kucoinfutures ordre {id} introuvable")
+        return dict(self.ordres[id])
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params=None):
+        self._requete('fetch_open_orders')
+        return [dict(ordre) for ordre in self.ordres.values()
+                if ordre['status'] == 'open' and symbol in (None, ordre['symbol'])]
+
+    def cancel_order(self, id, symbol=None, params=None):
+        self._requete('cancel_order')
+        with self._verrou:
+            ordre = self.ordres.get(id)
+            if ordre is None or ordre['status'] != 'open':
+                raise ccxt.OrderNotFound(f"kucoinfutures ordre {id} introuvable ou déjà exécuté")
+            ordre['status'] = 'canceled'
+        return dict(ordre)
+
+    def fetch_balance(self, params=None):
+        self._requete('fetch_balance')
+        return {'USDT': {'free': self.solde, 'used': 0.0, 'total': self.solde},
+                'free': {'USDT': self.solde}, 'total': {'USDT': self.solde}}
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._requete('fetch_positions')
+        return [{'symbol': symbole, 'side': 'long' if quantite > 0 else 'short', 'contracts': abs(quantite),
+                 'markPrice': self._prix(symbole)}
+                for symbole, quantite in self.positions_ouvertes.items() if symbols is None or symbole in symbols]
+
+    def close(self):
+        pass
+
+
+def depuis_configuration(paires):
+    """ExchangeFactice réglé par les variables d'environnement FAKE_EXCHANGE_*"""
+    repertoire = os.getenv("FAKE_EXCHANGE_DATA", "")
+    graine = os.getenv("FAKE_EXCHANGE_SEED", "")
+    historiques = (historiques_enregistres(repertoire) if repertoire
+                   else historiques_synthetiques(paires, graine=int(graine or 0)))
+    logger.info(f"Exchange factice: {len(historiques)} paires {'enregistrées' if repertoire else 'synthétiques'}")
+    return ExchangeFactice(
+        historiques,
+        latence=os.getenv("FAKE_EXCHANGE_LATENCY", "lognormale:0.08:0.5"),
+        taux_429=float(os.getenv("FAKE_EXCHANGE_429_RATE", "0")),
+        taux_timeout=float(os.getenv("FAKE_EXCHANGE_TIMEOUT_RATE", "0")),
+        delai_timeout=float(os.getenv("FAKE_EXCHANGE_TIMEOUT", "10")),
+        graine=int(graine) if graine else None,
+    )
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    from concurrent.futures import ThreadPoolExecutor
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from botV0 import PAIRS
+
+    parser = argparse.ArgumentParser(description="Essai de charge de l'exchange factice")
+    parser.add_argument("--requetes", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latence", default='lognormale:0.02:0.5')
+    parser.add_argument("--taux-429", type=float, default=0.01)
+    parser.add_argument("--taux-timeout", type=float, default=0.005)
+    args = parser.parse_args()
+
+    exchange = ExchangeFactice(historiques_synthetiques(PAIRS), latence=args.latence, taux_429=args.taux_429,
+                               taux_timeout=args.taux_timeout, delai_timeout=0.5, graine=1)
+
+    def appel(i):
+        paire = PAIRS[i % len(PAIRS)]
+        debut = time.perf_counter()
+        try:
+            if i % 3 == 0:
+                exchange.fetch_ohlcv(paire, '5m', limit=100)
+            elif i % 3 == 1:
+                exchange.fetch_ticker(paire)
+            else:
+                exchange.fetch_tickers(PAIRS[:4])
+            return time.perf_counter() - debut, None
+        except ccxt.BaseError as e:
+            return time.perf_counter() - debut, type(e).__name__
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        resultats = list(pool.map(appel, range(args.requetes)))
+    duree = time.perf_counter() - debut
+    durees = np.array([d for d, _ in resultats])
+    erreurs = {}
+    for _, erreur in resultats:
+        if erreur:
+            erreurs[erreur] = erreurs.get(erreur, 0) + 1
+    print(f"{args.requetes} requêtes en {duree:.1f} s ({args.requetes / duree:.0f}/s) | "
+          f"p50 {np.percentile(durees, 50) * 1000:.1f} ms, p99 {np.percentile(durees, 99) * 1000:.1f} ms | "
+          f"erreurs: {erreurs}")
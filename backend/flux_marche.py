@@ -0,0 +1,349 @@
+"""
+Flux de données de marché poussés
+---------------------------------
+Interface ``MarketDataFeed`` qui délivre les mises à jour de bougies et de
+tickers dès leur arrivée, avec deux implémentations :
+
+- ``FluxWebsocketKucoin`` : websocket public de KuCoin Futures
+- ``FluxRejeu`` : rejeu d'un fichier JSON Lines, en local ou via ``ServeurRejeu``
+  (serveur TCP localhost), pour faire tourner le bot sans réseau.
+
+Format d'un événement de rejeu (une ligne JSON par événement) :
+    {"t": 1716370000000, "type": "bougie", "symbole": "BTC/USDT:USDT",
+     "timeframe": "1m", "bougie": [ts, open, high, low, close, volume]}
+    {"t": 1716370000500, "type": "ticker", "symbole": "BTC/USDT:USDT", "prix": 67000.5}
+"""
+
+import json
+import time
+import socket
+import logging
+import socketserver
+from collections import deque
+from threading import Thread, Event, Lock
+
+logger = logging.getLogger(__name__)
+
+# Correspondance timeframe ccxt -> granularité des topics KuCoin Futures
+GRANULARITES_KUCOIN = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1hour',
+    '4h': '4hour',
+    '1d': '1day',
+}
+
+
+class MarketDataFeed:
+    """Interface commune des flux de marché : abonnements et publication des événements"""
+
+    def __init__(self):
+        self.symboles = []
+        self.timeframes = ('1m',)
+        self.connecte = False
+        self._abonnes_bougies = []
+        self._abonnes_tickers = []
+        self._arret = Event()
+        self._thread = None
+        self._latences = deque(maxlen=1000)
+        self._verrou_latences = Lock()
+
+    def suivre(self, symboles, timeframes=('1m',)):
+        """Définit les symboles et timeframes à suivre (avant ``demarrer``)"""
+        self.symboles = list(symboles)
+        self.timeframes = tuple(timeframes)
+
+    def abonner_bougies(self, rappel):
+        """Enregistre ``rappel(symbole, timeframe, bougie, recu)``, appelé à chaque mise à jour de bougie"""
+        self._abonnes_bougies.append(rappel)
+
+    def abonner_tickers(self, rappel):
+        """Enregistre ``rappel(symbole, prix, horodatage, recu)``, appelé à chaque nouveau prix"""
+        self._abonnes_tickers.append(rappel)
+
+    def demarrer(self):
+        """Démarre la réception des événements dans un thread dédié"""
+        self._arret.clear()
+        self._thread = Thread(target=self._executer, daemon=True)
+        self._thread.start()
+
+    def arreter(self):
+        """Arrête la réception des événements"""
+        self._arret.set()
+        self.connecte = False
+
+    def _executer(self):
+        raise NotImplementedError
+
+    def _publier_bougie(self, symbole, timeframe, bougie):
+        recu = time.perf_counter()
+        for rappel in self._abonnes_bougies:
+            try:
+                rappel(symbole, timeframe, bougie, recu)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné bougies pour {symbole}: {e}")
+        self._enregistrer_latence(recu)
+
+    def _publier_ticker(self, symbole, prix, horodatage):
+        recu = time.perf_counter()
+        for rappel in self._abonnes_tickers:
+            try:
+                rappel(symbole, prix, horodatage, recu)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné tickers pour {symbole}: {e}")
+        self._enregistrer_latence(recu)
+
+    def _enregistrer_latence(self, recu):
+        with self._verrou_latences:
+            self._latences.append((time.perf_counter() - recu) * 1000)
+
+    def statistiques_latence(self):
+        """Latence de traitement des événements par les abonnés (ms)"""
+        with self._verrou_latences:
+            latences = sorted(self._latences)
+        if not latences:
+            return {'evenements': 0, 'moyenne_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+        return {
+            'evenements': len(latences),
+            'moyenne_ms': sum(latences) / len(latences),
+            'p99_ms': latences[min(len(latences) - 1, int(len(latences) * 0.99))],
+            'max_ms': latences[-1],
+        }
+
+
+class FluxWebsocketKucoin(MarketDataFeed):
+    """Flux temps réel via le websocket public de KuCoin Futures (nécessite ``websocket-client``)"""
+
+    def __init__(self, exchange):
+        super().__init__()
+        self.exchange = exchange
+        self._ws = None
+        self._symboles_par_id = {}
+        self._intervalle_ping = 18
+
+    def _executer(self):
+        try:
+            import websocket
+        except ImportError:
+            logger.error("Le module websocket-client n'est pas installé, flux websocket indisponible")
+            return
+
+        delai_reconnexion = 1
+        while not self._arret.is_set():
+            try:
+                url = self._obtenir_url()
+                self._ws = websocket.create_connection(url, timeout=30)
+                self._souscrire()
+                self.connecte = True
+                delai_reconnexion = 1
+                logger.info(f"Flux websocket KuCoin connecté ({len(self.symboles)} symboles)")
+
+                dernier_ping = time.time()
+                self._ws.settimeout(1)
+                while not self._arret.is_set():
+                    if time.time() - dernier_ping > self._intervalle_ping:
+                        self._ws.send(json.dumps({'id': str(int(time.time() * 1000)), 'type': 'ping'}))
+                        dernier_ping = time.time()
+                    try:
+                        message = self._ws.recv()
+                    except websocket.WebSocketTimeoutException:
+                        continue
+                    self._traiter_message(message)
+            except Exception as e:
+                logger.error(f"Erreur du flux websocket KuCoin: {e}")
+            finally:
+                self.connecte = False
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+            if not self._arret.is_set():
+                time.sleep(delai_reconnexion)
+                delai_reconnexion = min(delai_reconnexion * 2, 30)
+
+    def _obtenir_url(self):
+        """Demande un jeton public et retourne l'URL du serveur websocket"""
+        reponse = self.exchange.futuresPublicPostBulletPublic()
+        donnees = reponse['data']
+        serveur = donnees['instanceServers'][0]
+        self._intervalle_ping = serveur.get('pingInterval', 18000) / 1000 * 0.8
+        return f"{serveur['endpoint']}?token={donnees['token']}&connectId={int(time.time() * 1000)}"
+
+    def _souscrire(self):
+        self.exchange.load_markets()
+        for symbole in self.symboles:
+            id_marche = self.exchange.market(symbole)['id']
+            self._symboles_par_id[id_marche] = symbole
+            sujets = [f"/contractMarket/ticker:{id_marche}"]
+            sujets += [f"/contractMarket/limitCandle:{id_marche}_{GRANULARITES_KUCOIN[tf]}" for tf in self.timeframes]
+            for sujet in sujets:
+                self._ws.send(json.dumps({
+                    'id': str(int(time.time() * 1000)),
+                    'type': 'subscribe',
+                    'topic': sujet,
+                    'response': False
+                }))
+
+    def _traiter_message(self, message):
+        message = json.loads(message)
+        if message.get('type') != 'message':
+            return
+        sujet = message.get('topic', '')
+        donnees = message.get('data', {})
+
+        if sujet.startswith('/contractMarket/limitCandle:'):
+            id_marche, granularite = sujet.split(':', 1)[1].rsplit('_', 1)
+            timeframe = next((tf for tf, g in GRANULARITES_KUCOIN.items() if g == granularite), None)
+            symbole = self._symboles_par_id.get(id_marche)
+            if symbole is None or timeframe is None:
+                return
+            # Format KuCoin : [début (s), open, close, high, low, volume, turnover]
+            c = donnees['candles']
+            bougie = [int(c[0]) * 1000, float(c[1]), float(c[3]), float(c[4]), float(c[2]), float(c[5])]
+            self._publier_bougie(symbole, timeframe, bougie)
+
+        elif sujet.startswith('/contractMarket/ticker:'):
+            symbole = self._symboles_par_id.get(donnees.get('symbol'))
+            if symbole is None:
+                return
+            # L'horodatage du ticker est exprimé en nanosecondes
+            self._publier_ticker(symbole, float(donnees['price']), int(donnees['ts']) // 1_000_000)
+
+
+class FluxRejeu(MarketDataFeed):
+    """Rejoue des événements enregistrés depuis un fichier JSON Lines ou un ``ServeurRejeu``.
+
+    ``vitesse`` est le facteur d'accélération par rapport au temps réel ;
+    0 rejoue les événements aussi vite que possible.
+    """
+
+    def __init__(self, chemin=None, adresse=None, vitesse=1.0):
+        super().__init__()
+        if (chemin is None) == (adresse is None):
+            raise ValueError("Indiquer soit un fichier de rejeu, soit l'adresse d'un serveur de rejeu")
+        self.chemin = chemin
+        self.adresse = adresse
+        self.vitesse = vitesse
+        self.termine = Event()
+
+    def _lignes(self):
+        if self.chemin is not None:
+            with open(self.chemin, 'r', encoding='utf-8') as f:
+                yield from f
+        else:
+            with socket.create_connection(self.adresse, timeout=30) as connexion:
+                with connexion.makefile('r', encoding='utf-8') as f:
+                    yield from f
+
+    def _executer(self):
+        self.connecte = True
+        suivis = set(self.symboles)
+        precedent = None
+        try:
+            for ligne in self._lignes():
+                if self._arret.is_set():
+                    break
+                ligne = ligne.strip()
+                if not ligne:
+                    continue
+                evenement = json.loads(ligne)
+                if suivis and evenement['symbole'] not in suivis:
+                    continue
+
+                # Respecter l'écart entre deux événements, ajusté par la vitesse de rejeu
+                if self.vitesse and precedent is not None:
+                    attente = (evenement['t'] - precedent) / 1000 / self.vitesse
+                    if attente > 0:
+                        self._arret.wait(attente)
+                precedent = evenement['t']
+
+                if evenement['type'] == 'bougie':
+                    if evenement.get('timeframe', '1m') in self.timeframes:
+                        self._publier_bougie(evenement['symbole'], evenement.get('timeframe', '1m'), evenement['bougie'])
+                elif evenement['type'] == 'ticker':
+                    self._publier_ticker(evenement['symbole'], float(evenement['prix']), evenement['t'])
+        except Exception as e:
+            logger.error(f"Erreur pendant le rejeu du flux de marché: {e}")
+        finally:
+            self.connecte = False
+            self.termine.set()
+            logger.info("Rejeu du flux de marché terminé")
+
+
+class EnregistreurFlux:
+    """Enregistre les événements d'un flux au format de rejeu JSON Lines"""
+
+    def __init__(self, chemin):
+        self._fichier = open(chemin, 'a', encoding='utf-8')
+        self._verrou = Lock()
+
+    def attacher(self, flux):
+        flux.abonner_bougies(self.sur_bougie)
+        flux.abonner_tickers(self.sur_ticker)
+
+    def _ecrire(self, evenement):
+        with self._verrou:
+            self._fichier.write(json.dumps(evenement, separators=(',', ':')) + "\n")
+            self._fichier.flush()
+
+    def sur_bougie(self, symbole, timeframe, bougie, recu):
+        self._ecrire({'t': int(time.time() * 1000), 'type': 'bougie', 'symbole': symbole,
+                      'timeframe': timeframe, 'bougie': list(bougie)})
+
+    def sur_ticker(self, symbole, prix, horodatage, recu):
+        self._ecrire({'t': horodatage, 'type': 'ticker', 'symbole': symbole, 'prix': prix})
+
+    def fermer(self):
+        with self._verrou:
+            self._fichier.close()
+
+
+class _ServeurTCP(socketserver.ThreadingTCPServer):
+    """Serveur TCP multi-clients dont le port est réutilisable aussitôt après un arrêt"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class ServeurRejeu:
+    """Serveur TCP local qui diffuse un fichier de rejeu à chaque client connecté"""
+
+    def __init__(self, chemin, hote='127.0.0.1', port=8765):
+        chemin_rejeu = chemin
+
+        class _Gestionnaire(socketserver.StreamRequestHandler):
+            def handle(self):
+                with open(chemin_rejeu, 'rb') as f:
+                    for ligne in f:
+                        self.wfile.write(ligne)
+
+        self._serveur = _ServeurTCP((hote, port), _Gestionnaire)
+        self.adresse = self._serveur.server_address
+
+    def demarrer(self):
+        Thread(target=self._serveur.serve_forever, daemon=True).start()
+        logger.info(f"Serveur de rejeu démarré sur {self.adresse[0]}:{self.adresse[1]}")
+
+    def arreter(self):
+        self._serveur.shutdown()
+        self._serveur.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur de rejeu du flux de marché")
+    parser.add_argument("fichier", help="Fichier JSON Lines à diffuser")
+    parser.add_argument("--port", type=int, default=8765, help="Port d'écoute")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    serveur = ServeurRejeu(args.fichier, port=args.port)
+    serveur.demarrer()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        serveur.arreter()
@@ -0,0 +1,327 @@
+"""
+Graphe d'indicateurs paresseux
+------------------------------
+Chaque indicateur de ``calculer_indicateurs`` est un nœud qui déclare ses
+dépendances et l'historique supplémentaire dont il a besoin (fenêtre
+glissante, décalage, ou toute la série pour les moyennes exponentielles).
+Les consommateurs déclarent les colonnes qu'ils lisent et le nombre de
+dernières lignes utilisées ; la demande est propagée dans le graphe et seuls
+les nœuds atteints sont calculés, sur la plus petite fenêtre de queue
+suffisante.
+
+Le DataFrame retourné a la même forme que celui de ``calculer_indicateurs``
+(lignes d'amorçage supprimées) : les colonnes OHLCV sont complètes, les
+colonnes calculées ne sont renseignées que sur leur fenêtre de queue.
+Les valeurs manquantes ne sont recherchées que dans ces fenêtres : une ligne
+incomplète plus ancienne, que le calcul complet supprimerait, n'est pas
+détectée (cas des bougies plates prolongées).
+Lancer ``python graphe_indicateurs.py`` affiche le travail évité et le
+gain face au calcul complet.
+"""
+
+import time
+from collections import namedtuple
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from divergences import detecter_divergences, FENETRE_DIVERGENCES, LARGEUR_PIVOT, ECART_MAX_PIVOTS
+
+# Lignes supprimées par le dropna de calculer_indicateurs (fenêtres de 20 bougies)
+AMORCE = 19
+
+# Nombre de colonnes produites par calculer_indicateurs (référence du travail évité)
+COLONNES_CALCUL_COMPLET = 40
+
+COLONNES_BRUTES = ('open', 'high', 'low', 'close', 'volume')
+
+# historique : lignes antérieures nécessaires en plus de la fenêtre demandée (None = toute la série)
+# calcul(entrees, m, n) : retourne les m dernières valeurs à partir des entrées (queues alignées sur la fin)
+Noeud = namedtuple('Noeud', ['dependances', 'historique', 'calcul'])
+
+
+def _completer(valeurs, m, remplissage=np.nan):
+    """Aligne un résultat sur les ``m`` dernières lignes (complété au début si l'historique manque)"""
+    if len(valeurs) >= m:
+        return valeurs[len(valeurs) - m:]
+    resultat = np.full(m, remplissage, dtype=np.result_type(valeurs, type(remplissage)))
+    resultat[m - len(valeurs):] = valeurs
+    return resultat
+
+
+def _glissant(valeurs, fenetre, m, operation, **options):
+    if len(valeurs) < fenetre:
+        return np.full(m, np.nan)
+    return _completer(operation(sliding_window_view(valeurs, fenetre), axis=-1, **options), m)
+
+
+def _ema(periode):
+    def calcul(entrees, m, n):
+        serie = pd.Series(entrees['close'])
+        return serie.ewm(span=periode, adjust=False).mean().to_numpy()[-m:]
+    return Noeud(('close',), None, calcul)
+
+
+def _rsi(entrees, m, n):
+    close = entrees['close']
+    delta = np.diff(close)
+    # Sur la série complète, la première variation (inconnue) compte pour zéro
+    if len(close) == n:
+        delta = np.concatenate(([0.0], delta))
+    gain = np.where(delta > 0, delta, 0.0)
+    perte = np.where(delta < 0, -delta, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = _glissant(gain, 14, m, np.mean) / _glissant(perte, 14, m, np.mean)
+        return 100 - (100 / (1 + rs))
+
+
+def _atr(entrees, m, n):
+    high, low, close = entrees['high'], entrees['low'], entrees['close']
+    precedente = np.concatenate(([np.nan], close[:-1]))
+    tr = np.fmax(high - low, np.fmax(np.abs(high - precedente), np.abs(low - precedente)))
+    # Hors début de série, la première ligne ne sert qu'à fournir la clôture précédente
+    if len(close) < n:
+        tr = tr[1:]
+    return _glissant(tr, 14, m, np.mean)
+
+
+def _absorption(haussiere):
+    def calcul(entrees, m, n):
+        ouverture, close, corps = entrees['open'], entrees['close'], entrees['corps']
+        if haussiere:
+            veille, jour = ouverture[:-1] > close[:-1], close[1:] > ouverture[1:]
+        else:
+            veille, jour = close[:-1] > ouverture[:-1], ouverture[1:] > close[1:]
+        return _completer(veille & jour & (corps[1:] > corps[:-1]), m, False)
+    return Noeud(('open', 'close', 'corps'), 1, calcul)
+
+
+def _divergence(haussiere, largeur_pivot, ecart_max, fenetre):
+    def calcul(entrees, m, n):
+        debut, fin = fenetre
+        drapeaux = detecter_divergences(entrees['low'], entrees['high'], entrees['rsi'],
+                                        largeur_pivot=largeur_pivot, ecart_max=ecart_max,
+                                        serie_complete=True)[0 if haussiere else 1]
+        drapeaux = _completer(drapeaux, m, False)
+        # Même zone que calculer_indicateurs : bougies -debut à -(fin - 1), si la série est assez longue
+        positions = np.arange(n - m, n)
+        zone = (positions >= n - fin + 1) & (positions <= n - debut) if n > fin else np.zeros(m, dtype=bool)
+        return drapeaux & zone
+    return Noeud(('low', 'high', 'rsi'), ecart_max + largeur_pivot, calcul)
+
+
+def construire_noeuds(largeur_pivot=LARGEUR_PIVOT, ecart_max=ECART_MAX_PIVOTS, fenetre=FENETRE_DIVERGENCES):
+    """Graphe des indicateurs de calculer_indicateurs"""
+    noeuds = {colonne: Noeud((), 0, None) for colonne in COLONNES_BRUTES}
+    for periode in (5, 8, 13, 21, 34, 55):
+        noeuds[f'ema_{periode}'] = _ema(periode)
+
+    def division(a, b):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return a / b
+
+    noeuds.update({
+        'sma_20': Noeud(('close',), 19, lambda e, m, n: _glissant(e['close'], 20, m, np.mean)),
+        'std_20': Noeud(('close',), 19, lambda e, m, n: _glissant(e['close'], 20, m, np.std, ddof=1)),
+        'bb_upper': Noeud(('sma_20', 'std_20'), 0, lambda e, m, n: e['sma_20'] + e['std_20'] * 2),
+        'bb_lower': Noeud(('sma_20', 'std_20'), 0, lambda e, m, n: e['sma_20'] - e['std_20'] * 2),
+        'bb_width': Noeud(('bb_upper', 'bb_lower', 'sma_20'), 0,
+                          lambda e, m, n: division(e['bb_upper'] - e['bb_lower'], e['sma_20'])),
+        'high_max': Noeud(('high',), 9, lambda e, m, n: _glissant(e['high'], 10, m, np.max)),
+        'low_min': Noeud(('low',), 9, lambda e, m, n: _glissant(e['low'], 10, m, np.min)),
+        'volume_sma': Noeud(('volume',), 19, lambda e, m, n: _glissant(e['volume'], 20, m, np.mean)),
+        'volume_ratio': Noeud(('volume', 'volume_sma'), 0, lambda e, m, n: division(e['volume'], e['volume_sma'])),
+        'rsi': Noeud(('close',), 14, _rsi),
+        'macd': Noeud(('ema_13', 'ema_34'), 0, lambda e, m, n: e['ema_13'] - e['ema_34']),
+        'macd_signal': Noeud(('macd',), None,
+                             lambda e, m, n: pd.Series(e['macd']).ewm(span=9, adjust=False).mean().to_numpy()[-m:]),
+        'macd_hist': Noeud(('macd', 'macd_signal'), 0, lambda e, m, n: e['macd'] - e['macd_signal']),
+        'atr': Noeud(('high', 'low', 'close'), 14, _atr),
+        'momentum': Noeud(('close',), 10, lambda e, m, n: _completer(
+            division(e['close'][10:], e['close'][:-10]) - 1, m)),
+        'corps': Noeud(('open', 'close'), 0, lambda e, m, n: np.abs(e['close'] - e['open'])),
+        'ombre_haute': Noeud(('open', 'high', 'close'), 0,
+                             lambda e, m, n: e['high'] - np.maximum(e['open'], e['close'])),
+        'ombre_basse': Noeud(('open', 'low', 'close'), 0,
+                             lambda e, m, n: np.minimum(e['open'], e['close']) - e['low']),
+        'corps_moyen': Noeud(('corps',), 9, lambda e, m, n: _glissant(e['corps'], 10, m, np.mean)),
+        'doji': Noeud(('corps', 'corps_moyen'), 0, lambda e, m, n: e['corps'] <= 0.1 * e['corps_moyen']),
+        'marteau': Noeud(('ombre_basse', 'ombre_haute', 'corps'), 0,
+                         lambda e, m, n: (e['ombre_basse'] >= 2 * e['corps']) & (e['ombre_haute'] <= 0.5 * e['corps'])),
+        'etoile_filante': Noeud(('ombre_basse', 'ombre_haute', 'corps'), 0,
+                                lambda e, m, n: (e['ombre_haute'] >= 2 * e['corps']) & (e['ombre_basse'] <= 0.5 * e['corps'])),
+        'absorption_haussiere': _absorption(True),
+        'absorption_baissiere': _absorption(False),
+        'divergence_haussiere': _divergence(True, largeur_pivot, ecart_max, fenetre),
+        'divergence_baissiere': _divergence(False, largeur_pivot, ecart_max, fenetre),
+    })
+    return noeuds
+
+
+class GrapheIndicateurs:
+    """Évalue à la demande les indicateurs déclarés par les consommateurs"""
+
+    def __init__(self, noeuds=None):
+        self.noeuds = noeuds if noeuds is not None else construire_noeuds()
+        self._ordre = self._ordonner()
+        self._verrou = Lock()
+        self.statistiques_cumulees = {
+            'evaluations': 0, 'replis': 0, 'noeuds_calcules': 0, 'noeuds_ignores': 0,
+            'cellules_calculees': 0, 'cellules_completes': 0, 'duree_totale': 0.0
+        }
+
+    def _ordonner(self):
+        """Ordre topologique des nœuds (dépendances d'abord)"""
+        ordre, vus = [], set()
+
+        def visiter(nom):
+            if nom in vus:
+                return
+            vus.add(nom)
+            for dependance in self.noeuds[nom].dependances:
+                visiter(dependance)
+            ordre.append(nom)
+
+        for nom in self.noeuds:
+            visiter(nom)
+        return ordre
+
+    def planifier(self, demandes, lignes_sortie, n):
+        """Propage les demandes (colonne -> lignes de queue, None = toutes) et retourne les fenêtres à calculer"""
+        fenetres = {}
+        for nom, lignes in demandes.items():
+            fenetres[nom] = lignes_sortie if lignes is None else min(lignes, lignes_sortie)
+        for nom in reversed(self._ordre):
+            if nom not in fenetres:
+                continue
+            noeud = self.noeuds[nom]
+            besoin = n if noeud.historique is None else min(n, fenetres[nom] + noeud.historique)
+            for dependance in noeud.dependances:
+                fenetres[dependance] = max(fenetres.get(dependance, 0), besoin)
+        return fenetres
+
+    def evaluer(self, df, demandes):
+        """Retourne (DataFrame au format de calculer_indicateurs, profil), ou (None, profil) s'il faut le calcul complet.
+
+        Le calcul complet reste nécessaire quand une colonne calculée contient
+        une valeur manquante dans sa fenêtre : le dropna de
+        calculer_indicateurs supprimerait alors des lignes.
+        """
+        debut = time.perf_counter()
+        n = len(df)
+        lignes_sortie = n - AMORCE
+        fenetres = self.planifier(demandes, lignes_sortie, n)
+
+        brutes = {colonne: df[colonne].to_numpy(dtype=np.float64) for colonne in COLONNES_BRUTES}
+        valeurs = {}
+        cellules = 0
+        for nom in self._ordre:
+            if nom not in fenetres:
+                continue
+            m = fenetres[nom]
+            noeud = self.noeuds[nom]
+            if noeud.calcul is None:
+                valeurs[nom] = brutes[nom][n - m:]
+                continue
+            besoin = n if noeud.historique is None else min(n, m + noeud.historique)
+            entrees = {dependance: valeurs[dependance][-besoin:] for dependance in noeud.dependances}
+            valeurs[nom] = noeud.calcul(entrees, m, n)
+            cellules += m
+
+        # Seules les lignes effectivement lues sont vérifiées
+        calcules = [nom for nom in fenetres if self.noeuds[nom].calcul is not None]
+        complet = all(
+            not np.isnan(valeurs[nom][-min(fenetres[nom], lignes_sortie):]).any()
+            for nom in calcules if valeurs[nom].dtype != bool
+        )
+
+        cadre = None
+        if complet and lignes_sortie > 0:
+            # Un seul DataFrame construit en bloc : les colonnes d'origine puis les colonnes demandées
+            colonnes = {colonne: df[colonne].to_numpy()[AMORCE:] for colonne in df.columns}
+            for nom in calcules:
+                if nom in demandes:
+                    colonnes[nom] = _completer(valeurs[nom], lignes_sortie, False if valeurs[nom].dtype == bool else np.nan)
+            cadre = pd.DataFrame(colonnes, index=df.index[AMORCE:], copy=False)
+
+        profil = {
+            'noeuds_calcules': len(calcules),
+            'noeuds_ignores': sum(noeud.calcul is not None for noeud in self.noeuds.values()) - len(calcules),
+            'cellules_calculees': cellules,
+            'cellules_completes': COLONNES_CALCUL_COMPLET * n,
+            'duree_ms': (time.perf_counter() - debut) * 1000,
+        }
+        with self._verrou:
+            stats = self.statistiques_cumulees
+            stats['evaluations'] += 1
+            stats['replis'] += cadre is None
+            stats['noeuds_calcules'] += profil['noeuds_calcules']
+            stats['noeuds_ignores'] += profil['noeuds_ignores']
+            stats['cellules_calculees'] += cellules
+            stats['cellules_completes'] += profil['cellules_completes']
+            stats['duree_totale'] += profil['duree_ms']
+        return cadre, profil
+
+    def statistiques(self):
+        """Travail évité depuis le démarrage, par rapport au calcul complet"""
+        with self._verrou:
+            stats = dict(self.statistiques_cumulees)
+        evaluations = stats['evaluations']
+        return {
+            'evaluations': evaluations,
+            'replis_calcul_complet': stats['replis'],
+            'noeuds_calcules_moyen': stats['noeuds_calcules'] / evaluations if evaluations else 0,
+            'noeuds_ignores_moyen': stats['noeuds_ignores'] / evaluations if evaluations else 0,
+            'travail_evite_pct': (1 - stats['cellules_calculees'] / stats['cellules_completes']) * 100
+                                 if stats['cellules_completes'] else 0,
+            'duree_moyenne_ms': stats['duree_totale'] / evaluations if evaluations else 0,
+        }
+
+
+def fusionner(*declarations):
+    """Union de déclarations colonne -> lignes de queue (la plus grande fenêtre l'emporte)"""
+    demandes = {}
+    for declaration in declarations:
+        for nom, lignes in declaration.items():
+            if nom in demandes and (demandes[nom] is None or lignes is None):
+                demandes[nom] = None
+            else:
+                demandes[nom] = max(demandes.get(nom, 0), lignes)
+    return demandes
+
+
+if __name__ == "__main__":
+    import timeit
+    from botV0 import BotScalpingAvance
+
+    bot = BotScalpingAvance.__new__(BotScalpingAvance)
+    graphe = GrapheIndicateurs()
+    demandes = fusionner(BotScalpingAvance.CARACTERISTIQUES_SIGNAUX, BotScalpingAvance.CARACTERISTIQUES_LEVIER)
+
+    generateur = np.random.default_rng(11)
+    symboles = 300
+    for i in range(symboles):
+        taille = 100
+        close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.004, taille)))
+        ouverture = np.concatenate(([close[0]], close[:-1]))
+        amplitude = np.abs(generateur.normal(0, 0.002, taille)) * close
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(np.arange(taille) * 60_000, unit='ms'),
+            'open': ouverture,
+            'high': np.maximum(ouverture, close) + amplitude,
+            'low': np.minimum(ouverture, close) - amplitude,
+            'close': close,
+            'volume': generateur.lognormal(3, 0.8, taille),
+        })
+        _, profil = graphe.evaluer(df, demandes)
+
+    print(f"Profil d'une évaluation : {profil}")
+    print(f"Cumul sur {symboles} évaluations : {graphe.statistiques()}")
+
+    repetitions = 200
+    duree_complete = timeit.timeit(lambda: bot.calculer_indicateurs(df.copy()), number=repetitions) / repetitions
+    duree_paresseuse = timeit.timeit(lambda: graphe.evaluer(df.copy(), demandes), number=repetitions) / repetitions
+    print(f"Calcul complet : {duree_complete * 1e3:.2f} ms, graphe paresseux : {duree_paresseuse * 1e3:.2f} ms "
+          f"(x{duree_complete / duree_paresseuse:.1f})")
@@ -0,0 +1,38 @@
+"""
+Horloges du bot
+---------------
+Le bot lit l'heure au travers d'une horloge : l'horloge système en direct,
+une horloge simulée pilotée par les données en backtest. Les deux exposent
+``time()`` (secondes depuis l'époque, comme ``time.time``) et
+``maintenant()`` (``datetime`` naïf, comme ``datetime.now``).
+"""
+
+import time
+from datetime import datetime, timezone
+
+
+class HorlogeSysteme:
+    """Heure réelle de la machine"""
+
+    def time(self):
+        return time.time()
+
+    def maintenant(self):
+        return datetime.now()
+
+
+class HorlogeSimulee:
+    """Heure simulée, avancée explicitement par le moteur de backtest (UTC)"""
+
+    def __init__(self, instant=0.0):
+        self.instant = float(instant)
+
+    def regler(self, instant):
+        """Place l'horloge à ``instant`` (secondes depuis l'époque) ; elle ne recule jamais"""
+        self.instant = max(self.instant, float(instant))
+
+    def time(self):
+        return self.instant
+
+    def maintenant(self):
+        return datetime.fromtimestamp(self.instant, timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,302 @@
+"""
+Indicateurs incrémentaux
+------------------------
+Moteur d'indicateurs à état, un par couple (symbole, timeframe). Chaque
+mise à jour de bougie coûte un temps constant : l'état n'est engagé qu'à
+la clôture d'une bougie, et la bougie en cours de formation est évaluée à
+partir de cet état sans le modifier. Les formules reproduisent celles de
+``BotScalpingAvance.calculer_indicateurs`` (EMA ``adjust=False``, moyennes
+glissantes simples, écart-type d'échantillon).
+
+Lancer ``python indicateurs_flux.py`` mesure le coût d'une mise à jour
+face au recalcul pandas complet.
+"""
+
+import math
+from collections import deque
+from threading import Lock
+
+NAN = float('nan')
+
+PERIODES_EMA = (5, 8, 13, 21, 34, 55)
+
+# Recalcul complet des sommes glissantes à intervalle régulier pour éviter la dérive flottante
+RECALCUL_SOMMES = 1000
+
+
+class _SommeGlissante:
+    """Somme et somme des carrés sur une fenêtre glissante (valeurs centrées sur une référence)"""
+
+    def __init__(self, taille):
+        self.taille = taille
+        self.valeurs = deque()
+        self.reference = None
+        self.somme = 0.0
+        self.somme_carres = 0.0
+        self._ajouts = 0
+
+    def _centrer(self, x):
+        if self.reference is None:
+            return 0.0 if x == x else NAN
+        return x - self.reference
+
+    def apercu(self, x):
+        """(nombre, somme, somme des carrés) de la fenêtre qui se terminerait par ``x``"""
+        y = self._centrer(x)
+        somme, somme_carres, nombre = self.somme + y, self.somme_carres + y * y, len(self.valeurs) + 1
+        if len(self.valeurs) == self.taille:
+            ancien = self.valeurs[0]
+            somme -= ancien
+            somme_carres -= ancien * ancien
+            nombre -= 1
+        return nombre, somme, somme_carres
+
+    def ajouter(self, x):
+        if self.reference is None and x == x:
+            self.reference = x
+        y = self._centrer(x)
+        self.valeurs.append(y)
+        self.somme += y
+        self.somme_carres += y * y
+        if len(self.valeurs) > self.taille:
+            ancien = self.valeurs.popleft()
+            self.somme -= ancien
+            self.somme_carres -= ancien * ancien
+        self._ajouts += 1
+        if self._ajouts % RECALCUL_SOMMES == 0:
+            self.somme = math.fsum(self.valeurs)
+            self.somme_carres = math.fsum(v * v for v in self.valeurs)
+
+    def moyenne(self, x):
+        nombre, somme, _ = self.apercu(x)
+        if nombre < self.taille:
+            return NAN
+        return somme / nombre + (self.reference if self.reference is not None else x)
+
+    def moyenne_ecart_type(self, x):
+        nombre, somme, somme_carres = self.apercu(x)
+        if nombre < self.taille:
+            return NAN, NAN
+        reference = self.reference if self.reference is not None else x
+        variance = max((somme_carres - somme * somme / nombre) / (nombre - 1), 0.0)
+        return somme / nombre + reference, math.sqrt(variance)
+
+
+class _ExtremumGlissant:
+    """Maximum (ou minimum) glissant par file monotone, amorti en O(1)"""
+
+    def __init__(self, taille, maximum=True):
+        self.taille = taille
+        self.signe = 1 if maximum else -1
+        self.file = deque()  # (index, valeur signée), valeurs décroissantes
+        self.n = 0
+
+    def apercu(self, x):
+        if self.n + 1 < self.taille:
+            return NAN
+        meilleur = self.signe * x
+        # La fenêtre provisoire couvre les index engagés >= n - taille + 1
+        for index, valeur in self.file:
+            if index >= self.n - self.taille + 1:
+                meilleur = max(meilleur, valeur)
+                break
+        return self.signe * meilleur
+
+    def ajouter(self, x):
+        valeur = self.signe * x
+        while self.file and self.file[-1][1] <= valeur:
+            self.file.pop()
+        self.file.append((self.n, valeur))
+        self.n += 1
+        while self.file[0][0] <= self.n - 1 - self.taille:
+            self.file.popleft()
+
+
+class MoteurIndicateurs:
+    """Indicateurs techniques d'un couple symbole/timeframe mis à jour en O(1)"""
+
+    def __init__(self):
+        self.alphas = {periode: 2 / (periode + 1) for periode in PERIODES_EMA}
+        self.emas = {periode: None for periode in PERIODES_EMA}
+        self.macd_signal = None
+        self.dernier_close = None
+        self.closes_momentum = deque(maxlen=10)
+        self.bollinger = _SommeGlissante(20)
+        self.volumes = _SommeGlissante(20)
+        self.gains = _SommeGlissante(14)
+        self.pertes = _SommeGlissante(14)
+        self.true_ranges = _SommeGlissante(14)
+        self.plus_hauts = _ExtremumGlissant(10, maximum=True)
+        self.plus_bas = _ExtremumGlissant(10, maximum=False)
+
+        self.bougie_en_cours = None
+        self.valeurs = {}
+        self.bougies_cloturees = 0
+        self.verrou = Lock()
+
+    def _calculer(self, bougie):
+        """Valeurs des indicateurs pour ``bougie`` à partir de l'état engagé (sans le modifier)"""
+        _, ouverture, haut, bas, close, volume = bougie
+        v = {'timestamp': bougie[0], 'open': ouverture, 'high': haut, 'low': bas, 'close': close, 'volume': volume}
+
+        for periode, alpha in self.alphas.items():
+            precedente = self.emas[periode]
+            v[f'ema_{periode}'] = close if precedente is None else alpha * close + (1 - alpha) * precedente
+
+        v['sma_20'], v['std_20'] = self.bollinger.moyenne_ecart_type(close)
+        v['bb_upper'] = v['sma_20'] + v['std_20'] * 2
+        v['bb_lower'] = v['sma_20'] - v['std_20'] * 2
+        v['bb_width'] = (v['bb_upper'] - v['bb_lower']) / v['sma_20']
+
+        v['high_max'] = self.plus_hauts.apercu(haut)
+        v['low_min'] = self.plus_bas.apercu(bas)
+
+        v['volume_sma'] = self.volumes.moyenne(volume)
+        v['volume_ratio'] = volume / v['volume_sma'] if v['volume_sma'] else (NAN if volume == 0 else math.inf)
+
+        # RSI sur moyennes simples des gains et pertes (la première variation compte pour 0)
+        variation = 0.0 if self.dernier_close is None else close - self.dernier_close
+        v['gain'] = max(variation, 0.0)
+        v['perte'] = max(-variation, 0.0)
+        gain = self.gains.moyenne(v['gain'])
+        perte = self.pertes.moyenne(v['perte'])
+        if gain != gain or perte != perte or (gain == 0 and perte == 0):
+            v['rsi'] = NAN
+        elif perte == 0:
+            v['rsi'] = 100.0
+        else:
+            v['rsi'] = 100 - (100 / (1 + gain / perte))
+
+        v['macd'] = v['ema_13'] - v['ema_34']
+        v['macd_signal'] = v['macd'] if self.macd_signal is None else (2 / 10) * v['macd'] + (1 - 2 / 10) * self.macd_signal
+        v['macd_hist'] = v['macd'] - v['macd_signal']
+
+        if self.dernier_close is None:
+            v['tr'] = haut - bas
+        else:
+            v['tr'] = max(haut - bas, abs(haut - self.dernier_close), abs(bas - self.dernier_close))
+        v['atr'] = self.true_ranges.moyenne(v['tr'])
+
+        if len(self.closes_momentum) == 10:
+            v['momentum'] = close / self.closes_momentum[0] - 1
+        else:
+            v['momentum'] = NAN
+        return v
+
+    def _engager(self, bougie):
+        """Intègre définitivement une bougie clôturée dans l'état"""
+        v = self._calculer(bougie)
+        close = v['close']
+        for periode in PERIODES_EMA:
+            self.emas[periode] = v[f'ema_{periode}']
+        self.macd_signal = v['macd_signal']
+        self.bollinger.ajouter(close)
+        self.volumes.ajouter(v['volume'])
+        self.gains.ajouter(v['gain'])
+        self.pertes.ajouter(v['perte'])
+        self.true_ranges.ajouter(v['tr'])
+        self.plus_hauts.ajouter(v['high'])
+        self.plus_bas.ajouter(v['low'])
+        self.closes_momentum.append(close)
+        self.dernier_close = close
+        self.bougies_cloturees += 1
+
+    def mettre_a_jour(self, bougie):
+        """Intègre une mise à jour de bougie [ts, open, high, low, close, volume].
+
+        Une bougie portant le même horodatage que la bougie en cours la remplace ;
+        un horodatage plus récent clôture la bougie en cours. Retourne les valeurs
+        des indicateurs pour la dernière bougie.
+        """
+        bougie = tuple(float(x) for x in bougie)
+        if self.bougie_en_cours is not None:
+            if bougie[0] < self.bougie_en_cours[0]:
+                return self.valeurs
+            if bougie[0] > self.bougie_en_cours[0]:
+                self._engager(self.bougie_en_cours)
+        self.bougie_en_cours = bougie
+        self.valeurs = self._calculer(bougie)
+        return self.valeurs
+
+
+class IndicateursFlux:
+    """Moteurs d'indicateurs par couple (symbole, timeframe), synchronisés sur les tampons OHLCV"""
+
+    def __init__(self):
+        self._moteurs = {}
+        self._verrou = Lock()
+
+    def moteur(self, symbole, timeframe):
+        cle = (symbole, timeframe)
+        with self._verrou:
+            if cle not in self._moteurs:
+                self._moteurs[cle] = MoteurIndicateurs()
+            return self._moteurs[cle]
+
+    def synchroniser(self, symbole, timeframe, tampon):
+        """Transmet au moteur les bougies du tampon postérieures à sa bougie en cours et retourne ses valeurs.
+
+        Au premier appel, ou si le tampon ne couvre plus la bougie en cours du
+        moteur (trou), le moteur est réinitialisé avec tout l'historique du tampon.
+        """
+        moteur = self.moteur(symbole, timeframe)
+        bougies = tampon.copie()
+        if len(bougies) == 0:
+            return {}
+
+        with moteur.verrou:
+            en_cours = moteur.bougie_en_cours
+            if en_cours is None or bougies[0, 0] > en_cours[0] or bougies[-1, 0] < en_cours[0]:
+                moteur = MoteurIndicateurs()
+                with self._verrou:
+                    self._moteurs[(symbole, timeframe)] = moteur
+                nouvelles = bougies
+            else:
+                nouvelles = bougies[bougies[:, 0] >= en_cours[0]]
+            for bougie in nouvelles:
+                moteur.mettre_a_jour(bougie)
+            return moteur.valeurs
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    import timeit
+
+    import numpy as np
+    import pandas as pd
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from botV0 import BotScalpingAvance
+
+    generateur = np.random.default_rng(42)
+    n = 2000
+    close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.002, n)))
+    ouverture = np.concatenate(([close[0]], close[:-1]))
+    haut = np.maximum(ouverture, close) * (1 + generateur.random(n) * 0.001)
+    bas = np.minimum(ouverture, close) * (1 - generateur.random(n) * 0.001)
+    volume = generateur.random(n) * 1000
+    horodatages = np.arange(n) * 60_000
+    bougies = np.column_stack([horodatages, ouverture, haut, bas, close, volume])
+
+    df = pd.DataFrame(bougies, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    bot = BotScalpingAvance.__new__(BotScalpingAvance)
+
+    moteur = MoteurIndicateurs()
+    for bougie in bougies:
+        moteur.mettre_a_jour(bougie)
+
+    fenetre = df.iloc[-100:].reset_index(drop=True)
+    repetitions = 200
+    duree_complete = timeit.timeit(lambda: bot.calculer_indicateurs(fenetre.copy()), number=repetitions) / repetitions
+    derniere = bougies[-1].copy()
+    debut = time.perf_counter()
+    for i in range(10_000):
+        derniere[4] += 0.01
+        moteur.mettre_a_jour(derniere)
+    duree_incrementale = (time.perf_counter() - debut) / 10_000
+
+    print(f"Recalcul complet (100 bougies) : {duree_complete * 1e6:.0f} µs")
+    print(f"Mise à jour incrémentale       : {duree_incrementale * 1e6:.1f} µs")
+    print(f"Accélération                   : x{duree_complete / duree_incrementale:.0f}")
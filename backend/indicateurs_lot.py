@@ -0,0 +1,272 @@
+"""
+Indicateurs calculés par lot
+----------------------------
+Les bougies de tous les symboles sont empilées dans des tableaux NumPy à
+deux dimensions (symboles x temps) et chaque indicateur utilisé par
+``verifier_signaux`` et ``ajuster_levier_et_niveaux`` est calculé en une
+seule passe vectorisée pour tout l'univers. Les scores de signal, le levier
+et les niveaux de SL/TP sont ensuite évalués symbole par symbole sous forme
+de tableaux, sans DataFrame par paire.
+
+Les formules reproduisent celles de ``BotScalpingAvance.calculer_indicateurs``.
+Un symbole dont les indicateurs contiennent des valeurs manquantes après
+l'amorçage (bougies plates, volume nul) est marqué non valide : le bot le
+traite alors par le chemin pandas habituel, dont le ``dropna`` change la
+forme des données.
+
+Lancer ``python indicateurs_lot.py`` mesure le gain face au chemin pandas
+pour différentes tailles d'univers.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from divergences import detecter_divergences, LARGEUR_PIVOT, ECART_MAX_PIVOTS
+
+PERIODES_EMA = (5, 8, 13, 21, 34, 55)
+
+# Lignes supprimées par le dropna de calculer_indicateurs (fenêtres de 20 bougies)
+AMORCE = 19
+
+# Nombre minimal de bougies pour évaluer un lot (verifier_signaux exige 30 lignes après amorçage)
+BOUGIES_MIN_LOT = AMORCE + 30
+
+COLONNES_LOT = ('open', 'high', 'low', 'close', 'volume')
+
+
+def empiler(cadres):
+    """Empile des DataFrames OHLCV de même longueur en tableaux (symboles x temps)"""
+    return {colonne: np.stack([cadre[colonne].to_numpy(dtype=np.float64) for cadre in cadres])
+            for colonne in COLONNES_LOT}
+
+
+def _ema(valeurs, periodes):
+    """EMA ``adjust=False`` de plusieurs périodes ; retourne un tableau (périodes x symboles x temps)"""
+    alphas = (2.0 / (np.asarray(periodes, dtype=np.float64) + 1))[:, None]
+    resultat = np.empty((len(periodes),) + valeurs.shape)
+    courant = np.repeat(valeurs[None, :, 0], len(periodes), axis=0)
+    resultat[:, :, 0] = courant
+    for t in range(1, valeurs.shape[1]):
+        courant = courant + alphas * (valeurs[:, t] - courant)
+        resultat[:, :, t] = courant
+    return resultat
+
+
+def _glissant(valeurs, fenetre, operation, **options):
+    """Statistique glissante le long du temps, NaN pendant l'amorçage (comme pandas ``rolling``)"""
+    resultat = np.full(valeurs.shape, np.nan)
+    if valeurs.shape[1] >= fenetre:
+        resultat[:, fenetre - 1:] = operation(sliding_window_view(valeurs, fenetre, axis=1), axis=-1, **options)
+    return resultat
+
+
+def _decaler(valeurs, pas=1, remplissage=np.nan):
+    resultat = np.full(valeurs.shape, remplissage, dtype=valeurs.dtype)
+    resultat[:, pas:] = valeurs[:, :-pas]
+    return resultat
+
+
+def calculer_indicateurs_lot(ouverture, haut, bas, cloture, volume,
+                             largeur_pivot=LARGEUR_PIVOT, ecart_max=ECART_MAX_PIVOTS):
+    """Calcule les colonnes de calculer_indicateurs pour tous les symboles à la fois"""
+    ind = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emas = _ema(cloture, PERIODES_EMA)
+        for periode, ema in zip(PERIODES_EMA, emas):
+            ind[f'ema_{periode}'] = ema
+
+        # Bandes de Bollinger (20, 2)
+        ind['sma_20'] = _glissant(cloture, 20, np.mean)
+        ind['std_20'] = _glissant(cloture, 20, np.std, ddof=1)
+        ind['bb_upper'] = ind['sma_20'] + ind['std_20'] * 2
+        ind['bb_lower'] = ind['sma_20'] - ind['std_20'] * 2
+        ind['bb_width'] = (ind['bb_upper'] - ind['bb_lower']) / ind['sma_20']
+
+        # Supports/résistances et volume relatif
+        ind['high_max'] = _glissant(haut, 10, np.max)
+        ind['low_min'] = _glissant(bas, 10, np.min)
+        ind['volume_sma'] = _glissant(volume, 20, np.mean)
+        ind['volume_ratio'] = volume / ind['volume_sma']
+
+        # RSI (la première variation, inconnue, compte pour zéro)
+        delta = np.zeros(cloture.shape)
+        delta[:, 1:] = np.diff(cloture, axis=1)
+        gain = _glissant(np.where(delta > 0, delta, 0.0), 14, np.mean)
+        perte = _glissant(np.where(delta < 0, -delta, 0.0), 14, np.mean)
+        ind['rsi'] = 100 - (100 / (1 + gain / perte))
+
+        # MACD
+        ind['macd'] = ind['ema_13'] - ind['ema_34']
+        ind['macd_signal'] = _ema(ind['macd'], (9,))[0]
+        ind['macd_hist'] = ind['macd'] - ind['macd_signal']
+
+        # ATR (la première bougie n'a que son amplitude)
+        cloture_prec = _decaler(cloture)
+        tr = np.fmax(haut - bas, np.fmax(np.abs(haut - cloture_prec), np.abs(bas - cloture_prec)))
+        ind['atr'] = _glissant(tr, 14, np.mean)
+
+        ind['momentum'] = cloture / _decaler(cloture, 10) - 1
+
+        # Patterns de chandeliers
+        corps = np.abs(cloture - ouverture)
+        ombre_haute = haut - np.maximum(ouverture, cloture)
+        ombre_basse = np.minimum(ouverture, cloture) - bas
+        ind['corps'] = corps
+        ind['corps_moyen'] = _glissant(corps, 10, np.mean)
+        ind['marteau'] = (ombre_basse >= 2 * corps) & (ombre_haute <= 0.5 * corps)
+        ind['etoile_filante'] = (ombre_haute >= 2 * corps) & (ombre_basse <= 0.5 * corps)
+        corps_prec = _decaler(corps)
+        ind['absorption_haussiere'] = (_decaler(ouverture) > cloture_prec) & (cloture > ouverture) & (corps > corps_prec)
+        ind['absorption_baissiere'] = (cloture_prec > _decaler(ouverture)) & (ouverture > cloture) & (corps > corps_prec)
+
+    ind['divergence_haussiere'], ind['divergence_baissiere'] = detecter_divergences(
+        bas, haut, ind['rsi'], largeur_pivot=largeur_pivot, ecart_max=ecart_max)
+
+    # Le chemin pandas supprime toute ligne incomplète : seuls les symboles sans trou après l'amorçage sont comparables
+    complet = np.ones(cloture.shape[0], dtype=bool)
+    for serie in [ouverture, haut, bas, cloture, volume] + [v for v in ind.values() if v.dtype != bool]:
+        complet &= ~np.isnan(serie[:, AMORCE:]).any(axis=1)
+    ind['complet'] = complet
+    ind['close'] = cloture
+    return ind
+
+
+def evaluer_lot(ind, volatilite=None, levier_max=30, seuil=None):
+    """Scores de signal, levier et niveaux SL/TP de chaque symbole (cf. verifier_signaux et ajuster_levier_et_niveaux).
+
+    ``volatilite`` contient les scores de volatilité connus (NaN pour les
+    symboles sans score, qui utilisent l'écart-type des rendements).
+    ``seuil`` : par défaut PARAMETRES_DEFAUT['seuil_signal'] du bot.
+    """
+    if seuil is None:
+        from botV0 import PARAMETRES_DEFAUT
+        seuil = PARAMETRES_DEFAUT['seuil_signal']
+    cloture = ind['close']
+    n = cloture.shape[1]
+    if n < BOUGIES_MIN_LOT:
+        raise ValueError(f"Au moins {BOUGIES_MIN_LOT} bougies sont nécessaires pour évaluer un lot ({n} fournies)")
+
+    def dernier(nom, decalage=1):
+        return ind[nom][:, -decalage]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moyenne_bb_width = ind['bb_width'][:, -20:].mean(axis=1)
+        close, ema_8, ema_21 = dernier('close'), dernier('ema_8'), dernier('ema_21')
+        rsi, rsi_prec = dernier('rsi'), dernier('rsi', 2)
+        volume_eleve = dernier('volume_ratio') > 1.2
+
+        # Composantes de verifier_signaux
+        tendance_haussiere = (ema_8 > ema_21) & (close > ema_8)
+        tendance_baissiere = (ema_8 < ema_21) & (close < ema_8)
+        momentum_haussier = (rsi > 50) & (rsi > rsi_prec)
+        momentum_baissier = (rsi < 50) & (rsi < rsi_prec)
+        breakout_haut = (close > dernier('high_max')) & volume_eleve
+        breakout_bas = (close < dernier('low_min')) & volume_eleve
+        macd, signal = dernier('macd'), dernier('macd_signal')
+        macd_prec, signal_prec = dernier('macd', 2), dernier('macd_signal', 2)
+        macd_haussier = (macd > signal) & (macd_prec <= signal_prec)
+        macd_baissier = (macd < signal) & (macd_prec >= signal_prec)
+        bb_expansion = dernier('bb_width') > moyenne_bb_width * 1.2
+        bb_casse_haut = close > dernier('bb_upper')
+        bb_casse_bas = close < dernier('bb_lower')
+        pattern_haussier = dernier('marteau') | dernier('absorption_haussiere')
+        pattern_baissier = dernier('etoile_filante') | dernier('absorption_baissiere')
+        divergence_haussiere = ind['divergence_haussiere'][:, -5:].any(axis=1)
+        divergence_baissiere = ind['divergence_baissiere'][:, -5:].any(axis=1)
+
+        score_long = (4.0 * tendance_haussiere + 2.0 * momentum_haussier + 2.0 * breakout_haut
+                      + 1.0 * macd_haussier + 1.0 * (bb_casse_haut & bb_expansion)
+                      + 1.0 * (pattern_haussier | divergence_haussiere) + 0.5 * volume_eleve)
+        score_short = (4.0 * tendance_baissiere + 2.0 * momentum_baissier + 2.0 * breakout_bas
+                       + 1.0 * macd_baissier + 1.0 * (bb_casse_bas & bb_expansion)
+                       + 1.0 * (pattern_baissier | divergence_baissiere) + 0.5 * volume_eleve)
+
+        # Composantes de ajuster_levier_et_niveaux
+        rendements = cloture[:, AMORCE + 1:] / cloture[:, AMORCE:-1] - 1
+        ecart_type = rendements.std(axis=1, ddof=1) * 100
+        if volatilite is None:
+            volatilite = ecart_type
+        else:
+            volatilite = np.where(np.isnan(volatilite), ecart_type, volatilite)
+        atr_pct = dernier('atr') / close * 100
+        est_range = dernier('bb_width') < moyenne_bb_width
+        est_tendance = (ema_8 > ema_21) | (ema_8 < ema_21)
+
+        levier_base = np.maximum(10, np.minimum(levier_max, np.trunc(25 - volatilite * 1.5)))
+        levier = np.where(est_tendance & volume_eleve, np.minimum(levier_max, np.trunc(levier_base * 1.3)),
+                          np.where(est_range | (volatilite > 5), np.maximum(5, np.trunc(levier_base * 0.8)), levier_base))
+
+        facteur_atr = np.minimum(atr_pct, 3.0)
+        sl_pct = np.where(est_tendance, facteur_atr * 1.0, np.where(est_range, facteur_atr * 1.5, facteur_atr * 1.2))
+        tp_pct = np.where(est_tendance, facteur_atr * 3.0, np.where(est_range, facteur_atr * 2.0, facteur_atr * 2.5))
+        sl_pct = np.maximum(0.5, np.minimum(4.0, sl_pct))
+        tp_pct = np.maximum(1.0, np.minimum(12.0, tp_pct))
+
+    valide = ind['complet'] & np.isfinite(volatilite) & np.isfinite(atr_pct)
+    return {
+        'valide': valide,
+        'prix': close,
+        'score_long': score_long,
+        'score_short': score_short,
+        'signal_achat': score_long >= seuil,
+        'signal_vente': score_short >= seuil,
+        'force_signal': np.maximum(score_long, score_short) / 10,
+        'levier': np.where(valide, levier, 0).astype(np.int64),
+        'sl_pct': sl_pct / 100,
+        'tp_pct': tp_pct / 100,
+    }
+
+
+if __name__ == "__main__":
+    # Mesure du gain face au chemin pandas selon la taille de l'univers
+    import time
+    import pandas as pd
+    from botV0 import BotScalpingAvance, PARAMETRES_DEFAUT
+
+    bot = BotScalpingAvance.__new__(BotScalpingAvance)
+    bot.parametres = dict(PARAMETRES_DEFAUT)
+    bot.scores_volatilite = {}
+    bot.tendances_marche = {}
+    bot.ajustements_levier = {}
+
+    def generer(nombre, taille=100, graine=3):
+        generateur = np.random.default_rng(graine)
+        cadres = []
+        for _ in range(nombre):
+            cloture = 100 * np.exp(np.cumsum(generateur.normal(0, 0.004, taille)))
+            ouverture = np.concatenate(([cloture[0]], cloture[:-1]))
+            amplitude = np.abs(generateur.normal(0, 0.002, taille)) * cloture
+            cadres.append(pd.DataFrame({
+                'open': ouverture,
+                'high': np.maximum(ouverture, cloture) + amplitude,
+                'low': np.minimum(ouverture, cloture) - amplitude,
+                'close': cloture,
+                'volume': generateur.lognormal(3, 0.8, taille),
+            }))
+        return cadres
+
+    def chemin_pandas(cadres):
+        resultats = []
+        for i, cadre in enumerate(cadres):
+            df = bot.calculer_indicateurs(cadre.copy())
+            levier, sl_pct, tp_pct = bot.ajuster_levier_et_niveaux(i, df)
+            achat, vente = bot.verifier_signaux(df, i)
+            resultats.append((achat, vente, levier, sl_pct, tp_pct))
+        return resultats
+
+    def chemin_lot(cadres):
+        tableaux = empiler(cadres)
+        ind = calculer_indicateurs_lot(tableaux['open'], tableaux['high'], tableaux['low'], tableaux['close'],
+                                       tableaux['volume'])
+        return evaluer_lot(ind)
+
+    for nombre in (16, 100, 500):
+        cadres = generer(nombre)
+        debut = time.perf_counter()
+        chemin_pandas(cadres)
+        duree_pandas = time.perf_counter() - debut
+        debut = time.perf_counter()
+        chemin_lot(cadres)
+        duree_lot = time.perf_counter() - debut
+        print(f"{nombre} symboles : pandas {duree_pandas * 1e3:.1f} ms, lot {duree_lot * 1e3:.1f} ms "
+              f"(x{duree_pandas / duree_lot:.0f})")
@@ -0,0 +1,106 @@
+"""
+Instantané des prix partagé
+---------------------------
+Un seul appel ``fetch_tickers`` par intervalle pour tout l'univers du bot.
+Le résultat est publié sous forme de correspondance immuable symbole -> prix,
+lue sans verrou par le gestionnaire de positions, les vérifications
+SL/TP et l'interface web. Les prix poussés par un flux de marché peuvent
+être publiés dans le même instantané.
+"""
+
+import time
+import logging
+from collections import namedtuple
+from threading import Thread, Event, Lock
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+Instantane = namedtuple('Instantane', ['prix', 'horodatages', 'version'])
+
+
+class ServicePrix:
+    """Rafraîchit périodiquement les prix de l'univers et publie des instantanés immuables"""
+
+    def __init__(self, exchange, symboles, intervalle=2.0, horloge=time.time):
+        self.exchange = exchange
+        self.symboles = symboles  # Fonction retournant les symboles à suivre
+        self.intervalle = intervalle
+        self.horloge = horloge
+        self._instantane = Instantane(MappingProxyType({}), MappingProxyType({}), 0)
+        self._verrou_publication = Lock()
+        self._abonnes = []
+        self._arret = Event()
+        self.requetes = 0
+
+    def instantane(self):
+        """Retourne le dernier instantané publié (lecture sans verrou)"""
+        return self._instantane
+
+    def prix(self, symbole, age_max=None):
+        """Dernier prix connu d'un symbole, ou None s'il est absent ou plus vieux que ``age_max`` secondes"""
+        instantane = self._instantane
+        prix = instantane.prix.get(symbole)
+        if prix is None:
+            return None
+        if age_max is not None and self.horloge() - instantane.horodatages[symbole] > age_max:
+            return None
+        return prix
+
+    def abonner(self, rappel):
+        """Enregistre ``rappel(instantane)``, appelé après chaque rafraîchissement complet"""
+        self._abonnes.append(rappel)
+
+    def publier(self, nouveaux_prix):
+        """Fusionne des prix dans un nouvel instantané et le publie atomiquement"""
+        if not nouveaux_prix:
+            return self._instantane
+        maintenant = self.horloge()
+        with self._verrou_publication:
+            courant = self._instantane
+            prix = dict(courant.prix)
+            prix.update(nouveaux_prix)
+            horodatages = dict(courant.horodatages)
+            horodatages.update((symbole, maintenant) for symbole in nouveaux_prix)
+            self._instantane = Instantane(MappingProxyType(prix), MappingProxyType(horodatages), courant.version + 1)
+            return self._instantane
+
+    def rafraichir(self):
+        """Interroge l'exchange en une seule requête pour tous les symboles suivis"""
+        symboles = list(self.symboles())
+        if not symboles:
+            return self._instantane
+        tickers = self.exchange.fetch_tickers(symboles)
+        self.requetes += 1
+        instantane = self.publier({
+            symbole: ticker['last'] for symbole, ticker in tickers.items()
+            if symbole in symboles and ticker.get('last') is not None
+        })
+        for rappel in self._abonnes:
+            try:
+                rappel(instantane)
+            except Exception as e:
+                logger.error(f"Erreur dans un abonné de l'instantané des prix: {e}")
+        return instantane
+
+    def executer(self):
+        """Boucle de rafraîchissement, à lancer dans un thread"""
+        while not self._arret.is_set():
+            try:
+                self.rafraichir()
+            except Exception as e:
+                logger.error(f"Erreur lors du rafraîchissement de l'instantané des prix: {e}")
+            self._arret.wait(self.intervalle)
+
+    def demarrer(self, contexte=None):
+        """Démarre la boucle dans un thread, éventuellement sous un gestionnaire de contexte (priorité)"""
+        def boucle():
+            if contexte is None:
+                self.executer()
+            else:
+                with contexte:
+                    self.executer()
+        Thread(target=boucle, daemon=True).start()
+
+    def arreter(self):
+        self._arret.set()
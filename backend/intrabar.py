@@ -0,0 +1,103 @@
+"""
+Chemin des prix à l'intérieur d'une bougie
+------------------------------------------
+Une bougie 1m ne dit pas dans quel ordre son plus haut et son plus bas ont
+été atteints. En rejeu, le chemin suivi par le prix dans la bougie est
+choisi par un modèle :
+
+- ``ohlc`` : ouverture, puis l'extrême le plus proche du sens de la bougie
+  en dernier (bougie haussière O → L → H → C, baissière O → H → L → C) ;
+- ``pessimiste`` : l'extrême défavorable à la position d'abord (le stop
+  avant l'objectif quand les deux sont dans la bougie) ;
+- ``optimiste`` : l'extrême favorable d'abord.
+
+Les chemins se calculent pour toutes les bougies à la fois. Pendant le rejeu,
+``parcourir_bougie`` suit le chemin d'une bougie pour une position et
+présente à ``verifier_stop_loss_take_profit`` chaque niveau franchi, dans
+l'ordre où le prix l'atteint : stop-loss, take-profit, trailing stop, ainsi
+que les seuils d'activation du trailing, du break-even et du profit partiel.
+Les ordres sont donc exécutés au niveau de déclenchement, et les mises à
+jour du trailing et du break-even se font au prix où elles auraient eu lieu.
+"""
+
+import numpy as np
+
+from carnet_declencheurs import niveaux_position
+
+MODELES_INTRABAR = ('ohlc', 'pessimiste', 'optimiste')
+
+
+def bas_d_abord(ouverture, cloture, modele, sens):
+    """Masque des bougies dont le plus bas est atteint avant le plus haut.
+
+    ``sens`` vaut 'long' ou 'short' (utilisé par les modèles pessimiste et
+    optimiste). Retourne un booléen ou un tableau selon l'entrée.
+    """
+    if modele == 'ohlc':
+        return np.asarray(cloture) >= np.asarray(ouverture)
+    if modele not in MODELES_INTRABAR:
+        raise ValueError(f"Modèle intrabar inconnu: {modele} (choix: {', '.join(MODELES_INTRABAR)})")
+    defavorable_bas = sens == 'long'
+    bas = defavorable_bas if modele == 'pessimiste' else not defavorable_bas
+    return np.full(np.shape(ouverture), bas, dtype=bool)
+
+
+def chemins(bougies, modele='ohlc', sens='long'):
+    """Chemins (bougies x 4) : ouverture, premier extrême, second extrême, clôture"""
+    bougies = np.asarray(bougies, dtype=np.float64)
+    ouverture, haut, bas, cloture = bougies[:, 1], bougies[:, 2], bougies[:, 3], bougies[:, 4]
+    d_abord = bas_d_abord(ouverture, cloture, modele, sens)
+    return np.column_stack((ouverture, np.where(d_abord, bas, haut), np.where(d_abord, haut, bas), cloture))
+
+
+def niveaux_declenchement(position, parametres):
+    """Prix auxquels verifier_stop_loss_take_profit change l'état de la position.
+
+    Le suivi du trailing actif n'en fait pas partie : le chemin passe de
+    toute façon par les extrêmes de la bougie.
+    """
+    bas, haut = niveaux_position(position, parametres)
+    return [niveau for niveau, nature in bas + haut if nature != 'suivi_trailing']
+
+
+def _parcourir_segment(bot, symbole, depart, arrivee):
+    """Présente au bot, dans l'ordre, chaque niveau franchi entre ``depart`` (exclu) et ``arrivee`` (inclus)"""
+    courant = depart
+    while symbole in bot.positions:
+        niveaux = niveaux_declenchement(bot.positions[symbole], bot.parametres)
+        if arrivee < courant:
+            franchis = [niveau for niveau in niveaux if arrivee <= niveau < courant]
+            suivant = max(franchis) if franchis else None
+        else:
+            franchis = [niveau for niveau in niveaux if courant < niveau <= arrivee]
+            suivant = min(franchis) if franchis else None
+        if suivant is None:
+            break
+        bot.verifier_stop_loss_take_profit(symbole, suivant)
+        courant = suivant
+    if symbole in bot.positions and courant != arrivee:
+        bot.verifier_stop_loss_take_profit(symbole, arrivee)
+
+
+def parcourir_bougie(bot, symbole, bougie, modele='ohlc', bas_en_premier=None):
+    """Fait suivre à la position ``symbole`` le chemin intrabar de ``bougie`` (timestamp, o, h, l, c, v).
+
+    ``bas_en_premier`` (précalculé avec bas_d_abord pour toutes les bougies)
+    évite de réévaluer le modèle. L'ouverture est traitée comme un saut (un
+    gap au-delà du stop est exécuté à l'ouverture) ; les trois segments
+    suivants sont parcourus niveau par niveau.
+    """
+    position = bot.positions.get(symbole)
+    if position is None:
+        return
+    _, ouverture, haut, bas, cloture = bougie[:5]
+    if bas_en_premier is None:
+        bas_en_premier = bas_d_abord(ouverture, cloture, modele, position['direction'])
+    points = (bas, haut) if bas_en_premier else (haut, bas)
+    bot.verifier_stop_loss_take_profit(symbole, ouverture)
+    precedent = ouverture
+    for point in (*points, cloture):
+        if symbole not in bot.positions:
+            return
+        _parcourir_segment(bot, symbole, precedent, point)
+        precedent = point
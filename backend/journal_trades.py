@@ -0,0 +1,141 @@
+"""
+Journal des trades
+------------------
+Chaque trade fermé est ajouté en une ligne JSON à la fin d'un journal
+(JSON Lines) : une écriture de taille constante, quel que soit le nombre de
+trades déjà enregistrés. Le fichier n'est jamais réécrit.
+
+Politiques de synchronisation disque (``fsync``) :
+
+- ``jamais`` : le système écrit le fichier quand il le souhaite ;
+- ``lot`` : l'écrivain de persistance fait un ``fsync`` par lot d'écritures
+  (plusieurs trades rapprochés partagent la même synchronisation) ;
+- ``toujours`` : la ligne est écrite et synchronisée par l'appelant avant
+  de rendre la main, sans passer par l'écrivain.
+
+Un appelant qui ajoute un trade sous un verrou (la garde du portefeuille du
+bot) passe ``differer=True`` : la ligne est seulement mise en attente, à sa
+place dans le journal, et ``ecrire`` l'écrit une fois le verrou relâché. Les
+lignes en attente sont écrites dans l'ordre des ajouts, par le premier
+appelant qui les trouve : des fermetures rapprochées partagent un ``fsync``.
+
+L'état agrégé (profit total, séries, PnL quotidien...) est sauvegardé à part,
+dans un petit point de reprise qui note combien de trades du journal il
+contient et la taille du journal à cet instant. Au démarrage, le journal est
+relu ligne à ligne à partir de cette position : seuls les trades
+postérieurs au point de reprise sont reportés dans l'état agrégé.
+"""
+
+import os
+import json
+import logging
+from collections import deque
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+POLITIQUES_FSYNC = ('jamais', 'lot', 'toujours')
+
+
+class JournalTrades:
+    """Journal JSON Lines des trades fermés, en ajout seul"""
+
+    def __init__(self, chemin, politique_fsync='lot', ecrivain=None):
+        if politique_fsync not in POLITIQUES_FSYNC:
+            raise ValueError(f"Politique fsync inconnue: {politique_fsync} (attendu: {', '.join(POLITIQUES_FSYNC)})")
+        self.chemin = chemin
+        self.politique_fsync = politique_fsync
+        self.ecrivain = ecrivain
+        self._verrou = Lock()
+        # Lignes ajoutées avec differer=True, pas encore écrites
+        self._en_attente = deque()
+        # Nombre de trades et d'octets du journal, y compris les lignes encore en attente ou en file
+        self.nombre = 0
+        self.taille = 0
+
+    def ajouter(self, enregistrement, differer=False):
+        """Ajoute le trade ``enregistrement`` (dictionnaire sérialisable en JSON) à la fin du journal.
+
+        ``differer`` : la ligne est mise en attente sans toucher au fichier,
+        ``ecrire`` l'écrira (à appeler hors du verrou de l'appelant).
+        """
+        ligne = json.dumps(enregistrement, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self.nombre += 1
+        self.taille += len(ligne.encode('utf-8'))
+        self._en_attente.append(ligne)
+        if not differer:
+            self.ecrire()
+
+    def ecrire(self):
+        """Écrit les lignes en attente, dans l'ordre des ajouts"""
+        with self._verrou:
+            # popleft plutôt que clear : un ajout concurrent (sans ce verrou) n'est jamais perdu
+            lignes = []
+            while self._en_attente:
+                lignes.append(self._en_attente.popleft())
+            if not lignes:
+                return
+            if self.politique_fsync == 'toujours' or self.ecrivain is None:
+                with open(self.chemin, 'a', encoding='utf-8') as f:
+                    f.write(''.join(lignes))
+                    if self.politique_fsync != 'jamais':
+                        f.flush()
+                        os.fsync(f.fileno())
+            else:
+                for ligne in lignes:
+                    self.ecrivain.ajouter_ligne(self.chemin, ligne, synchroniser=self.politique_fsync == 'lot')
+
+    def lire(self, trades=0, octets=0):
+        """Parcourt le journal et produit ses trades un à un, dans l'ordre d'écriture.
+
+        La lecture commence à la position ``octets`` (``trades`` trades déjà
+        lus), telle que notée par ``point_de_reprise``. Une dernière ligne
+        incomplète (arrêt pendant une écriture) est retirée du fichier pour
+        que les ajouts suivants repartent d'une ligne propre.
+        ``nombre`` et ``taille`` reflètent ensuite le journal relu.
+        """
+        self.nombre, self.taille = trades, octets
+        if not os.path.exists(self.chemin):
+            return
+        with open(self.chemin, 'rb') as f:
+            f.seek(octets)
+            for ligne in f:
+                try:
+                    if not ligne.endswith(b'\n'):
+                        raise ValueError("ligne incomplète")
+                    enregistrement = json.loads(ligne)
+                except ValueError as e:
+                    logger.error(f"Journal des trades {self.chemin}: ligne {self.nombre + 1} illisible ({e}), "
+                                 f"journal tronqué à {self.taille} octets")
+                    break
+                self.nombre += 1
+                self.taille += len(ligne)
+                yield enregistrement
+        if os.path.getsize(self.chemin) > self.taille:
+            with open(self.chemin, 'r+b') as f:
+                f.truncate(self.taille)
+
+    def point_de_reprise(self):
+        """Position du journal à noter dans l'état agrégé sauvegardé"""
+        return {'trades': self.nombre, 'octets': self.taille}
+
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        for politique in POLITIQUES_FSYNC:
+            journal = JournalTrades(os.path.join(repertoire, f"{politique}.jsonl"), politique)
+            trade = {'symbole': 'BTC/USDT:USDT', 'action': 'fermeture_long', 'prix_entree': 100.0, 'prix_sortie': 101.0,
+                     'profit_net': 1.5, 'frais': 0.1, 'date_sortie': '2024-01-01 00:00:00'}
+            debut = time.perf_counter()
+            for _ in range(2000):
+                journal.ajouter(trade)
+            duree = time.perf_counter() - debut
+            print(f"{politique:>8}: {duree / 2000 * 1e6:.0f} µs par trade")
+
+        debut = time.perf_counter()
+        relus = sum(1 for _ in journal.lire())
+        print(f"Relecture: {relus} trades en {(time.perf_counter() - debut) * 1000:.1f} ms, "
+              f"point de reprise {journal.point_de_reprise()}")
@@ -0,0 +1,284 @@
+"""
+Livre des positions
+-------------------
+Les positions ouvertes ne sont plus des dictionnaires libres : chaque
+position est un enregistrement ``Position`` (``__slots__``) dont les champs
+numériques vivent dans des tableaux NumPy parallèles du ``LivrePositions``
+(une ligne par position : prix d'entrée, quantité, levier, marge, SL, TP,
+trailing...). Le livre se comporte comme le dictionnaire
+``{symbole: position}`` d'avant et chaque position comme un dictionnaire
+(``position['stop_loss']``, ``position.get('trailing_actif', False)``,
+``dict(position)`` pour l'interface et les journaux), mais la valorisation
+de toutes les positions, la marge engagée, les durées et la détection des
+niveaux franchis se calculent en une opération sur les tableaux.
+
+Un champ numérique facultatif (SL, TP, trailing, niveau de suivi) vaut NaN
+quand il n'est pas défini : la clé est alors absente, comme avant.
+
+Un verrou du livre protège l'agrandissement des tableaux, les écritures et
+les calculs vectorisés. Une position retirée du livre est détachée de sa
+ligne (réutilisée par la prochaine ouverture) : la lire ou la modifier lève
+``PositionFermee`` au lieu de toucher la ligne d'un autre symbole.
+"""
+
+from datetime import datetime
+from threading import RLock
+from collections.abc import MutableMapping
+
+import numpy as np
+
+# Champs numériques stockés en colonnes
+COLONNES = ('prix_entree', 'quantite', 'levier', 'marge_initiale', 'frais_entree', 'risque_utilise',
+            'stop_loss', 'take_profit', 'trailing_stop', 'niveau_activation_trailing')
+
+# Colonnes relues comme des entiers (le levier est un entier pour l'exchange et l'affichage)
+ENTIERS = ('levier',)
+
+# Champs des enregistrements
+ATTRIBUTS = ('direction', 'heure_entree', 'trailing_actif', 'breakeven_actif', 'profit_partiel_pris')
+
+_ABSENT = object()
+
+
+class PositionFermee(RuntimeError):
+    """Accès à une position déjà retirée du livre"""
+
+
+class Position(MutableMapping):
+    """Une position ouverte : vue dictionnaire sur une ligne du livre"""
+
+    __slots__ = ('symbole', 'indice', '_livre', '_autres') + ATTRIBUTS
+
+    def __init__(self, livre, symbole, indice):
+        self._livre = livre
+        self.symbole = symbole
+        self.indice = indice
+        self._autres = {}
+        for nom in ATTRIBUTS:
+            object.__setattr__(self, nom, _ABSENT)
+
+    def _ligne(self):
+        """Indice de la ligne de la position, sous le verrou du livre"""
+        if self.indice < 0:
+            raise PositionFermee(f"Position {self.symbole} retirée du livre")
+        return self.indice
+
+    def __getitem__(self, cle):
+        colonne = self._livre._colonnes.get(cle)
+        if colonne is not None:
+            with self._livre.verrou:
+                valeur = self._livre._colonnes[cle][self._ligne()]
+            if valeur != valeur:  # NaN : champ non défini
+                raise KeyError(cle)
+            return int(valeur) if cle in ENTIERS else float(valeur)
+        self._ligne()
+        if cle in ATTRIBUTS:
+            valeur = getattr(self, cle)
+            if valeur is _ABSENT:
+                raise KeyError(cle)
+            return valeur
+        return self._autres[cle]
+
+    def __setitem__(self, cle, valeur):
+        livre = self._livre
+        with livre.verrou:
+            indice = self._ligne()
+            if cle in livre._colonnes:
+                livre._colonnes[cle][indice] = np.nan if valeur is None else valeur
+            elif cle in ATTRIBUTS:
+                setattr(self, cle, valeur)
+                if cle == 'direction':
+                    livre._sens[indice] = 1.0 if valeur == 'long' else -1.0
+                elif cle == 'heure_entree':
+                    livre._instant_entree[indice] = datetime.strptime(valeur, '%Y-%m-%d %H:%M:%S').timestamp()
+            else:
+                self._autres[cle] = valeur
+
+    def __delitem__(self, cle):
+        with self._livre.verrou:
+            indice = self._ligne()
+            if cle in self._livre._colonnes:
+                self._livre._colonnes[cle][indice] = np.nan
+            elif cle in ATTRIBUTS:
+                setattr(self, cle, _ABSENT)
+            else:
+                del self._autres[cle]
+
+    def __iter__(self):
+        with self._livre.verrou:
+            indice = self._ligne()
+            presents = [nom for nom, colonne in self._livre._colonnes.items() if colonne[indice] == colonne[indice]]
+        yield from presents
+        for nom in ATTRIBUTS:
+            if getattr(self, nom) is not _ABSENT:
+                yield nom
+        yield from self._autres
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return f"Position({self.symbole}, {dict(self)})"
+
+
+class LivrePositions(MutableMapping):
+    """{symbole: Position} adossé à des tableaux NumPy, avec calculs vectorisés sur toutes les positions"""
+
+    def __init__(self, capacite=16):
+        self.verrou = RLock()
+        self._positions = {}
+        self._libres = []
+        self._capacite = 0
+        self._colonnes = {}
+        self._allouer(capacite)
+
+    def _allouer(self, capacite):
+        """Agrandit les tableaux à ``capacite`` lignes (les lignes existantes sont conservées)"""
+        def agrandir(tableau, remplissage, dtype=np.float64):
+            nouveau = np.full(capacite, remplissage, dtype=dtype)
+            if tableau is not None:
+                nouveau[:len(tableau)] = tableau
+            return nouveau
+
+        # Sous le verrou : un calcul vectorisé ou une écriture ne voit jamais des tableaux à moitié remplacés
+        with self.verrou:
+            for nom in COLONNES:
+                self._colonnes[nom] = agrandir(self._colonnes.get(nom), np.nan)
+            self._sens = agrandir(getattr(self, '_sens', None), 0.0)
+            self._instant_entree = agrandir(getattr(self, '_instant_entree', None), np.nan)
+            self._prix = agrandir(getattr(self, '_prix', None), np.nan)
+            self._seuil_bas = agrandir(getattr(self, '_seuil_bas', None), -np.inf)
+            self._seuil_haut = agrandir(getattr(self, '_seuil_haut', None), np.inf)
+            self._actif = agrandir(getattr(self, '_actif', None), False, dtype=bool)
+            self._libres.extend(range(capacite - 1, self._capacite - 1, -1))
+            self._capacite = capacite
+
+    # Interface dictionnaire
+
+    def __setitem__(self, symbole, valeurs):
+        with self.verrou:
+            if symbole in self._positions:
+                del self[symbole]
+            if not self._libres:
+                self._allouer(self._capacite * 2)
+            indice = self._libres.pop()
+            for colonne in self._colonnes.values():
+                colonne[indice] = np.nan
+            self._prix[indice] = np.nan
+            self._seuil_bas[indice], self._seuil_haut[indice] = -np.inf, np.inf
+            position = Position(self, symbole, indice)
+            for cle, valeur in valeurs.items():
+                position[cle] = valeur
+            self._actif[indice] = True
+            self._positions[symbole] = position
+
+    def __getitem__(self, symbole):
+        return self._positions[symbole]
+
+    def __delitem__(self, symbole):
+        with self.verrou:
+            position = self._positions.pop(symbole)
+            self._actif[position.indice] = False
+            self._libres.append(position.indice)
+            # Les détenteurs de l'objet ne peuvent plus atteindre la ligne, bientôt réutilisée
+            position.indice = -1
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, symbole):
+        return symbole in self._positions
+
+    # Calculs vectorisés
+
+    def marquer(self, prix):
+        """Enregistre le dernier prix connu des symboles de ``prix`` ({symbole: prix})"""
+        with self.verrou:
+            for symbole, valeur in prix.items():
+                position = self._positions.get(symbole)
+                if position is not None and valeur is not None:
+                    self._prix[position.indice] = valeur
+
+    def fixer_seuils(self, symbole, bas, haut):
+        """Niveaux de déclenchement les plus proches : sortie ou ajustement si prix <= bas ou prix >= haut"""
+        with self.verrou:
+            position = self._positions.get(symbole)
+            if position is not None:
+                self._seuil_bas[position.indice] = bas
+                self._seuil_haut[position.indice] = haut
+
+    def _par_symbole(self, tableau):
+        return {symbole: float(tableau[position.indice]) for symbole, position in self._positions.items()}
+
+    def valorisation(self):
+        """Profit en % avec levier et P&L latent (USDT) de chaque position au dernier prix marqué.
+
+        Même calcul que la fermeture dans executer_trade (sans les frais).
+        Retourne ({symbole: profit_pct}, {symbole: pnl_latent}).
+        """
+        with self.verrou, np.errstate(invalid='ignore', divide='ignore'):
+            prix, entree = self._prix, self._colonnes['prix_entree']
+            levier = self._colonnes['levier']
+            rapport = np.where(self._sens > 0, prix / entree, entree / prix)
+            profit_pct = (rapport - 1) * 100 * levier
+            pnl = self._sens * (prix - entree) / entree * self._colonnes['quantite'] * prix * levier
+            return self._par_symbole(profit_pct), self._par_symbole(pnl)
+
+    def marge_engagee(self):
+        """Somme des marges initiales des positions ouvertes"""
+        with self.verrou:
+            return float(self._colonnes['marge_initiale'][self._actif].sum())
+
+    def durees_minutes(self, maintenant):
+        """Minutes écoulées depuis l'entrée de chaque position (``maintenant`` : datetime naïf)"""
+        with self.verrou:
+            return self._par_symbole((maintenant.timestamp() - self._instant_entree) / 60)
+
+    def declenches(self, prix=None):
+        """Symboles dont le dernier prix atteint un SL, TP, trailing ou seuil fixé par fixer_seuils"""
+        with self.verrou:
+            if prix:
+                self.marquer(prix)
+            p, sens = self._prix, self._sens
+            with np.errstate(invalid='ignore'):
+                # Sens +1 (long) : SL et trailing sous le prix, TP au-dessus ; inversé pour un short
+                atteint = ((sens * (p - self._colonnes['stop_loss']) <= 0)
+                           | (sens * (p - self._colonnes['trailing_stop']) <= 0)
+                           | (sens * (p - self._colonnes['take_profit']) >= 0)
+                           | (p <= self._seuil_bas) | (p >= self._seuil_haut))
+            indices = np.flatnonzero(atteint & self._actif)
+            if not len(indices):
+                return []
+            indices = set(indices.tolist())
+            return [symbole for symbole, position in self._positions.items() if position.indice in indices]
+
+
+if __name__ == "__main__":
+    import time
+    import random
+
+    livre = LivrePositions()
+    generateur = random.Random(0)
+    symboles = [f"SYN{i}/USDT:USDT" for i in range(10)]
+    for i, symbole in enumerate(symboles):
+        direction = 'long' if i % 2 == 0 else 'short'
+        signe = 1 if direction == 'long' else -1
+        livre[symbole] = {'quantite': 10.0, 'prix_entree': 100.0, 'levier': 20, 'marge_initiale': 50.0,
+                          'direction': direction, 'heure_entree': '2024-01-01 00:00:00',
+                          'stop_loss': 100 * (1 - signe * 0.003), 'take_profit': 100 * (1 + signe * 0.006)}
+
+    instantanes = [{symbole: 100 * (1 + generateur.gauss(0, 0.002)) for symbole in symboles} for _ in range(20_000)]
+    debut = time.perf_counter()
+    for prix in instantanes:
+        declenches = livre.declenches(prix)
+        profits, pnl = livre.valorisation()
+    duree = time.perf_counter() - debut
+    print(f"{len(instantanes)} mises à jour de {len(symboles)} positions en {duree:.2f} s "
+          f"({duree / len(instantanes) * 1e6:.0f} µs chacune, marge engagée {livre.marge_engagee():.0f} USDT)")
+    print(f"Déclenchés au dernier instantané: {declenches}")
@@ -0,0 +1,203 @@
+"""
+Métriques de performance en continu
+-----------------------------------
+``MetriquesPerformance`` tient à jour, trade par trade et en temps
+constant, tout ce que le bot publiait en reparcourant la liste des trades :
+taux de réussite, profit et frais totaux, meilleur et pire trade, séries
+gagnantes et perdantes, solde cumulé, plus haut atteint et drawdown maximum,
+ratio de Sharpe des 30 derniers trades et compteurs par jour.
+
+Le Sharpe glissant repose sur une moyenne et une somme des carrés des écarts
+(méthode de Welford) mises à jour à l'entrée d'un profit dans la fenêtre et
+à la sortie du plus ancien ; elles sont recalculées exactement une fois par
+fenêtre complète pour ne pas accumuler d'erreurs d'arrondi.
+
+Le bot et l'interface web lisent le même objet ; ``etat`` et ``depuis_etat``
+servent au point de reprise sauvegardé sur disque.
+"""
+
+import math
+from collections import deque
+
+# Nombre de derniers trades du ratio de Sharpe, publié au-delà de SHARPE_TRADES_MIN trades
+FENETRE_SHARPE = 30
+SHARPE_TRADES_MIN = 10
+
+
+class MetriquesPerformance:
+    """Accumulateur des métriques de performance, mis à jour en O(1) à chaque trade fermé"""
+
+    def __init__(self, balance_initiale, fenetre=FENETRE_SHARPE):
+        self.balance_initiale = balance_initiale
+        self.total = 0
+        self.gagnants = 0
+        self.perdants = 0
+        self.profit_total = 0.0
+        self.frais_total = 0.0
+        self.meilleur_trade = {'symbole': '', 'profit': 0}
+        self.pire_trade = {'symbole': '', 'profit': 0}
+        self.gagnants_consecutifs = 0
+        self.perdants_consecutifs = 0
+        self.serie_gagnante_max = 0
+        self.serie_perdante_max = 0
+        self.solde_cumule = balance_initiale
+        self.solde_max = balance_initiale
+        self.drawdown_max = 0.0
+        # Jour (AAAA-MM-JJ) -> [profit, trades, gagnants]
+        self.jours = {}
+        self.derniers_trades = deque(maxlen=fenetre)
+        self.sharpe_ratio = 0
+        self._moyenne = 0.0
+        self._m2 = 0.0
+        self._remplacements = 0
+
+    @property
+    def taux_reussite(self):
+        return self.gagnants / self.total * 100 if self.total else 0
+
+    def roi(self, solde):
+        return (solde / self.balance_initiale - 1) * 100
+
+    def ajouter(self, trade):
+        """Reporte le trade fermé ``trade`` (profit_net, frais, symbole, date_sortie...) dans les métriques"""
+        profit = trade.get('profit_net', 0)
+        gagnant = profit > 0
+
+        self.total += 1
+        self.profit_total += profit
+        self.frais_total += trade.get('frais', 0)
+        if gagnant:
+            self.gagnants += 1
+            self.gagnants_consecutifs += 1
+            self.perdants_consecutifs = 0
+            self.serie_gagnante_max = max(self.serie_gagnante_max, self.gagnants_consecutifs)
+        else:
+            self.perdants += 1
+            self.perdants_consecutifs += 1
+            self.gagnants_consecutifs = 0
+            self.serie_perdante_max = max(self.serie_perdante_max, self.perdants_consecutifs)
+
+        if not self.meilleur_trade['symbole'] or profit > self.meilleur_trade['profit']:
+            self.meilleur_trade = {'symbole': trade['symbole'], 'profit': profit}
+        if not self.pire_trade['symbole'] or profit < self.pire_trade['profit']:
+            self.pire_trade = {'symbole': trade['symbole'], 'profit': profit}
+
+        # Drawdown : écart au plus haut du solde cumulé des trades
+        self.solde_cumule += profit
+        self.solde_max = max(self.solde_max, self.solde_cumule)
+        if self.solde_max > 0:
+            self.drawdown_max = max(self.drawdown_max, (self.solde_max - self.solde_cumule) / self.solde_max * 100)
+
+        jour = self.jours.setdefault(trade['date_sortie'][:10], [0, 0, 0])
+        jour[0] += profit
+        jour[1] += 1
+        if gagnant:
+            jour[2] += 1
+
+        self._entrer_fenetre(trade)
+
+    def _entrer_fenetre(self, trade):
+        profit = trade.get('profit_net', 0)
+        fenetre = self.derniers_trades
+        if len(fenetre) < fenetre.maxlen:
+            fenetre.append(trade)
+            ecart = profit - self._moyenne
+            self._moyenne += ecart / len(fenetre)
+            self._m2 += ecart * (profit - self._moyenne)
+        else:
+            ancien = fenetre[0].get('profit_net', 0)
+            fenetre.append(trade)
+            self._remplacements += 1
+            if self._remplacements % fenetre.maxlen == 0:
+                self._recalculer_fenetre()
+            else:
+                moyenne = self._moyenne + (profit - ancien) / len(fenetre)
+                self._m2 += (profit - ancien) * (profit - moyenne + ancien - self._moyenne)
+                self._moyenne = moyenne
+
+        if self.total > SHARPE_TRADES_MIN:
+            volatilite = math.sqrt(max(self._m2, 0.0) / len(fenetre))
+            self.sharpe_ratio = self._moyenne / (volatilite if volatilite > 0 else 0.0001)
+
+    def _recalculer_fenetre(self):
+        profits = [t.get('profit_net', 0) for t in self.derniers_trades]
+        self._moyenne = sum(profits) / len(profits) if profits else 0.0
+        self._m2 = sum((p - self._moyenne) ** 2 for p in profits)
+
+    def profit_jour(self, jour):
+        return self.jours.get(jour, [0, 0, 0])[0]
+
+    def nombre_trades_jour(self, jour):
+        return self.jours.get(jour, [0, 0, 0])[1]
+
+    def resume(self, solde=None):
+        """Métriques au format de l'historique des performances (lu par l'interface et le backtest)"""
+        return {
+            "pnl_quotidien": {jour: valeurs[0] for jour, valeurs in dict(self.jours).items()},
+            "taux_reussite": self.taux_reussite,
+            "profit_total": self.profit_total,
+            "frais_total": self.frais_total,
+            "meilleur_trade": dict(self.meilleur_trade),
+            "pire_trade": dict(self.pire_trade),
+            "nombre_trades": {"total": self.total, "gagnants": self.gagnants, "perdants": self.perdants},
+            "series_gagnantes": {"max": self.serie_gagnante_max, "actuelle": self.gagnants_consecutifs},
+            "series_perdantes": {"max": self.serie_perdante_max, "actuelle": self.perdants_consecutifs},
+            "roi": self.roi(solde) if solde is not None else 0,
+            "sharpe_ratio": self.sharpe_ratio,
+            "drawdown_max": self.drawdown_max
+        }
+
+    def etat(self, solde):
+        """Résumé et état interne nécessaires pour reprendre l'accumulation (point de reprise JSON)"""
+        etat = self.resume(solde)
+        etat.update({
+            "trades_quotidiens": {jour: valeurs[1:] for jour, valeurs in self.jours.items()},
+            "solde_cumule": self.solde_cumule,
+            "solde_max": self.solde_max,
+            "derniers_trades": list(self.derniers_trades)
+        })
+        return etat
+
+    @classmethod
+    def depuis_etat(cls, etat, balance_initiale, fenetre=FENETRE_SHARPE):
+        """Reprend l'accumulation à partir d'un dictionnaire produit par ``etat``"""
+        metriques = cls(balance_initiale, fenetre)
+        nombre = etat["nombre_trades"]
+        metriques.total, metriques.gagnants, metriques.perdants = nombre["total"], nombre["gagnants"], nombre["perdants"]
+        metriques.profit_total = etat["profit_total"]
+        metriques.frais_total = etat["frais_total"]
+        metriques.meilleur_trade = dict(etat["meilleur_trade"])
+        metriques.pire_trade = dict(etat["pire_trade"])
+        metriques.serie_gagnante_max = etat["series_gagnantes"]["max"]
+        metriques.gagnants_consecutifs = etat["series_gagnantes"]["actuelle"]
+        metriques.serie_perdante_max = etat["series_perdantes"]["max"]
+        metriques.perdants_consecutifs = etat["series_perdantes"]["actuelle"]
+        metriques.solde_cumule = etat["solde_cumule"]
+        metriques.solde_max = etat["solde_max"]
+        metriques.drawdown_max = etat["drawdown_max"]
+        metriques.sharpe_ratio = etat["sharpe_ratio"]
+        quotidiens = etat["trades_quotidiens"]
+        metriques.jours = {jour: [profit] + list(quotidiens.get(jour, [0, 0]))
+                           for jour, profit in etat["pnl_quotidien"].items()}
+        metriques.derniers_trades.extend(etat["derniers_trades"])
+        metriques._recalculer_fenetre()
+        return metriques
+
+
+if __name__ == "__main__":
+    import time
+    import random
+
+    generateur = random.Random(0)
+    trades = [{'symbole': f"SYN{i % 4}/USDT:USDT", 'profit_net': generateur.gauss(0.5, 10), 'frais': 0.2,
+               'date_sortie': f"2024-01-{1 + i // 20_000:02d} 12:00:00"} for i in range(100_000)]
+
+    metriques = MetriquesPerformance(1000)
+    debut = time.perf_counter()
+    for trade in trades:
+        metriques.ajouter(trade)
+    duree = time.perf_counter() - debut
+    print(f"{len(trades)} trades en {duree:.2f} s ({duree / len(trades) * 1e6:.1f} µs par trade)")
+
+    print(f"Réussite {metriques.taux_reussite:.1f}% | Sharpe {metriques.sharpe_ratio:.3f} | "
+          f"Drawdown max {metriques.drawdown_max:.1f}% | Trades du 2024-01-05: {metriques.nombre_trades_jour('2024-01-05')}")
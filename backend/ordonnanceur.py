@@ -0,0 +1,175 @@
+"""
+Ordonnanceur des requêtes vers l'exchange
+-----------------------------------------
+Toutes les requêtes REST du bot (boucle principale, threads d'arrière-plan,
+interface web) passent par un seau à jetons commun dimensionné sur les
+limites de KuCoin Futures. Les requêtes sont servies par classe de
+priorité : la protection des positions d'abord, puis la recherche de
+signaux, puis l'analyse de fond et le tableau de bord. Une réserve de
+jetons est gardée pour les classes prioritaires afin que, sous forte
+charge, le tableau de bord ralentisse avant la gestion des stop-loss.
+"""
+
+import time
+import heapq
+import itertools
+import logging
+from contextlib import contextmanager
+from threading import Condition, local
+
+logger = logging.getLogger(__name__)
+
+# Classes de priorité (la plus petite valeur est servie en premier)
+PRIORITE_PROTECTION = 0  # Vérifications SL/TP et fermetures de positions
+PRIORITE_SIGNAUX = 1     # Recherche de signaux d'entrée
+PRIORITE_FOND = 2        # Analyse de régime du marché et tableau de bord
+
+NOMS_PRIORITES = {
+    PRIORITE_PROTECTION: 'protection',
+    PRIORITE_SIGNAUX: 'signaux',
+    PRIORITE_FOND: 'fond',
+}
+
+# Pool public KuCoin Futures : 2000 points de poids par fenêtre de 30 secondes
+POIDS_FENETRE = 2000
+DUREE_FENETRE = 30
+CAPACITE_RAFALE = 100
+
+# Poids des requêtes utilisées par le bot (documentation KuCoin Futures)
+POIDS_REQUETES = {
+    'fetch_ohlcv': 3,
+    'fetch_ticker': 2,
+    'fetch_tickers': 5,
+    'fetch_order_book': 2,
+    'load_markets': 3,
+    'fetch_markets': 3,
+    'fetch_balance': 5,
+    'fetch_positions': 2,
+    'create_order': 2,
+    'cancel_order': 1,
+}
+
+# Part de la capacité que chaque classe doit laisser disponible aux classes plus prioritaires
+RESERVES = {
+    PRIORITE_PROTECTION: 0.0,
+    PRIORITE_SIGNAUX: 0.1,
+    PRIORITE_FOND: 0.3,
+}
+
+
+class DelaiOrdonnanceurDepasse(Exception):
+    """Levée quand une requête n'a pas obtenu de créneau dans le délai imparti"""
+
+
+class OrdonnanceurRequetes:
+    """Seau à jetons partagé avec file d'attente par priorité"""
+
+    def __init__(self, debit=POIDS_FENETRE / DUREE_FENETRE, capacite=CAPACITE_RAFALE, reserves=None):
+        self.debit = debit
+        self.capacite = capacite
+        self.reserves = dict(RESERVES if reserves is None else reserves)
+        self._jetons = float(capacite)
+        self._dernier_remplissage = time.monotonic()
+        self._condition = Condition()
+        self._file = []
+        self._sequence = itertools.count()
+        self._contexte = local()
+        self._statistiques = {
+            niveau: {'en_attente': 0, 'servies': 0, 'expirees': 0, 'attente_totale': 0.0, 'attente_max': 0.0}
+            for niveau in NOMS_PRIORITES
+        }
+
+    @contextmanager
+    def priorite(self, niveau, delai_max=None):
+        """Définit la priorité (et le délai d'attente maximal) des requêtes du thread courant"""
+        precedent = getattr(self._contexte, 'reglage', None)
+        self._contexte.reglage = (niveau, delai_max)
+        try:
+            yield
+        finally:
+            self._contexte.reglage = precedent
+
+    def reglage_courant(self):
+        return getattr(self._contexte, 'reglage', None) or (PRIORITE_SIGNAUX, None)
+
+    def _remplir(self):
+        maintenant = time.monotonic()
+        self._jetons = min(self.capacite, self._jetons + (maintenant - self._dernier_remplissage) * self.debit)
+        self._dernier_remplissage = maintenant
+
+    def acquerir(self, cout=1, niveau=None, delai_max=None):
+        """Bloque jusqu'à obtenir ``cout`` jetons ; retourne le temps d'attente en secondes"""
+        if niveau is None:
+            niveau, delai_max = self.reglage_courant()
+        cout = min(cout, self.capacite)
+        seuil = cout + self.reserves.get(niveau, 0) * self.capacite
+        debut = time.monotonic()
+        entree = (niveau, next(self._sequence))
+        stats = self._statistiques[niveau]
+
+        with self._condition:
+            heapq.heappush(self._file, entree)
+            stats['en_attente'] += 1
+            try:
+                while True:
+                    self._remplir()
+                    if self._file[0] == entree and self._jetons >= seuil:
+                        break
+                    if delai_max is not None and time.monotonic() - debut >= delai_max:
+                        stats['expirees'] += 1
+                        raise DelaiOrdonnanceurDepasse(
+                            f"Aucun créneau en {delai_max}s pour une requête de priorité {NOMS_PRIORITES[niveau]}")
+                    # Attendre le remplissage nécessaire, ou un changement de tête de file
+                    attente = max(seuil - self._jetons, 0) / self.debit if self._file[0] == entree else 0.05
+                    if delai_max is not None:
+                        attente = min(attente, delai_max - (time.monotonic() - debut))
+                    self._condition.wait(timeout=max(attente, 0.001))
+                self._jetons -= cout
+            finally:
+                self._file.remove(entree)
+                heapq.heapify(self._file)
+                stats['en_attente'] -= 1
+                self._condition.notify_all()
+
+            attente = time.monotonic() - debut
+            stats['servies'] += 1
+            stats['attente_totale'] += attente
+            stats['attente_max'] = max(stats['attente_max'], attente)
+        return attente
+
+    def statistiques(self):
+        """Profondeur de file et temps d'attente par classe de priorité"""
+        with self._condition:
+            self._remplir()
+            resultat = {'jetons_disponibles': round(self._jetons, 1), 'capacite': self.capacite}
+            for niveau, stats in self._statistiques.items():
+                resultat[NOMS_PRIORITES[niveau]] = {
+                    'en_attente': stats['en_attente'],
+                    'servies': stats['servies'],
+                    'expirees': stats['expirees'],
+                    'attente_moyenne_ms': stats['attente_totale'] / stats['servies'] * 1000 if stats['servies'] else 0,
+                    'attente_max_ms': stats['attente_max'] * 1000,
+                }
+            return resultat
+
+
+class ExchangePlanifie:
+    """Enveloppe un client ccxt : chaque requête REST passe par l'ordonnanceur"""
+
+    def __init__(self, exchange, ordonnanceur, poids=None):
+        self._exchange = exchange
+        self.ordonnanceur = ordonnanceur
+        self._poids = dict(POIDS_REQUETES if poids is None else poids)
+
+    def __getattr__(self, nom):
+        attribut = getattr(self._exchange, nom)
+        if nom not in self._poids or not callable(attribut):
+            return attribut
+
+        poids = self._poids[nom]
+
+        def requete_planifiee(*args, **kwargs):
+            self.ordonnanceur.acquerir(poids)
+            return attribut(*args, **kwargs)
+
+        return requete_planifiee
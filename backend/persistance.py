@@ -0,0 +1,159 @@
+"""
+Écrivain de persistance
+-----------------------
+Les écritures des fichiers de suivi (lignes du journal CSV des trades,
+historique des performances et rapport quotidien en JSON) sont confiées à un
+thread d'arrière-plan par une file. Le code appelant, souvent sous le
+verrou des trades, ne fait que déposer une ligne déjà formatée ou une tâche
+d'écriture ; aucun fichier n'est ouvert dans la section critique.
+
+L'écrivain traite la file par lots : les lignes d'un même fichier sont
+ajoutées en une seule ouverture, et seule la dernière tâche planifiée sous
+une même clé est exécutée (une sauvegarde de l'historique en remplace une
+plus ancienne encore en attente). Un fichier dont une ligne demande à être
+synchronisée reçoit un seul ``fsync`` pour tout le lot. Tant que le thread n'est pas démarré
+(backtest, essais), tout est écrit immédiatement par l'appelant.
+
+``ecrire_atomique`` remplace un fichier d'état (point de reprise, rapport)
+sans jamais laisser sur disque une version tronquée.
+"""
+
+import os
+import time
+import logging
+from queue import Queue, Empty
+from threading import Thread
+
+logger = logging.getLogger(__name__)
+
+# Attente après le premier élément d'un lot pour regrouper les suivants (secondes)
+DELAI_REGROUPEMENT = 0.2
+
+
+def ecrire_atomique(chemin, ecrire, binaire=False):
+    """Remplace ``chemin`` d'un bloc : ``ecrire(f)`` remplit un fichier temporaire, synchronisé puis renommé.
+
+    Un arrêt brutal laisse soit l'ancien fichier, soit le nouveau, jamais un
+    fichier à moitié écrit.
+    """
+    temporaire = f"{chemin}.tmp"
+    with open(temporaire, 'wb' if binaire else 'w', **({} if binaire else {'encoding': 'utf-8'})) as f:
+        ecrire(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporaire, chemin)
+    # Rendre le renommage lui-même durable
+    try:
+        descripteur = os.open(os.path.dirname(os.path.abspath(chemin)), os.O_RDONLY)
+        try:
+            os.fsync(descripteur)
+        finally:
+            os.close(descripteur)
+    except OSError:
+        pass
+
+
+class EcrivainPersistance:
+    """Thread unique d'écriture des fichiers, alimenté par une file"""
+
+    _ARRET = object()
+
+    def __init__(self, delai_regroupement=DELAI_REGROUPEMENT):
+        self.delai_regroupement = delai_regroupement
+        self._file = Queue()
+        self._thread = None
+        self.statistiques = {'lots': 0, 'lignes': 0, 'fsync': 0, 'taches': 0, 'taches_remplacees': 0,
+                             'erreurs': 0, 'duree_lot_max_ms': 0.0}
+
+    @property
+    def actif(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def demarrer(self):
+        if not self.actif:
+            self._thread = Thread(target=self._boucle, name='ecrivain-persistance', daemon=True)
+            self._thread.start()
+
+    def ajouter_ligne(self, chemin, ligne, synchroniser=False):
+        """Ajoute ``ligne`` (terminée par un saut de ligne) à la fin du fichier ``chemin``.
+
+        ``synchroniser`` : le fichier est passé à ``fsync`` après l'écriture du lot.
+        """
+        if self.actif:
+            self._file.put(('ligne', chemin, (ligne, synchroniser)))
+        else:
+            self._ecrire_lot({chemin: [(ligne, synchroniser)]}, {})
+
+    def planifier(self, cle, tache):
+        """Exécute ``tache()`` dans l'écrivain ; une tâche plus récente de même ``cle`` la remplace"""
+        if self.actif:
+            self._file.put(('tache', cle, tache))
+        else:
+            self._ecrire_lot({}, {cle: tache})
+
+    def vider(self):
+        """Attend que tout ce qui a été déposé soit écrit"""
+        if self.actif:
+            self._file.join()
+
+    def arreter(self, delai=10.0):
+        """Écrit ce qui reste puis arrête le thread"""
+        if self.actif:
+            self._file.put((self._ARRET, None, None))
+            self._thread.join(delai)
+        self._thread = None
+
+    def _boucle(self):
+        while True:
+            element = self._file.get()
+            elements = [element]
+            # Laisser le temps aux écritures suivantes de rejoindre le lot
+            if element[0] is not self._ARRET:
+                time.sleep(self.delai_regroupement)
+            try:
+                while True:
+                    elements.append(self._file.get_nowait())
+            except Empty:
+                pass
+
+            lignes, taches, arret = {}, {}, False
+            for nature, cle, valeur in elements:
+                if nature is self._ARRET:
+                    arret = True
+                elif nature == 'ligne':
+                    lignes.setdefault(cle, []).append(valeur)
+                else:
+                    if cle in taches:
+                        self.statistiques['taches_remplacees'] += 1
+                    taches.pop(cle, None)
+                    taches[cle] = valeur
+            self._ecrire_lot(lignes, taches)
+            for _ in elements:
+                self._file.task_done()
+            if arret:
+                return
+
+    def _ecrire_lot(self, lignes, taches):
+        debut = time.perf_counter()
+        for chemin, contenu in lignes.items():
+            try:
+                with open(chemin, 'a', encoding='utf-8') as f:
+                    f.write(''.join(ligne for ligne, _ in contenu))
+                    if any(synchroniser for _, synchroniser in contenu):
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self.statistiques['fsync'] += 1
+                self.statistiques['lignes'] += len(contenu)
+            except Exception as e:
+                self.statistiques['erreurs'] += 1
+                logger.error(f"Erreur d'écriture dans {chemin}: {e}")
+        for cle, tache in taches.items():
+            try:
+                tache()
+                self.statistiques['taches'] += 1
+            except Exception as e:
+                self.statistiques['erreurs'] += 1
+                logger.error(f"Erreur de la tâche d'écriture {cle}: {e}")
+        self.statistiques['lots'] += 1
+        self.statistiques['duree_lot_max_ms'] = max(self.statistiques['duree_lot_max_ms'],
+                                                     (time.perf_counter() - debut) * 1000)
@@ -0,0 +1,95 @@
+"""
+Point de reprise de l'état du bot
+---------------------------------
+L'état nécessaire pour reprendre le trading sans repasser par la séquence de
+démarrage (test de connexion, chargement des marchés, analyse des paires et
+ses dizaines de requêtes OHLCV) est écrit dans un seul fichier ``.npz`` :
+
+- un document JSON : solde, frais cumulés, positions ouvertes avec leurs
+  drapeaux (trailing, break-even, profit partiel), paires retenues et leurs
+  scores de volatilité, leviers ajustés, position du journal des trades ;
+- les tampons de bougies, un tableau NumPy par (symbole, timeframe).
+
+Le fichier est remplacé d'un bloc (fichier temporaire synchronisé puis
+renommé) : un arrêt brutal laisse toujours un point de reprise complet.
+"""
+
+import json
+
+import numpy as np
+
+from persistance import ecrire_atomique
+
+VERSION = 1
+
+
+def _scalaire(valeur):
+    """Scalaires NumPy (prix, quantités...) convertis pour JSON"""
+    if hasattr(valeur, 'item'):
+        return valeur.item()
+    raise TypeError(f"Valeur non sérialisable: {valeur!r}")
+
+
+def sauvegarder(chemin, etat, tampons):
+    """Écrit ``etat`` (dictionnaire JSON) et ``tampons`` ({(symbole, timeframe): (bougies, mise_a_jour)})"""
+    tableaux = {}
+    liste = []
+    for i, ((symbole, timeframe), (bougies, mise_a_jour)) in enumerate(tampons.items()):
+        tableaux[f"bougies_{i}"] = bougies
+        liste.append([symbole, timeframe, mise_a_jour])
+    document = dict(etat, version=VERSION, tampons=liste)
+    tableaux['etat'] = np.array(json.dumps(document, ensure_ascii=False, default=_scalaire))
+    ecrire_atomique(chemin, lambda f: np.savez(f, **tableaux), binaire=True)
+
+
+def charger(chemin):
+    """Relit un point de reprise : (etat, tampons) ; ValueError si la version ne correspond pas"""
+    with np.load(chemin, allow_pickle=False) as archive:
+        etat = json.loads(str(archive['etat']))
+        if etat.get('version') != VERSION:
+            raise ValueError(f"Version de point de reprise {etat.get('version')} (attendue: {VERSION})")
+        tampons = {(symbole, timeframe): (archive[f"bougies_{i}"], mise_a_jour)
+                   for i, (symbole, timeframe, mise_a_jour) in enumerate(etat.pop('tampons'))}
+    return etat, tampons
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import time
+    import shutil
+    import logging
+    import tempfile
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import botV0
+    from exchange_factice import ExchangeFactice, historiques_synthetiques
+
+    logging.getLogger('botV0').setLevel(logging.WARNING)
+    repertoire = tempfile.mkdtemp()
+    historiques = historiques_synthetiques(botV0.PAIRS, 3 * 24 * 60, graine=1)
+
+    def demarrer(reprise):
+        # Exchange local avec ~80 ms de latence par requête, comme KuCoin depuis l'Europe
+        exchange = ExchangeFactice(historiques, latence='constante:0.08')
+        debut = time.perf_counter()
+        bot = botV0.BotScalpingAvance(exchange=exchange, demarrer_taches=False, repertoire=repertoire, reprise=reprise)
+        return bot, time.perf_counter() - debut, exchange.statistiques['appels']
+
+    try:
+        bot, duree, appels = demarrer(reprise=False)
+        print(f"Démarrage à froid: {duree:.2f} s, {appels} requêtes, {len(bot.paires)} paires")
+        prix = bot.exchange.fetch_ticker(bot.paires[0])['last']
+        bot.executer_trade(bot.paires[0], 'acheter', prix, 20, 0.01, 0.02)
+        debut = time.perf_counter()
+        bot._ecrire_point_de_reprise(bot._etat_point_de_reprise())
+        print(f"Point de reprise écrit en {(time.perf_counter() - debut) * 1000:.0f} ms "
+              f"({os.path.getsize(bot.fichier_reprise) / 1024:.0f} Ko)")
+
+        bot, duree, appels = demarrer(reprise=True)
+        print(f"Reprise à chaud: {duree:.3f} s, {appels} requêtes, {len(bot.paires)} paires, "
+              f"positions {list(bot.positions)}, solde {bot.balance:.2f} USDT")
+        bot.reconciliation.join()
+        print(f"Réconciliation terminée: {bot.exchange.statistiques['appels']} requêtes")
+    finally:
+        shutil.rmtree(repertoire)
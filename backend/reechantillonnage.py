@@ -0,0 +1,97 @@
+"""
+Rééchantillonnage local des bougies
+-----------------------------------
+Les bougies 5m, 15m et 1h sont reconstruites à partir du tampon 1m déjà
+tenu à jour par le bot. L'exchange n'est sollicité pour ces timeframes
+qu'au démarrage à froid ou lorsque le tampon 1m ne couvre plus la
+dernière bougie agrégée (trou dans les données).
+"""
+
+import logging
+from threading import Lock
+
+import numpy as np
+
+from tampon_ohlcv import duree_timeframe
+
+logger = logging.getLogger(__name__)
+
+# Timeframes reconstruits à partir des bougies 1m
+TIMEFRAMES_REECHANTILLONNES = ('5m', '15m', '1h')
+
+# Fenêtre 1m tenue à jour pour alimenter le rééchantillonnage
+LIMITE_1M = 100
+
+
+def agreger(bougies, duree):
+    """Agrège des bougies triées par horodatage en bougies de ``duree`` millisecondes"""
+    bougies = np.asarray(bougies, dtype=np.float64)
+    if len(bougies) == 0:
+        return np.empty((0, 6))
+
+    debuts = (bougies[:, 0] // duree) * duree
+    ruptures = np.flatnonzero(np.diff(debuts)) + 1
+    premiers = np.concatenate(([0], ruptures))
+    derniers = np.concatenate((ruptures, [len(bougies)])) - 1
+
+    agregees = np.empty((len(premiers), 6))
+    agregees[:, 0] = debuts[premiers]
+    agregees[:, 1] = bougies[premiers, 1]
+    agregees[:, 2] = np.maximum.reduceat(bougies[:, 2], premiers)
+    agregees[:, 3] = np.minimum.reduceat(bougies[:, 3], premiers)
+    agregees[:, 4] = bougies[derniers, 4]
+    agregees[:, 5] = np.add.reduceat(bougies[:, 5], premiers)
+    return agregees
+
+
+class Reechantillonneur:
+    """Tient à jour les tampons 5m/15m/1h de façon incrémentale depuis le tampon 1m"""
+
+    def __init__(self, stockage, age_max_1m=3):
+        self.stockage = stockage
+        self.age_max_1m = age_max_1m
+        self._verrou = Lock()
+        self.statistiques = {'mises_a_jour_locales': 0, 'rattrapages': 0}
+
+    def _compter(self, cle):
+        with self._verrou:
+            self.statistiques[cle] += 1
+
+    def rafraichir(self, symbole, timeframe, limite):
+        """Met à jour le tampon du timeframe demandé et le retourne"""
+        duree = duree_timeframe(timeframe)
+        tampon = self.stockage.tampon(symbole, timeframe)
+
+        # Démarrage à froid : l'historique long vient de l'exchange
+        if len(tampon) < limite:
+            self._compter('rattrapages')
+            return self.stockage.rafraichir(symbole, timeframe, limite)
+
+        tampon_1m = self.stockage.rafraichir(symbole, '1m', LIMITE_1M, age_max=self.age_max_1m)
+
+        bougies_1m = tampon_1m.copie()
+        with tampon.verrou:
+            debut = tampon.dernier_timestamp()
+
+            # Le tampon 1m doit couvrir toute la dernière bougie agrégée, sinon rattrapage
+            if len(bougies_1m) == 0 or bougies_1m[0, 0] > debut:
+                rattrapage = True
+            else:
+                rattrapage = False
+                nouvelles = bougies_1m[bougies_1m[:, 0] >= debut]
+                tampon.ajouter(agreger(nouvelles, duree))
+
+        if rattrapage:
+            self._compter('rattrapages')
+            return self.stockage.rafraichir(symbole, timeframe, limite)
+
+        self._compter('mises_a_jour_locales')
+        return tampon
+
+    def recuperer(self, symbole, timeframe, limite):
+        """Retourne un DataFrame des ``limite`` dernières bougies rééchantillonnées"""
+        tampon = self.rafraichir(symbole, timeframe, limite)
+        bougies = tampon.copie(limite)
+        if len(bougies) == 0:
+            return None
+        return self.stockage.cadre(bougies)
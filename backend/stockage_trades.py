@@ -0,0 +1,306 @@
+"""
+Stockage SQLite des trades et événements
+----------------------------------------
+Ouvertures, fermetures, profits partiels et ajustements de SL/TP (trailing,
+break-even) sont enregistrés dans une base SQLite en mode WAL, une ligne par
+événement. Les index couvrent les requêtes du tableau de bord et des
+rapports :
+
+- ``(type, horodatage, profit_net, frais)`` : agrégats sur une période à
+  l'heure près et historique par période, lus dans l'index seul ;
+- ``(type, symbole, horodatage, profit_net, frais)`` : P&L par symbole et
+  historique d'un symbole ;
+- ``(type, raison, horodatage)`` : fermetures par raison (SL, TP, TS...).
+
+Une table ``cumuls`` (jour, symbole) tient, dans la même transaction que
+les insertions, le nombre de fermetures, de gagnants, le profit net et les
+frais : P&L par symbole et cumuls quotidiens sur des journées entières ne
+lisent que quelques lignes par jour, quel que soit le nombre de trades.
+
+Les écritures passent par une file et un thread qui insère par lots, en une
+transaction par lot. Tant que le thread n'est pas démarré (backtest, essais),
+chaque événement est inséré par l'appelant. Le mode WAL laisse les lecteurs
+(interface web, rapports) interroger la base pendant les écritures, chacun
+avec sa propre connexion.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from queue import Queue, Empty
+
+logger = logging.getLogger(__name__)
+
+# Types d'événements enregistrés
+TYPES_EVENEMENTS = ('ouverture', 'fermeture', 'profit_partiel', 'ajustement')
+
+# Colonnes de la table ; les autres champs d'un événement vont dans ``details`` (JSON)
+COLONNES = ('horodatage', 'type', 'symbole', 'direction', 'prix', 'quantite', 'levier', 'prix_entree',
+            'stop_loss', 'take_profit', 'profit_net', 'profit_pct', 'frais', 'duree_minutes', 'raison')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evenements (
+    id INTEGER PRIMARY KEY,
+    horodatage TEXT NOT NULL,
+    type TEXT NOT NULL,
+    symbole TEXT NOT NULL,
+    direction TEXT,
+    prix REAL,
+    quantite REAL,
+    levier REAL,
+    prix_entree REAL,
+    stop_loss REAL,
+    take_profit REAL,
+    profit_net REAL,
+    profit_pct REAL,
+    frais REAL,
+    duree_minutes REAL,
+    raison TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_evenements_date ON evenements (type, horodatage, profit_net, frais);
+CREATE INDEX IF NOT EXISTS idx_evenements_symbole ON evenements (type, symbole, horodatage, profit_net, frais);
+CREATE INDEX IF NOT EXISTS idx_evenements_raison ON evenements (type, raison, horodatage);
+CREATE TABLE IF NOT EXISTS cumuls (
+    jour TEXT NOT NULL,
+    symbole TEXT NOT NULL,
+    trades INTEGER NOT NULL,
+    gagnants INTEGER NOT NULL,
+    profit_net REAL NOT NULL,
+    frais REAL NOT NULL,
+    PRIMARY KEY (jour, symbole)
+) WITHOUT ROWID;
+"""
+
+def _valeur_sql(valeur):
+    return valeur.item() if hasattr(valeur, 'item') else valeur
+
+
+# Attente après le premier événement d'un lot pour regrouper les suivants (secondes)
+DELAI_REGROUPEMENT = 0.2
+
+
+class StockageTrades:
+    """Base SQLite (WAL) des événements de trading, écrite par lots depuis un thread dédié"""
+
+    _ARRET = object()
+
+    def __init__(self, chemin, delai_regroupement=DELAI_REGROUPEMENT):
+        self.chemin = chemin
+        self.delai_regroupement = delai_regroupement
+        self._file = Queue()
+        self._thread = None
+        self._lecteurs = threading.local()
+        # Connexion d'écriture, partagée entre l'appelant (mode direct) et le thread
+        self._verrou = threading.Lock()
+        self._ecriture = sqlite3.connect(chemin, check_same_thread=False)
+        self._ecriture.execute("PRAGMA journal_mode=WAL")
+        self._ecriture.execute("PRAGMA synchronous=NORMAL")
+        self._ecriture.executescript(SCHEMA)
+        self.statistiques = {'lots': 0, 'evenements': 0, 'erreurs': 0, 'duree_lot_max_ms': 0.0}
+
+    @property
+    def actif(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def demarrer(self):
+        if not self.actif:
+            self._thread = threading.Thread(target=self._boucle, name='stockage-trades', daemon=True)
+            self._thread.start()
+
+    def arreter(self, delai=10.0):
+        """Insère ce qui reste puis arrête le thread"""
+        if self.actif:
+            self._file.put(self._ARRET)
+            self._thread.join(delai)
+        self._thread = None
+
+    def vider(self):
+        """Attend que tous les événements déposés soient insérés"""
+        if self.actif:
+            self._file.join()
+
+    def enregistrer(self, evenement):
+        """Dépose un événement (dictionnaire avec au moins horodatage, type et symbole)"""
+        # Scalaires NumPy convertis en types Python, seuls acceptés par sqlite3
+        ligne = tuple(_valeur_sql(evenement.get(colonne)) for colonne in COLONNES)
+        autres = {cle: valeur for cle, valeur in evenement.items() if cle not in COLONNES}
+        ligne += (json.dumps(autres, ensure_ascii=False, default=float) if autres else None,)
+        if self.actif:
+            self._file.put(ligne)
+        else:
+            self._inserer([ligne])
+
+    def _boucle(self):
+        while True:
+            lignes = [self._file.get()]
+            if lignes[0] is not self._ARRET:
+                time.sleep(self.delai_regroupement)
+            try:
+                while True:
+                    lignes.append(self._file.get_nowait())
+            except Empty:
+                pass
+            arret = any(ligne is self._ARRET for ligne in lignes)
+            self._inserer([ligne for ligne in lignes if ligne is not self._ARRET])
+            for _ in lignes:
+                self._file.task_done()
+            if arret:
+                return
+
+    def _inserer(self, lignes):
+        if not lignes:
+            return
+        debut = time.perf_counter()
+        # Cumuls (jour, symbole) des fermetures du lot
+        cumuls = {}
+        i_type, i_horodatage, i_symbole = COLONNES.index('type'), COLONNES.index('horodatage'), COLONNES.index('symbole')
+        i_profit, i_frais = COLONNES.index('profit_net'), COLONNES.index('frais')
+        for ligne in lignes:
+            if ligne[i_type] == 'fermeture':
+                profit = ligne[i_profit] or 0
+                cumul = cumuls.setdefault((ligne[i_horodatage][:10], ligne[i_symbole]), [0, 0, 0.0, 0.0])
+                cumul[0] += 1
+                if profit > 0:
+                    cumul[1] += 1
+                cumul[2] += profit
+                cumul[3] += ligne[i_frais] or 0
+        try:
+            with self._verrou, self._ecriture:
+                self._ecriture.executemany(
+                    f"INSERT INTO evenements ({', '.join(COLONNES)}, details) VALUES ({', '.join('?' * (len(COLONNES) + 1))})",
+                    lignes)
+                self._ecriture.executemany(
+                    "INSERT INTO cumuls VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (jour, symbole) DO UPDATE SET "
+                    "trades = trades + excluded.trades, gagnants = gagnants + excluded.gagnants, "
+                    "profit_net = profit_net + excluded.profit_net, frais = frais + excluded.frais",
+                    [(jour, symbole, *cumul) for (jour, symbole), cumul in cumuls.items()])
+            self.statistiques['evenements'] += len(lignes)
+        except Exception as e:
+            self.statistiques['erreurs'] += 1
+            logger.error(f"Erreur d'insertion de {len(lignes)} événements dans {self.chemin}: {e}")
+        self.statistiques['lots'] += 1
+        self.statistiques['duree_lot_max_ms'] = max(self.statistiques['duree_lot_max_ms'],
+                                                     (time.perf_counter() - debut) * 1000)
+
+    # Requêtes (une connexion de lecture par thread)
+
+    def _lecteur(self):
+        connexion = getattr(self._lecteurs, 'connexion', None)
+        if connexion is None:
+            connexion = sqlite3.connect(self.chemin)
+            connexion.row_factory = sqlite3.Row
+            self._lecteurs.connexion = connexion
+        return connexion
+
+    def _requete(self, sql, parametres):
+        return [dict(ligne) for ligne in self._lecteur().execute(sql, parametres)]
+
+    @staticmethod
+    def _periode(debut, fin, colonne='horodatage'):
+        conditions, parametres = [], []
+        if debut:
+            conditions.append(f"{colonne} >= ?")
+            parametres.append(debut)
+        if fin:
+            conditions.append(f"{colonne} < ?")
+            parametres.append(fin)
+        return conditions, parametres
+
+    def _cumuls(self, selection, regroupement, debut, fin, symbole):
+        """Agrège les fermetures ; la table ``cumuls`` suffit quand la période tombe sur des jours entiers"""
+        jours_entiers = all(borne is None or len(borne) == 10 for borne in (debut, fin))
+        if jours_entiers:
+            conditions, parametres = self._periode(debut, fin, 'jour')
+            agregats = "SUM(trades) AS trades, SUM(gagnants) AS gagnants, SUM(profit_net) AS profit_net, SUM(frais) AS frais"
+            source = "cumuls"
+        else:
+            conditions, parametres = self._periode(debut, fin)
+            conditions.append("type = 'fermeture'")
+            agregats = ("COUNT(*) AS trades, SUM(profit_net > 0) AS gagnants, "
+                        "SUM(profit_net) AS profit_net, SUM(frais) AS frais")
+            source = "evenements"
+            selection = selection.replace("jour", "substr(horodatage, 1, 10) AS jour")
+        if symbole:
+            conditions.append("symbole = ?")
+            parametres.append(symbole)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._requete(f"SELECT {selection}, {agregats} FROM {source} {where} GROUP BY {regroupement}", parametres)
+
+    def pnl_par_symbole(self, debut=None, fin=None):
+        """P&L des fermetures par symbole : trades, gagnants, profit net et frais.
+
+        ``debut`` et ``fin`` : 'AAAA-MM-JJ' ou 'AAAA-MM-JJ HH:MM:SS' (fin exclue).
+        """
+        lignes = self._cumuls("symbole", "symbole", debut, fin, None)
+        return sorted(lignes, key=lambda ligne: ligne['profit_net'], reverse=True)
+
+    def cumuls_quotidiens(self, debut=None, fin=None, symbole=None):
+        """Fermetures par jour de sortie : trades, gagnants, profit net et frais"""
+        return sorted(self._cumuls("jour", "jour", debut, fin, symbole), key=lambda ligne: ligne['jour'])
+
+    def historique(self, type='fermeture', symbole=None, raison=None, debut=None, fin=None, limite=100, avant=None):
+        """Événements les plus récents d'abord, filtrés ; ``avant`` (id) donne la page suivante"""
+        conditions, parametres = self._periode(debut, fin)
+        for colonne, valeur in (('type', type), ('symbole', symbole), ('raison', raison)):
+            if valeur:
+                conditions.append(f"{colonne} = ?")
+                parametres.append(valeur)
+        if avant:
+            conditions.append("id < ?")
+            parametres.append(avant)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        evenements = self._requete(f"SELECT * FROM evenements {where} ORDER BY horodatage DESC, id DESC LIMIT ?",
+                                   parametres + [limite])
+        for evenement in evenements:
+            details = evenement.pop('details')
+            if details:
+                evenement.update(json.loads(details))
+        return evenements
+
+    def fermer(self):
+        self.arreter()
+        with self._verrou:
+            self._ecriture.close()
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    from datetime import datetime, timedelta
+
+    generateur = random.Random(0)
+    symboles = [f"SYN{i}/USDT:USDT" for i in range(20)]
+    depart = datetime(2023, 1, 1)
+    nombre = 1_000_000
+
+    with tempfile.TemporaryDirectory() as repertoire:
+        stockage = StockageTrades(os.path.join(repertoire, 'trades.sqlite'))
+        stockage.demarrer()
+        debut = time.perf_counter()
+        for i in range(nombre):
+            stockage.enregistrer({
+                'horodatage': (depart + timedelta(minutes=i // 2)).strftime('%Y-%m-%d %H:%M:%S'),
+                'type': 'fermeture', 'symbole': generateur.choice(symboles), 'direction': 'long',
+                'prix': 100.0, 'prix_entree': 100.0, 'quantite': 1.0, 'levier': 20,
+                'profit_net': generateur.gauss(0.1, 5), 'frais': 0.1, 'raison': generateur.choice(['SL', 'TP', 'TS'])})
+        depot = time.perf_counter() - debut
+        stockage.vider()
+        print(f"{nombre} fermetures déposées en {depot:.1f} s ({depot / nombre * 1e6:.1f} µs chacune), "
+              f"insérées en {time.perf_counter() - debut:.1f} s ({stockage.statistiques['lots']} lots)")
+
+        for nom, requete in [
+            ("P&L par symbole", lambda: stockage.pnl_par_symbole()),
+            ("Cumuls quotidiens", lambda: stockage.cumuls_quotidiens()),
+            ("Cumuls quotidiens d'un symbole", lambda: stockage.cumuls_quotidiens(symbole=symboles[0])),
+            ("P&L par symbole sur une journée à l'heure près", lambda: stockage.pnl_par_symbole('2023-03-01 08:00:00', '2023-03-02 08:00:00')),
+            ("Historique filtré", lambda: stockage.historique(symbole=symboles[3], raison='TP', limite=50)),
+            ("Dernières fermetures", lambda: stockage.historique(limite=10)),
+        ]:
+            debut = time.perf_counter()
+            resultat = requete()
+            print(f"{nom}: {len(resultat)} lignes en {(time.perf_counter() - debut) * 1000:.1f} ms")
+        stockage.fermer()
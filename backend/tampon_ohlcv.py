@@ -0,0 +1,289 @@
+"""
+Stockage incrémental des bougies OHLCV
+--------------------------------------
+Chaque couple (symbole, timeframe) dispose d'un tampon circulaire NumPy.
+Seules les bougies plus récentes que la dernière bougie stockée sont
+demandées à l'exchange (paramètre ``since``) et la bougie en cours de
+formation est réécrite en place. La stratégie reçoit une copie de la
+fenêtre demandée (au plus quelques centaines de bougies), prise sous le
+verrou du tampon : les réécritures et ajouts suivants ne la modifient pas.
+"""
+
+import json
+import time
+import logging
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Durée d'une bougie en millisecondes pour chaque timeframe utilisé par le bot
+DUREES_TIMEFRAMES = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '4h': 14_400_000,
+    '1d': 86_400_000,
+}
+
+COLONNES_OHLCV = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# Capacité par défaut d'un tampon (en bougies)
+CAPACITE_TAMPON = 500
+
+
+def duree_timeframe(timeframe):
+    """Retourne la durée d'une bougie en millisecondes"""
+    if timeframe not in DUREES_TIMEFRAMES:
+        raise ValueError(f"Timeframe non supporté: {timeframe}")
+    return DUREES_TIMEFRAMES[timeframe]
+
+
+class TamponOHLCV:
+    """Tampon circulaire de bougies OHLCV adossé à un tableau NumPy.
+
+    Chaque bougie est écrite deux fois (indices ``i`` et ``i + capacite``),
+    ce qui garantit que les ``n`` dernières bougies forment toujours une
+    tranche contiguë du tableau et peuvent être exposées sous forme de vue.
+    """
+
+    def __init__(self, capacite=CAPACITE_TAMPON, horloge=time.time):
+        self.capacite = capacite
+        self.horloge = horloge
+        self._donnees = np.zeros((2 * capacite, len(COLONNES_OHLCV)), dtype=np.float64)
+        self._tete = 0  # Index de la prochaine écriture dans [0, capacite)
+        self.taille = 0
+        self.revision = 0  # Incrémentée à chaque modification du tampon
+        self.mise_a_jour = 0.0  # Instant (horloge) de la dernière modification
+        self.verrou = Lock()
+
+    def __len__(self):
+        return self.taille
+
+    def dernier_timestamp(self):
+        """Horodatage (ms) de la dernière bougie stockée, ou None si le tampon est vide"""
+        if self.taille == 0:
+            return None
+        return int(self._donnees[(self._tete - 1) % self.capacite, 0])
+
+    def vider(self):
+        """Oublie toutes les bougies stockées (avant un rechargement complet)"""
+        self._tete = 0
+        self.taille = 0
+
+    def _ecrire(self, lignes):
+        """Ajoute un bloc de bougies après la dernière bougie stockée"""
+        if len(lignes) > self.capacite:
+            lignes = lignes[-self.capacite:]
+        indices = (self._tete + np.arange(len(lignes))) % self.capacite
+        self._donnees[indices] = lignes
+        self._donnees[indices + self.capacite] = lignes
+        self._tete = (self._tete + len(lignes)) % self.capacite
+        self.taille = min(self.capacite, self.taille + len(lignes))
+
+    def ajouter(self, bougies):
+        """Fusionne des bougies triées par horodatage croissant.
+
+        La bougie portant le même horodatage que la dernière bougie stockée
+        la remplace en place, les bougies plus anciennes sont ignorées.
+        Retourne le nombre de nouvelles bougies ajoutées.
+        """
+        lignes = np.asarray(bougies, dtype=np.float64)
+        if lignes.size == 0:
+            return 0
+        lignes = lignes.reshape(-1, len(COLONNES_OHLCV))
+
+        dernier = self.dernier_timestamp()
+        if dernier is not None:
+            # Réécrire en place la bougie en cours de formation
+            identiques = lignes[lignes[:, 0] == dernier]
+            if len(identiques):
+                index = (self._tete - 1) % self.capacite
+                self._donnees[index] = identiques[-1]
+                self._donnees[index + self.capacite] = identiques[-1]
+            lignes = lignes[lignes[:, 0] > dernier]
+
+        if len(lignes):
+            self._ecrire(lignes)
+        self.revision += 1
+        self.mise_a_jour = self.horloge()
+        return len(lignes)
+
+    def vue(self, n=None):
+        """Retourne une vue en lecture seule des ``n`` dernières bougies (sans copie).
+
+        La vue suit les écritures suivantes : elle ne doit être lue que sous
+        ``verrou``. Pour conserver les bougies au-delà, utiliser ``copie``.
+        """
+        n = self.taille if n is None else min(n, self.taille)
+        fin = (self._tete - 1) % self.capacite + self.capacite + 1
+        vue = self._donnees[fin - n:fin].view()
+        vue.flags.writeable = False
+        return vue
+
+    def copie(self, n=None):
+        """Copie des ``n`` dernières bougies, prise sous le verrou du tampon"""
+        with self.verrou:
+            return self.vue(n).copy()
+
+
+class StockageOHLCV:
+    """Ensemble des tampons OHLCV du bot, alimenté par des requêtes incrémentales"""
+
+    def __init__(self, exchange, capacite=CAPACITE_TAMPON, horloge=time.time):
+        self.exchange = exchange
+        self.capacite = capacite
+        self.horloge = horloge
+        self._tampons = {}
+        self._verrou = Lock()
+        # Couples alimentés par un flux poussé, et fonction indiquant si ce flux est connecté
+        self._cles_poussees = set()
+        self.flux_connecte = lambda: False
+        self._statistiques = self._statistiques_vides()
+        self.dernier_releve = self._statistiques_vides()
+
+    @staticmethod
+    def _statistiques_vides():
+        return {
+            'requetes': 0,
+            'requetes_incrementales': 0,
+            'bougies_recues': 0,
+            'octets_recus': 0,
+            # Volume qu'aurait coûté un rechargement complet de la fenêtre demandée
+            'octets_rechargement_complet': 0,
+        }
+
+    def tampon(self, symbole, timeframe):
+        """Retourne (en le créant si nécessaire) le tampon d'un couple symbole/timeframe"""
+        cle = (symbole, timeframe)
+        with self._verrou:
+            if cle not in self._tampons:
+                self._tampons[cle] = TamponOHLCV(self.capacite, self.horloge)
+            return self._tampons[cle]
+
+    def _telecharger(self, symbole, timeframe, limite, depuis=None):
+        """Appelle fetch_ohlcv et retourne (bougies, taille estimée de la réponse en octets)"""
+        if depuis is None:
+            ohlcv = self.exchange.fetch_ohlcv(symbole, timeframe, limit=limite)
+        else:
+            ohlcv = self.exchange.fetch_ohlcv(symbole, timeframe, since=depuis, limit=limite)
+        ohlcv = ohlcv or []
+        octets = len(json.dumps(ohlcv, separators=(',', ':')))
+        return ohlcv, octets
+
+    def rafraichir(self, symbole, timeframe, limite, age_max=0):
+        """Met à jour le tampon avec les bougies manquantes et retourne le tampon.
+
+        Aucune requête n'est émise si le tampon contient assez de bougies et a été
+        mis à jour il y a moins de ``age_max`` secondes.
+        """
+        tampon = self.tampon(symbole, timeframe)
+        duree = duree_timeframe(timeframe)
+
+        with tampon.verrou:
+            # Le flux poussé tient déjà le tampon à jour, aucune requête n'est nécessaire
+            if (symbole, timeframe) in self._cles_poussees and self.flux_connecte() and len(tampon) >= limite:
+                return tampon
+            if age_max and len(tampon) >= limite and self.horloge() - tampon.mise_a_jour < age_max:
+                return tampon
+
+            dernier = tampon.dernier_timestamp()
+            maintenant = int(self.horloge() * 1000)
+            manquantes = (maintenant - dernier) // duree + 1 if dernier is not None else None
+
+            # Rechargement complet au démarrage, si la fenêtre demandée est plus grande
+            # que le contenu du tampon, ou si l'écart depuis la dernière bougie est trop grand
+            if dernier is None or len(tampon) < limite or manquantes >= limite:
+                ohlcv, octets = self._telecharger(symbole, timeframe, min(limite, self.capacite))
+                incremental = False
+            else:
+                ohlcv, octets = self._telecharger(symbole, timeframe, int(manquantes) + 1, depuis=dernier)
+                incremental = True
+
+            if ohlcv:
+                # Un rechargement complet remplace le contenu : les anciennes bougies
+                # laisseraient sinon un trou avant les bougies téléchargées
+                if not incremental:
+                    tampon.vider()
+                tampon.ajouter(ohlcv)
+
+        with self._verrou:
+            stats = self._statistiques
+            stats['requetes'] += 1
+            stats['requetes_incrementales'] += int(incremental)
+            stats['bougies_recues'] += len(ohlcv)
+            stats['octets_recus'] += octets
+            octets_par_bougie = octets / len(ohlcv) if ohlcv else 0
+            stats['octets_rechargement_complet'] += int(octets_par_bougie * limite) if incremental else octets
+
+        return tampon
+
+    def alimenter(self, symbole, timeframe, bougie):
+        """Intègre une bougie reçue d'un flux poussé.
+
+        Si la bougie laisse un trou après la dernière bougie stockée (reconnexion),
+        les bougies manquantes sont d'abord rattrapées par une requête incrémentale.
+        """
+        tampon = self.tampon(symbole, timeframe)
+        dernier = tampon.dernier_timestamp()
+        if dernier is not None and bougie[0] > dernier + duree_timeframe(timeframe):
+            with self._verrou:
+                self._cles_poussees.discard((symbole, timeframe))
+            self.rafraichir(symbole, timeframe, len(tampon))
+
+        with tampon.verrou:
+            tampon.ajouter([bougie])
+        with self._verrou:
+            self._cles_poussees.add((symbole, timeframe))
+        return tampon
+
+    def recuperer(self, symbole, timeframe='1m', limite=100):
+        """Retourne un DataFrame des ``limite`` dernières bougies, copiées du tampon"""
+        tampon = self.rafraichir(symbole, timeframe, limite)
+        bougies = tampon.copie(limite)
+        if len(bougies) == 0:
+            return None
+        return self.cadre(bougies)
+
+    @staticmethod
+    def cadre(bougies):
+        """Construit un DataFrame sur un tableau de bougies (une copie du tampon) sans le recopier"""
+        df = pd.DataFrame(bougies[:, 1:], columns=COLONNES_OHLCV[1:], copy=False)
+        df.insert(0, 'timestamp', pd.to_datetime(bougies[:, 0].astype(np.int64), unit='ms'))
+        return df
+
+    def exporter(self):
+        """Copie de tous les tampons : {(symbole, timeframe): (bougies, instant de mise à jour)}"""
+        with self._verrou:
+            tampons = list(self._tampons.items())
+        copies = {}
+        for cle, tampon in tampons:
+            with tampon.verrou:
+                if len(tampon):
+                    copies[cle] = (tampon.vue().copy(), tampon.mise_a_jour)
+        return copies
+
+    def importer(self, tampons):
+        """Recharge des tampons exportés ; leur âge d'origine est conservé pour les prochains rafraîchissements"""
+        for (symbole, timeframe), (bougies, mise_a_jour) in tampons.items():
+            tampon = self.tampon(symbole, timeframe)
+            with tampon.verrou:
+                tampon.ajouter(bougies)
+                tampon.mise_a_jour = mise_a_jour
+
+    def releve_cycle(self):
+        """Retourne les statistiques de téléchargement accumulées depuis le dernier relevé"""
+        with self._verrou:
+            releve = self._statistiques
+            self._statistiques = self._statistiques_vides()
+        if releve['octets_rechargement_complet']:
+            releve['economie_pct'] = (1 - releve['octets_recus'] / releve['octets_rechargement_complet']) * 100
+        else:
+            releve['economie_pct'] = 0
+        self.dernier_releve = releve
+        return releve
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Les modules du bot s'importent par leur nom, depuis backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def botV0(tmp_path_factory):
+    """Module botV0, importé depuis un répertoire temporaire (il crée son dossier logs/ à l'import)"""
+    repertoire = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("bot"))
+    try:
+        import botV0
+    finally:
+        os.chdir(repertoire)
+    return botV0
+
+
+@pytest.fixture
+def bot_factice(botV0, tmp_path):
+    """Construit un bot sur l'exchange factice (sans réseau), ses fichiers de suivi dans ``tmp_path``"""
+    import exchange_factice
+    from horloge import HorlogeSimulee
+
+    paires = ['SYN0/USDT:USDT', 'SYN1/USDT:USDT']
+    historiques = exchange_factice.historiques_synthetiques(paires, 3000, 1)
+    # Horloge figée partagée : le bot repris voit les mêmes prix que celui qui a écrit le point de reprise
+    horloge = HorlogeSimulee(time.time())
+
+    def construire(reprise=False, flux=None):
+        exchange = exchange_factice.ExchangeFactice(historiques, horloge=horloge)
+        return botV0.BotScalpingAvance(exchange=exchange, paires=paires, demarrer_taches=False,
+                                       repertoire=str(tmp_path), reprise=reprise, flux=flux)
+
+    return construire
+
+
+@pytest.fixture
+def bot_calcul(botV0):
+    """Bot réduit aux méthodes de calcul (ni exchange ni fichiers)"""
+    bot = botV0.BotScalpingAvance.__new__(botV0.BotScalpingAvance)
+    bot.parametres = dict(botV0.PARAMETRES_DEFAUT)
+    bot.scores_volatilite = {}
+    bot.tendances_marche = {}
+    bot.ajustements_levier = {}
+    return bot
+
+
+def bougies_aleatoires(nombre, graine=42):
+    """Tableau de bougies 1m (horodatage, open, high, low, close, volume) en marche aléatoire"""
+    generateur = np.random.default_rng(graine)
+    close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.002, nombre)))
+    ouverture = np.concatenate(([close[0]], close[:-1]))
+    haut = np.maximum(ouverture, close) * (1 + generateur.random(nombre) * 0.001)
+    bas = np.minimum(ouverture, close) * (1 - generateur.random(nombre) * 0.001)
+    volume = generateur.random(nombre) * 1000
+    return np.column_stack([np.arange(nombre) * 60_000, ouverture, haut, bas, close, volume])
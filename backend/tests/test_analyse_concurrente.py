@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def decisions_appliquees(bot, symboles):
+    appliquees = []
+    bot.appliquer_decision = lambda symbole, decision: appliquees.append((symbole, decision))
+    bot.evaluer_symboles(symboles)
+    return appliquees
+
+
+def test_analyse_en_parallele_identique_a_l_analyse_sequentielle(botV0, bot_factice, monkeypatch):
+    monkeypatch.setattr(botV0, 'BATCH_INDICATORS', False)
+    sequentiel = bot_factice()
+    symboles = list(sequentiel.paires) * 3
+    attendues = decisions_appliquees(sequentiel, symboles)
+
+    parallele = bot_factice()
+    with ThreadPoolExecutor(max_workers=4) as executeur:
+        parallele.executeur = executeur
+        obtenues = decisions_appliquees(parallele, symboles)
+
+    # Décisions appliquées dans l'ordre des symboles, quel que soit l'ordre de fin des analyses
+    assert [symbole for symbole, _ in obtenues] == symboles
+    assert obtenues == attendues
+
+
+def test_symbole_en_erreur_sans_decision(botV0, bot_factice, monkeypatch):
+    monkeypatch.setattr(botV0, 'BATCH_INDICATORS', False)
+    bot = bot_factice()
+    with ThreadPoolExecutor(max_workers=2) as executeur:
+        bot.executeur = executeur
+        appliquees = decisions_appliquees(bot, ['INCONNU/USDT:USDT'] + list(bot.paires))
+
+    assert [symbole for symbole, _ in appliquees] == list(bot.paires)
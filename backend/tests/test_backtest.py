@@ -0,0 +1,60 @@
+import numpy as np
+
+from backtest import ExchangeSimule, MoteurBacktest, generer_historique
+from horloge import HorlogeSimulee
+
+
+def historiques(paires=2, bougies=1500):
+    return {f"SYN{i}/USDT:USDT": generer_historique(bougies, graine=i, prix=10.0 * (i + 1)) for i in range(paires)}
+
+
+def test_exchange_simule_ne_sert_que_les_bougies_cloturees():
+    donnees = historiques(paires=1, bougies=300)
+    symbole = next(iter(donnees))
+    horloge = HorlogeSimulee()
+    exchange = ExchangeSimule(donnees, horloge)
+    debut = donnees[symbole]['timestamp'].iloc[0]
+
+    # 200e bougie en cours de formation : seules les 199 premières sont servies
+    horloge.regler((debut + 199 * 60_000 + 30_000) / 1000)
+    bougies = exchange.fetch_ohlcv(symbole, '1m', limit=500)
+
+    assert len(bougies) == 199
+    assert bougies[-1][0] == debut + 198 * 60_000
+    assert exchange.fetch_ticker(symbole)['last'] == bougies[-1][4]
+    # Le 5m agrège les mêmes bougies, dernière bougie en formation comprise
+    agregees = exchange.fetch_ohlcv(symbole, '5m', limit=10)
+    assert agregees[-1][4] == bougies[-1][4]
+
+
+def test_backtest_rapide_et_complet_sur_le_meme_pre_filtre(tmp_path):
+    donnees = historiques(bougies=400)
+    rapide = MoteurBacktest(donnees, str(tmp_path / 'rapide'), controle=0).executer()
+    complet = MoteurBacktest(donnees, str(tmp_path / 'complet'), complet=True).executer()
+
+    for resultats in (rapide, complet):
+        assert resultats['positions_ouvertes'] == 0
+        assert np.isfinite(resultats['solde_final'])
+    assert rapide['statistiques']['bougies'] == complet['statistiques']['bougies'] == 800
+    assert rapide['statistiques']['candidates'] == complet['statistiques']['candidates']
+    # Sans contrôle, le mode rapide n'analyse jamais hors des candidates
+    assert rapide['statistiques']['controles'] == 0
+    assert rapide['statistiques']['decisions'] <= rapide['statistiques']['candidates']
+    # Le mode complet applique la décision du bot sur chaque bougie analysable
+    assert complet['statistiques']['decisions'] > rapide['statistiques']['decisions']
+    assert complet['statistiques']['controles'] > 0
+    assert complet['statistiques']['faux_negatifs'] <= complet['statistiques']['controles']
+
+
+def test_controle_des_signaux_manques_sans_effet_sur_le_portefeuille(tmp_path):
+    donnees = historiques()
+    sans_controle = MoteurBacktest(donnees, str(tmp_path / 'a'), controle=0).executer()
+    avec_controle = MoteurBacktest(donnees, str(tmp_path / 'b'), controle=50).executer()
+
+    statistiques = avec_controle['statistiques']
+    non_candidates = statistiques['bougies'] - statistiques['candidates']
+    assert 0 < statistiques['controles'] <= non_candidates // 50 + len(donnees)
+    assert statistiques['faux_negatifs'] <= statistiques['controles']
+    # Les bougies de contrôle sont analysées sans que leur décision soit appliquée
+    assert statistiques['decisions'] == sans_controle['statistiques']['decisions']
+    assert avec_controle['solde_final'] == sans_controle['solde_final']
@@ -0,0 +1,85 @@
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from backtest import LIGNES_ANALYSE, POIDS_SIGNAUX, generer_historique, indicateurs_historique
+from backtest_vectorise import (SORTIE_DUREE, SORTIE_SL, SORTIE_TP, PreparationPaire, explorer, grille,
+                                simuler, sorties, table_extremes, variante_complete)
+from tampon_ohlcv import COLONNES_OHLCV
+
+
+@pytest.fixture(scope='module')
+def historique():
+    return generer_historique(4000, graine=2)[COLONNES_OHLCV].to_numpy(dtype=np.float64)
+
+
+def test_colonnes_decident_comme_le_bot(bot_calcul, historique):
+    preparation = PreparationPaire(bot_calcul, 'SYN', historique)
+    ind = indicateurs_historique(bot_calcul, historique)
+    score_long, score_short = preparation.scores(POIDS_SIGNAUX)
+    seuil = bot_calcul.parametres['seuil_signal']
+
+    echantillon = np.random.default_rng(0).choice(np.flatnonzero(preparation.valide), 150, replace=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for r in echantillon:
+            fenetre = ind.iloc[r - LIGNES_ANALYSE + 1:r + 1].copy()
+            # Les colonnes de divergence portent déjà la vue du direct à chaque bougie : seule la dernière compte
+            fenetre.iloc[:-1, [fenetre.columns.get_loc('divergence_haussiere'),
+                               fenetre.columns.get_loc('divergence_baissiere')]] = False
+            levier, sl_pct, tp_pct = bot_calcul.ajuster_levier_et_niveaux('SYN', fenetre)
+            achat, vente = bot_calcul.verifier_signaux(fenetre, 'SYN')
+            assert (achat, vente, levier) == (score_long[r] >= seuil, score_short[r] >= seuil, preparation.levier[r])
+            assert sl_pct == pytest.approx(preparation.sl_pct[r]) and tp_pct == pytest.approx(preparation.tp_pct[r])
+
+
+def test_variante_complete_prend_le_seuil_du_bot(botV0):
+    assert variante_complete()['seuil'] == botV0.PARAMETRES_DEFAUT['seuil_signal']
+    assert variante_complete({'seuil': 9, 'facteur_tp': 2})['seuil'] == 9
+    assert variante_complete({'facteur_tp': 2})['facteur_sl'] == 1.0
+
+
+def sortie_bougie_par_bougie(entree, sens, stop, objectif, haut, bas, close, duree_max):
+    """Référence : premier contact du SL (prioritaire) ou du TP, sinon clôture après duree_max bougies"""
+    limite = min(entree + duree_max, len(close) - 1)
+    for i in range(entree + 1, limite + 1):
+        touche_sl = bas[i] <= stop if sens > 0 else haut[i] >= stop
+        touche_tp = haut[i] >= objectif if sens > 0 else bas[i] <= objectif
+        if touche_sl:
+            return i, stop, SORTIE_SL
+        if touche_tp:
+            return i, objectif, SORTIE_TP
+    return limite, close[limite], SORTIE_DUREE
+
+
+def test_sorties_par_sauts_identiques_au_parcours_bougie_par_bougie(historique):
+    haut, bas, close = historique[:, 2], historique[:, 3], historique[:, 4]
+    generateur = np.random.default_rng(1)
+    entrees = np.sort(generateur.choice(len(close), 500, replace=False))
+    sens = generateur.choice([-1, 1], len(entrees))
+    stop = close[entrees] * (1 - sens * generateur.uniform(0.001, 0.02, len(entrees)))
+    objectif = close[entrees] * (1 + sens * generateur.uniform(0.001, 0.04, len(entrees)))
+
+    indice, prix, cause = sorties(entrees, sens, stop, objectif, table_extremes(haut, bas, 240), close, 240)
+
+    for k, entree in enumerate(entrees):
+        attendu = sortie_bougie_par_bougie(entree, sens[k], stop[k], objectif[k], haut, bas, close, 240)
+        assert (indice[k], prix[k], cause[k]) == attendu
+
+
+def test_une_position_a_la_fois_et_variantes_triees(bot_calcul, historique):
+    preparation = PreparationPaire(bot_calcul, 'SYN', historique)
+    trades = simuler(preparation, {'seuil': 5})
+
+    assert len(trades['entree']) > 0
+    assert np.all(trades['entree'][1:] >= trades['sortie'][:-1])
+    assert np.all(trades['sortie'] > trades['entree'])
+
+    variantes = grille(seuil=[5, 6], facteur_tp=[1.0, 1.5])
+    resultats = explorer([preparation], variantes)
+    assert len(resultats) == 4
+    totaux = [resultat['rendement_total'] for resultat in resultats]
+    assert totaux == sorted(totaux, reverse=True)
+    simule = simuler(preparation, variantes[0])['rendement']
+    assert next(r for r in resultats if r['variante'] == variantes[0])['rendement_total'] == pytest.approx(simule.sum())
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from backtest import MoteurBacktest, generer_historique
+from balayage import DonneesPartagees, attacher, balayer, tableau, tirages_aleatoires
+
+
+def historiques(paires=2, bougies=1500):
+    return {f"SYN{i}/USDT:USDT": generer_historique(bougies, graine=i, prix=10.0 * (i + 1)) for i in range(paires)}
+
+
+def test_vues_partagees_en_lecture_seule():
+    donnees = historiques(bougies=200)
+    with DonneesPartagees(donnees) as partagees:
+        segment, vues = attacher(partagees.descripteur)
+        try:
+            for symbole, df in donnees.items():
+                np.testing.assert_array_equal(vues[symbole], df.to_numpy(dtype=np.float64))
+                with pytest.raises(ValueError):
+                    vues[symbole][0, 4] = 0.0
+        finally:
+            del vues
+            segment.close()
+
+
+def test_tirages_aleatoires_reproductibles_et_dans_leur_domaine():
+    espace = {'positions_max': (1, 5), 'risque_par_trade': (0.05, 0.4), 'seuil_signal': [6, 7, 8]}
+    tirages = tirages_aleatoires(espace, 50, graine=3)
+
+    assert tirages == tirages_aleatoires(espace, 50, graine=3)
+    for tirage in tirages:
+        assert isinstance(tirage['positions_max'], int) and 1 <= tirage['positions_max'] <= 5
+        assert 0.05 <= tirage['risque_par_trade'] <= 0.4
+        assert tirage['seuil_signal'] in (6, 7, 8)
+
+
+def test_balayage_parallele_identique_aux_backtests_sequentiels(tmp_path):
+    donnees = historiques()
+    essais = [{'seuil_signal': 6}, {'seuil_signal': 'invalide'}, {'seuil_signal': 7}]
+
+    lignes = balayer(donnees, essais, processus=2)
+
+    assert [ligne['rang'] for ligne in lignes] == [1, 2, 3]
+    # L'essai en erreur est classé dernier, avec son message
+    assert lignes[-1]['essai'] == 1 and lignes[-1]['erreur']
+    assert lignes[0]['profit_total'] >= lignes[1]['profit_total']
+    for ligne in lignes[:2]:
+        attendu = MoteurBacktest(donnees, str(tmp_path / str(ligne['essai'])), parametres=ligne['parametres']).executer()
+        assert ligne['profit_total'] == attendu['profit_total']
+        assert ligne['trades'] == attendu['nombre_trades']['total']
+    assert 'invalide' in tableau(lignes)
@@ -0,0 +1,101 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from cache_bougies import CacheBougies, CacheIndicateurs, FRAICHEUR_MIN, expiration
+
+
+def cadre(nombre, debut=0):
+    return pd.DataFrame({'timestamp': pd.to_datetime([(debut + i) * 60_000 for i in range(nombre)], unit='ms'),
+                         'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': [float(debut + i) for i in range(nombre)],
+                         'volume': 1.0})
+
+
+def test_expiration_jamais_apres_la_cloture_de_la_bougie():
+    # 1m : fraîcheur minimale, sauf à l'approche de la clôture
+    assert expiration('1m', 120.0) == 120.0 + FRAICHEUR_MIN
+    assert expiration('1m', 179.0) == 180.0
+    # 1h : une fraction de la durée de la bougie
+    assert expiration('1h', 3600.0) == 3600.0 + 180.0
+    assert expiration('1h', 7100.0) == 7200.0
+
+
+def test_fenetre_plus_large_sert_les_demandes_plus_petites():
+    cache = CacheBougies(horloge=lambda: 0.0)
+    cache.stocker('A', '1m', cadre(100))
+
+    df = cache.obtenir('A', '1m', 30)
+
+    assert list(df['close']) == [float(i) for i in range(70, 100)]
+    assert list(df.index) == list(range(30))
+    assert cache.obtenir('A', '1m', 150) is None
+    # Une fenêtre plus petite ne remplace pas une fenêtre plus large encore valide
+    cache.stocker('A', '1m', cadre(30, debut=70))
+    assert cache.obtenir('A', '1m', 100) is not None
+
+
+def test_entree_expiree_et_invalidation():
+    instant = [0.0]
+    cache = CacheBougies(horloge=lambda: instant[0])
+    cache.stocker('A', '1m', cadre(10))
+    cache.stocker('B', '1m', cadre(10))
+
+    cache.invalider('B', '1m')
+    assert cache.obtenir('B', '1m', 10) is None
+    instant[0] = FRAICHEUR_MIN
+    assert cache.obtenir('A', '1m', 10) is None
+
+    statistiques = cache.statistiques()
+    assert statistiques['expirations'] == 1
+    assert statistiques['entrees'] == 0
+
+
+def test_eviction_de_l_entree_la_moins_recemment_utilisee():
+    cache = CacheBougies(taille_max=2, horloge=lambda: 0.0)
+    cache.stocker('A', '1m', cadre(10))
+    cache.stocker('B', '1m', cadre(10))
+    cache.obtenir('A', '1m', 10)
+    cache.stocker('C', '1m', cadre(10))
+
+    assert cache.obtenir('B', '1m', 10) is None
+    assert cache.obtenir('A', '1m', 10) is not None
+    assert cache.statistiques()['evictions'] == 1
+
+
+def test_acces_concurrents_bornes_et_coherents():
+    cache = CacheBougies(taille_max=8, horloge=lambda: 0.0)
+
+    def travailler(i):
+        symbole = f"S{i % 20}"
+        cache.stocker(symbole, '1m', cadre(50, debut=i % 20))
+        df = cache.obtenir(symbole, '1m', 10)
+        return df is None or df['close'].iloc[-1] == pytest.approx(i % 20 + 49)
+
+    with ThreadPoolExecutor(max_workers=8) as executeur:
+        assert all(executeur.map(travailler, range(2000)))
+    assert len(cache) <= 8
+
+
+def test_indicateurs_valables_jusqu_a_la_prochaine_bougie_cloturee():
+    cache = CacheIndicateurs()
+    df = cadre(100)
+    cache.stocker(('A', '1m'), df, 'resultat')
+
+    assert cache.obtenir(('A', '1m'), df.copy()) == 'resultat'
+    # Même dernière bougie clôturée, fenêtre plus courte : le calcul sur la fenêtre large sert
+    assert cache.obtenir(('A', '1m'), df.iloc[-30:]) == 'resultat'
+    # La bougie en cours a bougé, puis une nouvelle bougie est arrivée
+    en_cours = df.copy()
+    en_cours.loc[99, 'close'] += 1
+    assert cache.obtenir(('A', '1m'), en_cours) is None
+    assert cache.obtenir(('A', '1m'), cadre(100, debut=1)) is None
+
+
+def test_fenetre_plus_large_que_le_calcul_memorise_recalculee():
+    cache = CacheIndicateurs()
+    df = cadre(100)
+    cache.stocker(('A', '1m'), df.iloc[-30:], 'court')
+
+    assert cache.obtenir(('A', '1m'), df) is None
+    assert cache.statistiques()['echecs'] == 1
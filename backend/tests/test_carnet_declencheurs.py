@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from carnet_declencheurs import CarnetDeclencheurs, niveaux_position, seuil_profit
+
+PARAMETRES = {'trailing_activation_pct': 2.0, 'breakeven_pct': 1.0, 'profit_partiel_pct': 3.0}
+
+
+def position(direction):
+    signe = 1 if direction == 'long' else -1
+    return {'direction': direction, 'prix_entree': 100.0, 'levier': 20,
+            'stop_loss': 100 * (1 - signe * 0.003), 'take_profit': 100 * (1 + signe * 0.006)}
+
+
+def test_niveaux_ranges_du_cote_ou_le_prix_les_atteint():
+    bas, haut = niveaux_position(position('long'), PARAMETRES)
+    assert [nature for _, nature in bas] == ['stop_loss']
+    assert [nature for _, nature in haut] == ['breakeven', 'activation_trailing', 'profit_partiel', 'take_profit']
+
+    bas, haut = niveaux_position(position('short'), PARAMETRES)
+    assert [nature for _, nature in haut] == ['stop_loss']
+    assert [nature for _, nature in bas] == ['take_profit', 'profit_partiel', 'activation_trailing', 'breakeven']
+    # Au seuil, le profit avec levier calculé par le bot atteint bien le pourcentage
+    assert (100.0 / seuil_profit(position('short'), 1.0) - 1) * 100 * 20 >= 1.0
+
+
+def test_declenchement_et_niveaux_franchis():
+    carnet = CarnetDeclencheurs(PARAMETRES)
+    carnet.placer('A', position('long'))
+    appels = []
+
+    assert not carnet.surveiller('A', 100.02, lambda s, p: appels.append(p))
+    assert not carnet.declenche('B', 0.0)
+    assert carnet.surveiller('A', 99.6, lambda s, p: appels.append(p))
+    assert appels == [99.6]
+    assert [nature for _, nature in carnet.franchis('A', 100.12)] == ['activation_trailing', 'breakeven']
+
+    carnet.retirer('A')
+    assert 'A' not in carnet and len(carnet) == 0
+
+
+@pytest.mark.parametrize('action', ['acheter', 'vendre_short'])
+def test_aucun_prix_ecarte_n_aurait_change_la_position(bot_factice, action):
+    bot = bot_factice()
+    symbole = bot.paires[0]
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, action, prix, 20, 0.01, 0.02)
+    carnet = bot.carnet_declencheurs
+
+    # Un parcours de prix qui active le trailing puis le fait suivre, jusqu'au stop ou à l'objectif
+    chemin = prix * (1 + np.concatenate([np.linspace(0, 0.004, 200), np.linspace(0.004, -0.012, 400)]))
+    if action == 'vendre_short':
+        chemin = prix * prix / chemin
+    ecartes = 0
+    for courant in chemin:
+        if symbole not in bot.positions:
+            break
+        avant = dict(bot.positions[symbole])
+        if not carnet.declenche(symbole, courant):
+            bot.verifier_stop_loss_take_profit(symbole, courant)
+            assert dict(bot.positions[symbole]) == avant, courant
+            ecartes += 1
+        else:
+            bot.verifier_stop_loss_take_profit(symbole, courant)
+            if symbole in bot.positions:
+                carnet.placer(symbole, bot.positions[symbole])
+    assert ecartes > 0
+    assert symbole not in bot.positions
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from divergences import detecter_divergences, pivots
+
+
+def boucle_origine(df):
+    """Boucle historique de calculer_indicateurs, référence du calcul vectorisé"""
+    df['divergence_haussiere'] = False
+    df['divergence_baissiere'] = False
+    if len(df) > 30:
+        for i in range(5, 30):
+            if df['low'].iloc[-i] < df['low'].iloc[-i-1] and df['rsi'].iloc[-i] > df['rsi'].iloc[-i-1]:
+                df.loc[df.index[-i], 'divergence_haussiere'] = True
+            if df['high'].iloc[-i] > df['high'].iloc[-i-1] and df['rsi'].iloc[-i] < df['rsi'].iloc[-i-1]:
+                df.loc[df.index[-i], 'divergence_baissiere'] = True
+    return df
+
+
+def serie(taille, graine=7):
+    generateur = np.random.default_rng(graine)
+    close = 100 + np.cumsum(generateur.normal(0, 0.5, taille))
+    df = pd.DataFrame({
+        'low': close - generateur.random(taille),
+        'high': close + generateur.random(taille),
+        'rsi': 50 + 20 * np.sin(np.arange(taille) / 3) + generateur.normal(0, 5, taille),
+    })
+    df.loc[:13, 'rsi'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('taille', [20, 30, 31, 100, 1000])
+def test_identique_a_la_boucle_d_origine(taille):
+    df = serie(taille, graine=taille)
+    attendu = boucle_origine(df.copy())
+
+    haussiere, baissiere = detecter_divergences(df['low'].to_numpy(), df['high'].to_numpy(), df['rsi'].to_numpy())
+
+    np.testing.assert_array_equal(haussiere, attendu['divergence_haussiere'].to_numpy())
+    np.testing.assert_array_equal(baissiere, attendu['divergence_baissiere'].to_numpy())
+
+
+def test_lot_symboles_x_temps_identique_a_chaque_serie():
+    series = [serie(100, graine=g) for g in range(5)]
+    bas, haut, rsi = (np.stack([df[colonne].to_numpy() for df in series]) for colonne in ('low', 'high', 'rsi'))
+
+    haussiere, baissiere = detecter_divergences(bas, haut, rsi, largeur_pivot=2, ecart_max=10)
+
+    for i, df in enumerate(series):
+        attendu = detecter_divergences(df['low'], df['high'], df['rsi'], largeur_pivot=2, ecart_max=10)
+        np.testing.assert_array_equal(haussiere[i], attendu[0])
+        np.testing.assert_array_equal(baissiere[i], attendu[1])
+
+
+def test_serie_complete_coincide_avec_la_fenetre_en_direct():
+    df = serie(300)
+    bas, haut, rsi = df['low'].to_numpy(), df['high'].to_numpy(), df['rsi'].to_numpy()
+    complete = detecter_divergences(bas, haut, rsi, largeur_pivot=3, ecart_max=20, serie_complete=True)
+    direct = detecter_divergences(bas, haut, rsi, largeur_pivot=3, ecart_max=20)
+
+    for masque_complet, masque_direct in zip(complete, direct):
+        np.testing.assert_array_equal(masque_complet[-29:-4], masque_direct[-29:-4])
+        assert not masque_direct[:-29].any() and not masque_direct[-4:].any()
+
+
+def test_pivots_extremums_locaux_confirmes():
+    valeurs = np.array([5.0, 3.0, 4.0, 6.0, 2.0, 7.0, 8.0])
+    np.testing.assert_array_equal(pivots(valeurs, 1, 'bas'), [False, True, False, False, True, False, False])
+    np.testing.assert_array_equal(pivots(valeurs, 1, 'haut'), [False, False, False, True, False, False, False])
+    assert pivots(valeurs, 0, 'bas').all()
@@ -0,0 +1,75 @@
+import random
+
+import ccxt
+import pytest
+
+from exchange_factice import ExchangeFactice, historiques_synthetiques, loi_latence
+from horloge import HorlogeSimulee
+from ordonnanceur import POIDS_REQUETES
+
+PAIRES = ['BTC/USDT:USDT', 'SYN1/USDT:USDT']
+
+
+def exchange(**options):
+    return ExchangeFactice(historiques_synthetiques(PAIRES, bougies=3000), prechauffage=2000,
+                           horloge=HorlogeSimulee(1_700_000_000.0), graine=0, **options)
+
+
+def test_lois_de_latence():
+    generateur = random.Random(0)
+    assert loi_latence('aucune')() == 0.0
+    assert loi_latence('constante:0.05')() == 0.05
+    assert all(0.02 <= loi_latence('uniforme:0.02:0.2', generateur)() <= 0.2 for _ in range(100))
+    assert all(loi_latence('normale:0.01:0.5', generateur)() >= 0.0 for _ in range(100))
+    with pytest.raises(ValueError):
+        loi_latence('pareto:1')
+
+
+def test_bougies_recalees_sur_le_lancement():
+    marche = exchange()
+    bougies = marche.fetch_ohlcv('BTC/USDT:USDT', '1m', limit=5000)
+
+    # Les ``prechauffage`` premières bougies sont clôturées, la dernière juste avant l'instant présent
+    assert len(bougies) == 2000
+    assert bougies[-1][0] == (marche.milliseconds() // 60_000) * 60_000 - 60_000
+    assert marche.fetch_ticker('BTC/USDT:USDT')['last'] == bougies[-1][4]
+    assert marche.market('BTC/USDT:USDT')['id'] == 'XBTUSDTM'
+    with pytest.raises(ccxt.BadSymbol):
+        marche.fetch_ticker('AUTRE/USDT:USDT')
+
+
+def test_quota_de_la_fenetre_glissante():
+    marche = exchange(quota=5 * POIDS_REQUETES['fetch_ticker'])
+    for _ in range(5):
+        marche.fetch_ticker('BTC/USDT:USDT')
+
+    with pytest.raises(ccxt.RateLimitExceeded):
+        marche.fetch_ticker('BTC/USDT:USDT')
+    assert marche.statistiques['erreurs_429'] == 1
+
+
+def test_pannes_injectees():
+    erreurs = {'taux_429': ccxt.RateLimitExceeded, 'taux_timeout': ccxt.RequestTimeout}
+    for option, erreur in erreurs.items():
+        marche = exchange(delai_timeout=0.0, **{option: 1.0})
+        with pytest.raises(erreur):
+            marche.fetch_ohlcv('BTC/USDT:USDT', '5m', limit=10)
+
+
+def test_ordres_et_positions_nettes():
+    marche = exchange()
+    prix = marche.fetch_ticker('SYN1/USDT:USDT')['last']
+
+    achat = marche.create_order('SYN1/USDT:USDT', 'market', 'buy', 3.0)
+    assert achat['status'] == 'closed' and achat['average'] == prix
+    limite = marche.create_order('SYN1/USDT:USDT', 'limit', 'sell', 1.0, price=prix * 2)
+    assert limite['status'] == 'open'
+    assert [ordre['id'] for ordre in marche.fetch_open_orders('SYN1/USDT:USDT')] == [limite['id']]
+    assert marche.cancel_order(limite['id'])['status'] == 'canceled'
+    with pytest.raises(ccxt.OrderNotFound):
+        marche.cancel_order(limite['id'])
+
+    positions = marche.fetch_positions()
+    assert positions == [{'symbol': 'SYN1/USDT:USDT', 'side': 'long', 'contracts': 3.0, 'markPrice': prix}]
+    marche.create_order('SYN1/USDT:USDT', 'market', 'sell', 3.0)
+    assert marche.fetch_positions() == []
@@ -0,0 +1,76 @@
+import json
+import socketserver
+
+import pytest
+
+from flux_marche import FluxRejeu, ServeurRejeu
+
+
+def ecrire_rejeu(chemin, evenements):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        for evenement in evenements:
+            f.write(json.dumps(evenement) + "\n")
+    return str(chemin)
+
+
+def bougies_rejeu(symbole, nombre, debut=1_700_000_000_000, prix=100.0):
+    return [{'t': debut + i * 60_000, 'type': 'bougie', 'symbole': symbole, 'timeframe': '1m',
+             'bougie': [debut + i * 60_000, prix, prix + 1, prix - 1, prix + 0.5, 10.0]} for i in range(nombre)]
+
+
+def test_rejeu_fichier_publie_dans_l_ordre_les_symboles_suivis(tmp_path):
+    evenements = bougies_rejeu('A', 3) + bougies_rejeu('B', 2)
+    evenements.append({'t': evenements[-1]['t'], 'type': 'ticker', 'symbole': 'A', 'prix': 101.0})
+    flux = FluxRejeu(chemin=ecrire_rejeu(tmp_path / "rejeu.jsonl", evenements), vitesse=0)
+    flux.suivre(['A'])
+    recus = []
+    flux.abonner_bougies(lambda symbole, timeframe, bougie, recu: recus.append((symbole, bougie[0])))
+    flux.abonner_tickers(lambda symbole, prix, horodatage, recu: recus.append((symbole, prix)))
+
+    flux.demarrer()
+    assert flux.termine.wait(5)
+
+    assert recus == [('A', e['t']) for e in evenements[:3]] + [('A', 101.0)]
+    assert not flux.connecte
+
+
+def test_flux_rejeu_exige_une_seule_source():
+    with pytest.raises(ValueError):
+        FluxRejeu()
+    with pytest.raises(ValueError):
+        FluxRejeu(chemin='rejeu.jsonl', adresse=('127.0.0.1', 8765))
+
+
+def test_serveur_rejeu_ne_modifie_pas_les_autres_serveurs_tcp(tmp_path):
+    serveur = ServeurRejeu(ecrire_rejeu(tmp_path / "rejeu.jsonl", []), port=0)
+    serveur.demarrer()
+    serveur.arreter()
+    assert socketserver.ThreadingTCPServer.allow_reuse_address is False
+
+
+def test_bot_hors_ligne_alimente_par_le_serveur_de_rejeu(bot_factice, tmp_path):
+    symbole = 'SYN0/USDT:USDT'
+    chemin = tmp_path / "rejeu.jsonl"
+    # Le serveur écoute dès sa création mais ne lit le fichier qu'une fois démarré
+    serveur = ServeurRejeu(str(chemin), port=0)
+    try:
+        flux = FluxRejeu(adresse=serveur.adresse, vitesse=0)
+        bot = bot_factice(flux=flux)
+        prix = bot.exchange.fetch_ticker(symbole)['last']
+        bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+
+        # Un prix poussé sous le stop-loss doit fermer la position sans attendre la boucle principale
+        evenements = bougies_rejeu(symbole, 40, prix=prix)
+        evenements.append({'t': evenements[-1]['t'] + 500, 'type': 'ticker', 'symbole': symbole, 'prix': prix * 0.98})
+        ecrire_rejeu(chemin, evenements)
+        serveur.demarrer()
+        assert flux.termine.wait(5)
+    finally:
+        serveur.arreter()
+
+    tampon = bot.stockage_ohlcv.tampon(symbole, '1m')
+    assert len(tampon) == 40
+    assert tampon.dernier_timestamp() == evenements[39]['t']
+    assert set(bot._attendre_evenements_marche(delai=0.1)) == {symbole}
+    assert symbole not in bot.positions
+    assert bot.service_prix.prix(symbole) == pytest.approx(prix * 0.98)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from graphe_indicateurs import GrapheIndicateurs, fusionner
+
+
+def cadre_aleatoire(generateur, taille=100):
+    close = 100 * np.exp(np.cumsum(generateur.normal(0, 0.004, taille)))
+    ouverture = np.concatenate(([close[0]], close[:-1]))
+    amplitude = np.abs(generateur.normal(0, 0.002, taille)) * close
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(np.arange(taille) * 60_000, unit='ms'),
+        'open': ouverture,
+        'high': np.maximum(ouverture, close) + amplitude,
+        'low': np.minimum(ouverture, close) - amplitude,
+        'close': close,
+        'volume': generateur.lognormal(3, 0.8, taille),
+    })
+
+
+@pytest.fixture
+def demandes(botV0):
+    return fusionner(botV0.BotScalpingAvance.CARACTERISTIQUES_SIGNAUX, botV0.BotScalpingAvance.CARACTERISTIQUES_LEVIER)
+
+
+def test_decisions_identiques_au_calcul_complet(bot_calcul, demandes):
+    graphe = GrapheIndicateurs()
+    generateur = np.random.default_rng(11)
+    for i in range(150):
+        df = cadre_aleatoire(generateur)
+        bot_calcul.scores_volatilite = {} if i % 2 else {i: 1.5}
+        complet = bot_calcul.calculer_indicateurs(df.copy())
+        paresseux, _ = graphe.evaluer(df.copy(), demandes)
+
+        assert (bot_calcul.verifier_signaux(paresseux, i), bot_calcul.ajuster_levier_et_niveaux(i, paresseux)) == \
+               (bot_calcul.verifier_signaux(complet, i), bot_calcul.ajuster_levier_et_niveaux(i, complet))
+        assert len(paresseux) == len(complet)
+
+
+def test_seuls_les_noeuds_demandes_sont_calcules(demandes):
+    graphe = GrapheIndicateurs()
+    df = cadre_aleatoire(np.random.default_rng(0))
+
+    _, profil = graphe.evaluer(df, demandes)
+    _, profil_close = graphe.evaluer(df, {'ema_5': 1})
+
+    assert profil['noeuds_ignores'] > 0
+    assert profil['cellules_calculees'] < profil['cellules_completes']
+    assert profil_close['noeuds_calcules'] == 1
+    assert graphe.statistiques()['evaluations'] == 2
+
+
+def test_donnees_incompletes_renvoyees_au_calcul_complet(demandes):
+    graphe = GrapheIndicateurs()
+    df = cadre_aleatoire(np.random.default_rng(0))
+    df.loc[:, ['open', 'high', 'low', 'close']] = 100.0
+    df.loc[:, 'volume'] = 0.0
+
+    cadre, _ = graphe.evaluer(df, demandes)
+
+    assert cadre is None
+    assert graphe.statistiques()['replis_calcul_complet'] == 1
+
+
+def test_fusionner_garde_la_plus_grande_fenetre():
+    assert fusionner({'a': 2, 'b': 5}, {'a': 10, 'c': 1}) == {'a': 10, 'b': 5, 'c': 1}
+    assert fusionner({'a': 2}, {'a': None}) == {'a': None}
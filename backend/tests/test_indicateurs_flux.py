@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import bougies_aleatoires
+from indicateurs_flux import IndicateursFlux, MoteurIndicateurs
+from tampon_ohlcv import COLONNES_OHLCV, TamponOHLCV
+
+COLONNES = ['ema_5', 'ema_55', 'sma_20', 'std_20', 'bb_width', 'high_max', 'low_min',
+            'volume_ratio', 'rsi', 'macd', 'macd_signal', 'atr', 'momentum']
+
+
+def test_moteur_identique_au_calcul_pandas_complet(bot_calcul):
+    bougies = bougies_aleatoires(2000)
+    reference = bot_calcul.calculer_indicateurs(pd.DataFrame(bougies, columns=COLONNES_OHLCV)).set_index('timestamp')
+
+    moteur = MoteurIndicateurs()
+    comparees = 0
+    for bougie in bougies:
+        # Deux mises à jour provisoires de la bougie en cours, puis sa valeur finale
+        moteur.mettre_a_jour([bougie[0], bougie[1], bougie[1], bougie[1], bougie[1], 0.0])
+        valeurs = moteur.mettre_a_jour(bougie)
+        if bougie[0] in reference.index:
+            ligne = reference.loc[bougie[0]]
+            for colonne in COLONNES:
+                assert valeurs[colonne] == pytest.approx(ligne[colonne], rel=1e-9, abs=1e-12), colonne
+            comparees += 1
+    assert comparees > 1500
+
+
+def test_synchronisation_incrementale_puis_reinitialisation_apres_un_trou():
+    bougies = bougies_aleatoires(400)
+    tampon = TamponOHLCV(capacite=200)
+    flux = IndicateursFlux()
+    tampon.ajouter(bougies[:150])
+    flux.synchroniser('A', '1m', tampon)
+    moteur = flux.moteur('A', '1m')
+
+    tampon.ajouter(bougies[150:160])
+    valeurs = flux.synchroniser('A', '1m', tampon)
+    assert flux.moteur('A', '1m') is moteur
+
+    reference = MoteurIndicateurs()
+    for bougie in bougies[:160]:
+        attendues = reference.mettre_a_jour(bougie)
+    assert valeurs['ema_21'] == pytest.approx(attendues['ema_21'], rel=1e-12)
+
+    # Le tampon ne couvre plus la bougie en cours du moteur : repartir de tout le tampon
+    tampon.vider()
+    tampon.ajouter(bougies[360:])
+    valeurs = flux.synchroniser('A', '1m', tampon)
+    assert flux.moteur('A', '1m') is not moteur
+    assert flux.moteur('A', '1m').bougie_en_cours[0] == bougies[-1, 0]
+    assert not np.isnan(valeurs['ema_21'])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicateurs_lot import calculer_indicateurs_lot, empiler, evaluer_lot
+
+
+def cadres_aleatoires(nombre, taille=100, graine=3):
+    generateur = np.random.default_rng(graine)
+    cadres = []
+    for _ in range(nombre):
+        cloture = 100 * np.exp(np.cumsum(generateur.normal(0, 0.004, taille)))
+        ouverture = np.concatenate(([cloture[0]], cloture[:-1]))
+        amplitude = np.abs(generateur.normal(0, 0.002, taille)) * cloture
+        cadres.append(pd.DataFrame({
+            'open': ouverture,
+            'high': np.maximum(ouverture, cloture) + amplitude,
+            'low': np.minimum(ouverture, cloture) - amplitude,
+            'close': cloture,
+            'volume': generateur.lognormal(3, 0.8, taille),
+        }))
+    return cadres
+
+
+def evaluer(cadres, **options):
+    tableaux = empiler(cadres)
+    return evaluer_lot(calculer_indicateurs_lot(tableaux['open'], tableaux['high'], tableaux['low'],
+                                                tableaux['close'], tableaux['volume']), **options)
+
+
+def test_evaluer_lot_decide_comme_le_bot(bot_calcul):
+    cadres = cadres_aleatoires(120)
+    lot = evaluer(cadres)
+
+    signaux = 0
+    for i, cadre in enumerate(cadres):
+        df = bot_calcul.calculer_indicateurs(cadre.copy())
+        levier, sl_pct, tp_pct = bot_calcul.ajuster_levier_et_niveaux(i, df)
+        achat, vente = bot_calcul.verifier_signaux(df, i)
+        assert (bool(lot['signal_achat'][i]), bool(lot['signal_vente'][i]), int(lot['levier'][i])) == (achat, vente, levier)
+        assert lot['sl_pct'][i] == pytest.approx(sl_pct) and lot['tp_pct'][i] == pytest.approx(tp_pct)
+        signaux += achat or vente
+    # L'échantillon doit contenir des signaux pour que la comparaison porte sur quelque chose
+    assert signaux > 0
+
+
+def test_seuil_par_defaut_celui_des_parametres(botV0):
+    cadres = cadres_aleatoires(60)
+    assert all(np.array_equal(evaluer(cadres)[cle], evaluer(cadres, seuil=botV0.PARAMETRES_DEFAUT['seuil_signal'])[cle])
+               for cle in ('signal_achat', 'signal_vente'))
+
+
+def test_serie_incomplete_marquee_non_valide():
+    cadres = cadres_aleatoires(3)
+    # Bougies plates et volume nul : le chemin pandas (dropna) doit reprendre la main
+    cadres[1].loc[:, ['open', 'high', 'low', 'close']] = 100.0
+    cadres[1].loc[:, 'volume'] = 0.0
+
+    assert list(evaluer(cadres)['valide']) == [True, False, True]
+
+
+def test_analyse_par_lot_du_bot_identique_a_l_analyse_par_symbole(botV0, bot_factice, monkeypatch):
+    monkeypatch.setattr(botV0, 'BOUGIES_MIN_LOT', 30)
+    bot = bot_factice()
+    symboles = list(bot.paires)
+    attendues = [bot.analyser_symbole(symbole) for symbole in symboles]
+
+    obtenues = bot.analyser_symboles_lot(symboles)
+
+    assert bot.statistiques_lot == {'symboles_lot': len(symboles), 'repli_pandas': 0}
+    for attendue, obtenue in zip(attendues, obtenues):
+        assert obtenue is not None
+        assert {cle: obtenue[cle] for cle in ('signal_achat', 'signal_vente', 'levier', 'alignement')} == \
+               {cle: attendue[cle] for cle in ('signal_achat', 'signal_vente', 'levier', 'alignement')}
+        for cle in ('prix', 'sl_pct', 'tp_pct'):
+            assert obtenue[cle] == pytest.approx(attendue[cle])
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from cache_bougies import CacheIndicateurs
+from conftest import bougies_aleatoires
+from tampon_ohlcv import StockageOHLCV
+
+
+@pytest.fixture
+def bot(bot_calcul, monkeypatch):
+    bot_calcul.cache_indicateurs = CacheIndicateurs()
+    calculs = []
+    calculer = bot_calcul.calculer_indicateurs
+
+    def calculer_compte(df, serie_complete=False):
+        calculs.append(len(df))
+        return calculer(df, serie_complete)
+
+    monkeypatch.setattr(bot_calcul, 'calculer_indicateurs', calculer_compte)
+    bot_calcul.calculs = calculs
+    return bot_calcul
+
+
+def fenetre(bougies, limite):
+    return StockageOHLCV.cadre(bougies[-limite:])
+
+
+def test_calcul_partage_entre_fenetres_de_tailles_differentes(bot):
+    bougies = bougies_aleatoires(200)
+    large = bot.calculer_indicateurs_memoises('A', fenetre(bougies, 100))
+    court = bot.calculer_indicateurs_memoises('A', fenetre(bougies, 50))
+
+    assert bot.calculs == [100]
+    # L'appelant à fenêtre courte ne reçoit que ses bougies, calculées sur la fenêtre large
+    debut = fenetre(bougies, 50)['timestamp'].iloc[0]
+    assert court['timestamp'].iloc[0] == debut
+    pd.testing.assert_frame_equal(court, large[large['timestamp'] >= debut])
+
+
+def test_recalcul_pour_une_fenetre_plus_large_ou_une_nouvelle_bougie(bot):
+    bougies = bougies_aleatoires(200)
+    bot.calculer_indicateurs_memoises('A', fenetre(bougies, 50))
+    bot.calculer_indicateurs_memoises('A', fenetre(bougies, 100))
+    bot.calculer_indicateurs_memoises('A', fenetre(bougies, 50))
+    bot.calculer_indicateurs_memoises('A', fenetre(bougies[:-1], 100))
+    bot.calculer_indicateurs_memoises('B', fenetre(bougies, 100))
+
+    assert bot.calculs == [50, 100, 100, 100]
+
+
+def test_chaque_appelant_recoit_son_propre_dataframe(bot):
+    df = fenetre(bougies_aleatoires(200), 100)
+    premier = bot.calculer_indicateurs_memoises('A', df)
+    premier['signal'] = 1
+
+    assert 'signal' not in bot.calculer_indicateurs_memoises('A', df)
@@ -0,0 +1,92 @@
+import pytest
+
+from instantane_prix import ServicePrix
+
+
+class ExchangeTickers:
+    def __init__(self, prix):
+        self.prix = prix
+        self.appels = []
+
+    def fetch_tickers(self, symboles):
+        self.appels.append(list(symboles))
+        return {symbole: {'last': prix} for symbole, prix in self.prix.items()}
+
+
+def test_un_seul_appel_pour_tout_l_univers_et_abonnes_notifies():
+    exchange = ExchangeTickers({'A': 1.0, 'B': 2.0, 'C': 3.0})
+    service = ServicePrix(exchange, lambda: ['A', 'B'], horloge=lambda: 100.0)
+    recus = []
+    service.abonner(recus.append)
+
+    instantane = service.rafraichir()
+
+    assert exchange.appels == [['A', 'B']]
+    assert dict(instantane.prix) == {'A': 1.0, 'B': 2.0}
+    assert recus == [instantane]
+
+
+def test_instantane_immuable_et_remplace_a_chaque_publication():
+    instant = [100.0]
+    service = ServicePrix(None, lambda: [], horloge=lambda: instant[0])
+    premier = service.publier({'A': 1.0})
+    instant[0] += 10
+    second = service.publier({'B': 2.0})
+
+    assert dict(premier.prix) == {'A': 1.0}
+    assert dict(second.prix) == {'A': 1.0, 'B': 2.0}
+    assert second.version == premier.version + 1
+    with pytest.raises(TypeError):
+        second.prix['A'] = 5.0
+    assert service.prix('A', age_max=5) is None
+    assert service.prix('B', age_max=5) == 2.0
+
+
+def ouvrir(bot, symbole):
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+    return prix
+
+
+def compter_bougies(bot, monkeypatch, erreur=None):
+    appels = []
+
+    def fetch_ohlcv(symbole, timeframe, since=None, limit=None):
+        appels.append(symbole)
+        if erreur is not None:
+            raise erreur
+        return []
+
+    monkeypatch.setattr(bot.exchange, 'fetch_ohlcv', fetch_ohlcv)
+    return appels
+
+
+def test_positions_gerees_au_prix_de_l_instantane_sans_bougies(bot_factice, monkeypatch):
+    bot = bot_factice()
+    perdante, gagnante = bot.paires
+    prix_perdante = ouvrir(bot, perdante)
+    prix_gagnante = ouvrir(bot, gagnante)
+    appels = compter_bougies(bot, monkeypatch)
+
+    # Sous le stop-loss pour l'une, en léger recul pour l'autre : aucune bougie n'est utile
+    bot.service_prix.publier({perdante: prix_perdante * 0.98, gagnante: prix_gagnante * 0.9995})
+    bot.gerer_positions_ouvertes()
+
+    assert appels == []
+    assert perdante not in bot.positions
+    assert gagnante in bot.positions
+
+
+def test_trailing_active_meme_si_les_bougies_sont_indisponibles(bot_factice, monkeypatch):
+    bot = bot_factice()
+    symbole = bot.paires[0]
+    prix = ouvrir(bot, symbole)
+    appels = compter_bougies(bot, monkeypatch, erreur=ConnectionError("hors ligne"))
+
+    # +0,12 % à 20x : le trailing stop s'active, la vérification de tendance ne peut pas se faire
+    bot.service_prix.publier({symbole: prix * 1.0012})
+    bot.gerer_positions_ouvertes()
+
+    assert appels
+    assert bot.positions[symbole]['trailing_actif']
+    assert bot.positions[symbole]['trailing_stop'] == pytest.approx(prix * 1.0012 * (1 - bot.parametres['trailing_ecart']))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from intrabar import bas_d_abord, chemins, parcourir_bougie
+
+
+def test_ordre_des_extremes_selon_le_modele():
+    ouverture, cloture = np.array([100.0, 100.0]), np.array([101.0, 99.0])
+
+    # ohlc : bougie haussière O → L → H → C, baissière O → H → L → C
+    assert list(bas_d_abord(ouverture, cloture, 'ohlc', 'long')) == [True, False]
+    assert list(bas_d_abord(ouverture, cloture, 'pessimiste', 'long')) == [True, True]
+    assert list(bas_d_abord(ouverture, cloture, 'pessimiste', 'short')) == [False, False]
+    assert list(bas_d_abord(ouverture, cloture, 'optimiste', 'long')) == [False, False]
+    with pytest.raises(ValueError):
+        bas_d_abord(ouverture, cloture, 'aleatoire', 'long')
+
+    chemin = chemins([[0, 100.0, 102.0, 98.0, 101.0, 1.0], [0, 100.0, 102.0, 98.0, 99.0, 1.0]])
+    np.testing.assert_array_equal(chemin, [[100.0, 98.0, 102.0, 101.0], [100.0, 102.0, 98.0, 99.0]])
+
+
+def ouvrir_long(bot):
+    symbole = bot.paires[0]
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+    return symbole, prix
+
+
+def fermetures(bot, monkeypatch):
+    prix_fermeture = []
+    executer_trade = bot.executer_trade
+
+    def enregistrer(symbole, action, prix, *args, **kwargs):
+        if action == 'fermer':
+            prix_fermeture.append(prix)
+        return executer_trade(symbole, action, prix, *args, **kwargs)
+
+    monkeypatch.setattr(bot, 'executer_trade', enregistrer)
+    return prix_fermeture
+
+
+@pytest.mark.parametrize('modele', ['pessimiste', 'optimiste'])
+def test_stop_et_objectif_dans_la_meme_bougie_executes_au_niveau(bot_factice, monkeypatch, modele):
+    bot = bot_factice()
+    # Sans break-even : le stop déplacé au-dessus du seuil d'activation serait touché avant l'objectif
+    bot.parametres['breakeven_pct'] = 1000.0
+    symbole, prix = ouvrir_long(bot)
+    position = dict(bot.positions[symbole])
+    prix_fermeture = fermetures(bot, monkeypatch)
+
+    # La bougie touche le stop-loss et le take-profit
+    parcourir_bougie(bot, symbole, [0, prix, position['take_profit'] * 1.01, position['stop_loss'] * 0.99, prix, 1.0],
+                     modele=modele)
+
+    assert symbole not in bot.positions
+    attendu = position['stop_loss'] if modele == 'pessimiste' else position['take_profit']
+    assert prix_fermeture == [pytest.approx(attendu)]
+
+
+def test_gap_au_dela_du_stop_execute_a_l_ouverture(bot_factice, monkeypatch):
+    bot = bot_factice()
+    symbole, prix = ouvrir_long(bot)
+    ouverture = bot.positions[symbole]['stop_loss'] * 0.98
+    prix_fermeture = fermetures(bot, monkeypatch)
+
+    parcourir_bougie(bot, symbole, [0, ouverture, ouverture * 1.001, ouverture * 0.99, ouverture, 1.0])
+
+    assert prix_fermeture == [ouverture]
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from journal_trades import JournalTrades
+from persistance import EcrivainPersistance
+
+
+def trade(numero):
+    return {'symbole': f"S{numero}", 'profit_net': float(numero), 'date_sortie': '2024-01-01 00:00:00'}
+
+
+def test_relecture_a_partir_du_point_de_reprise(tmp_path):
+    journal = JournalTrades(str(tmp_path / 'journal.jsonl'), 'jamais')
+    for i in range(3):
+        journal.ajouter(trade(i))
+    reprise = journal.point_de_reprise()
+    for i in range(3, 5):
+        journal.ajouter(trade(i))
+
+    relu = JournalTrades(journal.chemin)
+    assert [t['symbole'] for t in relu.lire(**reprise)] == ['S3', 'S4']
+    assert relu.point_de_reprise() == journal.point_de_reprise()
+
+
+def test_ligne_incomplete_retiree_a_la_relecture(tmp_path):
+    journal = JournalTrades(str(tmp_path / 'journal.jsonl'), 'toujours')
+    journal.ajouter(trade(0))
+    with open(journal.chemin, 'a', encoding='utf-8') as f:
+        f.write('{"symbole": "S1')
+
+    assert len(list(journal.lire())) == 1
+    journal.ajouter(trade(2))
+    assert [t['symbole'] for t in journal.lire()] == ['S0', 'S2']
+
+
+def test_lignes_differees_ecrites_dans_l_ordre(tmp_path):
+    journal = JournalTrades(str(tmp_path / 'journal.jsonl'), 'lot', EcrivainPersistance())
+    journal.ajouter(trade(0), differer=True)
+    journal.ajouter(trade(1), differer=True)
+
+    assert not (tmp_path / 'journal.jsonl').exists()
+    assert journal.point_de_reprise()['trades'] == 2
+    journal.ecrire()
+    with open(journal.chemin, encoding='utf-8') as f:
+        assert [json.loads(ligne)['symbole'] for ligne in f] == ['S0', 'S1']
+
+
+def test_politique_inconnue():
+    with pytest.raises(ValueError):
+        JournalTrades('journal.jsonl', 'parfois')
+
+
+def test_metriques_reconstruites_au_redemarrage(bot_factice):
+    bot = bot_factice()
+    for symbole in bot.paires:
+        prix = bot.exchange.fetch_ticker(symbole)['last']
+        bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+    # Un trade avant le point de reprise, un après : ce dernier n'est relu que dans le journal
+    premier, second = bot.paires
+    bot.executer_trade(premier, 'fermer', bot.exchange.fetch_ticker(premier)['last'] * 1.002, 20)
+    bot._sauvegarder_historique_performance()
+    bot.executer_trade(second, 'fermer', bot.exchange.fetch_ticker(second)['last'] * 0.999, 20)
+    attendu = bot.metriques.resume(bot.balance)
+
+    redemarre = bot_factice()
+    assert redemarre.metriques.resume(bot.balance) == attendu
+    assert redemarre.journal_trades.point_de_reprise() == bot.journal_trades.point_de_reprise()
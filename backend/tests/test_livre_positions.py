@@ -0,0 +1,53 @@
+import pytest
+
+from livre_positions import LivrePositions, PositionFermee
+
+
+def valeurs(prix_entree, direction='long'):
+    return {'quantite': 10.0, 'prix_entree': prix_entree, 'levier': 20, 'marge_initiale': 50.0,
+            'direction': direction, 'heure_entree': '2024-01-01 00:00:00', 'stop_loss': prix_entree * 0.99}
+
+
+def test_position_retiree_detachee_de_sa_ligne_reutilisee():
+    livre = LivrePositions(capacite=2)
+    livre['A'] = valeurs(100.0)
+    ancienne = livre['A']
+    del livre['A']
+    livre['B'] = valeurs(50.0)
+
+    assert livre['B'].indice == 0
+    with pytest.raises(PositionFermee):
+        ancienne['prix_entree']
+    with pytest.raises(PositionFermee):
+        ancienne['stop_loss'] = 1.0
+    with pytest.raises(PositionFermee):
+        dict(ancienne)
+    assert livre['B']['stop_loss'] == pytest.approx(49.5)
+
+
+def test_agrandissement_conserve_les_positions():
+    livre = LivrePositions(capacite=2)
+    for i in range(9):
+        livre[f"S{i}"] = valeurs(100.0 + i)
+    del livre['S3']
+
+    assert len(livre) == 8
+    assert [livre[f"S{i}"]['prix_entree'] for i in (0, 4, 8)] == [100.0, 104.0, 108.0]
+    assert livre['S0']['levier'] == 20 and isinstance(livre['S0']['levier'], int)
+    assert 'trailing_stop' not in livre['S0']
+    assert livre.marge_engagee() == 8 * 50.0
+
+
+def test_valorisation_et_declenchements_identiques_au_calcul_par_position():
+    livre = LivrePositions()
+    livre['L'] = valeurs(100.0, 'long')
+    livre['C'] = dict(valeurs(100.0, 'short'), stop_loss=101.0)
+    prix = {'L': 98.0, 'C': 98.0}
+
+    declenches = livre.declenches(prix)
+    profits, _ = livre.valorisation()
+
+    assert profits['L'] == pytest.approx((98.0 / 100.0 - 1) * 100 * 20)
+    assert profits['C'] == pytest.approx((100.0 / 98.0 - 1) * 100 * 20)
+    # À 98, le stop du long (99) est franchi, pas celui du short (101)
+    assert declenches == ['L']
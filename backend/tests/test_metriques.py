@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+
+from metriques import FENETRE_SHARPE, MetriquesPerformance
+
+
+def trades_aleatoires(nombre, graine=0):
+    generateur = random.Random(graine)
+    return [{'symbole': f"SYN{i % 4}/USDT:USDT", 'profit_net': generateur.gauss(0.5, 10), 'frais': 0.2,
+             'date_sortie': f"2024-01-{1 + i // 2000:02d} 12:00:00"} for i in range(nombre)]
+
+
+def test_identique_au_recalcul_complet_sur_la_liste_des_trades():
+    trades = trades_aleatoires(10_000)
+    metriques = MetriquesPerformance(1000)
+    for trade in trades:
+        metriques.ajouter(trade)
+
+    profits = np.array([t['profit_net'] for t in trades])
+    soldes = 1000 + np.cumsum(profits)
+    plus_hauts = np.maximum.accumulate(np.concatenate([[1000], soldes]))[1:]
+    fenetre = profits[-FENETRE_SHARPE:]
+    assert metriques.drawdown_max == pytest.approx(((plus_hauts - soldes) / plus_hauts * 100).max(), abs=1e-9)
+    assert metriques.sharpe_ratio == pytest.approx(fenetre.mean() / fenetre.std(), abs=1e-9)
+    assert metriques.taux_reussite == (profits > 0).mean() * 100
+    assert metriques.profit_total == pytest.approx(profits.sum())
+    assert metriques.meilleur_trade['profit'] == profits.max() and metriques.pire_trade['profit'] == profits.min()
+    assert metriques.nombre_trades_jour('2024-01-03') == 2000
+    assert metriques.profit_jour('2024-01-03') == pytest.approx(profits[4000:6000].sum())
+
+
+def test_series_gagnantes_et_perdantes():
+    metriques = MetriquesPerformance(100)
+    for profit in (1, 2, 3, -1, -2, 4):
+        metriques.ajouter({'symbole': 'A', 'profit_net': profit, 'date_sortie': '2024-01-01 00:00:00'})
+
+    resume = metriques.resume(110)
+    assert resume['series_gagnantes'] == {'max': 3, 'actuelle': 1}
+    assert resume['series_perdantes'] == {'max': 2, 'actuelle': 0}
+    assert resume['roi'] == pytest.approx(10.0)
+    # Sharpe publié seulement au-delà de SHARPE_TRADES_MIN trades
+    assert resume['sharpe_ratio'] == 0
+
+
+def test_reprise_depuis_l_etat_sauvegarde():
+    trades = trades_aleatoires(500)
+    metriques = MetriquesPerformance(1000)
+    for trade in trades[:300]:
+        metriques.ajouter(trade)
+
+    reprise = MetriquesPerformance.depuis_etat(metriques.etat(1000), 1000)
+    assert reprise.resume(1000) == metriques.resume(1000)
+    for trade in trades[300:]:
+        metriques.ajouter(trade)
+        reprise.ajouter(trade)
+    # Le Sharpe est recalculé exactement à des instants différents : seuls les arrondis peuvent différer
+    attendu, obtenu = metriques.resume(1000), reprise.resume(1000)
+    assert obtenu.pop('sharpe_ratio') == pytest.approx(attendu.pop('sharpe_ratio'), rel=1e-9)
+    assert obtenu == attendu
@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread
+
+import pytest
+
+from ordonnanceur import (DelaiOrdonnanceurDepasse, ExchangePlanifie, OrdonnanceurRequetes,
+                          PRIORITE_FOND, PRIORITE_PROTECTION, PRIORITE_SIGNAUX)
+
+SANS_RESERVE = {PRIORITE_PROTECTION: 0.0, PRIORITE_SIGNAUX: 0.0, PRIORITE_FOND: 0.0}
+
+
+def test_protection_servie_avant_le_fond_deja_en_attente():
+    ordonnanceur = OrdonnanceurRequetes(debit=10, capacite=1, reserves=SANS_RESERVE)
+    ordonnanceur.acquerir(1, PRIORITE_PROTECTION)
+    servies = []
+
+    def requete(niveau):
+        ordonnanceur.acquerir(1, niveau)
+        servies.append(niveau)
+
+    fond = Thread(target=requete, args=(PRIORITE_FOND,))
+    fond.start()
+    time.sleep(0.02)
+    protection = Thread(target=requete, args=(PRIORITE_PROTECTION,))
+    protection.start()
+    fond.join(2)
+    protection.join(2)
+
+    assert servies == [PRIORITE_PROTECTION, PRIORITE_FOND]
+
+
+def test_reserve_gardee_pour_les_classes_prioritaires():
+    ordonnanceur = OrdonnanceurRequetes(debit=0.001, capacite=10, reserves={PRIORITE_FOND: 0.3})
+    ordonnanceur.acquerir(7, PRIORITE_FOND)
+
+    with pytest.raises(DelaiOrdonnanceurDepasse):
+        ordonnanceur.acquerir(1, PRIORITE_FOND, delai_max=0.05)
+    ordonnanceur.acquerir(1, PRIORITE_PROTECTION, delai_max=0.05)
+
+    statistiques = ordonnanceur.statistiques()
+    assert statistiques['fond']['expirees'] == 1
+    assert statistiques['protection']['servies'] == 1
+
+
+def test_priorite_propre_au_thread_courant():
+    ordonnanceur = OrdonnanceurRequetes()
+    with ordonnanceur.priorite(PRIORITE_FOND, delai_max=1.0):
+        assert ordonnanceur.reglage_courant() == (PRIORITE_FOND, 1.0)
+        with ThreadPoolExecutor(max_workers=1) as executeur:
+            assert executeur.submit(ordonnanceur.reglage_courant).result() == (PRIORITE_SIGNAUX, None)
+    assert ordonnanceur.reglage_courant() == (PRIORITE_SIGNAUX, None)
+
+
+def test_exchange_planifie_compte_le_poids_des_requetes():
+    class Exchange:
+        nom = 'factice'
+
+        def fetch_ticker(self, symbole):
+            return {'symbol': symbole}
+
+    ordonnanceur = OrdonnanceurRequetes(debit=0.001, capacite=10, reserves=SANS_RESERVE)
+    exchange = ExchangePlanifie(Exchange(), ordonnanceur, poids={'fetch_ticker': 4})
+
+    assert exchange.fetch_ticker('A') == {'symbol': 'A'}
+    assert exchange.nom == 'factice'
+    assert ordonnanceur.statistiques()['jetons_disponibles'] == pytest.approx(6, abs=0.1)
+
+
+def test_analyse_des_signaux_en_priorite_signaux(botV0, bot_factice, monkeypatch):
+    monkeypatch.setattr(botV0, 'BATCH_INDICATORS', False)
+    bot = bot_factice()
+    ordonnanceur = OrdonnanceurRequetes()
+    bot.exchange = ExchangePlanifie(bot.exchange, ordonnanceur)
+    bot.stockage_ohlcv.exchange = bot.exchange
+    bot.ordonnanceur = ordonnanceur
+    bot.appliquer_decision = lambda symbole, decision: None
+
+    # Appelée depuis un thread d'analyse de fond, l'analyse des signaux garde sa propre priorité
+    with ordonnanceur.priorite(PRIORITE_FOND), ThreadPoolExecutor(max_workers=2) as executeur:
+        bot.executeur = executeur
+        bot.evaluer_symboles(list(bot.paires))
+
+    statistiques = ordonnanceur.statistiques()
+    assert statistiques['signaux']['servies'] >= len(bot.paires)
+    assert statistiques['fond']['servies'] == 0
@@ -0,0 +1,88 @@
+import os
+import threading
+
+import pytest
+
+from persistance import EcrivainPersistance, ecrire_atomique
+
+
+def test_lignes_regroupees_et_taches_remplacees(tmp_path):
+    chemin = str(tmp_path / 'journal.csv')
+    ecrivain = EcrivainPersistance(delai_regroupement=0.05)
+    ecrivain.demarrer()
+    executees = []
+    try:
+        for i in range(10):
+            ecrivain.ajouter_ligne(chemin, f"{i}\n", synchroniser=i == 9)
+            ecrivain.planifier('performance', lambda i=i: executees.append(i))
+        ecrivain.vider()
+    finally:
+        ecrivain.arreter()
+
+    with open(chemin, encoding='utf-8') as f:
+        assert f.read() == ''.join(f"{i}\n" for i in range(10))
+    # Seule la dernière tâche d'une même clé compte
+    assert executees[-1] == 9 and len(executees) < 10
+    assert ecrivain.statistiques['fsync'] <= ecrivain.statistiques['lots']
+
+
+def test_ecriture_immediate_sans_thread(tmp_path):
+    chemin = str(tmp_path / 'journal.csv')
+    ecrivain = EcrivainPersistance()
+    ecrivain.ajouter_ligne(chemin, "a\n")
+
+    assert open(chemin, encoding='utf-8').read() == "a\n"
+
+
+def test_remplacement_atomique(tmp_path):
+    chemin = str(tmp_path / 'etat.json')
+    ecrire_atomique(chemin, lambda f: f.write('ancien'))
+
+    def echouer(f):
+        f.write('nou')
+        raise OSError("disque plein")
+
+    with pytest.raises(OSError):
+        ecrire_atomique(chemin, echouer)
+    assert open(chemin, encoding='utf-8').read() == 'ancien'
+
+
+def test_journal_synchronise_hors_de_la_garde_du_portefeuille(bot_factice, monkeypatch):
+    bot = bot_factice()
+    bot.journal_trades.politique_fsync = 'toujours'
+    symbole = bot.paires[0]
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+
+    garde_tenue = []
+    fsync = os.fsync
+
+    def surveiller(descripteur):
+        garde_tenue.append(bot.verrou_portefeuille._profondeur > 0)
+        fsync(descripteur)
+
+    monkeypatch.setattr(os, 'fsync', surveiller)
+    bot.executer_trade(symbole, 'fermer', prix * 1.001, 20)
+
+    assert garde_tenue == [False]
+    assert [trade['symbole'] for trade in bot.journal_trades.lire()] == [symbole]
+
+
+def test_fermetures_concurrentes_toutes_journalisees(bot_factice):
+    bot = bot_factice()
+    bot.journal_trades.politique_fsync = 'toujours'
+    for symbole in bot.paires:
+        prix = bot.exchange.fetch_ticker(symbole)['last']
+        bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+
+    fils = [threading.Thread(target=bot.executer_trade,
+                             args=(symbole, 'fermer', bot.exchange.fetch_ticker(symbole)['last'], 20))
+            for symbole in bot.paires]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+
+    trades = list(bot.journal_trades.lire())
+    assert sorted(trade['symbole'] for trade in trades) == sorted(bot.paires)
+    assert bot.journal_trades.point_de_reprise() == {'trades': 2, 'octets': os.path.getsize(bot.journal_trades.chemin)}
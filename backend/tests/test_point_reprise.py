@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+import pytest
+
+import point_reprise
+
+
+def test_aller_retour_etat_et_tampons(tmp_path):
+    chemin = str(tmp_path / "etat.npz")
+    bougies = np.arange(60, dtype=np.float64).reshape(10, 6)
+    etat = {'balance': np.float64(412.5), 'positions': {'A': {'levier': np.int64(20), 'trailing_actif': True}}}
+
+    point_reprise.sauvegarder(chemin, etat, {('A', '1m'): (bougies, 1234.5)})
+    relu, tampons = point_reprise.charger(chemin)
+
+    assert relu == {'balance': 412.5, 'positions': {'A': {'levier': 20, 'trailing_actif': True}},
+                    'version': point_reprise.VERSION}
+    np.testing.assert_array_equal(tampons[('A', '1m')][0], bougies)
+    assert tampons[('A', '1m')][1] == 1234.5
+    assert not (tmp_path / "etat.npz.tmp").exists()
+
+
+def test_version_inconnue_refusee(tmp_path, monkeypatch):
+    chemin = str(tmp_path / "etat.npz")
+    monkeypatch.setattr(point_reprise, 'VERSION', 0)
+    point_reprise.sauvegarder(chemin, {}, {})
+    monkeypatch.undo()
+
+    with pytest.raises(ValueError):
+        point_reprise.charger(chemin)
+
+
+def test_reprise_a_chaud_restaure_positions_et_rejoue_les_fermetures(bot_factice):
+    bot = bot_factice()
+    for symbole in bot.paires:
+        bot.recuperer_ohlcv(symbole, '1m', 100)
+        bot.executer_trade(symbole, 'acheter', bot.exchange.fetch_ticker(symbole)['last'], 20, 0.01, 0.02)
+    bot.positions[bot.paires[1]]['profit_partiel_pris'] = True
+    bot._ecrire_point_de_reprise(bot._etat_point_de_reprise())
+
+    # Fermeture écrite dans le journal après le point de reprise
+    fermee, gardee = bot.paires
+    bot.executer_trade(fermee, 'fermer', bot.exchange.fetch_ticker(fermee)['last'] * 1.001, 20)
+
+    reprise = bot_factice(reprise=True)
+    reprise.reconciliation.join()
+
+    assert list(reprise.positions) == [gardee]
+    assert reprise.balance == pytest.approx(bot.balance)
+    assert reprise.frais_cumules == pytest.approx(bot.frais_cumules)
+    assert dict(reprise.positions[gardee]) == dict(bot.positions[gardee])
+    np.testing.assert_array_equal(reprise.stockage_ohlcv.tampon(gardee, '1m').copie(),
+                                  bot.stockage_ohlcv.tampon(gardee, '1m').copie())
+
+
+def test_point_de_reprise_copie_hors_des_verrous_du_bot(bot_factice):
+    bot = bot_factice()
+    tenu, autre = bot.paires
+    prix = bot.exchange.fetch_ticker(tenu)['last']
+    bot.executer_trade(tenu, 'acheter', prix, 20, 0.01, 0.02)
+    bot.persistance.demarrer()
+    verrou_tenu, ouverture_terminee = threading.Event(), threading.Event()
+
+    def gerer_position_tenue():
+        # Comme verifier_stop_loss_take_profit : verrou du symbole, puis la garde en publiant la position
+        with bot.verrous_symboles.verrou(tenu):
+            verrou_tenu.set()
+            ouverture_terminee.wait(2)
+            bot._publier_position(tenu)
+
+    def ouvrir_autre():
+        verrou_tenu.wait(2)
+        bot.executer_trade(autre, 'acheter', bot.exchange.fetch_ticker(autre)['last'], 20, 0.01, 0.02)
+        ouverture_terminee.set()
+
+    fils = [threading.Thread(target=gerer_position_tenue, daemon=True), threading.Thread(target=ouvrir_autre, daemon=True)]
+    try:
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join(5)
+        assert not any(fil.is_alive() for fil in fils)
+        assert ouverture_terminee.is_set()
+
+        bot.persistance.vider()
+        etat, _ = point_reprise.charger(bot.fichier_reprise)
+        assert sorted(etat['positions']) == sorted([tenu, autre])
+        assert not bot.point_de_reprise_en_attente
+    finally:
+        bot.persistance.arreter()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from reechantillonnage import Reechantillonneur, agreger
+from tampon_ohlcv import COLONNES_OHLCV, StockageOHLCV, duree_timeframe
+
+
+def bougies_1m(nombre, graine=0):
+    generateur = np.random.default_rng(graine)
+    cloture = 100 * np.exp(np.cumsum(generateur.normal(0, 0.002, nombre)))
+    ouverture = np.concatenate(([cloture[0]], cloture[:-1]))
+    bougies = np.empty((nombre, 6))
+    bougies[:, 0] = np.arange(nombre) * 60_000
+    bougies[:, 1] = ouverture
+    bougies[:, 2] = np.maximum(ouverture, cloture) * 1.001
+    bougies[:, 3] = np.minimum(ouverture, cloture) * 0.999
+    bougies[:, 4] = cloture
+    bougies[:, 5] = generateur.lognormal(3, 0.5, nombre)
+    return bougies
+
+
+def agreger_pandas(bougies, duree):
+    df = pd.DataFrame(bougies, columns=COLONNES_OHLCV)
+    df.index = pd.to_datetime(df['timestamp'].astype(np.int64), unit='ms')
+    regles = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    agregees = df.resample(f"{duree // 60_000}min").agg(regles).dropna()
+    agregees.insert(0, 'timestamp', (agregees.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+    return agregees.to_numpy()
+
+
+class ExchangeHistorique:
+    """Sert les bougies 1m et leurs agrégats jusqu'à l'instant de l'horloge, en comptant les requêtes"""
+
+    def __init__(self, bougies, horloge):
+        self.bougies = bougies
+        self.horloge = horloge
+        self.requetes = []
+
+    def fetch_ohlcv(self, symbole, timeframe, since=None, limit=None):
+        self.requetes.append(timeframe)
+        bougies = self.bougies[self.bougies[:, 0] <= self.horloge() * 1000]
+        if timeframe != '1m':
+            bougies = agreger(bougies, duree_timeframe(timeframe))
+        if since is not None:
+            return bougies[bougies[:, 0] >= since][:limit].tolist()
+        return bougies[-limit:].tolist()
+
+
+def test_agreger_identique_au_resample_pandas():
+    bougies = bougies_1m(500)
+    for timeframe in ('5m', '15m', '1h'):
+        np.testing.assert_allclose(agreger(bougies, duree_timeframe(timeframe)),
+                                   agreger_pandas(bougies, duree_timeframe(timeframe)))
+
+
+def test_bougies_agregees_localement_apres_le_demarrage():
+    historique = bougies_1m(3000)
+    instant = [2000 * 60]
+    exchange = ExchangeHistorique(historique, lambda: instant[0])
+    reechantillonneur = Reechantillonneur(StockageOHLCV(exchange, horloge=lambda: instant[0]), age_max_1m=0)
+    reechantillonneur.recuperer('SYN', '5m', 50)
+    assert exchange.requetes.count('5m') == 1
+
+    for _ in range(40):
+        instant[0] += 60
+        df = reechantillonneur.recuperer('SYN', '5m', 50)
+
+    # Plus aucune requête 5m : la bougie en formation et les nouvelles viennent du tampon 1m
+    assert exchange.requetes.count('5m') == 1
+    assert reechantillonneur.statistiques['mises_a_jour_locales'] == 40
+    attendu = agreger(historique[historique[:, 0] <= instant[0] * 1000], duree_timeframe('5m'))[-50:]
+    np.testing.assert_allclose(df[COLONNES_OHLCV[1:]].to_numpy(), attendu[:, 1:])
+    assert df['timestamp'].iloc[-1] == pd.Timestamp(int(attendu[-1, 0]), unit='ms')
+
+
+def test_rattrapage_quand_le_tampon_1m_ne_couvre_plus_la_derniere_bougie():
+    historique = bougies_1m(3000)
+    instant = [2000 * 60]
+    exchange = ExchangeHistorique(historique, lambda: instant[0])
+    reechantillonneur = Reechantillonneur(StockageOHLCV(exchange, horloge=lambda: instant[0]), age_max_1m=0)
+    reechantillonneur.recuperer('SYN', '1h', 20)
+
+    # Absence plus longue que la fenêtre 1m : la dernière heure n'est plus couverte
+    instant[0] += 300 * 60
+    df = reechantillonneur.recuperer('SYN', '1h', 20)
+
+    assert reechantillonneur.statistiques['rattrapages'] == 2
+    attendu = agreger(historique[historique[:, 0] <= instant[0] * 1000], duree_timeframe('1h'))[-20:]
+    np.testing.assert_allclose(df[COLONNES_OHLCV[1:]].to_numpy(), attendu[:, 1:])
@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+import pytest
+
+from stockage_trades import StockageTrades
+
+SYMBOLES = ['A', 'B', 'C']
+
+
+@pytest.fixture
+def stockage(tmp_path):
+    stockage = StockageTrades(str(tmp_path / 'trades.sqlite'), delai_regroupement=0.01)
+    yield stockage
+    stockage.fermer()
+
+
+def fermetures(nombre, graine=0):
+    generateur = random.Random(graine)
+    return [{'horodatage': f"2024-01-{1 + i // 48:02d} {(i % 48) // 2:02d}:{30 * (i % 2):02d}:00",
+             'type': 'fermeture', 'symbole': generateur.choice(SYMBOLES), 'direction': 'long',
+             'profit_net': generateur.gauss(0.1, 5), 'frais': 0.1, 'raison': generateur.choice(['SL', 'TP', 'TS'])}
+            for i in range(nombre)]
+
+
+def test_cumuls_identiques_aux_agregats_des_evenements(stockage):
+    evenements = fermetures(500)
+    stockage.demarrer()
+    for evenement in evenements:
+        stockage.enregistrer(evenement)
+    stockage.enregistrer({'horodatage': '2024-01-02 00:00:00', 'type': 'ouverture', 'symbole': 'A'})
+    stockage.vider()
+
+    # Jours entiers : table des cumuls ; à l'heure près : agrégats sur les événements
+    for debut, fin in (('2024-01-02', '2024-01-05'), ('2024-01-02 00:00:00', '2024-01-05 00:00:00')):
+        pnl = {ligne['symbole']: ligne for ligne in stockage.pnl_par_symbole(debut, fin)}
+        for symbole in SYMBOLES:
+            retenus = [e for e in evenements if e['symbole'] == symbole and debut[:10] <= e['horodatage'] < fin]
+            assert pnl[symbole]['trades'] == len(retenus)
+            assert pnl[symbole]['gagnants'] == sum(e['profit_net'] > 0 for e in retenus)
+            assert pnl[symbole]['profit_net'] == pytest.approx(sum(e['profit_net'] for e in retenus))
+
+    quotidiens = stockage.cumuls_quotidiens(symbole='B')
+    assert [ligne['jour'] for ligne in quotidiens] == sorted({e['horodatage'][:10] for e in evenements
+                                                             if e['symbole'] == 'B'})
+
+
+def test_historique_filtre_et_pagine(stockage):
+    evenements = fermetures(100)
+    for evenement in evenements:
+        stockage.enregistrer(dict(evenement, profit_brut=np.float64(1.5)))
+
+    tp = [e for e in evenements if e['raison'] == 'TP' and e['symbole'] == 'A']
+    page = stockage.historique(symbole='A', raison='TP', limite=3)
+    suite = stockage.historique(symbole='A', raison='TP', limite=100, avant=page[-1]['id'])
+
+    assert len(page) + len(suite) == len(tp)
+    assert page[0]['horodatage'] == max(e['horodatage'] for e in tp)
+    # Champs hors colonnes conservés dans les détails (scalaires NumPy compris)
+    assert page[0]['profit_brut'] == 1.5
+    assert stockage.historique(type='ouverture') == []
+
+
+def test_evenements_du_bot_enregistres(bot_factice):
+    bot = bot_factice()
+    symbole = bot.paires[0]
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+    bot.executer_trade(symbole, 'fermer', prix * 1.001, 20)
+
+    fermeture, = bot.stockage_trades.historique(symbole=symbole)
+    assert fermeture['direction'] == 'long' and fermeture['prix_entree'] == prix
+    assert fermeture['profit_net'] == pytest.approx(bot.metriques.profit_total)
+    assert len(bot.stockage_trades.historique(type='ouverture', symbole=symbole)) == 1
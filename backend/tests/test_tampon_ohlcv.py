@@ -0,0 +1,73 @@
+import numpy as np
+
+from tampon_ohlcv import StockageOHLCV, TamponOHLCV
+
+
+def bougie(minute, close):
+    return [minute * 60_000, close, close + 1, close - 1, close, 10.0]
+
+
+class ExchangeMemoire:
+    """Sert les bougies d'une liste, comme fetch_ohlcv"""
+
+    def __init__(self, bougies, horloge=None):
+        self.bougies = bougies
+        self.horloge = horloge
+
+    def fetch_ohlcv(self, symbole, timeframe, since=None, limit=None):
+        bougies = [b for b in self.bougies if since is None or b[0] >= since]
+        if self.horloge is not None:
+            bougies = [b for b in bougies if b[0] <= self.horloge() * 1000]
+        return bougies[:limit] if since is not None else bougies[-limit:]
+
+
+def test_tampon_circulaire_garde_les_dernieres_bougies_dans_l_ordre():
+    tampon = TamponOHLCV(capacite=5)
+    tampon.ajouter([bougie(m, 100 + m) for m in range(8)])
+
+    assert len(tampon) == 5
+    assert tampon.dernier_timestamp() == 7 * 60_000
+    np.testing.assert_array_equal(tampon.vue()[:, 4], [103, 104, 105, 106, 107])
+    np.testing.assert_array_equal(tampon.vue(2)[:, 0], [6 * 60_000, 7 * 60_000])
+
+
+def test_bougie_en_formation_reecrite_en_place_et_anciennes_ignorees():
+    tampon = TamponOHLCV(capacite=5)
+    tampon.ajouter([bougie(m, 100 + m) for m in range(3)])
+
+    nouvelles = tampon.ajouter([bougie(1, 0), bougie(2, 150), bougie(3, 103)])
+
+    assert nouvelles == 1
+    np.testing.assert_array_equal(tampon.vue()[:, 4], [100, 101, 150, 103])
+
+
+def test_cadre_recupere_independant_des_ecritures_suivantes():
+    bougies = [bougie(m, 100 + m) for m in range(5)]
+    stockage = StockageOHLCV(ExchangeMemoire(bougies), capacite=5, horloge=lambda: 5 * 60)
+    cadre = stockage.recuperer('SYN', '1m', 3)
+    attendu = cadre.copy()
+
+    # Réécriture de la bougie en formation, puis ajouts jusqu'à faire le tour du tampon
+    tampon = stockage.tampon('SYN', '1m')
+    with tampon.verrou:
+        tampon.ajouter([bougie(4, 999)])
+        tampon.ajouter([bougie(m, 100 + m) for m in range(5, 30)])
+
+    assert cadre.equals(attendu)
+    assert list(cadre['close']) == [102, 103, 104]
+
+
+def test_rechargement_complet_apres_longue_absence_sans_trou():
+    instant = [300 * 60]
+    bougies = [bougie(m, 100 + m) for m in range(600)]
+    stockage = StockageOHLCV(ExchangeMemoire(bougies, lambda: instant[0]), capacite=500, horloge=lambda: instant[0])
+    stockage.rafraichir('SYN', '1m', 300)
+
+    # 200 minutes hors ligne : l'écart dépasse la fenêtre demandée, rechargement complet
+    instant[0] += 200 * 60
+    tampon = stockage.rafraichir('SYN', '1m', 100)
+
+    horodatages = tampon.copie(300)[:, 0]
+    assert len(horodatages) == 100
+    assert horodatages[-1] == 500 * 60_000
+    assert set(np.diff(horodatages)) == {60_000}
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from verrous import VerrouMesure, VerrousSymboles
+
+
+def test_detention_mesuree_une_fois_par_acquisition_externe():
+    verrou = VerrouMesure('garde', reentrant=True)
+    with verrou:
+        with verrou:
+            time.sleep(0.01)
+
+    statistiques = verrou.statistiques()
+    assert statistiques['acquisitions'] == 1
+    assert statistiques['detention_max_ms'] >= 10
+
+
+def test_attente_mesuree():
+    verrou = VerrouMesure()
+    verrou.acquire()
+    fil = threading.Thread(target=lambda: (verrou.acquire(), verrou.release()))
+    fil.start()
+    time.sleep(0.02)
+    verrou.release()
+    fil.join()
+
+    assert verrou.statistiques()['attente_max_ms'] >= 15
+
+
+def test_un_verrou_par_symbole():
+    verrous = VerrousSymboles()
+    assert verrous.verrou('A') is verrous.verrou('A')
+    assert verrous.verrou('A') is not verrous.verrou('B')
+    assert verrous.statistiques()['symboles'] == 2
+
+
+def test_symbole_verrouille_ne_bloque_pas_les_autres(bot_factice):
+    bot = bot_factice()
+    occupe, libre = bot.paires
+    tenu, relacher = threading.Event(), threading.Event()
+
+    def tenir():
+        with bot.verrous_symboles.verrou(occupe):
+            tenu.set()
+            relacher.wait(5)
+
+    fil = threading.Thread(target=tenir)
+    fil.start()
+    tenu.wait(5)
+    try:
+        prix = bot.exchange.fetch_ticker(libre)['last']
+        bot.executer_trade(libre, 'acheter', prix, 20, 0.01, 0.02)
+        assert libre in bot.positions
+    finally:
+        relacher.set()
+        fil.join()
+
+
+def test_instantane_publie_immuable(bot_factice):
+    bot = bot_factice()
+    symbole = bot.paires[0]
+    avant = bot.instantane
+    prix = bot.exchange.fetch_ticker(symbole)['last']
+    bot.executer_trade(symbole, 'acheter', prix, 20, 0.01, 0.02)
+
+    ouvert = bot.instantane
+    assert symbole not in avant.positions
+    assert ouvert.positions[symbole]['prix_entree'] == prix
+    assert ouvert.balance == bot.balance < avant.balance
+    with pytest.raises(TypeError):
+        ouvert.positions[symbole]['prix_entree'] = 0.0
+
+    bot.executer_trade(symbole, 'fermer', prix, 20)
+    assert symbole in ouvert.positions
+    assert symbole not in bot.instantane.positions
@@ -0,0 +1,110 @@
+"""
+Verrous mesurés et instantanés du portefeuille
+----------------------------------------------
+``VerrouMesure`` remplace un ``threading.Lock`` (ou ``RLock``) et relève, pour
+chaque section critique, le temps passé à attendre le verrou et le temps
+passé à le détenir. Les durées de détention des dernières acquisitions
+donnent la moyenne, le p99 et le maximum exposés par ``statistiques``.
+
+Modèle de concurrence du bot :
+- un verrou réentrant par symbole (``VerrousSymboles``) pour toute
+  modification d'une position ; les symboles différents avancent en
+  parallèle ;
+- une garde du portefeuille, prise brièvement et toujours après le verrou
+  du symbole, pour le solde, le nombre de positions et l'historique ;
+- les lecteurs (interface web) ne prennent aucun verrou : ils lisent le
+  dernier ``InstantanePortefeuille`` publié, immuable, remplacé d'un bloc
+  à chaque changement.
+"""
+
+import time
+from collections import deque, namedtuple
+from threading import Lock, RLock
+
+# Positions figées (symbole -> position en lecture seule), solde et instant de publication
+InstantanePortefeuille = namedtuple('InstantanePortefeuille', ['positions', 'balance', 'horodatage'])
+
+class VerrouMesure:
+    """Verrou qui mesure l'attente et la détention (s'utilise avec ``with``).
+
+    Réentrant (``reentrant=True``), seule la détention la plus externe est mesurée.
+    """
+
+    def __init__(self, nom='verrou', historique=1000, reentrant=False):
+        self.nom = nom
+        self._verrou = RLock() if reentrant else Lock()
+        self._profondeur = 0
+        self._acquis_a = 0.0
+        self._detentions = deque(maxlen=historique)
+        self._acquisitions = 0
+        self._attente_totale = 0.0
+        self._attente_max = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        debut = time.perf_counter()
+        acquis = self._verrou.acquire(blocking, timeout)
+        if acquis:
+            # Ces compteurs ne sont modifiés que par le détenteur du verrou
+            self._profondeur += 1
+            if self._profondeur > 1:
+                return acquis
+            self._acquis_a = time.perf_counter()
+            attente = self._acquis_a - debut
+            self._acquisitions += 1
+            self._attente_totale += attente
+            self._attente_max = max(self._attente_max, attente)
+        return acquis
+
+    def release(self):
+        self._profondeur -= 1
+        if self._profondeur == 0:
+            self._detentions.append(time.perf_counter() - self._acquis_a)
+        self._verrou.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def statistiques(self):
+        """Attente et détention (ms) : moyennes, p99 et maximum des dernières détentions"""
+        detentions = sorted(self._detentions)
+        if not detentions:
+            return {'acquisitions': self._acquisitions, 'attente_moyenne_ms': 0, 'attente_max_ms': 0,
+                    'detention_moyenne_ms': 0, 'detention_p99_ms': 0, 'detention_max_ms': 0}
+        return {
+            'acquisitions': self._acquisitions,
+            'attente_moyenne_ms': self._attente_totale / self._acquisitions * 1000,
+            'attente_max_ms': self._attente_max * 1000,
+            'detention_moyenne_ms': sum(detentions) / len(detentions) * 1000,
+            'detention_p99_ms': detentions[min(len(detentions) - 1, int(len(detentions) * 0.99))] * 1000,
+            'detention_max_ms': detentions[-1] * 1000,
+        }
+
+
+class VerrousSymboles:
+    """Un VerrouMesure réentrant par symbole, créé à la première demande"""
+
+    def __init__(self):
+        self._verrous = {}
+        self._creation = Lock()
+
+    def verrou(self, symbole):
+        verrou = self._verrous.get(symbole)
+        if verrou is None:
+            with self._creation:
+                verrou = self._verrous.setdefault(symbole, VerrouMesure(symbole, reentrant=True))
+        return verrou
+
+    def statistiques(self):
+        """Pires attente et détention (ms) parmi les verrous des symboles"""
+        statistiques = [verrou.statistiques() for verrou in list(self._verrous.values())]
+        return {
+            'symboles': len(statistiques),
+            'acquisitions': sum(s['acquisitions'] for s in statistiques),
+            'attente_max_ms': max((s['attente_max_ms'] for s in statistiques), default=0),
+            'detention_p99_ms': max((s['detention_p99_ms'] for s in statistiques), default=0),
+            'detention_max_ms': max((s['detention_max_ms'] for s in statistiques), default=0),
+        }